@@ -0,0 +1,166 @@
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+
+# Design-space exploration engine.
+#
+# A design space is a set of design points, given either as a grid of parameter vectors,
+# or as a sampler that draws the parameters of a number of points. The points are cut into
+# shards of contiguous sample indices, and each shard is evaluated by a vectorized evaluate
+# function in a pool of worker processes. Read-only context, such as the energy tables,
+# is created once per worker by a context factory. Loading the tables from a compiled
+# snapshot memory maps them, so all workers share the same pages.
+#
+# Results are written into one preallocated vector per output column at the offset of their
+# shard, so assembling N samples is linear in N, independent of the order shards complete in.
+
+# read-only context of the worker process, set by _initialize_worker
+_worker_context = None
+
+
+def parameter_grid(**axes) -> dict:
+    """
+    Cartesian product of parameter axes, flattened into one vector per parameter.
+
+    Args:
+        **axes: parameter name -> sequence of values along that axis
+
+    Returns:
+        dict of parameter name -> vector with one entry per design point
+    """
+    vectors = [np.asarray(values) for values in axes.values()]
+    grid = np.meshgrid(*vectors, indexing='ij')
+    return {name: np.ravel(values) for name, values in zip(axes.keys(), grid)}
+
+
+def snapshot_database(database_class, snapshot: str, data_source: str = None):
+    """
+    Context factory that loads an energy database from a compiled snapshot.
+
+    Args:
+        database_class: energy database class, such as, StoredProgramMachineEnergyDatabase
+        snapshot (str): path to the snapshot, see energysim.database.energy_store.compile_snapshot
+        data_source (str): CSV the snapshot was compiled from, a worker rejects the snapshot if it is stale
+
+    Returns:
+        energy database backed by a read-only memory map of the snapshot
+    """
+    db = database_class()
+    db.load_snapshot(snapshot, data_source)
+    return db
+
+
+def _initialize_worker(context_factory: Callable, context_args: tuple):
+    global _worker_context
+    _worker_context = context_factory(*context_args) if context_factory is not None else None
+
+
+def _evaluate_shard(evaluate: Callable, start: int, stop: int, parameters: dict,
+                    sampler: Callable, seed: np.random.SeedSequence, context=None) -> tuple[int, int, dict]:
+    if context is None:
+        context = _worker_context
+    rng = np.random.default_rng(seed)
+    if sampler is not None:
+        parameters = sampler(stop - start, rng)
+    return start, stop, evaluate(parameters, rng, context)
+
+
+def _shards(nr_samples: int, shard_size: int, parameters: dict, seed) -> list:
+    # every shard owns an independent random stream, spawned from the seed of the exploration
+    nr_shards = math.ceil(nr_samples / shard_size)
+    seeds = np.random.SeedSequence(seed).spawn(nr_shards)
+    shards = []
+    for shard, start in enumerate(range(0, nr_samples, shard_size)):
+        stop = min(start + shard_size, nr_samples)
+        shard_parameters = None
+        if parameters is not None:
+            shard_parameters = {name: values[start:stop] for name, values in parameters.items()}
+        shards.append((start, stop, shard_parameters, seeds[shard]))
+    return shards
+
+
+def _store(buffers: dict, nr_samples: int, start: int, stop: int, columns: dict):
+    # the first shard to complete defines the columns, a later shard with a wider type
+    # promotes its column, so an integer first shard does not truncate the floats of the others
+    if not buffers:
+        for name, values in columns.items():
+            buffers[name] = np.empty(nr_samples, dtype=np.asarray(values).dtype)
+    for name, buffer in buffers.items():
+        values = np.asarray(columns[name])
+        if values.shape != (stop - start,):
+            raise ValueError(f'Column {name} of samples [{start}, {stop}) has shape {values.shape}, '
+                             f'expected ({stop - start},)')
+        dtype = np.result_type(buffer.dtype, values.dtype)
+        if dtype != buffer.dtype:
+            buffer = buffers[name] = buffer.astype(dtype)
+        buffer[start:stop] = values
+
+
+def explore(evaluate: Callable,
+            parameters: dict = None,
+            sampler: Callable = None,
+            nr_samples: int = None,
+            context_factory: Callable = None,
+            context_args: tuple = (),
+            max_workers: int = None,
+            shard_size: int = None,
+            seed: int = None) -> pd.DataFrame:
+    """
+    Evaluate a design space, in parallel across a pool of worker processes.
+
+    The design points are either given as parameter vectors, for example, by parameter_grid,
+    or drawn by sampler(n, rng) -> dict of parameter vectors, nr_samples points in total.
+    evaluate(parameters, rng, context) -> dict of result vectors is called once per shard,
+    and must be a module-level function so that it can be sent to the workers.
+
+    Shards are seeded from seed, so, for a given shard_size, results do not depend
+    on the number of workers.
+
+    Args:
+        evaluate (Callable): vectorized model of a shard of design points
+        parameters (dict): parameter name -> vector of values, one per design point
+        sampler (Callable): draws the parameters of a shard, used if parameters is None
+        nr_samples (int): number of design points to draw with the sampler
+        context_factory (Callable): creates the read-only context of a worker, such as, snapshot_database
+        context_args (tuple): arguments of the context factory
+        max_workers (int): number of worker processes, os.cpu_count() if None, evaluate in-process if 0
+        shard_size (int): number of design points per shard, defaults to about four shards per worker
+        seed (int): seed of the random streams of the shards
+
+    Returns:
+        DataFrame with one row per design point, and one column per result of evaluate
+    """
+    if parameters is not None:
+        lengths = {len(values) for values in parameters.values()}
+        if len(lengths) != 1:
+            raise ValueError(f'Parameter vectors must have the same length, got lengths {sorted(lengths)}')
+        nr_samples = lengths.pop()
+    elif sampler is None or nr_samples is None:
+        raise ValueError('Either parameters, or a sampler and nr_samples, are required')
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    if shard_size is None:
+        shard_size = max(1, math.ceil(nr_samples / (4 * max(1, max_workers))))
+
+    buffers = {}
+    shards = _shards(nr_samples, shard_size, parameters, seed)
+    if max_workers == 0:
+        context = context_factory(*context_args) if context_factory is not None else None
+        for start, stop, shard_parameters, shard_seed in shards:
+            _store(buffers, nr_samples, *_evaluate_shard(evaluate, start, stop, shard_parameters,
+                                                         sampler, shard_seed, context))
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_initialize_worker,
+                                 initargs=(context_factory, context_args)) as executor:
+            futures = [executor.submit(_evaluate_shard, evaluate, start, stop, shard_parameters, sampler, shard_seed)
+                       for start, stop, shard_parameters, shard_seed in shards]
+            for future in as_completed(futures):
+                _store(buffers, nr_samples, *future.result())
+
+    return pd.DataFrame(buffers, copy=False)
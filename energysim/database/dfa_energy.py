@@ -1,10 +1,11 @@
-import pandas as pd
+from energysim.database.energy_store import EnergyDatabase
+
 
 class DomainFlowArchitectureEnergy:
     def __init__(self, identifier: str):
         self.identifier = identifier
 
-        self.cam_cycle_time_ns: float
+        self.cam_cycle_time_ns: float = 0  # the iStore is a CAM that matches data tokens to instructions
 
         self.istore: float = 0
         self.istore_dispatch: float = 0   # egress flow
@@ -16,6 +17,7 @@ class DomainFlowArchitectureEnergy:
         self.fma: float = 0
         self.fdiv: float = 0
 
+        # data tokens move between neighboring processing elements through pipeline registers
         self.data_token: float = 0
         self.pipe_read: float = 0
         self.pipe_write: float = 0
@@ -57,14 +59,13 @@ class DomainFlowArchitectureEnergy:
 
         Energy Metrics (pJ):
         - Compute
-        - Wavefront:    {self.wavefront}
-        -  instruction:  {self.instruction}
         - iStore:       {self.istore}
         -  dispatch:    {self.istore_dispatch}
         -  token write: {self.istore_operand_write}
-        - Operand:      {self.reg_read + self.reg_write}
-        -  Reg read:     {self.reg_read}
-        -  Reg write:    {self.reg_write}
+        -  CAM cycle:   {self.cam_cycle_time_ns} nsec
+        - Data token:   {self.data_token}
+        -  pipe read:   {self.pipe_read}
+        -  pipe write:  {self.pipe_write}
         - Execute:      {self.execute}
         -  add:          {self.add}
         -  mul:          {self.mul}
@@ -72,81 +73,75 @@ class DomainFlowArchitectureEnergy:
         -  fdiv:         {self.fdiv}
 
         - Data Movement
+        -  str read:    {self.str_read}
+        -  str write:   {self.str_write}
         -  L1 read:     {self.l1_read}
         -  L1 write:    {self.l1_write}
         -  smem read:   {self.smem_read}
         -  smem write:  {self.smem_write}
+        -  dma read:    {self.dma_read}
+        -  dma write:   {self.dma_write}
         -  gmem read:   {self.gmem_read}
         -  gmem write:  {self.gmem_write}
         """
 
 # database of energy per event for a Domain Flow Architecture computational engine
-class DomainFlowArchitectureEnergyDatabase:
+class DomainFlowArchitectureEnergyDatabase(EnergyDatabase):
     def __init__(self):
-        self.data = None
-        self.data_source = None
-
-    def load_data(self, data_source: str) -> pd.DataFrame:
-        """
-        Load data from the specified source.
-
-        :return: Loaded DataFrame
-        """
-        self.data = pd.read_csv(data_source, skipinitialspace=True)
-        if self.data is None:
-            raise FileNotFoundError
-
-        self.data_source = data_source
-        return pd.DataFrame(self.data)
+        super().__init__()
 
     # lookupEnergySet takes an ASIC manufacturing node name, such as, 'n14s' for 14nm slow
-    # and return a set of energy values for different GPU events,
-    # such as, l1 cache read, shared memory access, or a 32b floating-point multiplication.
-    # Different operator models will use this configuration to calculate
-    # energy consumption and performance of the operator when executing
-    # on a SPM architecture
+    # and return a set of energy values for different DFA events,
+    # such as, an instruction token dispatch from the iStore, a pipeline register write,
+    # or a DMA burst from global memory. Different operator models will use this configuration
+    # to calculate energy consumption and performance of the operator when executing
+    # on a DFA architecture
     def lookupEnergySet(self, node: str) -> DomainFlowArchitectureEnergy:
-        if self.data is None:
-            raise ValueError(f'Energy Database not loaded: did you for get to call load_data(csv-file-with-energy-event-data')
-
-        # query the database
-        df = self.data.copy()  # do we need to copy it? are all the operators on the db read-only?
-        # print(df)
-        # print(df.index)
-        # print(df.columns)
-        process_node = df.loc[df['node'] == node]
-        if process_node is None:
-            raise ValueError(f'Process {process_node} not supported')
+        self.check_loaded()
+
+        process_node = self.store.row(node)
 
         # create the set, initialize with the node string
         dfa_energies = DomainFlowArchitectureEnergy(node)
+        dfa_energies.cam_cycle_time_ns = process_node['cam_cycle_time']
 
         # all energy metrics are in pJ
 
-        istore_dispatch = process_node['itoken'].values[0]   # instruction token is an eviction from the iStore
-        istore_data_token = process_node['dtoken'].values[0] # data token is an operand write into the iStore
+        istore_dispatch = process_node['itoken']   # instruction token is an eviction from the iStore
+        istore_data_token = process_node['dtoken'] # data token is an operand write into the iStore
         dfa_energies.istore_dispatch = istore_dispatch   # egress flow
         dfa_energies.istore_operand_write = istore_data_token # data token ingress flow
-
-        self.execute: float = 0
-        dfa_energies.add = process_node['add'].values[0]
-        dfa_energies.mul = process_node['mul'].values[0]
-        dfa_energies.fma = process_node['fma'].values[0]
-        dfa_energies.fdiv = process_node['fdiv'].values[0]
-
-        # we should only be writing: write into the pipeline register
-        # that triggers the data token processing
-        dfa_energies.pipe_write = process_node['pipewr'].values[0]
-
+        dfa_energies.istore = istore_dispatch + istore_data_token
+
+        dfa_energies.add = process_node['add']
+        dfa_energies.mul = process_node['mul']
+        dfa_energies.fma = process_node['fma']
+        dfa_energies.fdiv = process_node['fdiv']
+        dfa_energies.execute = dfa_energies.fma  # approximate until we have instruction profiles
+
+        # a data token is written into the pipeline register of the neighbor,
+        # and read by it to trigger the data token processing
+        dfa_energies.pipe_read = process_node['piperd']
+        dfa_energies.pipe_write = process_node['pipewr']
+        dfa_energies.data_token = dfa_energies.pipe_read + dfa_energies.pipe_write
+
+        # the stream controller reads the L1 into the edges of the fabric, and writes the results back
+        dfa_energies.str_read = process_node['str_read']
+        dfa_energies.str_write = process_node['str_write']
+        dfa_energies.smem_streamer = dfa_energies.str_read + dfa_energies.str_write
         # L1 holds the data that will get streamed into the fabric
-        dfa_energies.l1_read = process_node['l1_read'].values[0]
-        dfa_energies.l1_write = process_node['l1_write'].values[0]
+        dfa_energies.l1_read = process_node['l1_read']
+        dfa_energies.l1_write = process_node['l1_write']
         # SMEM - shared memory accesses
-        dfa_energies.smem_read = process_node['smem_read'].values[0]
-        dfa_energies.smem_write = process_node['smem_write'].values[0]
+        dfa_energies.smem_read = process_node['smem_read']
+        dfa_energies.smem_write = process_node['smem_write']
+        # DMA engines move memory bursts between global memory and the shared memory
+        dfa_energies.dma_read = process_node['dma_read']
+        dfa_energies.dma_write = process_node['dma_write']
+        dfa_energies.dma = dfa_energies.dma_read + dfa_energies.dma_write
         # GMEM - global memory accesses
-        dfa_energies.gmem_read = process_node['gmem_read'].values[0]
-        dfa_energies.gmem_write = process_node['gmem_write'].values[0]
+        dfa_energies.gmem_read = process_node['gmem_read']
+        dfa_energies.gmem_write = process_node['gmem_write']
 
         return dfa_energies
 
@@ -1,13 +1,146 @@
+from energysim.database.energy_store import EnergyDatabase
 
 
+# Characteristic event energies of a Data Flow Machine:
+# a tagged-token machine in which instructions fire when all their operand tokens
+# have been matched in a content addressable memory, the waiting-matching store
 class DataFlowMachineEnergy:
     def __init__(self, name: str):
         self.name = name
 
-        self.cam_cycle_time_ns = 1
+        # cycle time of the CAM of the waiting-matching store
+        self.cam_cycle_time_ns: float = 1
+        # cache line size the cache line and memory event energies are expressed in
+        self.cache_line_size: int = 0
 
+        # all energy metrics in pJ
+        # token matching: every token that arrives looks up its partners in the CAM,
+        # waiting tokens are written into the matching store, and read when the instruction fires
+        self.token_match: float = 0
+        self.token_read: float = 0
+        self.token_write: float = 0
+        self.matching: float = 0
 
+        # an enabled instruction is fetched from the instruction store and decoded
+        self.instruction: float = 0
+        self.fetch: float = 0
+        self.decode: float = 0
 
+        self.execute: float = 0   # execute is a consolidated energy of an average ALU operation
+        # specific ALU operations
+        self.add32b: float = 0
+        self.mul32b: float = 0
+        self.fadd32b: float = 0
+        self.fmul32b: float = 0
+        self.fma32b: float = 0
+        self.fdiv32b: float = 0
+
+        # cache event energies
+        self.l1_read: float = 0   # per average word size
+        self.l1_write: float = 0  # cacheline
+        self.l2_read: float = 0   # cacheline
+        self.l2_write: float = 0  # cacheline
+        self.l3_read: float = 0   # cacheline
+        self.l3_write: float = 0  # cacheline
+        self.mem_read: float = 0  # cacheline
+        self.mem_write: float = 0 # cacheline
+
+        # consolidated energies
+        self.total: float = 0
+        self.compute: float = 0
+        self.data_movement: float = 0
+
+    def __repr__(self):
+        return f"DataFlowMachineEnergy(name='{self.name}', ...)"
+
+    def __str__(self):
+        return f"""
+        Node: {self.name}
+
+        Energy Metrics (pJ):
+        - Compute
+        - Matching:    {self.matching}
+        -  CAM match:   {self.token_match}
+        -  token read:  {self.token_read}
+        -  token write: {self.token_write}
+        -  CAM cycle:   {self.cam_cycle_time_ns} nsec
+        - Instruction: {self.instruction}
+        -  fetch:       {self.fetch}
+        -  decode:      {self.decode}
+        - Execute:     {self.execute}
+        -  add:         {self.add32b}
+        -  mul:         {self.mul32b}
+        -  fadd:        {self.fadd32b}
+        -  fmul:        {self.fmul32b}
+        -  fma:         {self.fma32b}
+        -  fdiv:        {self.fdiv32b}
+
+        - Data Movement
+        -  L1 read:     {self.l1_read}
+        -  L1 write:    {self.l1_write}
+        -  L2 read:     {self.l2_read}
+        -  L2 write:    {self.l2_write}
+        -  L3 read:     {self.l3_read}
+        -  L3 write:    {self.l3_write}
+        -  mem read:    {self.mem_read}
+        -  mem write:   {self.mem_write}
+        """
+
+
+# database of energy per event for a Data Flow Machine computational engine
+class DataFlowMachineEnergyDatabase(EnergyDatabase):
+    def __init__(self):
+        super().__init__()
+
+    # lookupEnergySet takes an ASIC manufacturing node name, such as, 'n14t' for 14nm typical
+    # and return a set of energy values for different DFM events,
+    # such as, a token match in the CAM, an instruction fetch, or a 32b floating-point multiply-add.
+    # Different operator models will use this configuration to calculate
+    # energy consumption and performance of the operator when executing
+    # on a DFM architecture.
+    def lookupEnergySet(self, node: str, cache_line_size_in_bytes: int) -> DataFlowMachineEnergy:
+        self.check_loaded()
+
+        process_node = self.store.row(node)
+
+        # create the set, initialize with the node string
+        dfm_energies = DataFlowMachineEnergy(node)
+        dfm_energies.cam_cycle_time_ns = process_node['cycle_time']
+        dfm_energies.cache_line_size = cache_line_size_in_bytes
+
+        word_size_in_bits = 32
+        # the dispatch stage of a DFM is the CAM lookup that matches a token to its partners,
+        # the operands of the waiting tokens are held in the matching store, its events are per bit
+        dfm_energies.token_match = process_node['dispatch']
+        dfm_energies.token_read = process_node['reg_read'] * word_size_in_bits
+        dfm_energies.token_write = process_node['reg_write'] * word_size_in_bits
+        dfm_energies.matching = dfm_energies.token_match + dfm_energies.token_read + dfm_energies.token_write
+
+        # all energy metrics in pJ
+        dfm_energies.fetch = process_node['fetch']
+        dfm_energies.decode = process_node['decode']
+        dfm_energies.instruction = dfm_energies.fetch + dfm_energies.decode
+
+        dfm_energies.add32b = process_node['add32b']
+        dfm_energies.mul32b = process_node['mul32b']
+        dfm_energies.fadd32b = process_node['fadd32b']
+        dfm_energies.fmul32b = process_node['fmul32b']
+        dfm_energies.fma32b = process_node['fma32b']
+        dfm_energies.fdiv32b = process_node['fdiv32b']
+        dfm_energies.execute = dfm_energies.fma32b  # approximate until we have instruction profiles
+
+        # cache and memory events are per bit, l1 reads deliver a word, the other events a cache line
+        cache_line_size_in_bits = cache_line_size_in_bytes * 8
+        dfm_energies.l1_read = word_size_in_bits * process_node['l1_read']
+        dfm_energies.l1_write = cache_line_size_in_bits * process_node['l1_write']
+        dfm_energies.l2_read = cache_line_size_in_bits * process_node['l2_read']
+        dfm_energies.l2_write = cache_line_size_in_bits * process_node['l2_write']
+        dfm_energies.l3_read = cache_line_size_in_bits * process_node['l3_read']
+        dfm_energies.l3_write = cache_line_size_in_bits * process_node['l3_write']
+        dfm_energies.mem_read = cache_line_size_in_bits * process_node['mem_read']
+        dfm_energies.mem_write = cache_line_size_in_bits * process_node['mem_write']
+
+        return dfm_energies
 
 # Typical cycle times for CAMs in 14nm TSMC process technology generally range between 0.8 to 1.5 nanoseconds (ns).
 # This range can vary depending on specific design parameters such as:
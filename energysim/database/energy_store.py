@@ -0,0 +1,273 @@
+import hashlib
+import json
+import os
+import struct
+import sys
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Compiled snapshot of an energy table:
+#   magic (8 bytes) | version (uint32) | header length (uint32) | JSON header | padding | float64 matrix
+# The matrix starts on a 64-byte boundary so that it can be memory mapped in place,
+# and worker processes that map the same snapshot share its pages.
+SNAPSHOT_MAGIC = b'ESIMSNAP'
+SNAPSHOT_VERSION = 1
+SNAPSHOT_SUFFIX = '.snapshot'
+_SNAPSHOT_PREAMBLE = struct.Struct('<8sII')
+_SNAPSHOT_ALIGNMENT = 64
+
+
+def read_energy_table(data_source: str) -> 'pd.DataFrame':
+    """
+    Read an energy table CSV file.
+
+    pandas is imported on first use, so that processes that only load
+    compiled snapshots do not pay for the import.
+
+    :param data_source: path to the energy CSV file
+    :return: DataFrame with one row per node
+    """
+    import pandas as pd
+
+    return pd.read_csv(data_source, skipinitialspace=True)
+
+
+def file_digest(path: str) -> str:
+    """
+    SHA-256 of a file, used to tie a snapshot to the CSV it was compiled from.
+
+    :param path: file to hash
+    :return: hex digest
+    """
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def snapshot_path(data_source: str) -> str:
+    """
+    Default location of the compiled snapshot of an energy CSV file.
+
+    :param data_source: path to the energy CSV file
+    :return: path of the snapshot next to the CSV file
+    """
+    return os.path.splitext(data_source)[0] + SNAPSHOT_SUFFIX
+
+
+def compile_snapshot(data_source: str, snapshot: str = None) -> str:
+    """
+    Compile an energy CSV file into a binary snapshot.
+
+    :param data_source: path to the energy CSV file
+    :param snapshot: path of the snapshot, defaults to snapshot_path(data_source)
+    :return: path of the snapshot
+    """
+    if snapshot is None:
+        snapshot = snapshot_path(data_source)
+    store = EnergyStore.from_dataframe(read_energy_table(data_source))
+    store.save_snapshot(snapshot, file_digest(data_source))
+    return snapshot
+
+
+# A row of the energy store: per-event energies of a single manufacturing node.
+# Indexing by event name is an offset lookup into the row vector.
+class EnergyRow:
+    __slots__ = ('node', 'values', 'column_index')
+
+    def __init__(self, node: str, values: np.ndarray, column_index: dict):
+        self.node = node
+        self.values = values
+        self.column_index = column_index
+
+    def __getitem__(self, column: str) -> float:
+        return self.values[self.column_index[column]]
+
+    def __repr__(self):
+        return f"EnergyRow(node='{self.node}', ...)"
+
+
+# Columnar store of characteristic event energies shared by the energy databases.
+# The table is held as a (node x event) float64 matrix together with a node index
+# and a column index, so that a lookup of a node is a row slice, and a lookup
+# of N nodes is a single fancy-indexing operation.
+class EnergyStore:
+    def __init__(self, nodes: list, columns: list, values: np.ndarray):
+        if values.shape != (len(nodes), len(columns)):
+            raise ValueError(f'Energy table shape {values.shape} does not match {len(nodes)} nodes x {len(columns)} events')
+
+        self.nodes: list = list(nodes)
+        self.columns: list = list(columns)
+        self.values: np.ndarray = values
+        self.node_index: dict = {node: offset for offset, node in enumerate(self.nodes)}
+        self.column_index: dict = {column: offset for offset, column in enumerate(self.columns)}
+
+    def __repr__(self):
+        return f"EnergyStore(nodes={len(self.nodes)}, events={len(self.columns)})"
+
+    @classmethod
+    def from_dataframe(cls, df: 'pd.DataFrame', key: str = 'node') -> 'EnergyStore':
+        """
+        Build a store from an energy table with one row per node.
+
+        :param df: energy table, as read from the energy CSV files
+        :param key: name of the column holding the node names
+        :return: EnergyStore
+        """
+        columns = [column for column in df.columns if column != key]
+        values = np.ascontiguousarray(df[columns].to_numpy(dtype=np.float64))
+        return cls(df[key].tolist(), columns, values)
+
+    @classmethod
+    def from_snapshot(cls, snapshot: str, data_source: str = None) -> 'EnergyStore':
+        """
+        Load a compiled snapshot; the energy matrix is a read-only memory map.
+
+        :param snapshot: path to the snapshot
+        :param data_source: CSV the snapshot must have been compiled from, not validated if None
+        :return: EnergyStore
+        :raises ValueError: if the file is not a snapshot, or it is stale with respect to data_source
+        """
+        with open(snapshot, 'rb') as f:
+            magic, version, header_length = _SNAPSHOT_PREAMBLE.unpack(f.read(_SNAPSHOT_PREAMBLE.size))
+            if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+                raise ValueError(f'{snapshot} is not a version {SNAPSHOT_VERSION} energy snapshot')
+            header = json.loads(f.read(header_length).decode('utf-8'))
+
+        if data_source is not None and file_digest(data_source) != header['source_sha256']:
+            raise ValueError(f'{snapshot} is stale: {data_source} changed since it was compiled')
+
+        shape = tuple(header['shape'])
+        if shape[0] * shape[1] == 0:
+            values = np.empty(shape, dtype=np.float64)
+        else:
+            values = np.memmap(snapshot, dtype=np.dtype(header['dtype']), mode='r',
+                               offset=header['data_offset'], shape=shape)
+        return cls(header['nodes'], header['columns'], values)
+
+    def save_snapshot(self, snapshot: str, source_sha256: str = ''):
+        """
+        Write the store as a binary snapshot that can be memory mapped by from_snapshot.
+
+        :param snapshot: path of the snapshot
+        :param source_sha256: digest of the CSV the store was built from
+        """
+        header = {
+            'nodes': self.nodes,
+            'columns': self.columns,
+            'shape': list(self.values.shape),
+            'dtype': '<f8',
+            'source_sha256': source_sha256,
+            'data_offset': 0,
+        }
+        # the data offset is part of the header, so iterate until its encoding is stable
+        while True:
+            encoded = json.dumps(header).encode('utf-8')
+            unaligned = _SNAPSHOT_PREAMBLE.size + len(encoded)
+            data_offset = -(-unaligned // _SNAPSHOT_ALIGNMENT) * _SNAPSHOT_ALIGNMENT
+            if header['data_offset'] == data_offset:
+                break
+            header['data_offset'] = data_offset
+
+        # write to a temporary file and rename, so concurrent readers never map a partial snapshot
+        partial = snapshot + '.partial'
+        with open(partial, 'wb') as f:
+            f.write(_SNAPSHOT_PREAMBLE.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(encoded)))
+            f.write(encoded)
+            f.write(b'\0' * (data_offset - unaligned))
+            f.write(np.ascontiguousarray(self.values, dtype='<f8').tobytes())
+        os.replace(partial, snapshot)
+
+    def node_offset(self, node: str) -> int:
+        offset = self.node_index.get(node)
+        if offset is None:
+            raise ValueError(f'Process {node} not supported')
+        return offset
+
+    def row(self, node: str) -> EnergyRow:
+        """
+        Energies of a single node, addressable by event name.
+
+        :param node: manufacturing node name, such as, 'n14t'
+        :return: EnergyRow, a view into the energy table
+        """
+        offset = self.node_offset(node)
+        return EnergyRow(node, self.values[offset], self.column_index)
+
+    def rows(self, nodes: list, columns: list = None) -> np.ndarray:
+        """
+        Energies of a collection of nodes.
+
+        :param nodes: manufacturing node names
+        :param columns: event names to select, all events if None
+        :return: (len(nodes) x len(columns)) float64 matrix
+        """
+        node_offsets = np.fromiter((self.node_offset(node) for node in nodes), dtype=np.intp, count=len(nodes))
+        if columns is None:
+            return self.values[node_offsets]
+        column_offsets = np.fromiter((self.column_index[column] for column in columns), dtype=np.intp, count=len(columns))
+        return self.values[np.ix_(node_offsets, column_offsets)]
+
+    def column(self, column: str) -> np.ndarray:
+        """
+        Energy of a single event across all nodes.
+
+        :param column: event name
+        :return: view of the event column
+        """
+        return self.values[:, self.column_index[column]]
+
+
+# Loading and raw table lookups shared by the energy databases: an energy database reads
+# its CSV file, or maps a compiled snapshot, into an EnergyStore, and derives its energy sets from it.
+class EnergyDatabase:
+    def __init__(self):
+        self.data = None
+        self.data_source = None
+        # columnar (node x event) energy table, built once by load_data
+        self.store: EnergyStore = None
+
+    def load_data(self, data_source: str) -> 'pd.DataFrame':
+        """
+        Load data from the specified source.
+
+        :return: Loaded DataFrame
+        """
+        self.data = read_energy_table(data_source)
+        if self.data is None:
+            raise FileNotFoundError
+
+        self.data_source = data_source
+        self.store = EnergyStore.from_dataframe(self.data)
+        return self.data.copy(deep=False)
+
+    def load_snapshot(self, snapshot: str, data_source: str = None):
+        """
+        Load a compiled snapshot of the energy table, see compile_snapshot.
+        The energy table is memory mapped and no DataFrame is created.
+
+        :param snapshot: path to the snapshot
+        :param data_source: CSV the snapshot was compiled from, used to reject stale snapshots
+        """
+        self.store = EnergyStore.from_snapshot(snapshot, data_source)
+        self.data = None
+        self.data_source = snapshot if data_source is None else data_source
+
+    def check_loaded(self):
+        if self.store is None:
+            raise ValueError('Energy Database not loaded: did you forget to call load_data(csv-file-with-energy-event-data)')
+
+    # lookupEnergyTable returns the raw table energies of a collection of nodes
+    # as a (nodes x events) matrix, selected with a single indexing operation
+    # on the columnar energy store. Column order follows events, or the CSV if events is None.
+    def lookupEnergyTable(self, nodes: list, events: list = None) -> np.ndarray:
+        self.check_loaded()
+        return self.store.rows(nodes, events)
+
+
+if __name__ == '__main__':
+    # compile the snapshots of the energy CSV files given on the command line
+    for csv_file in sys.argv[1:]:
+        print(f'{csv_file} -> {compile_snapshot(csv_file)}')
@@ -1,5 +1,5 @@
-import pandas as pd
-
+from energysim.database.energy_store import EnergyDatabase
+from energysim.models.datatype import FP32, INT32, Precision
 from energysim.models.design_category import DesignCategory
 from energysim.models.gpu_configuration import GraphicsProcessingUnitConfiguration
 from energysim.utils.randomizer import randomizer
@@ -49,42 +49,23 @@ class ExecutionUnitEnergy:
 
 
 # database of energy per event for a Execute Unit computational engine
-class ExecutionUnitEnergyDatabase:
+class ExecutionUnitEnergyDatabase(EnergyDatabase):
     def __init__(self):
-        self.data = None
-        self.data_source = None
-
-    def load_data(self, data_source: str) -> pd.DataFrame:
-        """
-        Load data from the specified source.
-
-        :return: Loaded DataFrame
-        """
-        self.data = pd.read_csv(data_source, skipinitialspace=True)
-        if self.data is None:
-            raise FileNotFoundError
-
-        self.data_source = data_source
-        return pd.DataFrame(self.data)
+        super().__init__()
 
     # lookupEnergySet takes an ASIC manufacturing node name, such as, 'n14s' for 14nm slow
     # and return a set of energy values for different GPU events,
     # such as, l1 cache read, shared memory access, or a 32b floating-point multiplication.
     # Different operator models will use this configuration to calculate
     # energy consumption and performance of the operator when executing
-    # on a SPM architecture
-    def lookupEnergySet(self, node: str, word_size_in_bytes: int) -> ExecutionUnitEnergy:
-        if self.data is None:
-            raise ValueError(f'Energy Database not loaded: did you for get to call load_data(csv-file-with-energy-event-data')
-
-        # query the database
-        df = self.data.copy()  # do we need to copy it? are all the operators on the db read-only?
-        # print(df)
-        # print(df.index)
-        # print(df.columns)
-        process_node = df.loc[df['node'] == node]
-        if process_node is None:
-            raise ValueError(f'Process {process_node} not supported')
+    # on a SPM architecture.
+    # With a precision, the arithmetic units are derived from their 32-bit energies instead: the FPU multiplies
+    # in the operand datatype and adds in the accumulator datatype, the multiplier half scales quadratically,
+    # the adder half, the ALU, and the registers linearly, see models/datatype. The AGU keeps the word size.
+    def lookupEnergySet(self, node: str, word_size_in_bytes: int, precision: 'Precision' = None) -> ExecutionUnitEnergy:
+        self.check_loaded()
+
+        process_node = self.store.row(node)
 
         # create the set, initialize with the node string
         exu_energies = ExecutionUnitEnergy(node)
@@ -93,10 +74,10 @@ class ExecutionUnitEnergyDatabase:
 
         # energies for compute units are in 8-bit building blocks
         # we need to scale them to the word size of interest
-        agu_energy = process_node['agu8'].values[0]
-        alu_energy = process_node['alu8'].values[0]
-        fpu_energy = process_node['fpu8'].values[0]
-        sfu_energy = process_node['sfu8'].values[0]
+        agu_energy = process_node['agu8']
+        alu_energy = process_node['alu8']
+        fpu_energy = process_node['fpu8']
+        sfu_energy = process_node['sfu8']
         exu_energies.agu = agu_energy * word_size_in_bytes
         exu_energies.alu = alu_energy * word_size_in_bytes
         exu_energies.fpu = fpu_energy * word_size_in_bytes
@@ -104,9 +85,18 @@ class ExecutionUnitEnergyDatabase:
 
         # register events are per bit
         word_size_in_bits = word_size_in_bytes * 8
-        reg_read = process_node['rreg8'].values[0]
-        reg_write = process_node['wreg8'].values[0]
+        reg_read = process_node['rreg8']
+        reg_write = process_node['wreg8']
         exu_energies.reg_read = reg_read * word_size_in_bits
         exu_energies.reg_write = reg_write * word_size_in_bits
 
+        if precision is not None:
+            operand, accumulate = precision.operand, precision.accumulate
+            integer = operand if not operand.is_float else INT32
+            exu_energies.alu = alu_energy * 4 * integer.adder_scale()
+            exu_energies.fpu = fpu_energy * 4 * (operand.multiplier_scale() + accumulate.adder_scale()) / 2
+            exu_energies.sfu = sfu_energy * 4 * (accumulate if accumulate.is_float else FP32).multiplier_scale()
+            exu_energies.reg_read = reg_read * operand.bits
+            exu_energies.reg_write = reg_write * accumulate.bits
+
         return exu_energies
@@ -1,15 +1,41 @@
-import pandas as pd
+import numpy as np
 
+from energysim.database.energy_store import EnergyDatabase
+from energysim.models.datatype import Precision, derive_energy_set
 from energysim.models.design_category import DesignCategory
 from energysim.models.gpu_configuration import GraphicsProcessingUnitConfiguration
-from energysim.utils.randomizer import randomizer
+from energysim.utils.randomizer import category_bounds, randomize_batch, randomizer
 
 
 # Characteristic event energies of a Graphics Processing Unit
 # organized as a Single Instruction Multiple Thread (SIMT) machine
 class GraphicsProcessingUnitEnergy:
+    # event energies that are perturbed to emulate different designs
+    randomized_fields = (
+        'fetch',
+        'decode',
+        'dispatch',
+        'add32b',
+        'mul32b',
+        'fadd32b',
+        'fmul32b',
+        'fma32b',
+        'fdiv32b',
+        'reg_read',
+        'reg_write',
+        'l1_read',
+        'l1_write',
+        'smem_read',
+        'smem_write',
+        'gmem_read',
+        'gmem_write',
+    )
+
     def __init__(self, identifier: str):
         self.identifier = identifier
+        # cache line and memory burst sizes the cache line and global memory event energies are expressed in
+        self.cache_line_size: int = 0
+        self.memory_burst_size: int = 0
 
         # all energy metrics in pJ
         self.thread: float = 0
@@ -83,6 +109,26 @@ class GraphicsProcessingUnitEnergy:
         -  gmem write:  {self.gmem_write}
         """
 
+    # global memory energies are per burst of memory_burst_size bytes, scale them to the burst size of a machine
+    def burst_scale(self, memory_burst_size):
+        if self.memory_burst_size > 0:
+            return memory_burst_size / self.memory_burst_size
+        return 1.0
+
+    # The energy set of a machine that computes in a mixed precision, derived from the 32-bit events of this set:
+    # the execute energies are scaled by the multiplier and adder widths of the precision, see models/datatype,
+    # register reads and the word accesses of L1 and shared memory by the operand width,
+    # and register writes by the accumulator width. Cache line and memory burst energies do not change.
+    def with_precision(self, precision: 'Precision') -> 'GraphicsProcessingUnitEnergy':
+        operand, accumulate = precision.operand.adder_scale(), precision.accumulate.adder_scale()
+        scaled = precision.scale_arithmetic(self)
+        scaled['reg_read'] = self.reg_read * operand
+        scaled['reg_write'] = self.reg_write * accumulate
+        scaled['l1_read'] = self.l1_read * operand
+        scaled['smem_read'] = self.smem_read * operand
+        scaled['smem_write'] = self.smem_write * operand
+        return derive_energy_set(self, f'{self.identifier}-{precision}', scaled)
+
     # Given an energy profile, randomize the values a little bit to emulate different designs
     # Energy efficient designs would start from the 'low' corner of the energy profiles,
     # high performance designs would start from the 'high' corner of the profile,
@@ -95,25 +141,16 @@ class GraphicsProcessingUnitEnergy:
         # randomize that around the value. We'll postulate that a range of (-25%, +25%)
         # is sufficiently interesting
         new_sample = GraphicsProcessingUnitEnergy(new_name)
+        new_sample.cache_line_size = self.cache_line_size
+        new_sample.memory_burst_size = self.memory_burst_size
 
-        if config.category == DesignCategory.EnergyEfficient:
-            lowerbound = 1.0 - proportion
-            upperbound = 1.0
-        elif config.category == DesignCategory.HighVolume:
-            lowerbound = 1.0 - (0.5 * proportion)
-            upperbound = 1.0 + (0.5 * proportion)
-        elif config.category == DesignCategory.HighPerformance:
-            lowerbound = 1.0
-            upperbound = 1.0 + proportion
-        else:
-            lowerbound = 0.0
-            upperbound = 0.0
+        lowerbound, upperbound = category_bounds(config.category, proportion)
 
         # instruction energies
         new_sample.fetch = randomizer(self.fetch, lowerbound, upperbound)
         new_sample.decode = randomizer(self.decode, lowerbound, upperbound)
         new_sample.dispatch = randomizer(self.dispatch, lowerbound, upperbound)
-        new_sample.instruction = self.fetch + self.decode + self.dispatch
+        new_sample.instruction = new_sample.fetch + new_sample.decode + new_sample.dispatch
 
         # execute energies
         new_sample.add32b = randomizer(self.add32b, lowerbound, upperbound)
@@ -122,7 +159,7 @@ class GraphicsProcessingUnitEnergy:
         new_sample.fmul32b = randomizer(self.fmul32b, lowerbound, upperbound)
         new_sample.fma32b = randomizer(self.fma32b, lowerbound, upperbound)
         new_sample.fdiv32b = randomizer(self.fdiv32b, lowerbound, upperbound)
-        new_sample.execute = self.fma32b  # approximate until we have instruction profiles
+        new_sample.execute = new_sample.fma32b  # approximate until we have instruction profiles
 
         new_sample.reg_read = randomizer(self.reg_read, lowerbound, upperbound)
         new_sample.reg_write = randomizer(self.reg_write, lowerbound, upperbound)
@@ -139,25 +176,41 @@ class GraphicsProcessingUnitEnergy:
 
         return new_sample
 
-
-# database of energy per event for a Graphics Processing Unit computational engine
-class GraphicsProcessingUnitEnergyDatabase:
-    def __init__(self):
-        self.data = None
-        self.data_source = None
-
-    def load_data(self, data_source: str) -> pd.DataFrame:
+    # Batched equivalent of generate_randomized_delta: the energies of nr_samples designs of a category
+    # are drawn as one (nr_samples x randomized_fields) matrix from an explicitly seeded generator.
+    # The energies of the returned set are column views into that matrix, so the set can be passed
+    # directly to the batched operator models, one design per design point.
+    def generate_randomized_samples(self, new_name: str, proportion: float, category: 'DesignCategory',
+                                    nr_samples: int, seed=None) -> 'GraphicsProcessingUnitEnergy':
         """
-        Load data from the specified source.
-
-        :return: Loaded DataFrame
+        Draw the energies of a batch of randomized designs.
+
+        :param new_name: identifier of the batch
+        :param proportion: width of the randomization range, such as, 0.25
+        :param category: design category that selects the corner of the energy profile
+        :param nr_samples: number of designs
+        :param seed: int, SeedSequence, or Generator, for reproducible batches
+        :return: GraphicsProcessingUnitEnergy whose randomized energies are vectors of length nr_samples
         """
-        self.data = pd.read_csv(data_source, skipinitialspace=True)
-        if self.data is None:
-            raise FileNotFoundError
+        lowerbound, upperbound = category_bounds(category, proportion)
+        values = np.array([getattr(self, field) for field in self.randomized_fields])
+        samples = randomize_batch(values, lowerbound, upperbound, nr_samples, np.random.default_rng(seed))
 
-        self.data_source = data_source
-        return pd.DataFrame(self.data)
+        new_sample = GraphicsProcessingUnitEnergy(new_name)
+        new_sample.cache_line_size = self.cache_line_size
+        new_sample.memory_burst_size = self.memory_burst_size
+        for offset, field in enumerate(self.randomized_fields):
+            setattr(new_sample, field, samples[:, offset])
+        # derived energies follow the randomized energies they aggregate, as in generate_randomized_delta
+        new_sample.instruction = new_sample.fetch + new_sample.decode + new_sample.dispatch
+        new_sample.execute = new_sample.fma32b   # approximate until we have instruction profiles
+        return new_sample
+
+
+# database of energy per event for a Graphics Processing Unit computational engine
+class GraphicsProcessingUnitEnergyDatabase(EnergyDatabase):
+    def __init__(self):
+        super().__init__()
 
     # lookupEnergySet takes an ASIC manufacturing node name, such as, 'n14s' for 14nm slow
     # and return a set of energy values for different GPU events,
@@ -166,29 +219,22 @@ class GraphicsProcessingUnitEnergyDatabase:
     # energy consumption and performance of the operator when executing
     # on a SPM architecture
     def lookupEnergySet(self, node: str, cache_line_size_in_bytes: int) -> GraphicsProcessingUnitEnergy:
-        if self.data is None:
-            raise ValueError(f'Energy Database not loaded: did you for get to call load_data(csv-file-with-energy-event-data')
-
-        # query the database
-        df = self.data.copy()  # do we need to copy it? are all the operators on the db read-only?
-        # print(df)
-        # print(df.index)
-        # print(df.columns)
-        process_node = df.loc[df['node'] == node]
-        if process_node is None:
-            raise ValueError(f'Process {process_node} not supported')
+        self.check_loaded()
+
+        process_node = self.store.row(node)
 
         # create the set, initialize with the node string
         gpu_energies = GraphicsProcessingUnitEnergy(node)
+        gpu_energies.cache_line_size = cache_line_size_in_bytes
 
         # all energy metrics in pJ
 
         # The instruction stream on a GPU is fetch and decode once, and
         # dispatch to Arithmetic Instruction Units inside the Streaming Multiprocessors.
         # The execute stage inside the Streaming Processor will read from the local thread register file.
-        fetch_energy = process_node['fetch'].values[0]
-        decode_energy = process_node['decode'].values[0]
-        dispatch_energy = process_node['dispatch'].values[0]
+        fetch_energy = process_node['fetch']
+        decode_energy = process_node['decode']
+        dispatch_energy = process_node['dispatch']
         instruction_energy = fetch_energy + decode_energy
         gpu_energies.instruction = instruction_energy
         gpu_energies.fetch = fetch_energy
@@ -210,12 +256,12 @@ class GraphicsProcessingUnitEnergyDatabase:
         # Let's standardize on 32 threads/work-items
         # For matvec, each thread
 
-        add32b = process_node['add32b'].values[0]
-        mul32b = process_node['mul32b'].values[0]
-        fadd32b = process_node['fadd32b'].values[0]
-        fmul32b = process_node['fmul32b'].values[0]
-        fma32b = process_node['fma32b'].values[0]
-        fdiv32b = process_node['fdiv32b'].values[0]
+        add32b = process_node['add32b']
+        mul32b = process_node['mul32b']
+        fadd32b = process_node['fadd32b']
+        fmul32b = process_node['fmul32b']
+        fma32b = process_node['fma32b']
+        fdiv32b = process_node['fdiv32b']
         gpu_energies.add32b = add32b
         gpu_energies.mul32b = mul32b
         gpu_energies.fadd32b = fadd32b
@@ -227,28 +273,29 @@ class GraphicsProcessingUnitEnergyDatabase:
 
         word_size_in_bits = 32
         # register events are per bit
-        register_read = process_node['reg_read'].values[0]
-        register_write = process_node['reg_write'].values[0]
+        register_read = process_node['reg_read']
+        register_write = process_node['reg_write']
         gpu_energies.reg_read = register_read * word_size_in_bits
         gpu_energies.reg_write = register_write * word_size_in_bits
 
         # l1 events are per bit
-        l1_read_per_bit = process_node['l1_read'].values[0]
-        l1_write_per_bit = process_node['l1_write'].values[0]
+        l1_read_per_bit = process_node['l1_read']
+        l1_write_per_bit = process_node['l1_write']
 
         gpu_energies.l1_read = word_size_in_bits * l1_read_per_bit
         gpu_energies.l1_write = cache_line_size_in_bytes * 8 * l1_write_per_bit
 
         # shared memory events are per bit
-        smem_read_per_bit = process_node['smem_read'].values[0]
-        smem_write_per_bit = process_node['smem_write'].values[0]
+        smem_read_per_bit = process_node['smem_read']
+        smem_write_per_bit = process_node['smem_write']
         gpu_energies.smem_read = word_size_in_bits * smem_read_per_bit
         gpu_energies.smem_write = word_size_in_bits * smem_write_per_bit
 
         # global memory events are per bit
-        mem_read_per_bit = process_node['gmem_read'].values[0]
-        mem_write_per_bit = process_node['gmem_write'].values[0]
+        mem_read_per_bit = process_node['gmem_read']
+        mem_write_per_bit = process_node['gmem_write']
         memory_burst_in_bytes = 64
+        gpu_energies.memory_burst_size = memory_burst_in_bytes
         gpu_energies.gmem_read = memory_burst_in_bytes * 8 * mem_read_per_bit  # 3840
         gpu_energies.gmem_write = memory_burst_in_bytes * 8 * mem_write_per_bit  # 5120
 
@@ -1,14 +1,47 @@
-import pandas as pd
+import functools
+from typing import TYPE_CHECKING
 
+import numpy as np
+
+from energysim.database.energy_store import EnergyDatabase
+from energysim.models.datatype import Precision, derive_energy_set
 from energysim.models.spm_configuration import StoredProgramMachineConfiguration, DesignCategory
-from energysim.utils.randomizer import randomizer
+from energysim.utils.randomizer import category_bounds, randomize_batch, randomizer
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 
 # Characteristic event energies of a Stored Program Machine
 # can be single core or multi-core, just depends on the aggregation
 class StoredProgramMachineEnergy:
+    # event energies that are perturbed to emulate different designs
+    randomized_fields = (
+        'fetch',
+        'decode',
+        'dispatch',
+        'add32b',
+        'mul32b',
+        'fadd32b',
+        'fmul32b',
+        'fma32b',
+        'fdiv32b',
+        'register_read',
+        'register_write',
+        'l1_read',
+        'l1_write',
+        'l2_read',
+        'l2_write',
+        'l3_read',
+        'l3_write',
+        'dram_read',
+        'dram_write',
+    )
+
     def __init__(self, identifier: str):
         self.identifier = identifier
+        # cache line size the cache line and memory event energies are expressed in
+        self.cache_line_size: int = 0
 
         # all energy metrics in pJ
         self.instruction: float = 0
@@ -46,6 +79,17 @@ class StoredProgramMachineEnergy:
         self.compute:float = 0
         self.data_movement:float = 0
 
+    def __setattr__(self, key, value):
+        if getattr(self, '_frozen', False):
+            raise AttributeError(f'{self!r} is immutable: derive a new energy set with generate_randomized_delta')
+        super().__setattr__(key, value)
+
+    def freeze(self) -> 'StoredProgramMachineEnergy':
+        # energy sets handed out by the database are shared between all callers
+        # that look up the same (node, cache line size), so they are made read-only
+        super().__setattr__('_frozen', True)
+        return self
+
     def __repr__(self):
         return f"StoredProgramMachineEnergy(node='{self.identifier}', ...)"
 
@@ -81,6 +125,18 @@ class StoredProgramMachineEnergy:
         -  DRAM write:    {self.dram_write}
         """
 
+    # The energy set of a machine that computes in a mixed precision, derived from the 32-bit events of this set:
+    # the execute energies are scaled by the multiplier and adder widths of the precision, see models/datatype,
+    # register reads and word-sized L1 reads by the operand width, and register writes by the accumulator width.
+    # Cache line and memory burst energies do not change.
+    def with_precision(self, precision: 'Precision') -> 'StoredProgramMachineEnergy':
+        operand, accumulate = precision.operand.adder_scale(), precision.accumulate.adder_scale()
+        scaled = precision.scale_arithmetic(self)
+        scaled['register_read'] = self.register_read * operand
+        scaled['register_write'] = self.register_write * accumulate
+        scaled['l1_read'] = self.l1_read * operand
+        return derive_energy_set(self, f'{self.identifier}-{precision}', scaled)
+
     # Given an energy profile, randomize the values a little bit to emulate different designs
     # Energy efficient designs would start from the 'low' corner of the energy profiles,
     # high performance designs would start from the 'high' corner of the profile,
@@ -92,25 +148,15 @@ class StoredProgramMachineEnergy:
         # randomize that around the value. We'll postulate that a range of (-25%, +25%)
         # is sufficiently interesting
         new_sample = StoredProgramMachineEnergy(new_name)
+        new_sample.cache_line_size = self.cache_line_size
 
-        if config.category == DesignCategory.EnergyEfficient:
-            lowerbound = 1.0 - proportion
-            upperbound = 1.0
-        elif config.category == DesignCategory.HighVolume:
-            lowerbound = 1.0 - (0.5*proportion)
-            upperbound = 1.0 + (0.5*proportion)
-        elif config.category == DesignCategory.HighPerformance:
-            lowerbound = 1.0
-            upperbound = 1.0 + proportion
-        else:
-            lowerbound = 0.0
-            upperbound = 0.0
+        lowerbound, upperbound = category_bounds(config.category, proportion)
 
         # instruction energies
         new_sample.fetch = randomizer(self.fetch, lowerbound, upperbound)
         new_sample.decode = randomizer(self.decode, lowerbound, upperbound)
         new_sample.dispatch = randomizer(self.dispatch, lowerbound, upperbound)
-        new_sample.instruction = self.fetch + self.decode + self.dispatch
+        new_sample.instruction = new_sample.fetch + new_sample.decode + new_sample.dispatch
 
         # execute energies
         new_sample.add32b = randomizer(self.add32b, lowerbound, upperbound)
@@ -119,7 +165,7 @@ class StoredProgramMachineEnergy:
         new_sample.fmul32b = randomizer(self.fmul32b, lowerbound, upperbound)
         new_sample.fma32b = randomizer(self.fma32b, lowerbound, upperbound)
         new_sample.fdiv32b = randomizer(self.fdiv32b, lowerbound, upperbound)
-        new_sample.execute = self.fma32b   # approximate until we have instruction profiles
+        new_sample.execute = new_sample.fma32b   # approximate until we have instruction profiles
 
         new_sample.register_read = randomizer(self.register_read, lowerbound, upperbound)
         new_sample.register_write = randomizer(self.register_write, lowerbound, upperbound)
@@ -139,64 +185,103 @@ class StoredProgramMachineEnergy:
 
         return new_sample
 
+    # Batched equivalent of generate_randomized_delta: the energies of nr_samples designs of a category
+    # are drawn as one (nr_samples x randomized_fields) matrix from an explicitly seeded generator.
+    # The energies of the returned set are column views into that matrix, so the set can be passed
+    # directly to the batched operator models, one design per design point.
+    def generate_randomized_samples(self, new_name: str, proportion: float, category: 'DesignCategory',
+                                    nr_samples: int, seed=None) -> 'StoredProgramMachineEnergy':
+        """
+        Draw the energies of a batch of randomized designs.
+
+        :param new_name: identifier of the batch
+        :param proportion: width of the randomization range, such as, 0.25
+        :param category: design category that selects the corner of the energy profile
+        :param nr_samples: number of designs
+        :param seed: int, SeedSequence, or Generator, for reproducible batches
+        :return: StoredProgramMachineEnergy whose randomized energies are vectors of length nr_samples
+        """
+        lowerbound, upperbound = category_bounds(category, proportion)
+        values = np.array([getattr(self, field) for field in self.randomized_fields])
+        samples = randomize_batch(values, lowerbound, upperbound, nr_samples, np.random.default_rng(seed))
+
+        new_sample = StoredProgramMachineEnergy(new_name)
+        new_sample.cache_line_size = self.cache_line_size
+        for offset, field in enumerate(self.randomized_fields):
+            setattr(new_sample, field, samples[:, offset])
+        # derived energies follow the randomized energies they aggregate, as in generate_randomized_delta
+        new_sample.instruction = new_sample.fetch + new_sample.decode + new_sample.dispatch
+        new_sample.execute = new_sample.fma32b   # approximate until we have instruction profiles
+        return new_sample
 
-# database of energy per event for a computational engine
-class StoredProgramMachineEnergyDatabase:
-    def __init__(self):
-        self.data = None
-        self.data_source = None
 
-    def load_data(self, data_source:str) -> pd.DataFrame:
+# database of energy per event for a computational engine
+class StoredProgramMachineEnergyDatabase(EnergyDatabase):
+    def __init__(self, cache_size: int = 128):
+        super().__init__()
+        # energy sets are immutable, so lookups of the same (node, cache line size) share one instance
+        self._energy_set_cache = functools.lru_cache(maxsize=cache_size)(self._create_energy_set)
+
+    def load_data(self, data_source: str) -> 'pd.DataFrame':
+        data = super().load_data(data_source)
+        self._energy_set_cache.cache_clear()
+        return data
+
+    def cache_info(self):
         """
-        Load data from the specified source.
+        Statistics of the energy set cache.
 
-        :return: Loaded DataFrame
+        :return: named tuple with hits, misses, maxsize, and currsize
         """
-        self.data = pd.read_csv(data_source, skipinitialspace=True)
-        if self.data is None:
-            raise FileNotFoundError
+        return self._energy_set_cache.cache_info()
 
-        self.data_source = data_source
-        return pd.DataFrame(self.data)
+    @property
+    def cache_hits(self) -> int:
+        return self._energy_set_cache.cache_info().hits
+
+    @property
+    def cache_misses(self) -> int:
+        return self._energy_set_cache.cache_info().misses
+
+    def load_snapshot(self, snapshot: str, data_source: str = None):
+        super().load_snapshot(snapshot, data_source)
+        self._energy_set_cache.cache_clear()
 
     # lookupEnergySet takes an ASIC manufacturing node name, such as, 'n14s' for 14nm slow
     # and return a set of energy values for different Stored Program Machine events,
     # such as, l1 cache read, or a 32b floating-point multiplication.
     # Different operator models will use this configuration to calculate
     # energy consumption and performance of the operator when executing
-    # on a SPM architecture
+    # on a SPM architecture.
+    # The returned energy set is shared and read-only.
     def lookupEnergySet(self, node: str, cache_line_size_in_bytes: int) -> StoredProgramMachineEnergy:
-        if self.data is None:
-            raise ValueError(f'Energy Database not loaded: did you for get to call load_data(csv-file-with-energy-event-data')
-
-        # query the database
-        df = self.data.copy()
-        #print(df)
-        #print(df.index)
-        #print(df.columns)
-        process_node = df.loc[df['node'] == node]
-        if process_node is None:
-            raise ValueError(f'Process {process_node} not supported')
+        self.check_loaded()
+
+        return self._energy_set_cache(node, cache_line_size_in_bytes)
+
+    def _create_energy_set(self, node: str, cache_line_size_in_bytes: int) -> StoredProgramMachineEnergy:
+        process_node = self.store.row(node)
 
         # create the set, initialize with the node string
         spm_energies = StoredProgramMachineEnergy(node)
+        spm_energies.cache_line_size = cache_line_size_in_bytes
 
         # all energy metrics in pJ
-        fetch_energy = process_node['fetch'].values[0]
-        decode_energy = process_node['decode'].values[0]
-        dispatch_energy = process_node['dispatch'].values[0]
+        fetch_energy = process_node['fetch']
+        decode_energy = process_node['decode']
+        dispatch_energy = process_node['dispatch']
         instruction_energy =  fetch_energy + decode_energy + dispatch_energy
         spm_energies.instruction = instruction_energy
         spm_energies.fetch = fetch_energy
         spm_energies.decode = decode_energy
         spm_energies.dispatch = dispatch_energy
 
-        add32b =  process_node['add32b'].values[0]
-        mul32b =  process_node['mul32b'].values[0]
-        fadd32b = process_node['fadd32b'].values[0]
-        fmul32b = process_node['fmul32b'].values[0]
-        fma32b =  process_node['fma32b'].values[0]
-        fdiv32b = process_node['fdiv32b'].values[0]
+        add32b =  process_node['add32b']
+        mul32b =  process_node['mul32b']
+        fadd32b = process_node['fadd32b']
+        fmul32b = process_node['fmul32b']
+        fma32b =  process_node['fma32b']
+        fdiv32b = process_node['fdiv32b']
         spm_energies.add32b = add32b
         spm_energies.mul32b = mul32b
         spm_energies.fadd32b = fadd32b
@@ -207,42 +292,34 @@ class StoredProgramMachineEnergyDatabase:
 
         word_size_in_bits = 32
         # register events are per bit
-        register_read = process_node['reg_read'].values[0]
-        register_write = process_node['reg_write'].values[0]
+        register_read = process_node['reg_read']
+        register_write = process_node['reg_write']
         spm_energies.register_read = register_read * word_size_in_bits
         spm_energies.register_write = register_write * word_size_in_bits
 
         # l1 events are per bit
-        l1_read_per_bit = process_node['l1_read'].values[0]
-        l1_write_per_bit = process_node['l1_write'].values[0]
+        l1_read_per_bit = process_node['l1_read']
+        l1_write_per_bit = process_node['l1_write']
 
         spm_energies.l1_read = word_size_in_bits * l1_read_per_bit
         spm_energies.l1_write = cache_line_size_in_bytes*8 * l1_write_per_bit
 
         # l2 events are per bit
-        l2_read_per_bit = process_node['l2_read'].values[0]
-        l2_write_per_bit = process_node['l2_write'].values[0]
+        l2_read_per_bit = process_node['l2_read']
+        l2_write_per_bit = process_node['l2_write']
         spm_energies.l2_read = cache_line_size_in_bytes*8 * l2_read_per_bit     #  768 # 1.5x L1
         spm_energies.l2_write = cache_line_size_in_bytes*8 * l2_write_per_bit    # 1152 # 1.5x L1
 
         # l3 events are per bit
-        l3_read_per_bit = process_node['l3_read'].values[0]
-        l3_write_per_bit = process_node['l3_write'].values[0]
+        l3_read_per_bit = process_node['l3_read']
+        l3_write_per_bit = process_node['l3_write']
         spm_energies.l3_read = cache_line_size_in_bytes*8 * l3_read_per_bit      # 1152 # 1.5x L2
         spm_energies.l3_write = cache_line_size_in_bytes*8 * l3_write_per_bit    # 1728 # 1.5x L2
 
         # memory events are per bit
-        mem_read_per_bit = process_node['mem_read'].values[0]
-        mem_write_per_bit = process_node['mem_write'].values[0]
+        mem_read_per_bit = process_node['mem_read']
+        mem_write_per_bit = process_node['mem_write']
         spm_energies.dram_read = cache_line_size_in_bytes*8 * mem_read_per_bit        # 3840
         spm_energies.dram_write = cache_line_size_in_bytes*8 * mem_write_per_bit      # 5120
 
-        return spm_energies
-
-
-
-
-
-
-
-
+        return spm_energies.freeze()
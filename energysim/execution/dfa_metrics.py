@@ -1,45 +1,91 @@
+import numpy as np
 from tabulate import tabulate
 
+from energysim.execution.event_metrics import EventMetrics
 from energysim.utils.scientific_format import scientific_format
 
-class DomainFlowArchitectureMetrics:
-    def __init__(self, name: str):
-        self.name = name
-
-        # tracking events and energy for a collection of categories
-        self.keys: [] = [
-            'thread',
-            'instruction',
-            'execute',
-            'add',
-            'mul',
-            'fadd',
-            'fmul',
-            'fdiv',
-            'fma',
-            'register_read',
-            'register_write',
-            'warp',
-            'block',
-            'l1_read',
-            'l1_write',
-            'smem_read',
-            'smem_write',
-            'gmem_read',
-            'gmem_write',
-            'compute',
-            'data_movement',
-            'cache_read',
-            'cache_write',
-            'l1',
-            'smem',
-            'gmem',
-            'cache',
-            'memory',
-            'total'
-        ]
-        self.events = dict.fromkeys(self.keys, 0)
-        self.energy = dict.fromkeys(self.keys, 0.0)
+class DomainFlowArchitectureMetrics(EventMetrics):
+    # tracking events and energy for a collection of categories
+    keys = (
+        'istore_dispatch',
+        'istore_operand_write',
+        'execute',
+        'add',
+        'mul',
+        'fma',
+        'fdiv',
+        'pipe_read',
+        'pipe_write',
+        'str_read',
+        'str_write',
+        'l1_read',
+        'l1_write',
+        'smem_read',
+        'smem_write',
+        'dma_read',
+        'dma_write',
+        'gmem_read',
+        'gmem_write',
+        'istore',
+        'pipe',
+        'compute',
+        'streamer',
+        'l1',
+        'smem',
+        'dma',
+        'gmem',
+        'cache',
+        'memory',
+        'data_movement',
+        'total',
+    )
+    # rollup hierarchy, applied in order by rollup()
+    consolidation = (
+        ('istore', ['istore_dispatch', 'istore_operand_write']),
+        ('pipe', ['pipe_read', 'pipe_write']),
+        ('compute', ['istore', 'execute', 'pipe']),
+        ('streamer', ['str_read', 'str_write']),
+        ('l1', ['l1_read', 'l1_write']),
+        ('smem', ['smem_read', 'smem_write']),
+        ('dma', ['dma_read', 'dma_write']),
+        ('gmem', ['gmem_read', 'gmem_write']),
+        ('cache', ['l1', 'smem']),
+        ('memory', ['dma', 'gmem']),
+        ('data_movement', ['streamer', 'cache', 'memory']),
+        ('total', ['compute', 'data_movement']),
+    )
+    __slots__ = (
+        'core_clock_ghz',
+        'memory_clock_ghz',
+        'word_size',
+        'cache_line_size',
+        'memory_burst',
+        'memory_channels',
+        'channel_width',
+        'max_memory_bw',
+        'fabric_size',
+        'istore_depth',
+        'dma_engines',
+        'tiles',
+        'wavefronts',
+        'fabric_utilization',
+        'elapsed_time',
+        'instr_per_sec',
+        'flops_per_sec',
+        'memory_transactions',
+        'memory_clock_ns',
+        'memops_per_sec',
+        'read_data',
+        'write_data',
+        'memory_read_bw',
+        'memory_write_bw',
+        'total_flops',
+        'power',
+        'flops_per_watt',
+    )
+
+    def __init__(self, name: str, events: np.ndarray = None, energy: np.ndarray = None):
+        super().__init__(name, events, energy)
 
         # machine attributes
         self.core_clock_ghz: float = 0
@@ -50,13 +96,16 @@ class DomainFlowArchitectureMetrics:
         self.memory_channels: int = 0
         self.channel_width: int = 0
         self.max_memory_bw: float = 0
-        # kernel attributes
-        self.threads_per_block: int = 0
-        self.blocks_per_grid: int = 0
-        self.nr_of_warps: int = 0
+        self.fabric_size: int = 0
+        self.istore_depth: int = 0
+        self.dma_engines: int = 0
+        # schedule attributes
+        self.tiles: int = 0  # tiles of the computational domain executed by the fabric
+        self.wavefronts: int = 0  # wavefronts of the schedule, one per core clock
+        self.fabric_utilization: float = 0  # fraction of the processing element cycles that execute
         # performance metrics
         self.elapsed_time: float = 0  # in seconds
-        self.instr_per_sec: float = 0  # instructions per second
+        self.instr_per_sec: float = 0  # instruction tokens dispatched per second
         self.flops_per_sec: float = 0  # floating point operations per second
         self.memory_transactions: int = 0
         self.memory_clock_ns: float = 0  # memory clock cycle in nano-seconds
@@ -71,7 +120,7 @@ class DomainFlowArchitectureMetrics:
         self.flops_per_watt: float = 0
 
     def __repr__(self):
-        return f"GraphicsProcessingUnitMetrics(name='{self.name}', ...)"
+        return f"DomainFlowArchitectureMetrics(name='{self.name}', ...)"
 
     def __str__(self):
         return f"""
@@ -79,88 +128,42 @@ class DomainFlowArchitectureMetrics:
 
         """
 
-    def record(self, key: str, occurrences: int, occurrence_energy: float):
-        if key in self.keys:
-            self.events[key] = occurrences
-            self.energy[key] = occurrences * occurrence_energy
-        else:
-            print(f'Key {key} not found.')
-
-    def consolidate(self, target_key: str, keys: []):
-        for key in keys:
-            occurrences: int = self.events.get(key, 0)
-            occurrence_energy: float = self.energy.get(key, 0.0)
-            # print(f'target_key: {target_key}, key: {key}, occurrences: {occurrences}, energy: {occurrence_energy}')
-            self.events[target_key] += occurrences
-            self.energy[target_key] += occurrence_energy
-
-    def gather(self, key: str) -> tuple[int, float]:
-        occurrences = self.events.get(key, 0)
-        occurrence_energy = self.energy.get(key, 0)
-        return occurrences, occurrence_energy
-
-    def occurrence(self, key: str) -> int:
-        occurrences = self.events.get(key, 0)
-        return occurrences
-
-    def occurrence_energy(self, key: str) -> float:
-        occurrence_energy = self.energy.get(key, 0)
-        return occurrence_energy
-
     def report(self):
-        instruction_events = self.events['instruction']
-        execute_events = self.events['execute']
-        register_read_events = self.events['register_read']
-        register_write_events = self.events['register_write']
-        compute_events = instruction_events + execute_events + register_read_events + register_write_events
-
-        instruction_energy = self.energy['instruction']
-        execute_energy = self.energy['execute']
-        register_read_energy = self.energy['register_read']
-        register_write_energy = self.energy['register_write']
-        compute_energy = instruction_energy + execute_energy + register_read_energy + register_write_energy
-
-        l1_read_events, l1_read_energy = self.gather('l1_read')
-        l1_write_events, l1_write_energy = self.gather('l1_write')
-        l1_events, l1_energy = self.gather('l1')
-        smem_read_events, smem_read_energy = self.gather('smem_read')
-        smem_write_events, smem_write_energy = self.gather('smem_write')
-        smem_events, smem_energy = self.gather('smem')
-        cache_events, cache_energy = self.gather('cache')
-        gmem_read_events, gmem_read_energy = self.gather('gmem_read')
-        gmem_write_events, gmem_write_energy = self.gather('gmem_write')
-        gmem_events, gmem_energy = self.gather('memory')
-        data_movement_events, data_movement_energy = self.gather('data_movement')
+        total_events, total_energy = self.gather('total')
 
-        # reference
-        # to, te = self.gather('total')
-        total_energy = compute_energy + data_movement_energy
-        # if te is not total_energy:
-        #    print(f'validation failed: {total_energy} != {te}')
+        def row(label: str, key: str) -> list:
+            events, energy = self.gather(key)
+            return [label, events, energy, 100 * energy / total_energy]
 
         print("Name: " + self.name)
         data = [["event", "Occurrences", "pJ", "%"],
                 ["Total", "-", total_energy, 100.0],
-                ["Compute", compute_events, compute_energy, 100 * compute_energy / total_energy],
-                ["DataMovement", data_movement_events, data_movement_energy, 100 * data_movement_energy / total_energy],
-                ["Compute", compute_events, compute_energy, 100 * compute_energy / total_energy],
-                ["- Execute", execute_events, execute_energy, 100 * execute_energy / total_energy],
-                ["- Instruction", instruction_events, instruction_energy, 100 * instruction_energy / total_energy],
-                ["- Register Read", register_read_events, register_read_energy,
-                 100 * register_read_energy / total_energy],
-                ["- Register Write", register_write_events, register_write_energy,
-                 100 * register_write_energy / total_energy],
-                ["Cache", cache_events, cache_energy, 100 * cache_energy / total_energy],
-                ["- L1 Cache", l1_events, l1_energy, 100 * l1_energy / total_energy],
-                ["-  read", l1_read_events, l1_read_energy, 100 * l1_read_energy / total_energy],
-                ["-  write", l1_write_events, l1_write_energy, 100 * l1_write_energy / total_energy],
-                ["- Shared Memory", smem_events, smem_energy, 100 * smem_energy / total_energy],
-                ["-  read", smem_read_events, smem_read_energy, 100 * smem_read_energy / total_energy],
-                ["-  write", smem_write_events, smem_write_energy, 100 * smem_write_energy / total_energy],
-                ["Global Memory", gmem_events, gmem_energy, 100 * gmem_energy / total_energy],
-                ["- read", gmem_read_events, gmem_read_energy, 100 * gmem_read_energy / total_energy],
-                ["- write", gmem_write_events, gmem_write_energy, 100 * gmem_write_energy / total_energy]
-
+                row("Compute", 'compute'),
+                row("DataMovement", 'data_movement'),
+                row("- iStore", 'istore'),
+                row("-  dispatch", 'istore_dispatch'),
+                row("-  operand write", 'istore_operand_write'),
+                row("- Execute", 'execute'),
+                row("- Pipeline", 'pipe'),
+                row("-  read", 'pipe_read'),
+                row("-  write", 'pipe_write'),
+                row("Streamer", 'streamer'),
+                row("- read", 'str_read'),
+                row("- write", 'str_write'),
+                row("Cache", 'cache'),
+                row("- L1", 'l1'),
+                row("-  read", 'l1_read'),
+                row("-  write", 'l1_write'),
+                row("- Shared Memory", 'smem'),
+                row("-  read", 'smem_read'),
+                row("-  write", 'smem_write'),
+                row("Memory", 'memory'),
+                row("- DMA", 'dma'),
+                row("-  read", 'dma_read'),
+                row("-  write", 'dma_write'),
+                row("- Global Memory", 'gmem'),
+                row("-  read", 'gmem_read'),
+                row("-  write", 'gmem_write'),
                 ]
 
         print(tabulate(data, headers="firstrow", floatfmt=".1f"))
@@ -175,12 +178,15 @@ class DomainFlowArchitectureMetrics:
         print(f'Memory channels     : {self.memory_channels}')
         print(f'Channel width       : {self.channel_width} bytes')
         print(f'Max Memory BW       : ' + scientific_format(self.max_memory_bw, "Bytes"))
+        print(f'Fabric size         : {self.fabric_size} x {self.fabric_size}')
+        print(f'iStore depth        : {self.istore_depth}')
+        print(f'DMA engines         : {self.dma_engines}')
 
         print()
-        print(f'Kernel Dispatch Configuration')
-        print(f'Threads per block   : {self.threads_per_block}')
-        print(f'Blocks per grid     : {self.blocks_per_grid}')
-        print(f'Total nr of Warps   : {self.nr_of_warps}')
+        print(f'Wavefront Schedule')
+        print(f'Tiles               : {self.tiles}')
+        print(f'Wavefronts          : {self.wavefronts}')
+        print(f'Fabric utilization  : {100 * self.fabric_utilization:.1f} %')
 
         print()
         print(f'Performance summary')
@@ -200,4 +206,3 @@ class DomainFlowArchitectureMetrics:
         print(f'Total FLOPS         : ' + scientific_format(self.total_flops, "FLOPS"))
         print(f'Power               : ' + scientific_format(self.power, "Watt"))
         print(f'FLOPS/Watt          : ' + scientific_format(self.flops_per_watt, "FLOPS/Watt"))
-
@@ -0,0 +1,198 @@
+import numpy as np
+from tabulate import tabulate
+
+from energysim.execution.event_metrics import EventMetrics
+from energysim.utils.scientific_format import scientific_format
+
+
+class DataFlowMachineMetrics(EventMetrics):
+    # tracking events and energy for a collection of categories
+    keys = (
+        'token_match',
+        'token_read',
+        'token_write',
+        'fetch',
+        'decode',
+        'execute',
+        'add',
+        'mul',
+        'fadd',
+        'fmul',
+        'fdiv',
+        'fma',
+        'l1_read',
+        'l1_write',
+        'l2_read',
+        'l2_write',
+        'l3_read',
+        'l3_write',
+        'mem_read',
+        'mem_write',
+        'matching',
+        'instruction',
+        'compute',
+        'l1',
+        'l2',
+        'l3',
+        'cache_read',
+        'cache_write',
+        'cache',
+        'memory',
+        'data_movement',
+        'total',
+    )
+    # rollup hierarchy, applied in order by rollup()
+    consolidation = (
+        ('matching', ['token_match', 'token_read', 'token_write']),
+        ('instruction', ['fetch', 'decode']),
+        ('compute', ['matching', 'instruction', 'execute']),
+        ('l1', ['l1_read', 'l1_write']),
+        ('l2', ['l2_read', 'l2_write']),
+        ('l3', ['l3_read', 'l3_write']),
+        ('cache_read', ['l1_read', 'l2_read', 'l3_read']),
+        ('cache_write', ['l1_write', 'l2_write', 'l3_write']),
+        ('cache', ['cache_read', 'cache_write']),
+        ('memory', ['mem_read', 'mem_write']),
+        ('data_movement', ['cache', 'memory']),
+        ('total', ['compute', 'data_movement']),
+    )
+    __slots__ = (
+        'core_clock_ghz',
+        'memory_clock_ghz',
+        'word_size',
+        'cache_line_size',
+        'memory_burst',
+        'memory_channels',
+        'channel_width',
+        'max_memory_bw',
+        'cam_size',
+        'token_match_rate',
+        'cam_cycle_ns',
+        'matching_utilization',
+        'elapsed_time',
+        'instr_per_sec',
+        'flops_per_sec',
+        'memory_transactions',
+        'memory_clock_ns',
+        'memops_per_sec',
+        'read_data',
+        'write_data',
+        'memory_read_bw',
+        'memory_write_bw',
+        'total_flops',
+        'power',
+        'flops_per_watt',
+    )
+
+    def __init__(self, name: str, events: np.ndarray = None, energy: np.ndarray = None):
+        super().__init__(name, events, energy)
+
+        # machine attributes
+        self.core_clock_ghz: float = 0
+        self.memory_clock_ghz: float = 0
+        self.word_size: int = 0
+        self.cache_line_size: int = 0
+        self.memory_burst: int = 0
+        self.memory_channels: int = 0
+        self.channel_width: int = 0
+        self.max_memory_bw: float = 0
+        self.cam_size: int = 0
+        self.token_match_rate: int = 0
+        self.cam_cycle_ns: float = 0
+        # fraction of the match cycles of the CAM that match a token
+        self.matching_utilization: float = 0
+        # performance metrics
+        self.elapsed_time: float = 0  # in seconds
+        self.instr_per_sec: float = 0  # instructions fired per second
+        self.flops_per_sec: float = 0  # floating point operations per second
+        self.memory_transactions: int = 0
+        self.memory_clock_ns: float = 0  # memory clock cycle in nano-seconds
+        self.memops_per_sec: float = 0  # memory operations per second
+        self.read_data: float = 0  # memory read in bytes
+        self.write_data: float = 0  # memory written in bytes
+        self.memory_read_bw: float = 0  # memory read bandwidth in bytes/sec
+        self.memory_write_bw: float = 0  # memory write bandwidth in bytes/sec
+        # normalized performance
+        self.total_flops: float = 0
+        self.power: float = 0
+        self.flops_per_watt: float = 0
+
+    def __repr__(self):
+        return f"DataFlowMachineMetrics(name='{self.name}', ...)"
+
+    def __str__(self):
+        return f"""
+        Name: {self.name}
+
+        """
+
+    def report(self):
+        total_events, total_energy = self.gather('total')
+
+        def row(label: str, key: str) -> list:
+            events, energy = self.gather(key)
+            return [label, events, energy, 100 * energy / total_energy]
+
+        print("Name: " + self.name)
+        data = [["event", "Occurrences", "pJ", "%"],
+                ["Total", "-", total_energy, 100.0],
+                row("Compute", 'compute'),
+                row("DataMovement", 'data_movement'),
+                row("- Matching", 'matching'),
+                row("-  CAM match", 'token_match'),
+                row("-  token read", 'token_read'),
+                row("-  token write", 'token_write'),
+                row("- Instruction", 'instruction'),
+                row("-  fetch", 'fetch'),
+                row("-  decode", 'decode'),
+                row("- Execute", 'execute'),
+                row("Cache", 'cache'),
+                row("- L1", 'l1'),
+                row("-  read", 'l1_read'),
+                row("-  write", 'l1_write'),
+                row("- L2", 'l2'),
+                row("-  read", 'l2_read'),
+                row("-  write", 'l2_write'),
+                row("- L3", 'l3'),
+                row("-  read", 'l3_read'),
+                row("-  write", 'l3_write'),
+                row("Memory", 'memory'),
+                row("- read", 'mem_read'),
+                row("- write", 'mem_write'),
+                ]
+
+        print(tabulate(data, headers="firstrow", floatfmt=".1f"))
+
+        print()
+        print(f'Machine Configuration')
+        print(f'Core clock          : {self.core_clock_ghz} GHz')
+        print(f'Memory clock        : {self.memory_clock_ghz} GHz')
+        print(f'Word size           : {self.word_size} bytes')
+        print(f'Cache line size     : {self.cache_line_size} bytes')
+        print(f'Memory burst        : {self.memory_burst} bytes')
+        print(f'Memory channels     : {self.memory_channels}')
+        print(f'Channel width       : {self.channel_width} bytes')
+        print(f'Max Memory BW       : ' + scientific_format(self.max_memory_bw, "Bytes"))
+        print(f'CAM size            : {self.cam_size} tokens')
+        print(f'Token match rate    : {self.token_match_rate} tokens/cycle')
+        print(f'CAM cycle           : ' + scientific_format(self.cam_cycle_ns * 1.0e-9, 'sec'))
+        print(f'Matching utilization: {100 * self.matching_utilization:.1f} %')
+
+        print()
+        print(f'Performance summary')
+        print(f'Elapsed time        : ' + scientific_format(self.elapsed_time, 'sec'))
+        print(f'IPS                 : ' + scientific_format(self.instr_per_sec, 'IPS/sec'))
+        print(f'FLOPS               : ' + scientific_format(self.flops_per_sec, 'FLOPS/sec'))
+        print(f'Memory Transactions : ' + scientific_format(self.memory_transactions, 'Memory Transactions'))
+        print(f'Memory clk          : ' + scientific_format(self.memory_clock_ns * 1.0e-9, 'sec'))
+        print(f'Data Size read      : ' + scientific_format(self.read_data, 'Bytes'))
+        print(f'Data Size written   : ' + scientific_format(self.write_data, 'Bytes'))
+        print(f'Memory Throughput   : ' + scientific_format(self.memops_per_sec, 'MemT/sec'))
+        print(f'Memory Read         : ' + scientific_format(self.memory_read_bw, 'Bytes/sec'))
+        print(f'Memory Write        : ' + scientific_format(self.memory_write_bw, 'Bytes/sec'))
+
+        print()
+        print(f'Normalized performance')
+        print(f'Total FLOPS         : ' + scientific_format(self.total_flops, "FLOPS"))
+        print(f'Power               : ' + scientific_format(self.power, "Watt"))
+        print(f'FLOPS/Watt          : ' + scientific_format(self.flops_per_watt, "FLOPS/Watt"))
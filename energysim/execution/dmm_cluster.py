@@ -1,6 +1,11 @@
 from tabulate import tabulate
 
+from energysim.utils.scientific_format import scientific_format
 
+
+# Energy and performance of an operator that is partitioned across the nodes of a distributed-memory cluster.
+# All energies are in pJ, summed over all nodes: compute and memory from the models of the nodes,
+# network from the collectives between the nodes, and storage from staging the operands.
 class DistributedMemoryCluster:
     def __init__(self, name: str):
         self.name = name
@@ -12,6 +17,41 @@ class DistributedMemoryCluster:
         self.storage_read = 0
         self.storage_write = 0
 
+        # cluster attributes
+        self.nodes: int = 0
+        self.topology: str = ''
+        self.partition: str = ''
+        # performance metrics, the phases of a node follow each other
+        self.storage_time: float = 0  # in seconds
+        self.compute_time: float = 0  # in seconds
+        self.communication_time: float = 0  # in seconds
+        self.elapsed_time: float = 0  # in seconds
+        self.network_data: float = 0  # bytes injected into the network by all nodes
+        self.storage_data: float = 0  # bytes read from, and written to, storage by all nodes
+        # normalized performance
+        self.total_flops: float = 0
+        self.flops_per_sec: float = 0
+        self.power: float = 0
+        self.flops_per_watt: float = 0
+
+    def __repr__(self):
+        return f"DistributedMemoryCluster(name='{self.name}', nodes={self.nodes}, ...)"
+
+    @property
+    def memory(self) -> float:
+        return self.memory_read + self.memory_write
+
+    @property
+    def network(self) -> float:
+        return self.network_read + self.network_write
+
+    @property
+    def storage(self) -> float:
+        return self.storage_read + self.storage_write
+
+    @property
+    def total(self) -> float:
+        return self.compute + self.memory + self.network + self.storage
 
     def report(self):
         print('Name: ' + self.name)
@@ -28,4 +68,28 @@ class DistributedMemoryCluster:
                 ["Storage", total_storage, 100 * total_storage / total_energy]
                 ]
 
-        print(tabulate(data, headers="firstrow", floatfmt=".1f"))
\ No newline at end of file
+        print(tabulate(data, headers="firstrow", floatfmt=".1f"))
+
+        if self.nodes == 0:
+            return
+        print()
+        print(f'Cluster Configuration')
+        print(f'Nodes               : {self.nodes}')
+        print(f'Topology            : {self.topology}')
+        print(f'Partition           : {self.partition}')
+
+        print()
+        print(f'Performance summary')
+        print(f'Elapsed time        : ' + scientific_format(self.elapsed_time, 'sec'))
+        print(f'- storage           : ' + scientific_format(self.storage_time, 'sec'))
+        print(f'- compute           : ' + scientific_format(self.compute_time, 'sec'))
+        print(f'- communication     : ' + scientific_format(self.communication_time, 'sec'))
+        print(f'Network data        : ' + scientific_format(self.network_data, 'Bytes'))
+        print(f'Storage data        : ' + scientific_format(self.storage_data, 'Bytes'))
+        print(f'FLOPS               : ' + scientific_format(self.flops_per_sec, 'FLOPS/sec'))
+
+        print()
+        print(f'Normalized performance')
+        print(f'Total FLOPS         : ' + scientific_format(self.total_flops, "FLOPS"))
+        print(f'Power               : ' + scientific_format(self.power, "Watt"))
+        print(f'FLOPS/Watt          : ' + scientific_format(self.flops_per_watt, "FLOPS/Watt"))
@@ -0,0 +1,152 @@
+import numpy as np
+
+
+# Base class of the architecture metrics.
+# Each metrics class declares the keys of the events it tracks once, as a class attribute,
+# and the key -> offset map is built when the class is defined. The events and energies
+# of an instance live in two fixed-layout float64 vectors, so record and consolidate are
+# index operations, and the metrics of many evaluations can share one 2D buffer.
+#
+# The rollup hierarchy is declared as data as well: consolidation is an ordered list of
+# (target key, source keys) steps. It is compiled into a 0/1 aggregation matrix, so that
+# rolling up one metrics vector, or a (N x keys) batch of them, is a single matrix product.
+class EventMetrics:
+    __slots__ = ('name', 'events', 'energy')
+
+    keys: tuple = ()
+    key_offset: dict = {}
+    consolidation: tuple = ()
+    aggregation: np.ndarray = np.zeros((0, 0))
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.key_offset = {key: offset for offset, key in enumerate(cls.keys)}
+        cls.aggregation = cls.compile_consolidation(cls.consolidation)
+
+    @classmethod
+    def compile_consolidation(cls, consolidation: tuple) -> np.ndarray:
+        """
+        Compile consolidation steps into an aggregation matrix.
+
+        The steps are applied in order, so a target can be the source of a later step,
+        for example, cache feeding data_movement. Column j of the matrix holds the
+        recorded keys that roll up into key j, including key j itself.
+
+        Args:
+            consolidation (tuple): (target key, [source keys]) steps
+
+        Returns:
+            (keys x keys) 0/1 matrix A, such that rolled up metrics are events @ A
+        """
+        aggregation = np.eye(len(cls.keys))
+        for target_key, source_keys in consolidation:
+            target = cls.key_offset[target_key]
+            sources = [cls.key_offset[key] for key in source_keys]
+            aggregation[:, target] += aggregation[:, sources].sum(axis=1)
+        return aggregation
+
+    @classmethod
+    def record_batch(cls, size: int, events: dict) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Record and roll up the events of a batch of evaluations.
+
+        Args:
+            size (int): number of evaluations N
+            events (dict): key -> (occurrences, occurrence energy), scalars or length N vectors
+
+        Returns:
+            (N x keys) events and energies with all consolidated keys filled in
+        """
+        recorded_events = np.zeros((size, len(cls.keys)))
+        recorded_energy = np.zeros((size, len(cls.keys)))
+        for key, (occurrences, occurrence_energy) in events.items():
+            offset = cls.key_offset[key]
+            recorded_events[:, offset] = occurrences
+            recorded_energy[:, offset] = occurrences * occurrence_energy
+        return cls.rollup_batch(recorded_events, recorded_energy)
+
+    @classmethod
+    def rollup_batch(cls, events: np.ndarray, energy: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Roll up a batch of recorded metrics.
+
+        Args:
+            events (np.ndarray): (N x keys) recorded events
+            energy (np.ndarray): (N x keys) recorded energies
+
+        Returns:
+            (N x keys) events and energies with all consolidated keys filled in
+        """
+        return events @ cls.aggregation, energy @ cls.aggregation
+
+    def __init__(self, name: str, events: np.ndarray = None, energy: np.ndarray = None):
+        self.name = name
+        # events and energy can be rows of a 2D buffer shared by a batch of metrics, see allocate
+        self.events: np.ndarray = np.zeros(len(self.keys)) if events is None else events
+        self.energy: np.ndarray = np.zeros(len(self.keys)) if energy is None else energy
+
+    @classmethod
+    def allocate(cls, names: list) -> tuple[list, np.ndarray, np.ndarray]:
+        """
+        Create a batch of metrics whose events and energies are rows of two 2D buffers.
+
+        Args:
+            names (list): name of each metrics instance
+
+        Returns:
+            list of metrics, (len(names) x len(keys)) events buffer, and energy buffer
+        """
+        events = np.zeros((len(names), len(cls.keys)))
+        energy = np.zeros((len(names), len(cls.keys)))
+        metrics = [cls(name, events[i], energy[i]) for i, name in enumerate(names)]
+        return metrics, events, energy
+
+    @classmethod
+    def stack(cls, metrics: list) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Stack the events and energies of independently created metrics into 2D arrays.
+
+        Args:
+            metrics (list): metrics of this class
+
+        Returns:
+            (len(metrics) x len(keys)) events and energy arrays
+        """
+        return np.stack([m.events for m in metrics]), np.stack([m.energy for m in metrics])
+
+    def rollup(self):
+        # in place, so that metrics allocated in a shared buffer roll up into their row
+        self.events[:] = self.events @ self.aggregation
+        self.energy[:] = self.energy @ self.aggregation
+
+    def record(self, key: str, occurrences: int, occurrence_energy: float):
+        offset = self.key_offset.get(key)
+        if offset is None:
+            print(f'Key {key} not found.')
+            return
+        self.events[offset] = occurrences
+        self.energy[offset] = occurrences * occurrence_energy
+
+    def consolidate(self, target_key: str, keys: []):
+        offsets = [self.key_offset[key] for key in keys if key in self.key_offset]
+        target = self.key_offset[target_key]
+        self.events[target] += self.events[offsets].sum()
+        self.energy[target] += self.energy[offsets].sum()
+
+    def gather(self, key: str) -> tuple[float, float]:
+        offset = self.key_offset.get(key)
+        if offset is None:
+            return 0, 0
+        return self.events[offset], self.energy[offset]
+
+    def occurrence(self, key: str) -> float:
+        offset = self.key_offset.get(key)
+        if offset is None:
+            return 0
+        return self.events[offset]
+
+    def occurrence_energy(self, key: str) -> float:
+        offset = self.key_offset.get(key)
+        if offset is None:
+            return 0
+        return self.energy[offset]
@@ -1,26 +1,68 @@
+import numpy as np
 from tabulate import tabulate
 
+from energysim.execution.event_metrics import EventMetrics
 from energysim.utils.scientific_format import scientific_format
 
 
-class ExecutionUnitMetrics:
-    def __init__(self, name: str):
-        self.name = name
-
-        # tracking events and energy for a collection of categories
-        self.keys: [] = [
-            'agu',
-            'alu',
-            'fpu',
-            'sfu',
-            'reg_read',
-            'reg_write',
-            'compute',
-            'data',
-            'total'
-        ]
-        self.events = dict.fromkeys(self.keys, 0)
-        self.energy = dict.fromkeys(self.keys, 0.0)
+class ExecutionUnitMetrics(EventMetrics):
+    # tracking events and energy for a collection of categories
+    keys = (
+        'agu',
+        'alu',
+        'fpu',
+        'sfu',
+        'reg_read',
+        'reg_write',
+        'compute',
+        'data',
+        'total',
+    )
+    # rollup hierarchy, applied in order by rollup()
+    consolidation = (
+        ('compute', ['agu', 'alu', 'fpu', 'sfu']),
+        ('data', ['reg_read', 'reg_write']),
+        ('total', ['compute', 'data']),
+    )
+    __slots__ = (
+        'core_clock_ghz',
+        'word_size',
+        'agus',
+        'alus',
+        'fpus',
+        'sfus',
+        'elapsed_time',
+        'agu_ops_per_sec',
+        'alu_ops_per_sec',
+        'fpu_ops_per_sec',
+        'sfu_ops_per_sec',
+        'read_data',
+        'write_data',
+        'total_ops',
+        'total_ops_energy',
+        'ops_per_sec',
+        'total_aops',
+        'total_aops_energy',
+        'aops_per_sec',
+        'total_iops',
+        'total_iops_energy',
+        'iops_per_sec',
+        'total_flops',
+        'total_flops_energy',
+        'flops_per_sec',
+        'total_sfops',
+        'total_sfops_energy',
+        'sfops_per_sec',
+        'power',
+        'ops_per_watt',
+        'aops_per_watt',
+        'iops_per_watt',
+        'flops_per_watt',
+        'sfops_per_watt',
+    )
+
+    def __init__(self, name: str, events: np.ndarray = None, energy: np.ndarray = None):
+        super().__init__(name, events, energy)
 
         # machine attributes
         self.core_clock_ghz: float = 0
@@ -75,50 +117,22 @@ class ExecutionUnitMetrics:
 
         """
 
-    def record(self, key: str, occurrences: int, occurrence_energy: float):
-        if key in self.keys:
-            self.events[key] = occurrences
-            self.energy[key] = occurrences * occurrence_energy
-        else:
-            print(f'Key {key} not found.')
-
-    def consolidate(self, target_key: str, keys: []):
-        for key in keys:
-            occurrences: int = self.events.get(key, 0)
-            occurrence_energy: float = self.energy.get(key, 0.0)
-            # print(f'target_key: {target_key}, key: {key}, occurrences: {occurrences}, energy: {occurrence_energy}')
-            self.events[target_key] += occurrences
-            self.energy[target_key] += occurrence_energy
-
-    def gather(self, key: str) -> tuple[int, float]:
-        occurrences = self.events.get(key, 0)
-        occurrence_energy = self.energy.get(key, 0)
-        return occurrences, occurrence_energy
-
-    def occurrence(self, key: str) -> int:
-        occurrences = self.events.get(key, 0)
-        return occurrences
-
-    def occurrence_energy(self, key: str) -> float:
-        occurrence_energy = self.energy.get(key, 0)
-        return occurrence_energy
-
     def report(self, header: str):
-        agu_events = self.events['agu']
-        alu_events = self.events['alu']
-        fpu_events = self.events['fpu']
-        sfu_events = self.events['sfu']
-        reg_read_events = self.events['reg_read']
-        reg_write_events = self.events['reg_write']
+        agu_events = self.occurrence('agu')
+        alu_events = self.occurrence('alu')
+        fpu_events = self.occurrence('fpu')
+        sfu_events = self.occurrence('sfu')
+        reg_read_events = self.occurrence('reg_read')
+        reg_write_events = self.occurrence('reg_write')
         compute_events = agu_events + alu_events + fpu_events + sfu_events
         data_events = reg_read_events + reg_write_events
 
-        agu_energy = self.energy['agu']
-        alu_energy = self.energy['alu']
-        fpu_energy = self.energy['fpu']
-        sfu_energy = self.energy['sfu']
-        register_read_energy = self.energy['reg_read']
-        register_write_energy = self.energy['reg_write']
+        agu_energy = self.occurrence_energy('agu')
+        alu_energy = self.occurrence_energy('alu')
+        fpu_energy = self.occurrence_energy('fpu')
+        sfu_energy = self.occurrence_energy('sfu')
+        register_read_energy = self.occurrence_energy('reg_read')
+        register_write_energy = self.occurrence_energy('reg_write')
         compute_energy = agu_energy + alu_energy + fpu_energy + sfu_energy
         data_energy = register_read_energy + register_write_energy
 
@@ -0,0 +1,58 @@
+import pandas as pd
+from tabulate import tabulate
+
+from energysim.utils.scientific_format import scientific_format
+
+
+# Energy and performance of a network of operators, a layer graph evaluated on a machine model.
+# The energies are in pJ, the latencies in seconds, and the memory sizes in bytes.
+class NetworkEstimate:
+    def __init__(self, name: str, layers: pd.DataFrame):
+        self.name = name
+        # a row per layer, in the order of the schedule
+        self.layers: pd.DataFrame = layers
+
+        # end-to-end performance metrics
+        self.total_energy: float = 0
+        self.serial_latency: float = 0          # the layers execute one after the other
+        self.critical_path_latency: float = 0   # the independent layers execute concurrently
+        self.critical_path: list = []
+        # memory footprint
+        self.weight_memory: int = 0
+        self.peak_activation_memory: int = 0
+        # evaluations of the layer models, and evaluations reused from the memo
+        self.evaluations: int = 0
+        self.memo_hits: int = 0
+        # operators of the source of the network without a model, as (operator, reason)
+        self.unmapped: list = []
+
+    def __repr__(self):
+        return f"NetworkEstimate(name='{self.name}', layers={len(self.layers)}, ...)"
+
+    @property
+    def peak_memory(self) -> int:
+        return self.weight_memory + self.peak_activation_memory
+
+    def report(self):
+        print('Name: ' + self.name)
+        data = [["layer", "op", "pJ", "%", "latency"]]
+        for row in self.layers.itertuples():
+            data.append([row.name, row.op, row.energy, 100 * row.energy / self.total_energy,
+                         scientific_format(row.latency, 'sec')])
+        print(tabulate(data, headers="firstrow", floatfmt=".1f"))
+
+        print()
+        print(f'Performance summary')
+        print(f'Total energy        : ' + scientific_format(self.total_energy * 1.0e-12, 'Joules'))
+        print(f'Serial latency      : ' + scientific_format(self.serial_latency, 'sec'))
+        print(f'Critical path       : ' + scientific_format(self.critical_path_latency, 'sec'))
+        print(f'                      ' + ' -> '.join(self.critical_path))
+        print(f'Peak memory         : ' + scientific_format(self.peak_memory, 'Bytes'))
+        print(f'- weights           : ' + scientific_format(self.weight_memory, 'Bytes'))
+        print(f'- activations       : ' + scientific_format(self.peak_activation_memory, 'Bytes'))
+        print(f'Layer evaluations   : {self.evaluations}, memoized {self.memo_hits}')
+        if self.unmapped:
+            print()
+            print(f'Unmapped operators')
+            for _, reason in self.unmapped:
+                print(f'  {reason}')
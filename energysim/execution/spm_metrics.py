@@ -1,45 +1,80 @@
+import numpy as np
 from tabulate import tabulate
 
+from energysim.execution.event_metrics import EventMetrics
 from energysim.utils.scientific_format import scientific_format
 
 
-class StoredProgramMachineMetrics:
-    def __init__(self, name: str):
-        self.name = name
-
-        # tracking events and energy for a collection of categories
-        self.keys:[] = [
-            'instruction',
-            'execute',
-            'add',
-            'mul',
-            'fadd',
-            'fmul',
-            'fdiv',
-            'fma',
-            'register_read',
-            'register_write',
-            'l1_read',
-            'l1_write',
-            'l2_read',
-            'l2_write',
-            'l3_read',
-            'l3_write',
-            'dram_read',
-            'dram_write',
-            'compute',
-            'data_movement',
-            'cache_read',
-            'cache_write',
-            'l1',
-            'l2',
-            'l3',
-            'cache',
-            'memory',
-            'total'
-        ]
-        self.events = dict.fromkeys(self.keys, 0)
-        self.energy = dict.fromkeys(self.keys, 0.0)
+class StoredProgramMachineMetrics(EventMetrics):
+    # tracking events and energy for a collection of categories
+    keys = (
+        'instruction',
+        'execute',
+        'add',
+        'mul',
+        'fadd',
+        'fmul',
+        'fdiv',
+        'fma',
+        'register_read',
+        'register_write',
+        'l1_read',
+        'l1_write',
+        'l2_read',
+        'l2_write',
+        'l3_read',
+        'l3_write',
+        'dram_read',
+        'dram_write',
+        'compute',
+        'data_movement',
+        'cache_read',
+        'cache_write',
+        'l1',
+        'l2',
+        'l3',
+        'cache',
+        'memory',
+        'total',
+    )
+    # rollup hierarchy, applied in order by rollup()
+    consolidation = (
+        ('compute', ['instruction', 'execute', 'register_read', 'register_write']),
+        ('l1', ['l1_read', 'l1_write']),
+        ('l2', ['l2_read', 'l2_write']),
+        ('l3', ['l3_read', 'l3_write']),
+        ('cache_read', ['l1_read', 'l2_read', 'l3_read']),
+        ('cache_write', ['l1_write', 'l2_write', 'l3_write']),
+        ('cache', ['cache_read', 'cache_write']),
+        ('memory', ['dram_read', 'dram_write']),
+        ('data_movement', ['cache', 'memory']),
+        ('total', ['compute', 'data_movement']),
+    )
+    __slots__ = (
+        'core_clock_ghz',
+        'memory_clock_ghz',
+        'word_size',
+        'cache_line_size',
+        'memory_burst',
+        'memory_channels',
+        'channel_width',
+        'elapsed_time',
+        'instr_per_sec',
+        'flops_per_sec',
+        'memory_transactions',
+        'memory_clock_ns',
+        'memops_per_sec',
+        'read_data',
+        'write_data',
+        'memory_read_bw',
+        'memory_write_bw',
+        'total_flops',
+        'power',
+        'flops_per_watt',
+    )
+
+    def __init__(self, name: str, events: np.ndarray = None, energy: np.ndarray = None):
+        super().__init__(name, events, energy)
 
         # machine attributes
         self.core_clock_ghz: float = 0
@@ -74,45 +109,17 @@ class StoredProgramMachineMetrics:
         
         """
 
-    def record(self, key: str, occurrences: int, occurrence_energy: float):
-        if key in self.keys:
-            self.events[key] = occurrences
-            self.energy[key] = occurrences * occurrence_energy
-        else:
-            print(f'Key {key} not found.')
-
-    def consolidate(self, target_key: str, keys: []):
-        for key in keys:
-            occurrences: int = self.events.get(key, 0)
-            occurrence_energy: float = self.energy.get(key, 0.0)
-            #print(f'target_key: {target_key}, key: {key}, occurrences: {occurrences}, energy: {occurrence_energy}')
-            self.events[target_key] += occurrences
-            self.energy[target_key] += occurrence_energy
-
-    def gather(self, key: str) -> tuple[int, float]:
-        occurrences = self.events.get(key, 0)
-        occurrence_energy = self.energy.get(key, 0)
-        return occurrences, occurrence_energy
-
-    def occurrence(self, key: str) -> int:
-        occurrences = self.events.get(key, 0)
-        return occurrences
-
-    def occurrence_energy(self, key: str) -> float:
-        occurrence_energy = self.energy.get(key, 0)
-        return occurrence_energy
-
     def report(self):
-        instruction_events = self.events['instruction']
-        execute_events = self.events['execute']
-        register_read_events = self.events['register_read']
-        register_write_events = self.events['register_write']
+        instruction_events = self.occurrence('instruction')
+        execute_events = self.occurrence('execute')
+        register_read_events = self.occurrence('register_read')
+        register_write_events = self.occurrence('register_write')
         compute_events = instruction_events + execute_events + register_read_events + register_write_events
 
-        instruction_energy = self.energy['instruction']
-        execute_energy = self.energy['execute']
-        register_read_energy = self.energy['register_read']
-        register_write_energy = self.energy['register_write']
+        instruction_energy = self.occurrence_energy('instruction')
+        execute_energy = self.occurrence_energy('execute')
+        register_read_energy = self.occurrence_energy('register_read')
+        register_write_energy = self.occurrence_energy('register_write')
         compute_energy = instruction_energy + execute_energy + register_read_energy + register_write_energy
 
         l1_read_events, l1_read_energy = self.gather('l1_read')
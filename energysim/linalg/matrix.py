@@ -1,6 +1,7 @@
-import copy
 import typing
 
+import numpy as np
+
 class Matrix:
     """
     A class representing a two-dimensional matrix with various operations and access methods.
@@ -11,6 +12,9 @@ class Matrix:
     - Type checking and validation
     - Deep copying
     - Flexible indexing
+
+    The elements are stored in a contiguous, row-major float64 NumPy array,
+    and slicing returns a Matrix that is a view of the rows of the original.
     """
     
     def __init__(self, 
@@ -32,20 +36,42 @@ class Matrix:
         """
         if data is not None:
             # Validate input data
-            if not data:
-                self._data = []
+            if len(data) == 0:
+                self._data = np.empty((0, 0))
                 return
             
             # Check that all rows have the same length
-            row_lengths = set(len(row) for row in data)
-            if len(row_lengths) > 1:
-                raise ValueError("All rows must have the same length")
+            if not isinstance(data, np.ndarray):
+                row_lengths = set(len(row) for row in data)
+                if len(row_lengths) > 1:
+                    raise ValueError("All rows must have the same length")
+            elif data.ndim != 2:
+                raise ValueError("Matrix data must be two-dimensional")
             
-            # Deep copy the input data to prevent external modifications
-            self._data = [list(row) for row in data]
+            # Copy the input data to prevent external modifications
+            self._data = np.array(data, dtype=np.float64)
         else:
             # Create matrix with specified dimensions and fill value
-            self._data = [[fill_value for _ in range(cols)] for _ in range(rows)]
+            self._data = np.full((rows, cols), fill_value, dtype=np.float64)
+
+    @classmethod
+    def _view(cls, data: np.ndarray) -> 'Matrix':
+        """
+        Wrap a 2D array without copying it
+        """
+        matrix = cls.__new__(cls)
+        matrix._data = data
+        return matrix
+
+    @property
+    def values(self) -> np.ndarray:
+        """
+        The underlying (rows x columns) float64 array, not a copy
+        
+        Returns:
+            np.ndarray: Matrix elements
+        """
+        return self._data
     
     def __getitem__(self, key):
         """
@@ -55,8 +81,8 @@ class Matrix:
         - Slice: matrix[1:3] returns submatrix
         """
         if isinstance(key, slice):
-            # Return a new Matrix with sliced rows
-            return Matrix(self._data[key])
+            # Return a Matrix that views the sliced rows
+            return Matrix._view(self._data[key])
         
         return self._data[key]
     
@@ -64,11 +90,11 @@ class Matrix:
         """
         Allows setting entire rows or specific elements
         """
-        if isinstance(value, list):
+        if isinstance(value, (list, np.ndarray)):
             # Set entire row
-            if len(value) != len(self._data[0]):
+            if len(value) != self._data.shape[1]:
                 raise ValueError("Row length must match matrix width")
-            self._data[key] = list(value)
+            self._data[key] = value
         else:
             # Set specific element
             self._data[key] = value
@@ -88,7 +114,7 @@ class Matrix:
         Returns:
             Matrix: A new independent matrix
         """
-        return Matrix(copy.deepcopy(self._data))
+        return Matrix._view(self._data.copy())
     
     @property
     def shape(self):
@@ -98,9 +124,7 @@ class Matrix:
         Returns:
             tuple: (rows, columns)
         """
-        if not self._data:
-            return (0, 0)
-        return (len(self._data), len(self._data[0]))
+        return self._data.shape
     
     def get(self, row: int, col: int) -> float:
         """
@@ -116,8 +140,8 @@ class Matrix:
         Raises:
             IndexError: If indices are out of bounds
         """
-        if 0 <= row < len(self._data) and 0 <= col < len(self._data[0]):
-            return self._data[row][col]
+        if 0 <= row < self._data.shape[0] and 0 <= col < self._data.shape[1]:
+            return float(self._data[row, col])
         raise IndexError("Matrix indices out of range")
     
     def set(self, row: int, col: int, value: float):
@@ -132,8 +156,8 @@ class Matrix:
         Raises:
             IndexError: If indices are out of bounds
         """
-        if 0 <= row < len(self._data) and 0 <= col < len(self._data[0]):
-            self._data[row][col] = value
+        if 0 <= row < self._data.shape[0] and 0 <= col < self._data.shape[1]:
+            self._data[row, col] = value
         else:
             raise IndexError("Matrix indices out of range")
     
@@ -144,12 +168,8 @@ class Matrix:
         Returns:
             Matrix: Transposed matrix
         """
-        if not self._data:
-            return Matrix()
-        
-        # Create transposed matrix
-        transposed = list(map(list, zip(*self._data)))
-        return Matrix(transposed)
+        # Create transposed matrix, contiguous in its own row-major order
+        return Matrix._view(np.ascontiguousarray(self._data.T))
     
     def __add__(self, other):
         """
@@ -167,9 +187,4 @@ class Matrix:
         if self.shape != other.shape:
             raise ValueError("Matrices must have the same dimensions")
         
-        result = []
-        for i in range(self.shape[0]):
-            row = [self._data[i][j] + other._data[i][j] for j in range(self.shape[1])]
-            result.append(row)
-        
-        return Matrix(result)
+        return Matrix._view(self._data + other._data)
@@ -1,6 +1,7 @@
-import typing
-import copy
 import math
+import typing
+
+import numpy as np
 
 class Vector:
     """
@@ -12,6 +13,9 @@ class Vector:
     - Type checking and validation
     - Deep copying
     - Flexible indexing
+
+    The elements are stored in a contiguous float64 NumPy array,
+    and slicing returns a Vector that is a view of the original.
     """
     
     def __init__(self, 
@@ -30,19 +34,38 @@ class Vector:
             ValueError: If input data is invalid
         """
         if data is not None:
-            # Deep copy the input data to prevent external modifications
-            self._data = list(data)
+            # Copy the input data to prevent external modifications
+            self._data = np.array(data, dtype=np.float64).reshape(-1)
         else:
             # Create vector with specified size and fill value
-            self._data = [fill_value] * size
+            self._data = np.full(size, fill_value, dtype=np.float64)
+
+    @classmethod
+    def _view(cls, data: np.ndarray) -> 'Vector':
+        """
+        Wrap a 1D array without copying it
+        """
+        vector = cls.__new__(cls)
+        vector._data = data
+        return vector
+
+    @property
+    def values(self) -> np.ndarray:
+        """
+        The underlying float64 array, not a copy
+        
+        Returns:
+            np.ndarray: Vector elements
+        """
+        return self._data
     
     def __getitem__(self, key):
         """
         Supports indexing and slicing
         """
         if isinstance(key, slice):
-            # Return a new Vector with sliced elements
-            return Vector(self._data[key])
+            # Return a Vector that views the sliced elements
+            return Vector._view(self._data[key])
         
         return self._data[key]
     
@@ -67,7 +90,7 @@ class Vector:
         Returns:
             Vector: A new independent vector
         """
-        return Vector(copy.deepcopy(self._data))
+        return Vector._view(self._data.copy())
     
     @property
     def size(self):
@@ -93,7 +116,7 @@ class Vector:
             IndexError: If index is out of bounds
         """
         if 0 <= index < len(self._data):
-            return self._data[index]
+            return float(self._data[index])
         raise IndexError("Vector index out of range")
     
     def set(self, index: int, value: float):
@@ -128,7 +151,7 @@ class Vector:
         if self.size != other.size:
             raise ValueError("Vectors must have the same length")
         
-        return sum(a * b for a, b in zip(self._data, other._data))
+        return float(np.dot(self._data, other._data))
     
     def magnitude(self) -> float:
         """
@@ -137,6 +160,6 @@ class Vector:
         Returns:
             float: Vector magnitude
         """
-        return math.sqrt(sum(x * x for x in self._data))
+        return math.sqrt(self.dot(self))
 
 
@@ -0,0 +1,272 @@
+import warnings
+from statistics import NormalDist
+
+import numpy as np
+
+from energysim.database.spm_energy import StoredProgramMachineEnergy
+from energysim.execution.spm_metrics import StoredProgramMachineMetrics
+from energysim.models.cache_simulator import CacheHierarchy
+from energysim.models.loop_nest import LoopNest
+
+
+# Sampled simulation of a cache hierarchy, for operators whose full trace is too long to simulate.
+#
+# Set sampling: the sets of the first level are split in groups, and only the accesses of a random
+# subset of the groups are simulated. Set s of a lower level only receives the lines of set s % l1_sets
+# of the first level, so, when the set counts of the levels are multiples of each other, every sampled
+# group is an exact slice of the whole hierarchy. The counts of the slice scale with the number of groups.
+#
+# Time sampling: the iteration space is cut in periods, and one window per period, at a random offset,
+# is simulated after a warm-up that refreshes the stale cache state left by the previous window.
+# The counts per reference of the windows scale to the references of the full trace.
+#   - the warm-up covers the reuse span of the nest, the longest distance between two uses of an element,
+#     or a window would miss on lines the full trace still holds; a shorter warm-up falls back to set sampling,
+#     with a warning that names the warm-up it needs
+#   - the first iteration of the outermost loop loads the elements that the whole nest reuses, those
+#     misses happen once, so that iteration is simulated in full, and its counts are added exactly
+#   - the dirty lines left by the warm-up are written back before the window, and the dirty lines of the
+#     window after it, as the full trace writes back its dirty lines at its end; a line that the warm-up
+#     and the window both dirty is a memory write of an earlier window, and is not counted again
+#
+# The sampled groups, or the windows, are the units of the estimate: the spread of their counts
+# gives the confidence intervals of the event counts and of the hit rates of the levels.
+
+def _z(confidence: float) -> float:
+    return NormalDist().inv_cdf(0.5 + confidence / 2.0)
+
+
+def _ratio_estimate(numerators: np.ndarray, denominators: np.ndarray, fraction: float) -> tuple[float, float]:
+    # ratio sum(y)/sum(x) of a sample of units, and its standard error, with the finite population correction
+    n = len(numerators)
+    ratio = numerators.sum() / denominators.sum() if denominators.sum() > 0 else 0.0
+    if n < 2:
+        return ratio, 0.0
+    residuals = numerators - ratio * denominators
+    variance = (1.0 - fraction) * residuals.var(ddof=1) / (n * denominators.mean() ** 2)
+    return ratio, float(np.sqrt(variance))
+
+
+class SampledCacheEvents:
+    def __init__(self, name: str, estimates: dict, errors: dict, hit_rates: dict, hit_rate_errors: dict,
+                 sampled_references: int, total_references: int, confidence: float, method: str = 'sets'):
+        self.name = name
+        self.method = method                    # 'time' for windows, 'sets' for groups of sets
+        self.estimates = estimates              # extrapolated count of every event
+        self.errors = errors                    # standard error of the count of every event
+        self.hit_rates = hit_rates              # extrapolated hit rate of every level
+        self.hit_rate_errors = hit_rate_errors
+        self.sampled_references = sampled_references
+        self.total_references = total_references
+        self.confidence = confidence
+
+    def __repr__(self):
+        return f"SampledCacheEvents(name='{self.name}', sampled={self.sampled_fraction:.4f})"
+
+    def __str__(self):
+        lines = [f"{self.name}: simulated {self.sampled_references} of {self.total_references} references "
+                 f"sampled by {self.method}, {100 * self.confidence:.0f}% confidence intervals"]
+        for key, estimate in self.estimates.items():
+            low, high = self.interval(key)
+            lines.append(f"  {key:<12} {estimate:>16.0f}  [{low:.0f}, {high:.0f}]")
+        for level, hit_rate in self.hit_rates.items():
+            low, high = self.hit_rate_interval(level)
+            lines.append(f"  {level} hit rate  {hit_rate:>16.4f}  [{low:.4f}, {high:.4f}]")
+        return '\n'.join(lines)
+
+    @property
+    def sampled_fraction(self) -> float:
+        return self.sampled_references / self.total_references if self.total_references > 0 else 0.0
+
+    def interval(self, key: str) -> tuple[float, float]:
+        half_width = _z(self.confidence) * self.errors[key]
+        return max(self.estimates[key] - half_width, 0.0), self.estimates[key] + half_width
+
+    def hit_rate_interval(self, level: str) -> tuple[float, float]:
+        half_width = _z(self.confidence) * self.hit_rate_errors[level]
+        return max(self.hit_rates[level] - half_width, 0.0), min(self.hit_rates[level] + half_width, 1.0)
+
+    def events(self) -> dict:
+        """
+        Extrapolated event counts in the keys of StoredProgramMachineMetrics.
+
+        :return: dict of event name to count
+        """
+        return {key: int(round(estimate)) for key, estimate in self.estimates.items()}
+
+    def record(self, spm_metrics: 'StoredProgramMachineMetrics', attributes: 'StoredProgramMachineEnergy'):
+        """
+        Record the extrapolated events, with their energies, in the metrics of an operator.
+
+        :param spm_metrics: metrics to record into
+        :param attributes: SPM energy set
+        """
+        for key, count in self.events().items():
+            spm_metrics.record(key, count, getattr(attributes, key))
+
+
+def _set_filter(hierarchy: 'CacheHierarchy', sampled_groups: np.ndarray):
+    first = hierarchy.levels[0]
+    sampled = np.zeros(first.nr_sets, dtype=bool)
+    sampled[sampled_groups] = True
+
+    def accept(trace):
+        for addresses, writes in trace:
+            keep = sampled[(addresses // first.line_size) % first.nr_sets]
+            yield addresses[keep], writes[keep]
+    return accept
+
+
+def _windows(start: int, iterations: int, nr_windows: int, window: int, warmup: int,
+             rng: np.random.Generator) -> list:
+    # one window per period of [start, iterations), at a random offset that leaves room for its warm-up
+    period = (iterations - start) // nr_windows
+    offsets = rng.integers(warmup, period - window + 1, size=nr_windows)
+    return [(start + w * period + offset - warmup, start + w * period + offset) for w, offset in enumerate(offsets)]
+
+
+def _simulate_range(hierarchy: 'CacheHierarchy', nest: 'LoopNest', accept, start: int, stop: int,
+                    chunk_size: int) -> int:
+    # simulate the sampled sets of a range of iterations, and return the references of the range
+    references = 0
+    for addresses, writes in nest.trace(chunk_size, start, stop):
+        references += len(addresses)
+        hierarchy.simulate(accept([(addresses, writes)]), flush=False)
+    return references
+
+
+def _dirty_lines(hierarchy: 'CacheHierarchy') -> np.ndarray:
+    # line numbers of the dirty lines of every level
+    lines = []
+    for level in hierarchy.levels:
+        sets, ways = np.nonzero(level.dirty)
+        lines.append(level.tags[sets, ways] * level.nr_sets + sets)
+    return np.unique(np.concatenate(lines))
+
+
+def _group_counts(hierarchy: 'CacheHierarchy', groups: int) -> dict:
+    # the events, and the accesses and misses of every level, per group of sets
+    counts = hierarchy.events_by_group(groups)
+    for level in hierarchy.levels:
+        group = np.arange(level.nr_sets) % groups
+        counts[level.name + '_accesses'] = np.bincount(group, weights=level.set_reads + level.set_writes,
+                                                       minlength=groups)
+        counts[level.name + '_misses'] = np.bincount(group, weights=level.set_misses, minlength=groups)
+    return counts
+
+
+def simulate_sampled(nest: 'LoopNest', hierarchy: 'CacheHierarchy', set_fraction: float = 0.25,
+                     windows: int = None, window_iterations: int = None, warmup_iterations: int = None,
+                     confidence: float = 0.95, seed: int = None, chunk_size: int = 1 << 20) -> 'SampledCacheEvents':
+    """
+    Estimate the cache and memory events of a loop nest from a sample of its trace.
+
+    :param nest: loop nest of the operator
+    :param hierarchy: cache hierarchy, the set counts of its levels must be multiples of the first level's
+    :param set_fraction: fraction of the sets of the first level to simulate, 1.0 simulates all sets
+    :param windows: number of time windows, None simulates the full iteration space
+    :param window_iterations: iterations of a window, required with windows
+    :param warmup_iterations: iterations of the warm-up before a window, defaults to the longer of
+        window_iterations and the reuse span of the nest, a warm-up shorter than the reuse span falls back
+        to set sampling with a warning
+    :param confidence: confidence level of the intervals
+    :param seed: seed of the selection of the groups and of the window offsets
+    :param chunk_size: iterations per trace chunk
+    :return: SampledCacheEvents, with method 'time' when the estimate comes from windows
+    """
+    if windows is not None:
+        if window_iterations is None or window_iterations < 1 or windows < 1:
+            raise ValueError(f'Time sampling needs windows and window_iterations of at least 1, '
+                             f'got windows={windows}, window_iterations={window_iterations}')
+        if warmup_iterations is None:
+            warmup_iterations = max(window_iterations, nest.reuse_span())
+        if warmup_iterations < 0:
+            raise ValueError(f'warmup_iterations must not be negative, got {warmup_iterations}')
+
+    rng = np.random.default_rng(seed)
+    groups = hierarchy.levels[0].nr_sets
+    nr_sampled = min(max(int(round(set_fraction * groups)), 1), groups)
+    sampled_groups = np.sort(rng.choice(groups, size=nr_sampled, replace=False))
+    accept = _set_filter(hierarchy, sampled_groups)
+    hierarchy.reset()
+    hierarchy.events_by_group(groups)   # reject set counts that do not split in groups before simulating
+    total_references = nest.references()
+
+    cold = nest.cold_iterations()
+    time_sampled = windows is not None
+    if time_sampled and warmup_iterations < nest.reuse_span():
+        warnings.warn(f'warmup_iterations={warmup_iterations} is shorter than the reuse span of the nest, '
+                      f'time sampling needs a warm-up of at least {nest.reuse_span()} iterations, '
+                      f'falling back to set sampling', stacklevel=2)
+        time_sampled = False
+    elif time_sampled and cold + windows * (window_iterations + warmup_iterations) >= nest.iterations:
+        warnings.warn(f'{windows} windows of {window_iterations} iterations after a warm-up of {warmup_iterations} '
+                      f'do not fit in the {nest.iterations - cold} iterations after the cold iterations, '
+                      f'falling back to set sampling', stacklevel=2)
+        time_sampled = False
+
+    if time_sampled:
+        # the counts of the first iteration of the outermost loop are exact
+        cold_references = _simulate_range(hierarchy, nest, accept, 0, cold, chunk_size)
+        hierarchy.flush()
+        exact = {key: value[sampled_groups].sum() * groups / nr_sampled
+                 for key, value in _group_counts(hierarchy, groups).items()}
+
+        # the units are the windows, the counts of a window scale with the references of the window
+        units = []
+        sizes = []
+        for warmup_start, window_start in _windows(cold, nest.iterations, windows, window_iterations,
+                                                   warmup_iterations, rng):
+            _simulate_range(hierarchy, nest, accept, warmup_start, window_start, chunk_size)
+            dirty = _dirty_lines(hierarchy)
+            hierarchy.flush()
+            before = _group_counts(hierarchy, groups)
+            references = _simulate_range(hierarchy, nest, accept, window_start, window_start + window_iterations,
+                                         chunk_size)
+            # a line dirty before and after the start of the window is written back once, by the window
+            # that dirtied it first
+            straddling = len(np.intersect1d(dirty, _dirty_lines(hierarchy), assume_unique=True))
+            hierarchy.flush()
+            after = _group_counts(hierarchy, groups)
+            unit = {key: (after[key] - before[key])[sampled_groups].sum() for key in after}
+            unit['dram_write'] -= straddling
+            units.append(unit)
+            sizes.append(references)
+        counts = {key: np.array([unit[key] for unit in units], dtype=np.float64) for key in units[0]}
+        sizes = np.array(sizes, dtype=np.float64)
+        fraction = sizes.sum() / (total_references - cold_references)
+        population = (total_references - cold_references) * groups / nr_sampled
+        sampled_references = int((counts[hierarchy.levels[0].name + '_accesses'].sum() +
+                                  exact[hierarchy.levels[0].name + '_accesses'] * nr_sampled / groups))
+    else:
+        # the units are the sampled groups of sets
+        hierarchy.simulate(accept(nest.trace(chunk_size)))
+        counts = {key: value[sampled_groups].astype(np.float64)
+                  for key, value in _group_counts(hierarchy, groups).items()}
+        exact = {key: 0.0 for key in counts}
+        sizes = np.ones(nr_sampled)
+        fraction = nr_sampled / groups
+        population = groups
+        sampled_references = int(counts[hierarchy.levels[0].name + '_accesses'].sum())
+
+    estimates = {}
+    errors = {}
+    for key in hierarchy.events():
+        ratio, error = _ratio_estimate(counts[key], sizes, fraction)
+        estimates[key] = exact[key] + ratio * population
+        errors[key] = error * population
+
+    hit_rates = {}
+    hit_rate_errors = {}
+    for level in hierarchy.levels:
+        misses, accesses = level.name + '_misses', level.name + '_accesses'
+        miss_rate, error = _ratio_estimate(counts[misses], counts[accesses], fraction)
+        sampled_accesses = _ratio_estimate(counts[accesses], sizes, fraction)[0] * population
+        total_accesses = exact[accesses] + sampled_accesses
+        share = sampled_accesses / total_accesses if total_accesses > 0 else 1.0
+        hit_rates[level.name] = 1.0 - (exact[misses] + miss_rate * sampled_accesses) / total_accesses \
+            if total_accesses > 0 else 1.0 - miss_rate
+        hit_rate_errors[level.name] = error * share
+
+    return SampledCacheEvents(repr(nest), estimates, errors, hit_rates, hit_rate_errors,
+                              sampled_references, total_references, confidence,
+                              'time' if time_sampled else 'sets')
@@ -0,0 +1,311 @@
+import numpy as np
+
+from energysim.database.spm_energy import StoredProgramMachineEnergy
+from energysim.execution.spm_metrics import StoredProgramMachineMetrics
+from energysim.models.spm_configuration import StoredProgramMachineConfiguration
+
+
+# Trace-driven simulation of a hierarchy of set-associative, write-back, write-allocate LRU caches.
+#
+# A level keeps its tag store in arrays of shape (sets, ways): the tag of the line held by each way,
+# the time of its last use, which orders the ways for LRU replacement, and its dirty bit, see cache_architecture.md.
+# Addresses are processed in chunks, and no Python object is created per access:
+#   - the accesses of a chunk are grouped by set, preserving their order, since sets do not interact
+#   - accesses that must hit, because they repeat a line of one of the last few accesses of their set,
+#     are folded into the access they repeat
+#   - the remaining accesses are replayed in rounds, the r-th access of every set in one vectorized step
+# The misses of a level, and the write-backs of the dirty lines they evict, are the trace of the next level,
+# ordered by the time of the access that caused them. A miss at time t sends its write-back at 2t and its fill
+# at 2t + 1, so that every level keeps distinct time stamps, and an exact LRU order.
+
+class CacheLevel:
+    def __init__(self, name: str, capacity: int, line_size: int, associativity: int):
+        self.name = name
+        self.capacity = capacity
+        self.line_size = line_size
+        self.associativity = associativity
+        self.nr_sets = capacity // (line_size * associativity)
+        if self.nr_sets < 1 or self.nr_sets * line_size * associativity != capacity:
+            raise ValueError(f'{name}: capacity {capacity} is not a multiple of '
+                             f'{associativity} ways of {line_size} byte lines')
+        self.reset()
+
+    def __repr__(self):
+        return (f"CacheLevel(name='{self.name}', capacity={self.capacity}, "
+                f"line_size={self.line_size}, associativity={self.associativity})")
+
+    def __str__(self):
+        return (f"{self.name}: {self.capacity} bytes, {self.nr_sets} sets x {self.associativity} ways, "
+                f"reads {self.reads} ({self.read_misses} misses), writes {self.writes} ({self.write_misses} misses), "
+                f"write-backs {self.writebacks}, hit rate {self.hit_rate:.4f}")
+
+    def reset(self):
+        # an invalid way holds tag -1, and is the least recently used way of its set
+        self.tags = np.full((self.nr_sets, self.associativity), -1, dtype=np.int64)
+        self.last_use = np.full((self.nr_sets, self.associativity), -1, dtype=np.int64)
+        self.dirty = np.zeros((self.nr_sets, self.associativity), dtype=bool)
+        self.reads: int = 0
+        self.writes: int = 0
+        self.read_misses: int = 0
+        self.write_misses: int = 0
+        self.writebacks: int = 0
+        # the same counters per set, for set sampling
+        self.set_reads = np.zeros(self.nr_sets, dtype=np.int64)
+        self.set_writes = np.zeros(self.nr_sets, dtype=np.int64)
+        self.set_misses = np.zeros(self.nr_sets, dtype=np.int64)
+        self.set_writebacks = np.zeros(self.nr_sets, dtype=np.int64)
+
+    @property
+    def accesses(self) -> int:
+        return self.reads + self.writes
+
+    @property
+    def misses(self) -> int:
+        return self.read_misses + self.write_misses
+
+    @property
+    def hit_rate(self) -> float:
+        return 1.0 - self.misses / self.accesses if self.accesses > 0 else 0.0
+
+    def access(self, addresses: np.ndarray, writes: np.ndarray, times: np.ndarray) \
+            -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Simulate a chunk of accesses.
+
+        :param addresses: byte addresses
+        :param writes: write flags
+        :param times: increasing time stamps of the accesses
+        :return: (addresses, write flags, time stamps) of the fills and write-backs sent to the next level
+        """
+        nr_writes = int(np.count_nonzero(writes))
+        self.writes += nr_writes
+        self.reads += len(addresses) - nr_writes
+        if len(addresses) == 0:
+            return addresses, writes, times
+
+        lines = addresses // self.line_size
+        sets = lines % self.nr_sets
+        set_writes = np.bincount(sets[writes], minlength=self.nr_sets)
+        self.set_writes += set_writes
+        self.set_reads += np.bincount(sets, minlength=self.nr_sets) - set_writes
+
+        # group by set, keeping program order within a set
+        order = np.argsort(sets.astype(np.uint32 if self.nr_sets > 1 << 16 else np.uint16), kind='stable')
+        lines, writes, times = lines[order], writes[order], times[order]
+
+        # An access to the line of one of the previous `associativity` accesses of its set is a hit:
+        # at most associativity - 1 other lines were used since, so the line is still in the set.
+        # These hits are folded into the access they repeat, which is replayed with the time stamp
+        # and the dirty bit of the last access of the chain. The line cannot be evicted while
+        # the chain is pending, so the victims of the replay are the victims of the full trace.
+        # Within a group, equal lines imply equal sets.
+        n = len(lines)
+        parent = np.arange(n)
+        for distance in range(self.associativity, 0, -1):
+            repeat = lines[distance:] == lines[:-distance]
+            parent[distance:][repeat] = np.flatnonzero(repeat)
+        root = parent
+        while True:
+            next_root = root[root]
+            if np.array_equal(next_root, root):
+                break
+            root = next_root
+        first = np.flatnonzero(root == np.arange(n))
+        first_writes = writes[first]
+        first_times = times[first]
+        if len(first) < n:
+            last_times = np.zeros(n, dtype=np.int64)
+            np.maximum.at(last_times, root, times)
+            dirties = np.zeros(n, dtype=bool)
+            np.logical_or.at(dirties, root, writes)
+            last_times, dirties = last_times[first], dirties[first]
+        else:
+            last_times, dirties = first_times, first_writes
+        lines = lines[first]
+        sets, tags = lines % self.nr_sets, lines // self.nr_sets
+
+        # rank of each access within its set, the round in which it is replayed
+        set_start = np.ones(len(sets), dtype=bool)
+        set_start[1:] = sets[1:] != sets[:-1]
+        set_first = np.flatnonzero(set_start)
+        rank = np.arange(len(sets)) - np.repeat(set_first, np.diff(np.append(set_first, len(sets))))
+        by_rank = np.argsort(rank, kind='stable')
+        bounds = np.concatenate(([0], np.cumsum(np.bincount(rank))))
+
+        hits = np.empty(len(sets), dtype=bool)
+        victims = np.empty(len(sets), dtype=np.int64)
+        victim_dirty = np.empty(len(sets), dtype=bool)
+        for r in range(len(bounds) - 1):
+            replay = by_rank[bounds[r]:bounds[r + 1]]
+            s, t = sets[replay], tags[replay]
+            match = self.tags[s] == t[:, None]
+            way = match.argmax(axis=1)
+            hit = match[np.arange(len(replay)), way]
+            way = np.where(hit, way, self.last_use[s].argmin(axis=1))
+
+            hits[replay] = hit
+            victims[replay] = self.tags[s, way]
+            victim_dirty[replay] = self.dirty[s, way] & ~hit
+            self.tags[s, way] = t
+            self.dirty[s, way] = (self.dirty[s, way] & hit) | dirties[replay]
+            self.last_use[s, way] = last_times[replay]
+
+        misses = ~hits
+        self.read_misses += int(np.count_nonzero(misses & ~first_writes))
+        self.write_misses += int(np.count_nonzero(misses & first_writes))
+        evicted = victim_dirty & (victims >= 0)
+        self.writebacks += int(np.count_nonzero(evicted))
+        self.set_misses += np.bincount(sets[misses], minlength=self.nr_sets)
+        self.set_writebacks += np.bincount(sets[evicted], minlength=self.nr_sets)
+
+        # the write-back of a victim precedes the fill that replaces it
+        fill_addresses = (tags[misses] * self.nr_sets + sets[misses]) * self.line_size
+        writeback_addresses = (victims[evicted] * self.nr_sets + sets[evicted]) * self.line_size
+        next_addresses = np.concatenate((writeback_addresses, fill_addresses))
+        next_writes = np.concatenate((np.ones(len(writeback_addresses), dtype=bool),
+                                      np.zeros(len(fill_addresses), dtype=bool)))
+        next_times = np.concatenate((2 * first_times[evicted], 2 * first_times[misses] + 1))
+        order = np.argsort(next_times)
+        return next_addresses[order], next_writes[order], next_times[order]
+
+    def flush(self, time: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Write back all the dirty lines of the level, the lines stay valid, and clean.
+
+        :param time: time stamp of the flush, in the time scale of the next level
+        :return: (addresses, write flags, time stamps) of the write-backs
+        """
+        sets, ways = np.nonzero(self.dirty)
+        addresses = (self.tags[sets, ways] * self.nr_sets + sets) * self.line_size
+        self.writebacks += len(addresses)
+        self.set_writebacks += np.bincount(sets, minlength=self.nr_sets)
+        self.dirty[:] = False
+        return addresses, np.ones(len(addresses), dtype=bool), time + np.arange(len(addresses), dtype=np.int64)
+
+
+# A hierarchy of cache levels in front of the memory.
+# The levels are neither inclusive nor exclusive: a level sees the fills and write-backs of the level above.
+class CacheHierarchy:
+    def __init__(self, levels: list):
+        self.levels = list(levels)
+        self.reset()
+
+    def __repr__(self):
+        return f"CacheHierarchy(levels={[level.name for level in self.levels]})"
+
+    def __str__(self):
+        lines = [str(level) for level in self.levels]
+        lines.append(f"memory: reads {self.memory_reads}, writes {self.memory_writes}")
+        return '\n'.join(lines)
+
+    @classmethod
+    def from_configuration(cls, config: 'StoredProgramMachineConfiguration', associativity: tuple = (8, 16, 16)) \
+            -> 'CacheHierarchy':
+        """
+        L1, L2, and L3 with the capacities and cache line size of an SPM configuration.
+
+        :param config: SPM configuration
+        :param associativity: ways of L1, L2, and L3
+        :return: CacheHierarchy
+        """
+        capacities = (config.l1_size, config.l2_size, config.l3_size)
+        return cls([CacheLevel(f'l{i + 1}', capacity, config.cache_line_size, ways)
+                    for i, (capacity, ways) in enumerate(zip(capacities, associativity))])
+
+    def reset(self):
+        for level in self.levels:
+            level.reset()
+        self.time: int = 0
+        self.memory_reads: int = 0
+        self.memory_writes: int = 0
+
+    def _propagate(self, addresses, writes, times, first_level: int = 0):
+        for level in self.levels[first_level:]:
+            addresses, writes, times = level.access(addresses, writes, times)
+        nr_writes = int(np.count_nonzero(writes))
+        self.memory_writes += nr_writes
+        self.memory_reads += len(addresses) - nr_writes
+
+    def access(self, addresses: np.ndarray, writes: np.ndarray):
+        """
+        Simulate a chunk of the trace of the core.
+
+        :param addresses: byte addresses
+        :param writes: write flags
+        """
+        times = self.time + np.arange(len(addresses), dtype=np.int64)
+        self.time += len(addresses)
+        self._propagate(np.asarray(addresses, dtype=np.int64), np.asarray(writes, dtype=bool), times)
+
+    def flush(self):
+        """
+        Write the dirty lines of every level back to memory, top down.
+        """
+        for i, level in enumerate(self.levels):
+            self._propagate(*level.flush(self.time << (i + 1)), first_level=i + 1)
+
+    def simulate(self, trace, flush: bool = True) -> 'CacheHierarchy':
+        """
+        Simulate a trace, for example, LoopNest.trace().
+
+        :param trace: iterable of (byte addresses, write flags) chunks
+        :param flush: write the dirty lines back to memory at the end of the trace
+        :return: self, with the counters of the trace
+        """
+        for addresses, writes in trace:
+            self.access(addresses, writes)
+        if flush:
+            self.flush()
+        return self
+
+    def events(self) -> dict:
+        """
+        Cache and memory events in the keys of StoredProgramMachineMetrics.
+
+        A level is read by the accesses that arrive as reads, the loads of the core, or the fills of the level above,
+        and it is written by the accesses that arrive as writes and by its own fills.
+        The memory is read by the fills of the last level, and written by its write-backs.
+
+        :return: dict of event name to count
+        """
+        events = {}
+        for level in self.levels:
+            events[level.name + '_read'] = level.reads
+            events[level.name + '_write'] = level.writes + level.misses
+        events['dram_read'] = self.memory_reads
+        events['dram_write'] = self.memory_writes
+        return events
+
+    def events_by_group(self, groups: int) -> dict:
+        """
+        The events of events(), per group of sets: set s of every level belongs to group s % groups.
+
+        The sets of a group only exchange lines with the sets of the same group,
+        so every group is an independent slice of the hierarchy, the unit of set sampling.
+
+        :param groups: number of groups, a divisor of the number of sets of every level
+        :return: dict of event name to an array of counts per group
+        """
+        def by_group(counts):
+            return np.bincount(np.arange(len(counts)) % groups, weights=counts, minlength=groups).astype(np.int64)
+
+        events = {}
+        for level in self.levels:
+            if level.nr_sets % groups != 0:
+                raise ValueError(f'{level.name} has {level.nr_sets} sets, which are not divisible in {groups} groups')
+            events[level.name + '_read'] = by_group(level.set_reads)
+            events[level.name + '_write'] = by_group(level.set_writes + level.set_misses)
+        last = self.levels[-1]
+        events['dram_read'] = by_group(last.set_misses)
+        events['dram_write'] = by_group(last.set_writebacks)
+        return events
+
+    def record(self, spm_metrics: 'StoredProgramMachineMetrics', attributes: 'StoredProgramMachineEnergy'):
+        """
+        Record the simulated events, with their energies, in the metrics of an operator.
+
+        :param spm_metrics: metrics to record into
+        :param attributes: SPM energy set
+        """
+        for key, count in self.events().items():
+            spm_metrics.record(key, count, getattr(attributes, key))
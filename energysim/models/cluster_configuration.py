@@ -0,0 +1,53 @@
+import copy
+import math
+
+from energysim.models.interconnect import Interconnect
+
+
+class DistributedMemoryClusterConfiguration:
+    def __init__(self,
+                 nodes: int,
+                 node_config,
+                 interconnect: 'Interconnect' = None,
+                 storage_bandwidth: float = 3.0e9,
+                 storage_read_energy_per_byte: float = 1000.0,
+                 storage_write_energy_per_byte: float = 2000.0):
+        # nodes of the cluster, each node is a machine with the configuration node_config,
+        # such as, a StoredProgramMachineConfiguration, or a GraphicsProcessingUnitConfiguration
+        self.nodes: int = nodes
+        self.node_config = node_config
+        self.interconnect: Interconnect = Interconnect() if interconnect is None else interconnect
+        # every node stages its partition of the operands from its local storage
+        self.storage_bandwidth: float = storage_bandwidth                        # bytes/sec per node
+        self.storage_read_energy_per_byte: float = storage_read_energy_per_byte  # pJ
+        self.storage_write_energy_per_byte: float = storage_write_energy_per_byte  # pJ
+
+    def __repr__(self):
+        return f"DistributedMemoryClusterConfiguration(nodes={self.nodes}, topology='{self.interconnect.topology}', ...)"
+
+    def __str__(self):
+        return f"""
+
+        Cluster Configuration:
+        - Nodes:              {self.nodes}
+        - Node:               {self.node_config!r}
+        - Topology:           {self.interconnect.topology}
+        - Storage bandwidth:  {self.storage_bandwidth * 1.0e-9} GB/sec per node
+        """
+
+    def with_nodes(self, nodes: int) -> 'DistributedMemoryClusterConfiguration':
+        """
+        The same cluster with a different number of nodes, for scaling studies.
+        """
+        cluster = copy.copy(self)
+        cluster.nodes = nodes
+        return cluster
+
+    def process_grid(self) -> tuple:
+        """
+        (rows, cols) of the most square 2D grid of the nodes, rows <= cols.
+        """
+        rows = int(math.isqrt(self.nodes))
+        while self.nodes % rows != 0:
+            rows -= 1
+        return rows, self.nodes // rows
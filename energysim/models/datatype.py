@@ -0,0 +1,149 @@
+import copy
+
+# Number systems of mixed-precision arithmetic, and the scaling of the 32-bit event energies of the databases.
+#
+# The SPM and GPU databases characterize 32-bit operators: add32b, mul32b, fadd32b, fmul32b, fma32b, and fdiv32b,
+# and register and word-sized cache accesses of 32 bits. The energy of a datatype of b bits is derived from them:
+#   multiplier   quadratic in the width of the multiplier array, the significand of a float, the bits of an integer
+#   adder        linear in the bits, the alignment shifter and the carry chain of a float adder grow linearly
+#   register     linear in the bits, and so are the word-sized accesses of L1 and shared memory
+# An fma multiplies in the precision of its operands and adds in the precision of its accumulator, so its energy
+# is the fma32b energy split in the proportion of fmul32b and fadd32b, each part scaled by its own datatype.
+# Cache line and memory burst events move whole lines and bursts: their energies do not change, a narrower element
+# packs more elements in a line, and the operator models move fewer lines.
+
+
+class DataType:
+    def __init__(self, name: str, bits: int, significand_bits: int = None):
+        self.name = name
+        self.bits = bits
+        # bits of the significand of a float, the hidden bit included, None for an integer
+        self.significand_bits = significand_bits
+
+    def __repr__(self):
+        return f"DataType(name='{self.name}', bits={self.bits})"
+
+    def __str__(self):
+        return self.name
+
+    @property
+    def size(self) -> int:
+        # bytes per element
+        return self.bits // 8
+
+    @property
+    def is_float(self) -> bool:
+        return self.significand_bits is not None
+
+    def multiplier_scale(self) -> float:
+        # energy of a multiplication relative to a 32-bit multiplication of the same kind
+        if self.is_float:
+            return (self.significand_bits / FP32.significand_bits) ** 2
+        return (self.bits / 32) ** 2
+
+    def adder_scale(self) -> float:
+        # energy of an addition, a register access, or a word access, relative to 32 bits
+        return self.bits / 32
+
+
+FP64 = DataType('fp64', 64, 53)
+FP32 = DataType('fp32', 32, 24)
+TF32 = DataType('tf32', 32, 11)       # stored in 32 bits, multiplies 11-bit significands
+BF16 = DataType('bf16', 16, 8)
+FP16 = DataType('fp16', 16, 11)
+FP8_E4M3 = DataType('fp8_e4m3', 8, 4)
+FP8_E5M2 = DataType('fp8_e5m2', 8, 3)
+INT32 = DataType('int32', 32)
+INT16 = DataType('int16', 16)
+INT8 = DataType('int8', 8)
+
+DATATYPES = {dt.name: dt for dt in (FP64, FP32, TF32, BF16, FP16, FP8_E4M3, FP8_E5M2, INT32, INT16, INT8)}
+# spellings of the same datatypes in frameworks and MLIR
+DATATYPES.update({'f64': FP64, 'f32': FP32, 'bf16': BF16, 'f16': FP16, 'fp8': FP8_E4M3, 'f8E4M3FN': FP8_E4M3,
+                  'f8E5M2': FP8_E5M2, 'i32': INT32, 'i16': INT16, 'i8': INT8})
+
+
+def datatype(name) -> 'DataType':
+    if isinstance(name, DataType):
+        return name
+    if name not in DATATYPES:
+        raise ValueError(f'unknown datatype {name}, use one of {sorted(DATATYPES)}')
+    return DATATYPES[name]
+
+
+# Precision of an operator: the datatype of its operands, of its accumulator, and of the elements it writes.
+# The accumulator defaults to the operands, and the output to the accumulator, so Precision('fp8_e4m3', 'fp32')
+# multiplies FP8 operands, accumulates in FP32, and writes FP32.
+class Precision:
+    def __init__(self, operand='fp32', accumulate=None, output=None):
+        self.operand: DataType = datatype(operand)
+        self.accumulate: DataType = datatype(accumulate or self.operand)
+        self.output: DataType = datatype(output or self.accumulate)
+
+    def __repr__(self):
+        return f"Precision(operand='{self.operand}', accumulate='{self.accumulate}', output='{self.output}')"
+
+    def __str__(self):
+        names = [self.operand.name, self.accumulate.name, self.output.name]
+        while len(names) > 1 and names[-1] == names[-2]:
+            names.pop()
+        return '/'.join(names)
+
+    def scale_arithmetic(self, energies) -> dict:
+        """
+        Execute energies of the precision, derived from the 32-bit energies of an SPM or GPU energy set.
+
+        Args:
+            energies: StoredProgramMachineEnergy or GraphicsProcessingUnitEnergy, or a batch of them
+
+        Returns:
+            dict of the add32b, mul32b, fadd32b, fmul32b, fma32b, fdiv32b, and execute energies
+        """
+        def multiply(dt):
+            return (energies.fmul32b if dt.is_float else energies.mul32b) * dt.multiplier_scale()
+
+        def add(dt):
+            return (energies.fadd32b if dt.is_float else energies.add32b) * dt.adder_scale()
+
+        # integer operators of float precisions compute addresses and indices, they stay 32-bit, and vice versa
+        integer = self.operand if not self.operand.is_float else INT32
+        floating = self.operand if self.operand.is_float else FP32
+        accumulator = self.accumulate if self.accumulate.is_float else FP32
+        fma = energies.fma32b * (multiply(self.operand) + add(self.accumulate)) / (energies.fmul32b + energies.fadd32b)
+        return {
+            'add32b': energies.add32b * integer.adder_scale(),
+            'mul32b': energies.mul32b * integer.multiplier_scale(),
+            'fadd32b': energies.fadd32b * accumulator.adder_scale(),
+            'fmul32b': energies.fmul32b * floating.multiplier_scale(),
+            'fma32b': fma,
+            'fdiv32b': energies.fdiv32b * accumulator.multiplier_scale(),
+            'execute': fma,
+        }
+
+
+def derive_energy_set(energies, name: str, scaled: dict):
+    # a new, writable, energy set of the class of energies, with the scaled events replaced
+    new_set = type(energies)(name)
+    for field, value in vars(energies).items():
+        if field not in ('identifier', '_frozen'):
+            setattr(new_set, field, scaled.get(field, value))
+    return new_set
+
+
+def apply_precision(energies, config, precision: 'Precision') -> tuple:
+    """
+    Energy set and configuration of a machine that computes in a precision, for any operator model.
+
+    Args:
+        energies: StoredProgramMachineEnergy or GraphicsProcessingUnitEnergy of 32-bit events
+        config: StoredProgramMachineConfiguration or GraphicsProcessingUnitConfiguration
+        precision: Precision, or the name of a datatype for a uniform precision
+
+    Returns:
+        (energies.with_precision(precision), a copy of config with words of the operand and output datatypes)
+    """
+    precision = precision if isinstance(precision, Precision) else Precision(precision)
+    config = copy.copy(config)
+    config.word_size = precision.operand.size
+    config.output_word_size = precision.output.size
+    return energies.with_precision(precision), config
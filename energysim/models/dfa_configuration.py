@@ -1,7 +1,8 @@
 from energysim.models.design_category import DesignCategory
+from energysim.models.dram_configuration import DynamicRandomAccessMemoryConfiguration
 
 
-class DataFlowArchitectureConfiguration:
+class DomainFlowArchitectureConfiguration:
     def __init__(self,
                  category: 'DesignCategory',
                  core_clock_ghz: float,
@@ -10,35 +11,64 @@ class DataFlowArchitectureConfiguration:
                  cache_line_size_in_bytes: int,
                  memory_burst_size_in_bytes: int,
                  memory_channels: int,
-                 channel_width_in_bytes: int):
-        # SPM attributes
+                 channel_width_in_bytes: int,
+                 fabric_size: int = 32,
+                 istore_depth: int = 64,
+                 l1_size_in_bytes: int = 256 * 1024,
+                 smem_size_in_bytes: int = 4 * 1024 * 1024,
+                 dma_engines: int = 4,
+                 dram: 'DynamicRandomAccessMemoryConfiguration' = None,
+                 output_word_size_in_bytes: int = None):
+        # DFA attributes
         # structure
         self.word_size: int = word_size_in_bytes
+        # bytes of the elements an operator writes, such as FP32 accumulations of FP8 operands
+        self.output_word_size: int = output_word_size_in_bytes or word_size_in_bytes
         self.cache_line_size: int = cache_line_size_in_bytes
         self.memory_burst_size: int = memory_burst_size_in_bytes
         self.memory_channels: int = memory_channels
         self.channel_width: int = channel_width_in_bytes
+        # the fabric is a fabric_size x fabric_size mesh of processing elements,
+        # the iStore of a processing element holds istore_depth instruction tokens
+        self.fabric_size: int = fabric_size
+        self.istore_depth: int = istore_depth
+        # the L1 feeds the streamers at the edges of the fabric, the shared memory holds the blocks
+        # that the DMA engines move in from, and out to, global memory
+        self.l1_size: int = l1_size_in_bytes
+        self.smem_size: int = smem_size_in_bytes
+        self.dma_engines: int = dma_engines
         # attributes
         self.category: DesignCategory = category
         self.core_clock: float = core_clock_ghz # GHz
         self.clock_cycle_ns: float  = 1.0 / core_clock_ghz  # nsec
         self.memory_clock: float = memory_clock_ghz    # GHz
         self.memory_cycle_ns: float = 1.0 / memory_clock_ghz  # nsec
+        # DRAM behind the memory channels, DDR4 timing unless configured
+        if dram is None:
+            dram = DynamicRandomAccessMemoryConfiguration.from_memory_parameters(
+                memory_clock_ghz, memory_channels, channel_width_in_bytes, memory_burst_size_in_bytes, family='DDR4')
+        self.dram: DynamicRandomAccessMemoryConfiguration = dram
 
     def __repr__(self):
-        return f"StoredProgramMachineConfiguration(clock='{self.core_clock}'GHz', ...)"
+        return f"DomainFlowArchitectureConfiguration(clock='{self.core_clock}'GHz', fabric={self.fabric_size}, ...)"
 
     def __str__(self):
         return f"""
 
-        SPM Configuration:
+        DFA Configuration:
+        - Fabric size:        {self.fabric_size} x {self.fabric_size} processing elements
+        - iStore depth:       {self.istore_depth} instruction tokens
+        - L1 size:            {self.l1_size} bytes
+        - Shared memory size: {self.smem_size} bytes
+        - DMA engines:        {self.dma_engines}
         - Cache line size:    {self.cache_line_size} bytes
         - Memory burst size:  {self.memory_burst_size} bytes
         - Word size:          {self.word_size} bytes
+        - Output word size:   {self.output_word_size} bytes
 
         - Design Category:    {self.category}
         - Processor clock:    {self.core_clock} GHz
         - Core Clock cycle:   {self.clock_cycle_ns} nsec
         - Memory clock:       {self.memory_clock} GHz
         - Memory Clock cycle: {self.memory_cycle_ns} nsec
-        """
\ No newline at end of file
+        """
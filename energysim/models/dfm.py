@@ -0,0 +1,44 @@
+import numpy as np
+
+
+# Data Flow Machine timing.
+#
+# An instruction of a DFM fires when all its operand tokens have been matched in the waiting-matching store,
+# a CAM that matches token_match_rate tokens per cycle. The CAM can't cycle faster than the core clock, so
+# the matching throughput bounds the rate at which tokens flow through the machine.
+#
+# Operands that come from memory arrive through split-phase loads: the load fires, and its result token
+# arrives a load latency later. Until then, the fma that consumes it holds its other operand tokens in the CAM,
+# two waiting tokens per fma, so a CAM of cam_size tokens keeps cam_size / 2 fmas in flight, and by Little's law
+# sustains cam_size / 2 fmas per load latency. A CAM that is too small to cover the load latency throttles
+# the machine below the bandwidth of its memory.
+#
+# The elapsed time is the longest of the matching time, the latency bound, and the time to move the data.
+# All arguments can be arrays, so the same model evaluates a batched sweep.
+
+def token_flow_time(tokens, fmas, memory_time, core_clock_ghz, cam_cycle_time_ns, token_match_rate,
+                    cam_size_in_tokens, load_latency_ns) -> tuple:
+    """
+    Time for a stream of tokens to flow through the waiting-matching store of a Data Flow Machine.
+
+    Args:
+        tokens: tokens matched in the CAM
+        fmas: fmas that wait for the operands of a split-phase load
+        memory_time: time to move the data of the operator between the memory and the caches, in seconds
+        core_clock_ghz: clock of the DFM
+        cam_cycle_time_ns: cycle time of the CAM
+        token_match_rate: tokens matched per CAM cycle
+        cam_size_in_tokens: capacity of the waiting-matching store
+        load_latency_ns: latency of a split-phase load
+
+    Returns:
+        (elapsed time, matching time), in seconds
+    """
+    cycle_ns = np.maximum(1.0 / np.asarray(core_clock_ghz, dtype=np.float64), cam_cycle_time_ns)
+    matching_time = np.asarray(tokens) / token_match_rate * cycle_ns * 1.0e-9
+    fmas_in_flight = np.maximum(np.minimum(np.asarray(cam_size_in_tokens) // 2, fmas), 1)
+    latency_time = np.asarray(fmas) * load_latency_ns / fmas_in_flight * 1.0e-9
+    elapsed_time = np.maximum(np.maximum(matching_time, latency_time), memory_time)
+    if elapsed_time.ndim == 0:
+        return float(elapsed_time), float(matching_time)
+    return elapsed_time, matching_time
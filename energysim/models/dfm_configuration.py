@@ -0,0 +1,73 @@
+from energysim.models.design_category import DesignCategory
+from energysim.models.dram_configuration import DynamicRandomAccessMemoryConfiguration
+
+
+class DataFlowMachineConfiguration:
+    def __init__(self,
+                 category: 'DesignCategory',
+                 core_clock_ghz: float,
+                 memory_clock_ghz: float,
+                 word_size_in_bytes: int,
+                 cache_line_size_in_bytes: int,
+                 memory_burst_size_in_bytes: int,
+                 memory_channels: int,
+                 channel_width_in_bytes: int,
+                 cam_size_in_tokens: int = 1024,
+                 token_match_rate: int = 8,
+                 l1_size_in_bytes: int = 32 * 1024,
+                 l2_size_in_bytes: int = 1024 * 1024,
+                 l3_size_in_bytes: int = 8 * 1024 * 1024,
+                 dram: 'DynamicRandomAccessMemoryConfiguration' = None,
+                 output_word_size_in_bytes: int = None):
+        # DFM attributes
+        # structure
+        self.word_size: int = word_size_in_bytes
+        # bytes of the elements an operator writes, such as FP32 accumulations of FP8 operands
+        self.output_word_size: int = output_word_size_in_bytes or word_size_in_bytes
+        self.cache_line_size: int = cache_line_size_in_bytes
+        self.memory_burst_size: int = memory_burst_size_in_bytes
+        self.memory_channels: int = memory_channels
+        self.channel_width: int = channel_width_in_bytes
+        # the waiting-matching store is a CAM that holds cam_size tokens waiting for their partners,
+        # and matches token_match_rate tokens per CAM cycle
+        self.cam_size: int = cam_size_in_tokens
+        self.token_match_rate: int = token_match_rate
+        # cache capacities
+        self.l1_size: int = l1_size_in_bytes
+        self.l2_size: int = l2_size_in_bytes
+        self.l3_size: int = l3_size_in_bytes
+        # attributes
+        self.category: DesignCategory = category
+        self.core_clock: float = core_clock_ghz # GHz
+        self.clock_cycle_ns: float  = 1.0 / core_clock_ghz  # nsec
+        self.memory_clock: float = memory_clock_ghz    # GHz
+        self.memory_cycle_ns: float = 1.0 / memory_clock_ghz  # nsec
+        # DRAM behind the memory channels, DDR4 timing unless configured
+        if dram is None:
+            dram = DynamicRandomAccessMemoryConfiguration.from_memory_parameters(
+                memory_clock_ghz, memory_channels, channel_width_in_bytes, memory_burst_size_in_bytes, family='DDR4')
+        self.dram: DynamicRandomAccessMemoryConfiguration = dram
+
+    def __repr__(self):
+        return f"DataFlowMachineConfiguration(clock='{self.core_clock}'GHz', cam={self.cam_size}, ...)"
+
+    def __str__(self):
+        return f"""
+
+        DFM Configuration:
+        - CAM size:           {self.cam_size} tokens
+        - Token match rate:   {self.token_match_rate} tokens per CAM cycle
+        - Cache line size:    {self.cache_line_size} bytes
+        - Memory burst size:  {self.memory_burst_size} bytes
+        - Word size:          {self.word_size} bytes
+        - Output word size:   {self.output_word_size} bytes
+        - L1 cache size:      {self.l1_size} bytes
+        - L2 cache size:      {self.l2_size} bytes
+        - L3 cache size:      {self.l3_size} bytes
+
+        - Design Category:    {self.category}
+        - Processor clock:    {self.core_clock} GHz
+        - Core Clock cycle:   {self.clock_cycle_ns} nsec
+        - Memory clock:       {self.memory_clock} GHz
+        - Memory Clock cycle: {self.memory_cycle_ns} nsec
+        """
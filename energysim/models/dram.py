@@ -0,0 +1,233 @@
+import numpy as np
+
+from energysim.models.dram_configuration import DynamicRandomAccessMemoryConfiguration
+
+
+# DRAM subsystem timing, in two modes.
+#
+# The analytic mode is a closed form for sweeps: every argument can be an array. A channel moves a burst
+# every burst_size / (2 * channel_width) memory clocks. A bank activates a row at most once per row cycle
+# (tRAS + tRP), and a rank at most four rows per tFAW window, so activations of different banks overlap
+# with the transfers of the others. A stream is bound by the larger of its data bus time and its activations
+# at the rate the banks and ranks sustain, plus the latency of the first access.
+# A stream visits the banks in turn, other traffic, given by its row hit rate, opens rows in random banks:
+# as in the event-driven mode, the activations of a rank issue in order, and a request to a bank that has
+# not finished its row cycle stalls the requests behind it. A rank then sustains an activation per row cycle
+# over the expected number of random requests until a bank repeats, combined with the tFAW limit.
+#
+# The event-driven mode replays a request stream through the banks and the data bus of every channel.
+# Under the open row policy, addresses map to channel, column, bank, and row from the least to the most
+# significant bits, so that consecutive bursts interleave over the channels and fill a row before moving
+# to the next bank. The closed row policy interleaves the banks below the column, as every burst opens a row.
+# A bank serves a burst from its open row (row hit), after an activation (row miss),
+# or after a precharge and an activation (row conflict), and the data bus of the channel is shared in order.
+
+def transfer_time(dram: 'DynamicRandomAccessMemoryConfiguration', requests, request_size, row_hit_rate=None,
+                  memory_clock_ghz=None, memory_channels=None, channel_width_in_bytes=None,
+                  memory_burst_size_in_bytes=None):
+    """
+    Analytic time to move a stream of requests between the memory controller and the DRAM.
+
+    Args:
+        dram: DRAM organization and timing
+        requests: number of requests
+        request_size: bytes per request, a cache line or a memory burst
+        row_hit_rate: fraction of the bursts that hit an open row, the other bursts open rows in random banks,
+            defaults to a sequential stream, with the hit rate of the row policy of the DRAM
+        memory_clock_ghz, memory_channels, channel_width_in_bytes, memory_burst_size_in_bytes:
+            interface parameters that replace the ones of dram, arrays for a sweep
+
+    Returns:
+        elapsed time in seconds, of the broadcast shape of the arguments
+    """
+    memory_clock = dram.memory_clock if memory_clock_ghz is None else memory_clock_ghz
+    channels = dram.memory_channels if memory_channels is None else memory_channels
+    channel_width = dram.channel_width if channel_width_in_bytes is None else channel_width_in_bytes
+    burst_size = dram.memory_burst_size if memory_burst_size_in_bytes is None else memory_burst_size_in_bytes
+
+    requests = np.asarray(requests)
+    bursts_per_request = -(-np.asarray(request_size) // burst_size)
+    bursts_per_channel = -(-(requests * bursts_per_request) // channels)
+    burst_time_ns = burst_size / (2 * channel_width * memory_clock)
+    data_time_ns = bursts_per_channel * burst_time_ns
+
+    if row_hit_rate is not None:
+        activations = bursts_per_channel * (1.0 - np.asarray(row_hit_rate))
+        activation_interval_ns = _random_activation_interval(dram, burst_time_ns)
+    else:
+        if dram.row_policy == 'open':
+            bursts_per_row = np.maximum(dram.row_size // burst_size, 1)
+            activations = -(-bursts_per_channel // bursts_per_row)
+        else:
+            activations = bursts_per_channel
+        activation_interval_ns = max(dram.row_cycle_ns / (dram.ranks * dram.banks),
+                                     dram.four_activate_window_ns / (4 * dram.ranks))
+    activation_time_ns = activations * activation_interval_ns
+
+    first_access_ns = dram.activate_ns + dram.cas_latency_ns
+    elapsed_ns = np.maximum(data_time_ns, activation_time_ns) + first_access_ns
+    elapsed_ns = np.where(requests > 0, elapsed_ns, 0.0)
+    return elapsed_ns * 1.0e-9 if elapsed_ns.ndim > 0 else float(elapsed_ns) * 1.0e-9
+
+
+def _distinct_banks(banks: int) -> float:
+    # expected number of requests to random banks until one repeats a bank of the previous ones,
+    # sum over i of prod over j < i of (1 - j / banks)
+    return float(np.cumprod(np.append(1.0, 1.0 - np.arange(1, banks) / banks)).sum())
+
+
+def _random_activation_interval(dram: 'DynamicRandomAccessMemoryConfiguration', burst_time_ns):
+    # time between the activations of a channel when the rows open in random banks: the activations of a rank
+    # issue in order, so a request to a bank that is still cycling holds back the requests behind it, and the
+    # ranks proceed independently. A closed row is precharged after its data transfer, and the transfers of
+    # a channel are in order, so the ranks of a closed row policy hold each other back as one set of banks.
+    if dram.row_policy == 'open':
+        bank_cycle_ns = np.maximum(dram.activate_ns + burst_time_ns, dram.active_ns) + dram.precharge_ns
+        conflict_interval_ns = bank_cycle_ns / _distinct_banks(dram.banks) / dram.ranks
+    else:
+        bank_cycle_ns = np.maximum(dram.activate_ns + dram.cas_latency_ns + burst_time_ns,
+                                   dram.active_ns) + dram.precharge_ns
+        conflict_interval_ns = bank_cycle_ns / _distinct_banks(dram.ranks * dram.banks)
+    # at most four activations per tFAW window of every rank
+    window_interval_ns = dram.four_activate_window_ns / (4 * dram.ranks)
+    return np.hypot(conflict_interval_ns, window_interval_ns)
+
+
+class DramSimulator:
+    def __init__(self, dram: 'DynamicRandomAccessMemoryConfiguration'):
+        self.dram = dram
+        self.reset()
+
+    def __repr__(self):
+        return f"DramSimulator(dram={self.dram!r})"
+
+    def __str__(self):
+        return (f"DRAM: {self.reads} reads, {self.writes} writes, {self.bursts} bursts, "
+                f"row hits {self.row_hits}, misses {self.row_misses}, conflicts {self.row_conflicts}, "
+                f"elapsed {self.elapsed_time * 1.0e9:.1f} nsec, bandwidth {self.bandwidth * 1.0e-9:.2f} GB/s, "
+                f"average latency {self.average_latency_ns:.1f} nsec")
+
+    def reset(self):
+        dram = self.dram
+        nr_banks = dram.memory_channels * dram.ranks * dram.banks
+        self.open_row = [-1] * nr_banks
+        self.bank_ready = [0.0] * nr_banks         # earliest column command, or activation of a closed bank
+        self.activated = [-1.0e30] * nr_banks      # last activation, a precharge waits tRAS after it
+        self.activations = [[] for _ in range(dram.memory_channels * dram.ranks)]   # last four of every rank
+        self.bus_free = [0.0] * dram.memory_channels
+        self.reads: int = 0
+        self.writes: int = 0
+        self.bursts: int = 0
+        self.row_hits: int = 0
+        self.row_misses: int = 0
+        self.row_conflicts: int = 0
+        self.total_latency_ns: float = 0.0
+        self.finish_ns: float = 0.0
+
+    @property
+    def elapsed_time(self) -> float:
+        return self.finish_ns * 1.0e-9
+
+    @property
+    def bandwidth(self) -> float:
+        return self.bursts * self.dram.memory_burst_size / self.elapsed_time if self.finish_ns > 0 else 0.0
+
+    @property
+    def row_hit_rate(self) -> float:
+        return self.row_hits / self.bursts if self.bursts > 0 else 0.0
+
+    @property
+    def average_latency_ns(self) -> float:
+        requests = self.reads + self.writes
+        return self.total_latency_ns / requests if requests > 0 else 0.0
+
+    def _decode(self, addresses: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        # channel and global bank index, and row, of every burst address
+        dram = self.dram
+        banks = dram.ranks * dram.banks
+        columns = max(dram.row_size // dram.memory_burst_size, 1)
+        burst = addresses // dram.memory_burst_size
+        channel = burst % dram.memory_channels
+        rest = burst // dram.memory_channels
+        if dram.row_policy == 'open':
+            bank = (rest // columns) % banks
+            row = rest // columns // banks
+        else:
+            bank = rest % banks
+            row = rest // banks // columns
+        return channel, channel * banks + bank, row
+
+    def simulate(self, addresses, request_size: int, writes=None, arrivals_ns=None) -> 'DramSimulator':
+        """
+        Replay a request stream, in order of the requests.
+
+        Args:
+            addresses: byte address of every request
+            request_size: bytes per request, a request larger than a burst moves consecutive bursts
+            writes: write flag of every request, all reads by default
+            arrivals_ns: arrival time of every request, all at time 0 for a saturating stream
+
+        Returns:
+            self, with the counters of the stream
+        """
+        dram = self.dram
+        addresses = np.asarray(addresses, dtype=np.int64)
+        writes = np.zeros(len(addresses), dtype=bool) if writes is None else np.asarray(writes, dtype=bool)
+        arrivals = np.zeros(len(addresses)) if arrivals_ns is None else np.asarray(arrivals_ns, dtype=np.float64)
+        nr_writes = int(np.count_nonzero(writes))
+        self.writes += nr_writes
+        self.reads += len(addresses) - nr_writes
+
+        bursts_per_request = max(-(-request_size // dram.memory_burst_size), 1)
+        offsets = np.arange(bursts_per_request) * dram.memory_burst_size
+        burst_addresses = (addresses[:, None] // dram.memory_burst_size * dram.memory_burst_size + offsets).ravel()
+        channels, banks, rows = (a.tolist() for a in self._decode(burst_addresses))
+        arrivals = np.repeat(arrivals, bursts_per_request).tolist()
+        self.bursts += len(channels)
+
+        burst_time = dram.memory_burst_size / (2 * dram.channel_width * dram.memory_clock)
+        activate, precharge, cas = dram.activate_ns, dram.precharge_ns, dram.cas_latency_ns
+        active, window = dram.active_ns, dram.four_activate_window_ns
+        banks_per_rank = dram.banks
+        open_page = dram.row_policy == 'open'
+        open_row, bank_ready, activated = self.open_row, self.bank_ready, self.activated
+        activations, bus_free = self.activations, self.bus_free
+        finish = self.finish_ns
+        latency = 0.0
+        for i in range(len(channels)):
+            channel, bank, row = channels[i], banks[i], rows[i]
+            start = max(arrivals[i], bank_ready[bank])
+            if open_row[bank] == row:
+                self.row_hits += 1
+                column = start
+            else:
+                if open_row[bank] < 0:
+                    self.row_misses += 1
+                    act = start
+                else:
+                    self.row_conflicts += 1
+                    act = max(start, activated[bank] + active) + precharge
+                # activations of a rank issue in order, at most four per window
+                recent = activations[bank // banks_per_rank]
+                if recent:
+                    act = max(act, recent[-1])
+                    if len(recent) == 4:
+                        act = max(act, recent.pop(0) + window)
+                recent.append(act)
+                activated[bank] = act
+                column = act + activate
+            end = max(column + cas, bus_free[channel]) + burst_time
+            bus_free[channel] = end
+            if open_page:
+                open_row[bank] = row
+                bank_ready[bank] = column + burst_time
+            else:
+                open_row[bank] = -1
+                bank_ready[bank] = max(end, activated[bank] + active) + precharge
+            if end > finish:
+                finish = end
+            if (i + 1) % bursts_per_request == 0:
+                latency += end - arrivals[i]
+        self.finish_ns = finish
+        self.total_latency_ns += latency
+        return self
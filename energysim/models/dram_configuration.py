@@ -0,0 +1,127 @@
+# timing and organization of DRAM families, the timings are in nsec so that they hold across speed grades
+# row_size is the row buffer (page) of a channel, the bytes that one activation opens
+DRAM_TIMINGS = {
+    'DDR4': {'ranks': 1, 'banks': 16, 'row_size_in_bytes': 8192,
+             'cas_latency_ns': 13.75, 'activate_ns': 13.75, 'precharge_ns': 13.75,
+             'active_ns': 32.0, 'four_activate_window_ns': 30.0},
+    'DDR5': {'ranks': 1, 'banks': 32, 'row_size_in_bytes': 4096,
+             'cas_latency_ns': 16.67, 'activate_ns': 16.67, 'precharge_ns': 16.67,
+             'active_ns': 32.0, 'four_activate_window_ns': 20.0},
+    'GDDR6': {'ranks': 1, 'banks': 16, 'row_size_in_bytes': 2048,
+              'cas_latency_ns': 12.0, 'activate_ns': 14.0, 'precharge_ns': 14.0,
+              'active_ns': 28.0, 'four_activate_window_ns': 12.0},
+    'HBM2': {'ranks': 1, 'banks': 16, 'row_size_in_bytes': 1024,
+             'cas_latency_ns': 14.0, 'activate_ns': 14.0, 'precharge_ns': 14.0,
+             'active_ns': 33.0, 'four_activate_window_ns': 16.0},
+}
+
+# interface of common parts: memory clock, channels, channel width, and burst size of a DIMM, a board, or a stack
+DRAM_PARTS = {
+    'DDR4-3200': ('DDR4', {'memory_clock_ghz': 1.6, 'memory_channels': 1,
+                           'channel_width_in_bytes': 8, 'memory_burst_size_in_bytes': 64}),
+    'DDR5-4800': ('DDR5', {'memory_clock_ghz': 2.4, 'memory_channels': 2,
+                           'channel_width_in_bytes': 4, 'memory_burst_size_in_bytes': 64}),
+    'GDDR6-16': ('GDDR6', {'memory_clock_ghz': 8.0, 'memory_channels': 16,
+                           'channel_width_in_bytes': 2, 'memory_burst_size_in_bytes': 32}),
+    'HBM2-2': ('HBM2', {'memory_clock_ghz': 1.0, 'memory_channels': 8,
+                        'channel_width_in_bytes': 16, 'memory_burst_size_in_bytes': 64}),
+}
+
+ROW_POLICIES = ('open', 'closed')
+
+
+class DynamicRandomAccessMemoryConfiguration:
+    def __init__(self,
+                 memory_clock_ghz: float,
+                 memory_channels: int,
+                 channel_width_in_bytes: int,
+                 memory_burst_size_in_bytes: int,
+                 ranks: int = 1,
+                 banks: int = 16,
+                 row_size_in_bytes: int = 8192,
+                 cas_latency_ns: float = 13.75,
+                 activate_ns: float = 13.75,
+                 precharge_ns: float = 13.75,
+                 active_ns: float = 32.0,
+                 four_activate_window_ns: float = 30.0,
+                 row_policy: str = 'open'):
+        if row_policy not in ROW_POLICIES:
+            raise ValueError(f'Row policy {row_policy} not supported, choose one of {ROW_POLICIES}')
+        # interface, the data bus transfers on both clock edges
+        self.memory_clock: float = memory_clock_ghz    # GHz
+        self.memory_cycle_ns: float = 1.0 / memory_clock_ghz  # nsec
+        self.memory_channels: int = memory_channels
+        self.channel_width: int = channel_width_in_bytes
+        self.memory_burst_size: int = memory_burst_size_in_bytes
+        # organization of a channel
+        self.ranks: int = ranks
+        self.banks: int = banks     # per rank
+        self.row_size: int = row_size_in_bytes
+        # timing
+        self.cas_latency_ns: float = cas_latency_ns     # tCL, column command to data
+        self.activate_ns: float = activate_ns           # tRCD, row activation to column command
+        self.precharge_ns: float = precharge_ns         # tRP, closing a row
+        self.active_ns: float = active_ns               # tRAS, row activation to precharge
+        self.four_activate_window_ns: float = four_activate_window_ns   # tFAW, window of four activations of a rank
+        self.row_policy: str = row_policy
+
+    def __repr__(self):
+        return (f"DynamicRandomAccessMemoryConfiguration(clock={self.memory_clock}GHz, "
+                f"channels={self.memory_channels}, width={self.channel_width}, ...)")
+
+    def __str__(self):
+        return f"""
+
+        DRAM Configuration:
+        - Memory clock:       {self.memory_clock} GHz
+        - Memory channels:    {self.memory_channels}
+        - Channel width:      {self.channel_width} bytes
+        - Memory burst size:  {self.memory_burst_size} bytes
+        - Ranks x banks:      {self.ranks} x {self.banks}
+        - Row size:           {self.row_size} bytes
+        - tCL/tRCD/tRP:       {self.cas_latency_ns}/{self.activate_ns}/{self.precharge_ns} nsec
+        - tRAS/tFAW:          {self.active_ns}/{self.four_activate_window_ns} nsec
+        - Row policy:         {self.row_policy}
+        - Peak bandwidth:     {self.peak_bandwidth * 1.0e-9:.1f} GB/s
+        """
+
+    @classmethod
+    def from_memory_parameters(cls, memory_clock_ghz: float, memory_channels: int, channel_width_in_bytes: int,
+                               memory_burst_size_in_bytes: int, family: str = 'DDR4', **overrides) \
+            -> 'DynamicRandomAccessMemoryConfiguration':
+        """
+        DRAM behind the memory interface of a machine configuration, with the timing of a DRAM family.
+
+        :param family: key of DRAM_TIMINGS
+        :param overrides: timing or organization parameters that replace the ones of the family
+        :return: DynamicRandomAccessMemoryConfiguration
+        """
+        if family not in DRAM_TIMINGS:
+            raise ValueError(f'DRAM family {family} not supported, choose one of {tuple(DRAM_TIMINGS)}')
+        timing = {**DRAM_TIMINGS[family], **overrides}
+        return cls(memory_clock_ghz, memory_channels, channel_width_in_bytes, memory_burst_size_in_bytes, **timing)
+
+    @classmethod
+    def part(cls, name: str, **overrides) -> 'DynamicRandomAccessMemoryConfiguration':
+        """
+        A common DRAM part, for example, 'DDR4-3200', 'DDR5-4800', 'GDDR6-16', or 'HBM2-2'.
+
+        :param name: key of DRAM_PARTS
+        :param overrides: interface, timing, or organization parameters that replace the ones of the part
+        :return: DynamicRandomAccessMemoryConfiguration
+        """
+        if name not in DRAM_PARTS:
+            raise ValueError(f'DRAM part {name} not supported, choose one of {tuple(DRAM_PARTS)}')
+        family, interface = DRAM_PARTS[name]
+        parameters = {**DRAM_TIMINGS[family], **interface, **overrides}
+        return cls(**parameters)
+
+    @property
+    def row_cycle_ns(self) -> float:
+        # tRC, activation to activation of a bank
+        return self.active_ns + self.precharge_ns
+
+    @property
+    def peak_bandwidth(self) -> float:
+        # bytes/sec over all channels
+        return self.memory_channels * self.channel_width * 2 * self.memory_clock * 1.0e9
@@ -58,18 +58,16 @@ def execute_unit(node: str,
     exu_metrics.record('reg_write', reg_write, energies.reg_write)
 
     # consolidate sets
-    exu_metrics.consolidate('compute', ['agu', 'alu', 'fpu', 'sfu'])
-    exu_metrics.consolidate('data', ['reg_read', 'reg_write'])
-    exu_metrics.consolidate('total', ['compute', 'data'])
+    exu_metrics.rollup()
 
     ############################################################################
     # calculate performance metrics
 
     # instruction throughput
-    total_aops = exu_metrics.events['agu']  # address operations
-    total_iops = exu_metrics.events['alu']  # ALU operations
-    total_flops = exu_metrics.events['fpu'] # FPU operations
-    total_sfops = exu_metrics.events['sfu'] # SFU operations
+    total_aops = exu_metrics.occurrence('agu')  # address operations
+    total_iops = exu_metrics.occurrence('alu')  # ALU operations
+    total_flops = exu_metrics.occurrence('fpu') # FPU operations
+    total_sfops = exu_metrics.occurrence('sfu') # SFU operations
     total_ops = total_aops + total_iops + total_flops + total_sfops
     exu_metrics.total_aops = total_aops
     exu_metrics.total_iops = total_iops
@@ -97,7 +95,7 @@ def execute_unit(node: str,
     # normalized performance
     # Watt = J/s
     # ops/Watt = ops/ (J/s)
-    total_energy_in_pJoules = exu_metrics.energy['total']
+    total_energy_in_pJoules = exu_metrics.occurrence_energy('total')
     total_energy = total_energy_in_pJoules * 1.0e-12
     power = total_energy / total_elapsed_time_in_sec
     exu_metrics.power = power
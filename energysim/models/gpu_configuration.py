@@ -1,4 +1,5 @@
 from energysim.models.design_category import DesignCategory
+from energysim.models.dram_configuration import DynamicRandomAccessMemoryConfiguration
 
 class GraphicsProcessingUnitConfiguration:
     def __init__(self,
@@ -11,20 +12,38 @@ class GraphicsProcessingUnitConfiguration:
                  memory_channels: int,
                  channel_width_in_bytes: int,
                  threads_per_block: int,
-                 blocks_per_grid: int):
+                 blocks_per_grid: int,
+                 dram: 'DynamicRandomAccessMemoryConfiguration' = None,
+                 fma_units: int = 1024,
+                 smem_size_in_bytes: int = 48 * 1024,
+                 l2_size_in_bytes: int = 4 * 1024 * 1024,
+                 output_word_size_in_bytes: int = None):
         # GPU attributes
         # structure
         self.word_size: int = word_size_in_bytes
+        # bytes of the elements an operator writes, such as FP32 accumulations of FP8 operands
+        self.output_word_size: int = output_word_size_in_bytes or word_size_in_bytes
         self.cache_line_size: int = cache_line_size_in_bytes
         self.memory_burst_size: int = memory_burst_size_in_bytes
         self.memory_channels: int = memory_channels
         self.channel_width: int = channel_width_in_bytes
+        # fma lanes of all streaming multiprocessors, the compute ceiling of the roofline
+        self.fma_units: int = fma_units
+        # shared memory of a thread block, the tile sizes of blocked kernels are derived from it
+        self.smem_size: int = smem_size_in_bytes
+        # L2 shared by all streaming multiprocessors, tensors stay resident in it between kernels
+        self.l2_size: int = l2_size_in_bytes
         # attributes
         self.category: DesignCategory = category
         self.core_clock: float = core_clock_ghz # GHz
         self.clock_cycle_ns: float  = 1.0 / core_clock_ghz  # nsec
         self.memory_clock: float = memory_clock_ghz    # GHz
         self.memory_cycle_ns: float = 1.0 / memory_clock_ghz  # nsec
+        # DRAM behind the memory channels, GDDR6 timing unless configured
+        if dram is None:
+            dram = DynamicRandomAccessMemoryConfiguration.from_memory_parameters(
+                memory_clock_ghz, memory_channels, channel_width_in_bytes, memory_burst_size_in_bytes, family='GDDR6')
+        self.dram: DynamicRandomAccessMemoryConfiguration = dram
         # kernel configuration
         self.threads_per_block: int = threads_per_block  # typically 128 or 256 as a starting point
         self.blocks_per_grid: int = blocks_per_grid
@@ -40,8 +59,12 @@ class GraphicsProcessingUnitConfiguration:
         - Cache line size:    {self.cache_line_size} bytes
         - Memory burst size:  {self.memory_burst_size} bytes
         - Word size:          {self.word_size} bytes
+        - Output word size:   {self.output_word_size} bytes
         - Memory channels:    {self.memory_channels}
         - Channel width:       {self.channel_width} bytes
+        - FMA units:          {self.fma_units}
+        - Shared memory size: {self.smem_size} bytes
+        - L2 cache size:      {self.l2_size} bytes
         
         - Design Category:    {self.category}
         - Core clock:         {self.core_clock} GHz
@@ -0,0 +1,259 @@
+import functools
+import math
+
+
+# Interconnect of a distributed-memory cluster.
+#
+# Messages follow the alpha-beta model: a message of n bytes that crosses h links takes
+# alpha(h) + n / link_bandwidth, with alpha(h) the software overhead of the message plus the latency of every link
+# and switch it crosses. Every byte costs the energy of the network interfaces that inject and eject it,
+# and the energy of every link it crosses.
+#
+# The collectives use the algorithm that suits the topology:
+# - ring: the ring algorithms, p - 1 neighbor steps of a block of n / p bytes per phase,
+# - torus: the ring algorithms along every dimension in turn, fewer steps of larger blocks,
+# - fat-tree: recursive doubling and halving, log2(p) steps between partners at growing distances,
+#   whose hops are the levels of the tree the partners have to climb to meet.
+# An all-reduce is a reduce-scatter followed by an all-gather, and a broadcast is the faster
+# of a binomial tree and a scatter followed by an all-gather.
+#
+# Every collective returns (time in seconds, bytes injected by all nodes, byte-hops crossed by all bytes),
+# and collective_energy converts the bytes and byte-hops into energy.
+
+TOPOLOGIES = ('ring', 'fat-tree', 'torus')
+
+
+@functools.lru_cache(maxsize=256)
+def torus_shape(nodes: int, dimensions: int) -> tuple:
+    """
+    Balanced factorization of a node count into the extents of the dimensions of a torus.
+
+    Args:
+        nodes: number of nodes
+        dimensions: number of dimensions of the torus
+
+    Returns:
+        tuple of dimension extents, largest first, whose product is nodes
+    """
+    shape = []
+    remaining = nodes
+    for left in range(dimensions, 0, -1):
+        target = remaining ** (1.0 / left)
+        divisors = [d for d in range(1, remaining + 1) if remaining % d == 0]
+        extent = min(divisors, key=lambda d: (abs(d - target), d))
+        shape.append(extent)
+        remaining //= extent
+    return tuple(sorted(shape, reverse=True))
+
+
+class Interconnect:
+    def __init__(self,
+                 topology: str = 'fat-tree',
+                 link_bandwidth: float = 25.0e9,
+                 link_latency_ns: float = 100.0,
+                 software_overhead_ns: float = 1000.0,
+                 link_energy_per_byte: float = 40.0,
+                 nic_energy_per_byte: float = 20.0,
+                 radix: int = 64,
+                 dimensions: int = 3):
+        if topology not in TOPOLOGIES:
+            raise ValueError(f'Topology {topology} not supported, choose one of {TOPOLOGIES}')
+        self.topology = topology
+        self.link_bandwidth = link_bandwidth                # bytes/sec per link and direction
+        self.link_latency_ns = link_latency_ns              # per link and switch crossed
+        self.software_overhead_ns = software_overhead_ns    # per message
+        self.link_energy_per_byte = link_energy_per_byte    # pJ per byte per link crossed
+        self.nic_energy_per_byte = nic_energy_per_byte      # pJ per byte injected, and per byte ejected
+        # a fat-tree switch has radix ports, half down toward the nodes, half up toward the next level
+        self.radix = radix
+        self.dimensions = dimensions                        # of a torus
+
+    def __repr__(self):
+        return f"Interconnect(topology='{self.topology}', link_bandwidth={self.link_bandwidth}, ...)"
+
+    def __str__(self):
+        return f"""
+        Interconnect:
+        - Topology:           {self.topology}
+        - Link bandwidth:     {self.link_bandwidth * 1.0e-9} GB/sec
+        - Link latency:       {self.link_latency_ns} nsec
+        - Software overhead:  {self.software_overhead_ns} nsec
+        - Link energy:        {self.link_energy_per_byte} pJ/byte
+        - NIC energy:         {self.nic_energy_per_byte} pJ/byte
+        """
+
+    # structure
+
+    def levels(self, nodes: int) -> int:
+        """
+        Levels of switches of a fat-tree that connects the nodes.
+        """
+        down = self.radix // 2
+        return max(1, math.ceil(math.log(nodes, down) - 1.0e-9)) if nodes > 1 else 1
+
+    def distance_hops(self, distance: int, nodes: int) -> int:
+        """
+        Links crossed between node i and node i + distance.
+        """
+        if self.topology == 'ring':
+            distance %= nodes
+            return min(distance, nodes - distance)
+        if self.topology == 'torus':
+            hops = 0
+            stride = nodes
+            for extent in torus_shape(nodes, self.dimensions):
+                stride //= extent
+                offset = (distance // stride) % extent
+                hops += min(offset, extent - offset)
+            return hops
+        # partners meet in the smallest subtree that holds both
+        down = self.radix // 2
+        level = 1
+        while down ** level <= distance:
+            level += 1
+        return 2 * level
+
+    def diameter(self, nodes: int) -> int:
+        if self.topology == 'ring':
+            return nodes // 2
+        if self.topology == 'torus':
+            return sum(extent // 2 for extent in torus_shape(nodes, self.dimensions))
+        return 2 * self.levels(nodes)
+
+    def average_hops(self, nodes: int) -> float:
+        """
+        Links crossed between a node and another node, on average over the other nodes.
+        """
+        if nodes < 2:
+            return 0.0
+        if self.topology == 'fat-tree':
+            # the nodes that a node first meets at level l of the tree are 2 * l links away
+            down = self.radix // 2
+            total, level, reached = 0, 1, 1
+            while reached < nodes:
+                subtree = min(nodes, down ** level)
+                total += 2 * level * (subtree - reached)
+                reached, level = subtree, level + 1
+            return total / (nodes - 1)
+        # the offsets along the rings of the dimensions are independent, over all nodes including itself
+        shape = (nodes,) if self.topology == 'ring' else torus_shape(nodes, self.dimensions)
+        ring_mean = sum(sum(min(offset, extent - offset) for offset in range(extent)) / extent for extent in shape)
+        return ring_mean * nodes / (nodes - 1)
+
+    def bisection_bandwidth(self, nodes: int) -> float:
+        """
+        Bandwidth, in bytes/sec, between two halves of the nodes.
+        """
+        if self.topology == 'ring':
+            return 2 * self.link_bandwidth
+        if self.topology == 'torus':
+            shape = torus_shape(nodes, self.dimensions)
+            wrap = 2 if shape[0] > 2 else 1
+            return wrap * nodes // shape[0] * self.link_bandwidth
+        return nodes / 2 * self.link_bandwidth
+
+    # alpha-beta cost of a message
+
+    def alpha(self, hops) -> float:
+        return (self.software_overhead_ns + hops * self.link_latency_ns) * 1.0e-9
+
+    def message_time(self, size_in_bytes, hops=1) -> float:
+        return self.alpha(hops) + size_in_bytes / self.link_bandwidth
+
+    # collectives
+
+    def all_gather(self, size_in_bytes, nodes: int) -> tuple:
+        """
+        Every node contributes size_in_bytes / nodes, and receives all of size_in_bytes.
+
+        Args:
+            size_in_bytes: size of the gathered result
+            nodes: nodes of the group
+
+        Returns:
+            (time in seconds, bytes injected by all nodes, byte-hops crossed by all bytes)
+        """
+        if nodes < 2:
+            return 0.0, 0.0, 0.0
+        block = size_in_bytes / nodes
+        time = 0.0
+        sent_per_node = 0.0
+        hops_per_node = 0.0
+        if self.topology == 'fat-tree':
+            # recursive doubling: the block a node holds doubles every step
+            for step in range(math.ceil(math.log2(nodes))):
+                distance = 2 ** step
+                message = block * min(distance, nodes - distance)
+                hops = self.distance_hops(distance, nodes)
+                time += self.message_time(message, hops)
+                sent_per_node += message
+                hops_per_node += message * hops
+        else:
+            # a ring along every dimension, the block grows by the extent of every dimension
+            shape = (nodes,) if self.topology == 'ring' else torus_shape(nodes, self.dimensions)
+            for extent in shape:
+                message = block
+                steps = extent - 1
+                time += steps * self.message_time(message)
+                sent_per_node += steps * message
+                hops_per_node += steps * message
+                block *= extent
+        return time, nodes * sent_per_node, nodes * hops_per_node
+
+    def reduce_scatter(self, size_in_bytes, nodes: int) -> tuple:
+        """
+        Every node contributes size_in_bytes, and receives its reduced block of size_in_bytes / nodes.
+        The messages mirror those of all_gather, in reverse order.
+        """
+        return self.all_gather(size_in_bytes, nodes)
+
+    def all_reduce(self, size_in_bytes, nodes: int) -> tuple:
+        """
+        Every node contributes size_in_bytes, and receives the reduction of all contributions.
+        """
+        scatter = self.reduce_scatter(size_in_bytes, nodes)
+        gather = self.all_gather(size_in_bytes, nodes)
+        return tuple(a + b for a, b in zip(scatter, gather))
+
+    def broadcast(self, size_in_bytes, nodes: int) -> tuple:
+        """
+        The root sends size_in_bytes to every node, along a binomial tree for small messages,
+        as a scatter followed by an all-gather for large messages.
+        """
+        if nodes < 2:
+            return 0.0, 0.0, 0.0
+        steps = math.ceil(math.log2(nodes))
+        binomial = [0.0, 0.0, 0.0]
+        scatter = [0.0, 0.0, 0.0]
+        for step in range(steps):
+            # in step s, the 2^s nodes that hold the data send it 2^(steps - s - 1) nodes further
+            distance = 2 ** (steps - step - 1)
+            senders = min(2 ** step, nodes - 2 ** step)
+            hops = self.distance_hops(distance, nodes)
+            binomial[0] += self.message_time(size_in_bytes, hops)
+            binomial[1] += senders * size_in_bytes
+            binomial[2] += senders * size_in_bytes * hops
+            # the scatter halves the data at every step
+            message = size_in_bytes * min(distance, nodes - distance) / nodes
+            scatter[0] += self.message_time(message, hops)
+            scatter[1] += senders * message
+            scatter[2] += senders * message * hops
+        gather = self.all_gather(size_in_bytes, nodes)
+        scatter_gather = tuple(a + b for a, b in zip(scatter, gather))
+        return tuple(binomial) if binomial[0] <= scatter_gather[0] else scatter_gather
+
+    def collective_energy(self, cost: tuple) -> tuple:
+        """
+        Energy of a collective.
+
+        Args:
+            cost: (time, bytes, byte-hops) of a collective
+
+        Returns:
+            (energy to receive, energy to send) in pJ: the network interface that ejects the bytes,
+            and the network interface that injects them with the links they cross
+        """
+        _, moved, byte_hops = cost
+        network_read = moved * self.nic_energy_per_byte
+        network_write = moved * self.nic_energy_per_byte + byte_hops * self.link_energy_per_byte
+        return network_read, network_write
@@ -0,0 +1,178 @@
+import numpy as np
+
+# alignment of the arrays of the reference loop nests, so that they start on a page boundary
+ARRAY_ALIGNMENT = 4096
+
+
+# An array reference in the body of a loop nest.
+# The element it touches is base + word_size * sum(stride[l] * index[l]) over the loops l of the nest.
+# A reference at level d belongs to the body of loop d: it executes once per iteration of loops 0..d.
+# Reads at an outer level execute before the deeper loops, writes after them, for example,
+# the load and the store of an accumulator around a reduction loop.
+class ArrayAccess:
+    __slots__ = ('name', 'base', 'strides', 'word_size', 'write', 'level')
+
+    def __init__(self, name: str, base: int, strides: tuple, word_size: int, write: bool = False, level: int = None):
+        self.name = name
+        self.base = base
+        self.strides = tuple(strides)
+        self.word_size = word_size
+        self.write = write
+        self.level = level
+
+    def __repr__(self):
+        return f"ArrayAccess(name='{self.name}', write={self.write}, level={self.level})"
+
+
+# A perfect loop nest with affine array references, the reference model of an operator.
+# The address trace of the nest is generated lazily, in chunks of iterations,
+# as NumPy arrays of byte addresses and write flags in program order.
+class LoopNest:
+    def __init__(self, extents: tuple, accesses: list):
+        self.extents = tuple(int(e) for e in extents)
+        self.accesses = list(accesses)
+        for access in self.accesses:
+            if len(access.strides) != len(self.extents):
+                raise ValueError(f'{access.name} has {len(access.strides)} strides for {len(self.extents)} loops')
+            if access.level is None:
+                access.level = len(self.extents) - 1
+
+    def __repr__(self):
+        return f"LoopNest(extents={self.extents}, accesses={[a.name for a in self.accesses]})"
+
+    @property
+    def iterations(self) -> int:
+        return int(np.prod(self.extents, dtype=np.int64))
+
+    def references(self) -> int:
+        """
+        Number of memory references of the nest, the length of its trace.
+
+        :return: total number of references
+        """
+        total = 0
+        for access in self.accesses:
+            total += int(np.prod(self.extents[:access.level + 1], dtype=np.int64))
+        return total
+
+    def reuse_span(self) -> int:
+        """
+        Longest distance, in iterations, between two uses of an element by the same reference:
+        a reference that does not move along a loop uses its elements again on the next iteration of that loop.
+
+        :return: iterations between the uses, 0 if no element is used twice
+        """
+        span = 0
+        for access in self.accesses:
+            for loop in range(access.level + 1):
+                if access.strides[loop] == 0 and self.extents[loop] > 1:
+                    span = max(span, int(np.prod(self.extents[loop + 1:], dtype=np.int64)))
+        return span
+
+    def cold_iterations(self) -> int:
+        """
+        Iterations in which the elements that the whole nest reuses are touched for the first time:
+        the first iteration of the outermost loop, when a reference does not move along it.
+
+        :return: iterations at the start of the nest, 0 if no reference is invariant in the outermost loop
+        """
+        for loop, extent in enumerate(self.extents):
+            if extent > 1:
+                if any(access.strides[loop] == 0 and loop <= access.level for access in self.accesses):
+                    return int(np.prod(self.extents[loop + 1:], dtype=np.int64))
+                return 0
+        return 0
+
+    def trace(self, chunk_size: int = 1 << 20, start: int = 0, stop: int = None):
+        """
+        Generate the address trace of the nest, or of a range of its iterations.
+
+        :param chunk_size: number of iterations of the innermost loop body per chunk
+        :param start: first iteration of the range, in the flattened iteration space
+        :param stop: end of the range, defaults to the end of the nest
+        :return: generator of (byte addresses, write flags) arrays, in program order
+        """
+        depth = len(self.extents)
+        stop = self.iterations if stop is None else min(stop, self.iterations)
+        for first in range(start, stop, chunk_size):
+            last = min(first + chunk_size, stop)
+            index = np.unravel_index(np.arange(first, last, dtype=np.int64), self.extents)
+
+            addresses = np.empty((last - first, len(self.accesses)), dtype=np.int64)
+            executes = np.ones((last - first, len(self.accesses)), dtype=bool)
+            writes = np.empty(len(self.accesses), dtype=bool)
+            for column, access in enumerate(self.accesses):
+                element = np.zeros(last - first, dtype=np.int64)
+                for loop, stride in enumerate(access.strides):
+                    if stride != 0:
+                        element += stride * index[loop]
+                addresses[:, column] = access.base + access.word_size * element
+                # outer level references execute on the first (reads) or last (writes) inner iteration
+                for loop in range(access.level + 1, depth):
+                    edge = self.extents[loop] - 1 if access.write else 0
+                    executes[:, column] &= index[loop] == edge
+                writes[column] = access.write
+
+            yield addresses[executes], np.broadcast_to(writes, executes.shape)[executes]
+
+
+def _align(address: int) -> int:
+    return -(-address // ARRAY_ALIGNMENT) * ARRAY_ALIGNMENT
+
+
+def matvec_loop_nest(rows: int, cols: int, word_size: int = 4) -> 'LoopNest':
+    """
+    y(rows) = A(rows x cols) * x(cols), row-major A, the reference of flat_matvec_spm.
+
+    :return: LoopNest over (i, j)
+    """
+    a_base = 0
+    x_base = _align(a_base + rows * cols * word_size)
+    y_base = _align(x_base + cols * word_size)
+    return LoopNest((rows, cols), [
+        ArrayAccess('A', a_base, (cols, 1), word_size),
+        ArrayAccess('x', x_base, (0, 1), word_size),
+        ArrayAccess('y', y_base, (1, 0), word_size, write=True, level=0),
+    ])
+
+
+def matmul_loop_nest(M: int, N: int, K: int, word_size: int = 4) -> 'LoopNest':
+    """
+    C(M x K) += A(M x N) * B(N x K), row-major, the shape convention of flat_matmul_spm,
+    with the reduction over N in the innermost loop.
+
+    :return: LoopNest over (i, k, j)
+    """
+    a_base = 0
+    b_base = _align(a_base + M * N * word_size)
+    c_base = _align(b_base + N * K * word_size)
+    return LoopNest((M, K, N), [
+        ArrayAccess('C', c_base, (K, 1, 0), word_size, level=1),
+        ArrayAccess('A', a_base, (N, 0, 1), word_size),
+        ArrayAccess('B', b_base, (0, 1, K), word_size),
+        ArrayAccess('C', c_base, (K, 1, 0), word_size, write=True, level=1),
+    ])
+
+
+def conv2d_loop_nest(N: int, H: int, W: int, C: int, K: int, R: int, S: int, stride: int = 1,
+                     word_size: int = 4) -> 'LoopNest':
+    """
+    O(N x P x Q x K) += I(N x H x W x C) * F(R x S x C x K), NHWC input and output, unpadded,
+    with the reduction over R, S, and C in the innermost loops.
+
+    :return: LoopNest over (n, p, q, k, r, s, c)
+    """
+    P = (H - R) // stride + 1
+    Q = (W - S) // stride + 1
+    i_base = 0
+    f_base = _align(i_base + N * H * W * C * word_size)
+    o_base = _align(f_base + R * S * C * K * word_size)
+    input_strides = (H * W * C, stride * W * C, stride * C, 0, W * C, C, 1)
+    filter_strides = (0, 0, 0, 1, S * C * K, C * K, K)
+    output_strides = (P * Q * K, Q * K, K, 1, 0, 0, 0)
+    return LoopNest((N, P, Q, K, R, S, C), [
+        ArrayAccess('O', o_base, output_strides, word_size, level=3),
+        ArrayAccess('I', i_base, input_strides, word_size),
+        ArrayAccess('F', f_base, filter_strides, word_size),
+        ArrayAccess('O', o_base, output_strides, word_size, write=True, level=3),
+    ])
@@ -0,0 +1,280 @@
+import numpy as np
+import pandas as pd
+
+from energysim.database.spm_energy import StoredProgramMachineEnergy
+from energysim.execution.spm_metrics import StoredProgramMachineMetrics
+from energysim.models.loop_nest import LoopNest
+
+
+# Reuse-distance (LRU stack distance) analysis of an address trace.
+#
+# The stack distance of a reference is the number of distinct lines touched since the previous
+# reference to its line, and infinite for the first reference. A fully associative LRU cache of C lines
+# hits exactly the references with a distance below C, so one histogram of the distances answers
+# the misses of every capacity. With p the previous reference of the reference at t,
+#   distance(t) = (t - p - 1) - #{intervals between consecutive references of a line nested in (p, t)}
+# and, with next(j) the time of the next reference of the line of j, the nested intervals are
+#   #{j : next(j) < t} - #{j < p : next(j) < next(p)}
+# The first term is a prefix count, the second counts, for every position, the earlier positions with
+# a smaller next use. That count is computed for all positions at once, one bit of next(j) at a time,
+# from the most significant down: every pass is a stable partition of the positions on the next bit,
+# the radix counterpart of the merge step of a merge sort, in a handful of O(n) NumPy operations.
+#
+# A line is written back when it is evicted dirty. The reference r before an eviction is followed by a reuse
+# of distance at least C, and its line is dirty when the reuses since the last write of the line, up to r,
+# all have a distance below C. Two more histograms give the write-backs of every capacity.
+
+def _earlier_smaller(values: np.ndarray) -> np.ndarray:
+    # for every position k, the number of positions j < k with values[j] < values[k], values distinct and >= 0
+    n = len(values)
+    index_type = np.int32 if n < np.iinfo(np.int32).max and values.max(initial=0) < np.iinfo(np.int32).max \
+        else np.int64
+    # the sequence of one pass is ordered by the bits of the values above the pass, stable in position,
+    # so a position, and the earlier positions with the same higher bits, are one contiguous group
+    element = np.arange(n, dtype=index_type)
+    ordered = values.astype(index_type)
+    group_start = np.zeros(n, dtype=index_type)
+    counts = np.zeros(n, dtype=index_type)
+    for bit in reversed(range(int(values.max(initial=0)).bit_length())):
+        ones = ((ordered >> bit) & 1).astype(bool)
+        zeros = ~ones
+        zeros_before = np.cumsum(zeros, dtype=index_type)
+        zeros_before -= zeros
+        nr_zeros = zeros_before[-1] + zeros[-1]
+        zeros_before_group = zeros_before[group_start]
+        counts += (zeros_before - zeros_before_group) * ones
+
+        # stable partition on the bit, the groups of the next pass start where their first element lands
+        group_start = np.where(ones, nr_zeros + group_start - zeros_before_group, zeros_before_group)
+        partition = np.concatenate((np.flatnonzero(zeros), np.flatnonzero(ones)))
+        element, ordered = element[partition], ordered[partition]
+        counts, group_start = counts[partition], group_start[partition]
+
+    result = np.empty(n, dtype=np.int64)
+    result[element] = counts
+    return result
+
+
+def _reuse_links(lines: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # references grouped by line in program order, and the previous and next reference of every reference
+    n = len(lines)
+    order = np.argsort(lines, kind='stable')
+    same = lines[order[1:]] == lines[order[:-1]]
+    previous = np.full(n, -1, dtype=np.int64)
+    previous[order[1:][same]] = order[:-1][same]
+    following = np.full(n, n, dtype=np.int64)
+    following[order[:-1][same]] = order[1:][same]
+    return order, previous, following
+
+
+def _distances(previous: np.ndarray, following: np.ndarray) -> np.ndarray:
+    n = len(previous)
+    # only references with a next use can be nested in a reuse interval
+    has_next = np.flatnonzero(following < n)
+    earlier_smaller = np.zeros(n, dtype=np.int64)
+    earlier_smaller[has_next] = _earlier_smaller(following[has_next])
+    reused = previous >= 0
+    reuses_before = np.cumsum(reused) - reused
+
+    distances = np.full(n, -1, dtype=np.int64)
+    t = np.flatnonzero(reused)
+    p = previous[t]
+    distances[t] = (t - p - 1) - (reuses_before[t] - earlier_smaller[p])
+    return distances
+
+
+def stack_distances(lines: np.ndarray) -> np.ndarray:
+    """
+    LRU stack distance of every reference of a trace of line addresses.
+
+    Args:
+        lines: line address of every reference, in program order
+
+    Returns:
+        distances, -1 for the first reference to a line
+    """
+    _, previous, following = _reuse_links(lines)
+    return _distances(previous, following)
+
+
+def _tail(values: np.ndarray, size: int) -> np.ndarray:
+    # tail[c] = #{values >= c}, for c in 0..size, values of size and above count in every entry
+    histogram = np.bincount(np.minimum(values, size), minlength=size + 1)
+    return np.cumsum(histogram[::-1])[::-1]
+
+
+# The reuse profile of a trace at one line size: every capacity is answered from cumulative histograms.
+class ReuseProfile:
+    def __init__(self, name: str, line_size: int, reads: int, writes: int,
+                 miss_tail: np.ndarray, eviction_tail: np.ndarray, clean_eviction_tail: np.ndarray):
+        self.name = name
+        self.line_size = line_size
+        self.reads = reads
+        self.writes = writes
+        # entry c counts the misses, the evictions, and the evictions of clean lines of a cache of c lines,
+        # the last entry holds for every larger cache
+        self.miss_tail = miss_tail
+        self.eviction_tail = eviction_tail
+        self.clean_eviction_tail = clean_eviction_tail
+
+    def __repr__(self):
+        return f"ReuseProfile(name='{self.name}', line_size={self.line_size}, references={self.references})"
+
+    def __str__(self):
+        return (f"{self.name}: {self.references} references of {self.line_size} byte lines, "
+                f"{self.cold_misses} cold misses, {len(self.miss_tail) - 1} lines maximum reuse distance")
+
+    @classmethod
+    def from_trace(cls, trace, line_size: int, name: str = 'trace') -> 'ReuseProfile':
+        """
+        Reuse profile of a trace.
+
+        Args:
+            trace: iterable of (byte addresses, write flags) chunks, for example, LoopNest.trace()
+            line_size: bytes per cache line
+            name: name of the profile
+
+        Returns:
+            ReuseProfile
+        """
+        chunks = list(trace)
+        addresses = np.concatenate([a for a, _ in chunks]) if chunks else np.zeros(0, dtype=np.int64)
+        writes = np.concatenate([w for _, w in chunks]) if chunks else np.zeros(0, dtype=bool)
+        lines = addresses // line_size
+        order, previous, following = _reuse_links(lines)
+        distances = _distances(previous, following)
+        n = len(lines)
+        size = int(distances.max()) + 1 if n > 0 else 0     # first references miss in every cache
+
+        misses = np.where(distances < 0, size, distances)
+        # the reuse distance that ends the residency of a line after every reference
+        next_distance = np.full(n, size, dtype=np.int64)
+        has_next = following < n
+        next_distance[has_next] = misses[following[has_next]]
+
+        # largest reuse distance since the last write of the line, up to every reference,
+        # size for lines not written yet, evictions after a reference with a smaller
+        # next_distance than that find the line clean
+        ordered_writes = writes[order]
+        new_line = np.ones(n, dtype=bool)
+        new_line[1:] = lines[order[1:]] != lines[order[:-1]]
+        segment = np.cumsum(new_line | ordered_writes)
+        dirty_since = np.cumsum(new_line)
+        written = np.maximum.accumulate(np.where(ordered_writes, dirty_since, 0)) == dirty_since
+        reuse = np.where(ordered_writes, 0, misses[order])
+        span = size + 1
+        running_max = np.maximum.accumulate(segment * span + reuse) - segment * span
+        since_write = np.empty(n, dtype=np.int64)
+        since_write[order] = np.where(written, running_max, size)
+
+        return cls(name, line_size, int(n - np.count_nonzero(writes)), int(np.count_nonzero(writes)),
+                   _tail(misses, size), _tail(next_distance, size),
+                   _tail(np.minimum(since_write, next_distance), size))
+
+    @classmethod
+    def from_loop_nest(cls, nest: 'LoopNest', line_size: int, chunk_size: int = 1 << 20) -> 'ReuseProfile':
+        return cls.from_trace(nest.trace(chunk_size), line_size, repr(nest))
+
+    @property
+    def references(self) -> int:
+        return self.reads + self.writes
+
+    @property
+    def cold_misses(self) -> int:
+        return int(self.miss_tail[-1])
+
+    def _lines(self, capacity):
+        return np.minimum(np.asarray(capacity) // self.line_size, len(self.miss_tail) - 1)
+
+    def misses(self, capacity):
+        """
+        Misses of a fully associative LRU cache.
+
+        Args:
+            capacity: capacity in bytes, scalar or array
+
+        Returns:
+            misses, of the shape of capacity
+        """
+        return self.miss_tail[self._lines(capacity)]
+
+    def hit_rate(self, capacity):
+        return 1.0 - self.misses(capacity) / self.references if self.references > 0 else np.zeros(np.shape(capacity))
+
+    def writebacks(self, capacity):
+        """
+        Dirty lines evicted by a fully associative, write-back, write-allocate LRU cache,
+        including the dirty lines left at the end of the trace.
+
+        Args:
+            capacity: capacity in bytes, scalar or array
+
+        Returns:
+            write-backs, of the shape of capacity
+        """
+        lines = self._lines(capacity)
+        return self.eviction_tail[lines] - self.clean_eviction_tail[lines]
+
+    def events(self, capacities: tuple, names: tuple = ('l1', 'l2', 'l3')) -> dict:
+        """
+        Cache and memory events of a hierarchy, in the keys of StoredProgramMachineMetrics,
+        with the definitions of CacheHierarchy.events(). Every level is modeled as a fully associative
+        LRU cache of the core's trace, which holds for hierarchies with the inclusion property.
+
+        Args:
+            capacities: capacity in bytes of every level
+            names: name of every level
+
+        Returns:
+            dict of event name to count, arrays when the capacities are arrays
+        """
+        events = {}
+        reads, writes = self.reads, self.writes
+        for name, capacity in zip(names, capacities):
+            misses = self.misses(capacity)
+            events[name + '_read'] = reads
+            events[name + '_write'] = writes + misses
+            reads, writes = misses, self.writebacks(capacity)
+        events['dram_read'] = reads
+        events['dram_write'] = writes
+        return events
+
+    def record(self, spm_metrics: 'StoredProgramMachineMetrics', attributes: 'StoredProgramMachineEnergy',
+               capacities: tuple):
+        """
+        Record the events of an L1/L2/L3 hierarchy, with their energies, in the metrics of an operator.
+
+        Args:
+            spm_metrics: metrics to record into
+            attributes: SPM energy set
+            capacities: capacity in bytes of L1, L2, and L3
+        """
+        for key, count in self.events(capacities).items():
+            spm_metrics.record(key, int(count), getattr(attributes, key))
+
+
+def reuse_sweep(nest: 'LoopNest', line_sizes, capacities) -> pd.DataFrame:
+    """
+    Misses, hit rate, and write-backs of a loop nest for every combination of line size and capacity.
+    The trace is analyzed once per line size, every capacity is a lookup.
+
+    Args:
+        nest: loop nest of the operator
+        line_sizes: bytes per cache line
+        capacities: cache capacities in bytes
+
+    Returns:
+        pd.DataFrame with a row per (line_size, capacity)
+    """
+    capacities = np.asarray(capacities)
+    frames = []
+    for line_size in line_sizes:
+        profile = ReuseProfile.from_loop_nest(nest, line_size)
+        frames.append(pd.DataFrame({
+            'line_size': np.full(len(capacities), line_size),
+            'capacity': capacities,
+            'misses': profile.misses(capacities),
+            'hit_rate': profile.hit_rate(capacities),
+            'writebacks': profile.writebacks(capacities),
+        }))
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,199 @@
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from energysim.execution.event_metrics import EventMetrics
+from energysim.models.exu_configuration import ExecutionUnitConfiguration
+from energysim.models.gpu_configuration import GraphicsProcessingUnitConfiguration
+from energysim.models.spm_configuration import StoredProgramMachineConfiguration
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+# Roofline of a machine: a compute ceiling, the peak fma rate, and a bandwidth ceiling per level of the memory
+# hierarchy. An operator that performs F fmas and moves B_x bytes through level x has an operational intensity
+# I_x = F / B_x at that level, and can at best attain min(peak, I_x * bandwidth_x) fmas per second over all levels.
+# The ceiling that attains that minimum bounds the operator: the compute ceiling, or the bandwidth of a level.
+# The flops of the models count an fma as one operation, so peak and intensity are in fmas and fmas per byte.
+#
+# Ceilings, and the traffic of the operators, can be arrays: a batched sweep is placed on its rooflines in one call.
+# pandas is imported by analyze(), the operator models import this module and do not need it.
+
+# cache lines per core clock that the L2 and L3 of an SPM deliver toward the core,
+# the L1 load ports deliver the two operands of every fma unit
+SPM_LINES_PER_CLOCK = {'l2': 1.0, 'l3': 0.5}
+# register file read ports of every fpu of an execution unit, a word per port per core clock
+EXU_OPERANDS_PER_CLOCK = 3
+
+
+class Roofline:
+    def __init__(self, name: str, peak_flops, bandwidths: dict):
+        self.name = name
+        self.peak_flops = peak_flops        # fmas/sec
+        self.bandwidths = bandwidths        # bytes/sec of every level, from the core outward
+
+    def __repr__(self):
+        return f"Roofline(name='{self.name}', levels={tuple(self.bandwidths)})"
+
+    def __str__(self):
+        lines = [f"{self.name} roofline", f"  {'compute':<10} {np.mean(self.peak_flops) * 1.0e-9:>12.2f} GFMA/sec"]
+        for level, bandwidth in self.bandwidths.items():
+            lines.append(f"  {level:<10} {np.mean(bandwidth) * 1.0e-9:>12.2f} GB/sec, "
+                         f"ridge point {np.mean(self.ridge_point(level)):.3f} fma/byte")
+        return '\n'.join(lines)
+
+    @classmethod
+    def from_spm(cls, config: 'StoredProgramMachineConfiguration') -> 'Roofline':
+        return cls._spm('SPM', config.core_clock, config.fma_units, config.word_size, config.cache_line_size,
+                        config.dram.peak_bandwidth)
+
+    @classmethod
+    def from_gpu(cls, config: 'GraphicsProcessingUnitConfiguration') -> 'Roofline':
+        return cls._gpu('GPU', config.core_clock, config.fma_units, config.word_size, config.dram.peak_bandwidth)
+
+    @classmethod
+    def from_exu(cls, config: 'ExecutionUnitConfiguration') -> 'Roofline':
+        clock = config.core_clock * 1.0e9
+        return cls('EXU', config.fpus * clock,
+                   {'register': EXU_OPERANDS_PER_CLOCK * config.word_size * config.fpus * clock})
+
+    @classmethod
+    def from_sweep(cls, frame: 'pd.DataFrame', machine: str, fma_units=1) -> 'Roofline':
+        """
+        Rooflines of every design point of a batched sweep.
+
+        Args:
+            frame: result of flat_matvec_spm_batch or flat_matvec_gpu_batch
+            machine: 'SPM' or 'GPU'
+            fma_units: fma units of the machine, scalar or array over the design points
+
+        Returns:
+            Roofline with arrays of ceilings
+        """
+        if machine not in ('SPM', 'GPU'):
+            raise ValueError(f'Machine {machine} not supported, choose SPM or GPU')
+        core_clock = frame['core_clock_ghz'].to_numpy()
+        word_size = frame['word_size'].to_numpy()
+        # a channel transfers channel_width bytes on both edges of the memory clock
+        dram_bandwidth = (frame['memory_channels'].to_numpy() * frame['channel_width'].to_numpy()
+                          * 2 * frame['memory_clock_ghz'].to_numpy() * 1.0e9)
+        if machine == 'SPM':
+            return cls._spm(machine, core_clock, fma_units, word_size, frame['cache_line_size'].to_numpy(),
+                            dram_bandwidth)
+        return cls._gpu(machine, core_clock, fma_units, word_size, dram_bandwidth)
+
+    @classmethod
+    def _spm(cls, name, core_clock, fma_units, word_size, cache_line_size, dram_bandwidth) -> 'Roofline':
+        clock = core_clock * 1.0e9
+        return cls(name, fma_units * clock, {
+            'l1': 2 * word_size * fma_units * clock,
+            'l2': SPM_LINES_PER_CLOCK['l2'] * cache_line_size * clock,
+            'l3': SPM_LINES_PER_CLOCK['l3'] * cache_line_size * clock,
+            'dram': dram_bandwidth,
+        })
+
+    @classmethod
+    def _gpu(cls, name, core_clock, fma_units, word_size, dram_bandwidth) -> 'Roofline':
+        # L1 and shared memory banks deliver a word per lane per clock
+        clock = core_clock * 1.0e9
+        return cls(name, fma_units * clock, {
+            'l1': word_size * fma_units * clock,
+            'smem': word_size * fma_units * clock,
+            'dram': dram_bandwidth,
+        })
+
+    def ridge_point(self, level: str):
+        """
+        Operational intensity, in fmas per byte of the level, above which the level stops bounding an operator.
+        """
+        return self.peak_flops / self.bandwidths[level]
+
+    def attainable(self, intensity, level: str = 'dram'):
+        """
+        Attainable fmas per second at an operational intensity of one level, for example, to draw the roofline.
+        """
+        return np.minimum(self.peak_flops, np.asarray(intensity) * self.bandwidths[level])
+
+    def analyze(self, flops, traffic: dict, elapsed_time=None) -> 'pd.DataFrame':
+        """
+        Place operator evaluations on the roofline.
+
+        Args:
+            flops: fmas of every evaluation
+            traffic: bytes moved through every level, a subset of the levels of the roofline
+            elapsed_time: elapsed time of every evaluation, adds the achieved rate and the fraction of the roofline
+
+        Returns:
+            pd.DataFrame with a row per evaluation: the intensity and ceiling of every level, the attainable rate,
+            the bounding ceiling, and whether the evaluation is memory-bound
+        """
+        import pandas as pd
+
+        flops = np.asarray(flops, dtype=np.float64)
+        columns = {'flops': flops}
+        ceilings = {'compute': np.broadcast_to(np.asarray(self.peak_flops, dtype=np.float64), flops.shape)}
+        for level, moved in traffic.items():
+            moved = np.asarray(moved, dtype=np.float64)
+            with np.errstate(divide='ignore'):
+                intensity = np.where(moved > 0, flops / np.where(moved > 0, moved, 1.0), np.inf)
+            columns[level + '_bytes'] = moved
+            columns[level + '_intensity'] = intensity
+            ceilings[level] = np.where(moved > 0, intensity * self.bandwidths[level], np.inf)
+            columns[level + '_ceiling'] = ceilings[level]
+
+        names = list(ceilings)
+        stacked = np.stack(np.broadcast_arrays(*ceilings.values()))
+        bound = np.argmin(stacked, axis=0)
+        columns['peak_flops'] = ceilings['compute']
+        columns['attainable_flops'] = np.min(stacked, axis=0)
+        columns['bound'] = np.array(names, dtype=object)[bound]
+        columns['memory_bound'] = bound > 0
+        if elapsed_time is not None:
+            columns['achieved_flops'] = flops / np.asarray(elapsed_time, dtype=np.float64)
+            columns['roofline_fraction'] = columns['achieved_flops'] / columns['attainable_flops']
+        return pd.DataFrame({key: np.atleast_1d(value) for key, value in columns.items()})
+
+    def place(self, metrics: 'EventMetrics') -> 'pd.Series':
+        """
+        Place the metrics of one operator evaluation on the roofline.
+
+        Args:
+            metrics: StoredProgramMachineMetrics, GraphicsProcessingUnitMetrics, or ExecutionUnitMetrics
+
+        Returns:
+            pd.Series with the columns of analyze()
+        """
+        events = metrics.occurrence
+        flops, traffic = _operator_traffic(self.bandwidths, events, lambda name: getattr(metrics, name))
+        return self.analyze(flops, traffic, metrics.elapsed_time).iloc[0]
+
+    def place_sweep(self, frame: 'pd.DataFrame') -> 'pd.DataFrame':
+        """
+        Place every design point of a batched sweep on its roofline.
+
+        Args:
+            frame: result of flat_matvec_spm_batch or flat_matvec_gpu_batch
+
+        Returns:
+            pd.DataFrame with the columns of analyze(), a row per design point
+        """
+        flops, traffic = _operator_traffic(self.bandwidths, lambda key: frame[key + '_events'].to_numpy(),
+                                           lambda name: frame[name].to_numpy())
+        return self.analyze(flops, traffic, frame['elapsed_time'].to_numpy())
+
+
+def _operator_traffic(levels, events, attribute) -> tuple:
+    # fmas, and bytes each level serves toward the core, from the events of the metrics of an operator,
+    # events(key) gives the count of an event, attribute(name) a machine attribute or a performance metric
+    if 'register' in levels:
+        return events('fpu'), {'register': events('reg_read') * attribute('word_size')}
+    word_size = attribute('word_size')
+    traffic = {'l1': events('l1_read') * word_size}
+    if 'smem' in levels:
+        traffic['smem'] = events('smem_read') * word_size
+    else:
+        traffic['l2'] = events('l2_read') * attribute('cache_line_size')
+        traffic['l3'] = events('l3_read') * attribute('cache_line_size')
+    traffic['dram'] = attribute('read_data') + attribute('write_data')
+    return events('execute'), traffic
@@ -0,0 +1,273 @@
+import numpy as np
+import pandas as pd
+
+from energysim.database.gpu_energy import GraphicsProcessingUnitEnergy
+from energysim.database.spm_energy import StoredProgramMachineEnergy
+from energysim.execution.gpu_metrics import GraphicsProcessingUnitMetrics
+from energysim.execution.spm_metrics import StoredProgramMachineMetrics
+from energysim.models.gpu_configuration import GraphicsProcessingUnitConfiguration
+from energysim.models.spm_configuration import StoredProgramMachineConfiguration
+from energysim.operator.workload import evaluate_workload_gpu, evaluate_workload_spm
+
+# Convolution and pooling operators on NHWC tensors.
+#
+# The input is (N x H x W x C), the filter is (R x S x C x K), and the output is (N x P x Q x K), with
+#   P = (H + 2 * padding - R) // stride + 1, and Q likewise.
+# A convolution is lowered onto GEMM phases, whose cache traffic follows the tiles of tiled_matmul,
+# and streaming phases that read or write every element once. The algorithms differ in how they lower:
+# - im2col: copies the receptive fields into a (NPQ x RSC) matrix in memory, and multiplies it with the
+#   (RSC x K) filter matrix,
+# - direct: an implicit GEMM that gathers the receptive fields of a tile of outputs from the input itself,
+#   the overlapping windows of neighboring outputs are reused within the tile,
+# - winograd: F(m x m, 3 x 3) of Lavin and Gray, transforms tiles of the input and the filter, multiplies
+#   the transformed tiles elementwise, as (m + 2)^2 GEMMs over the channels, and transforms the products back.
+#   The transformed tensors are materialized, the transforms are not fused with the GEMMs.
+#
+# The lowering is a workload, see energysim.operator.workload, that the SPM and GPU models evaluate.
+# The flops of the metrics count the operations that are executed, an fma of the GEMMs, and an add or
+# a mul of the transforms, so the algorithms are compared on the work they actually do.
+
+CONV_ALGORITHMS = ('im2col', 'direct', 'winograd')
+POOLING_KINDS = ('max', 'sum', 'avg')
+
+# Winograd transforms, Y = A^T [(G g G^T) * (B^T d B)] A, of an output tile of m x m and a 3 x 3 filter
+WINOGRAD_TRANSFORMS = {
+    2: {
+        'BT': np.array([[1, 0, -1, 0],
+                        [0, 1, 1, 0],
+                        [0, -1, 1, 0],
+                        [0, 1, 0, -1]]),
+        'G': np.array([[1, 0, 0],
+                       [1 / 2, 1 / 2, 1 / 2],
+                       [1 / 2, -1 / 2, 1 / 2],
+                       [0, 0, 1]]),
+        'AT': np.array([[1, 1, 1, 0],
+                        [0, 1, -1, -1]]),
+    },
+    4: {
+        'BT': np.array([[4, 0, -5, 0, 1, 0],
+                        [0, -4, -4, 1, 1, 0],
+                        [0, 4, -4, -1, 1, 0],
+                        [0, -2, -1, 2, 1, 0],
+                        [0, 2, -1, -2, 1, 0],
+                        [0, 4, 0, -5, 0, 1]]),
+        'G': np.array([[1 / 4, 0, 0],
+                       [-1 / 6, -1 / 6, -1 / 6],
+                       [-1 / 6, 1 / 6, -1 / 6],
+                       [1 / 24, 1 / 12, 1 / 6],
+                       [1 / 24, -1 / 12, 1 / 6],
+                       [0, 0, 1]]),
+        'AT': np.array([[1, 1, 1, 1, 1, 0],
+                        [0, 1, -1, 2, -2, 0],
+                        [0, 1, 1, 4, 4, 0],
+                        [0, 1, -1, 8, -8, 1]]),
+    },
+}
+
+
+def _ceil_div(numerator, denominator):
+    return -(-numerator // denominator)
+
+
+def conv_output_shape(H, W, R, S, stride=1, padding=0) -> tuple:
+    """
+    (P, Q) of the output of a convolution, or a pooling, window.
+    """
+    P = (H + 2 * padding - R) // stride + 1
+    Q = (W + 2 * padding - S) // stride + 1
+    if P < 1 or Q < 1:
+        raise ValueError(f'Window {R} x {S} does not fit an input of {H} x {W} with padding {padding}')
+    return P, Q
+
+
+def _transform_ops(L: np.ndarray) -> tuple:
+    # adds and muls of L X L^T for a square X: the rows of L combine their nonzero terms,
+    # and every coefficient other than 0 and +-1 costs a multiplication
+    rows, cols = L.shape
+    adds_per_column = int(sum(max(np.count_nonzero(row) - 1, 0) for row in L))
+    muls_per_column = int(np.count_nonzero((L != 0) & (np.abs(L) != 1)))
+    # L X is rows x cols with cols columns, (L X) L^T is rows x rows with rows columns
+    return adds_per_column * (cols + rows), muls_per_column * (cols + rows)
+
+
+def _direct_input_elements(N, P, Q, C, R, S, stride):
+    # input elements an implicit GEMM reads per pass over the reduction, with Tm outputs per tile:
+    # a square patch of t x t outputs reads the union of their receptive fields
+    lowered = N * P * Q * R * S * C
+
+    def elements(Tm):
+        t = np.maximum(np.floor(np.sqrt(Tm)), 1)
+        tp, tq = np.minimum(t, P), np.minimum(t, Q)
+        window = ((tp - 1) * stride + R) * ((tq - 1) * stride + S)
+        return np.minimum(np.ceil(N * P * Q * C * window / (tp * tq)), lowered).astype(np.int64)
+    return elements
+
+
+def conv_workload(N, H, W, C, K, R, S, stride=1, padding=0, algorithm='im2col', winograd_tile=2) -> dict:
+    """
+    Machine independent work of a convolution, lowered by an algorithm.
+
+    Args:
+        N, H, W, C: batch, height, width, and channels of the NHWC input
+        K, R, S: output channels, height, and width of the RSCK filter
+        stride: stride of the window
+        padding: zero padding on every side of the input
+        algorithm: one of CONV_ALGORITHMS
+        winograd_tile: m of F(m x m, 3 x 3), 2 or 4
+
+    Returns:
+        dict with the output shape, the fmas of the direct convolution ('macs'), the fmas ('products'),
+        adds, and muls that are executed, the GEMM phases as (count, M, N, K, A elements per pass),
+        the elements that the streaming phases read and write, and the words the core loads ('operand_reads')
+    """
+    if algorithm not in CONV_ALGORITHMS:
+        raise ValueError(f'Algorithm {algorithm} not supported, choose one of {CONV_ALGORITHMS}')
+    P, Q = conv_output_shape(H, W, R, S, stride, padding)
+    macs = N * P * Q * K * R * S * C
+    workload = {'output': (P, Q), 'macs': macs, 'products': macs, 'adds': 0, 'muls': 0, 'specials': 0,
+                'gemms': [], 'stream_read': 0, 'stream_write': 0}
+
+    if algorithm == 'im2col':
+        # the lowering reads the input, and writes every receptive field as a row of the lowered matrix
+        lowered = N * P * Q * R * S * C
+        workload['gemms'] = [(1, N * P * Q, R * S * C, K, None)]
+        workload['stream_read'] = N * H * W * C
+        workload['stream_write'] = lowered
+    elif algorithm == 'direct':
+        workload['gemms'] = [(1, N * P * Q, R * S * C, K, _direct_input_elements(N, P, Q, C, R, S, stride))]
+    else:
+        if winograd_tile not in WINOGRAD_TRANSFORMS:
+            raise ValueError(f'Winograd tile {winograd_tile} not supported, choose one of {tuple(WINOGRAD_TRANSFORMS)}')
+        if stride != 1 or R != 3 or S != 3:
+            raise ValueError(f'Winograd needs a 3 x 3 filter with stride 1, got {R} x {S} with stride {stride}')
+        m = winograd_tile
+        alpha = m + 2
+        transforms = WINOGRAD_TRANSFORMS[m]
+        tiles = N * _ceil_div(P, m) * _ceil_div(Q, m)
+        input_adds, input_muls = _transform_ops(transforms['BT'])
+        filter_adds, filter_muls = _transform_ops(transforms['G'])
+        output_adds, output_muls = _transform_ops(transforms['AT'])
+        workload['products'] = alpha * alpha * tiles * C * K
+        workload['adds'] = tiles * C * input_adds + C * K * filter_adds + tiles * K * output_adds
+        workload['muls'] = tiles * C * input_muls + C * K * filter_muls + tiles * K * output_muls
+        # a GEMM of the transformed input tiles (tiles x C) and the transformed filter (C x K) per element
+        workload['gemms'] = [(alpha * alpha, tiles, C, K, None)]
+        # the transforms read overlapping input tiles, the filter, and the products,
+        # and write the transformed input, the transformed filter, and the output
+        workload['stream_read'] = alpha * alpha * tiles * C + R * S * C * K + alpha * alpha * tiles * K
+        workload['stream_write'] = alpha * alpha * tiles * C + alpha * alpha * C * K + N * P * Q * K
+
+    # the GEMMs load two operands per fma, the streaming phases load every element they read
+    workload['operand_reads'] = 2 * workload['products'] + workload['stream_read']
+    return workload
+
+
+def pooling_workload(N, H, W, C, R, S, stride=None, padding=0, kind='max') -> dict:
+    """
+    Machine independent work of a pooling window over an NHWC input, in the form of conv_workload.
+    The stride defaults to the window, and the kinds compare ('max'), or add ('sum', 'avg'), the elements
+    of a window, an average scales every output by a mul.
+    """
+    if kind not in POOLING_KINDS:
+        raise ValueError(f'Pooling {kind} not supported, choose one of {POOLING_KINDS}')
+    stride = R if stride is None else stride
+    P, Q = conv_output_shape(H, W, R, S, stride, padding)
+    window_elements = N * P * Q * C * R * S
+    return {'output': (P, Q), 'macs': 0, 'products': 0,
+            'adds': window_elements, 'muls': N * P * Q * C if kind == 'avg' else 0, 'specials': 0,
+            'gemms': [], 'stream_read': N * H * W * C, 'stream_write': N * P * Q * C,
+            # the windows overlap in the caches, the input is read from memory once
+            'operand_reads': window_elements}
+
+
+def _conv_name(N, H, W, C, K, R, S, algorithm, machine) -> str:
+    return ("Conv2D " + algorithm + " " + str(N) + "x" + str(H) + "x" + str(W) + "x" + str(C)
+            + " * " + str(R) + "x" + str(S) + "x" + str(K) + " " + machine)
+
+
+# convolution operator on a Stored Program Machine, NHWC input and RSCK filter
+def conv2d_nhwc_spm(N, H, W, C, K, R, S, attributes: 'StoredProgramMachineEnergy',
+                    config: 'StoredProgramMachineConfiguration', stride=1, padding=0,
+                    algorithm: str = 'im2col', winograd_tile: int = 2) -> 'StoredProgramMachineMetrics':
+    workload = conv_workload(N, H, W, C, K, R, S, stride, padding, algorithm, winograd_tile)
+    return evaluate_workload_spm(_conv_name(N, H, W, C, K, R, S, algorithm, "SPM"), workload, attributes, config)
+
+
+# convolution operator on a GPU, NHWC input and RSCK filter
+def conv2d_nhwc_gpu(N, H, W, C, K, R, S, energies: 'GraphicsProcessingUnitEnergy',
+                    config: 'GraphicsProcessingUnitConfiguration', stride=1, padding=0,
+                    algorithm: str = 'im2col', winograd_tile: int = 2) -> 'GraphicsProcessingUnitMetrics':
+    workload = conv_workload(N, H, W, C, K, R, S, stride, padding, algorithm, winograd_tile)
+    return evaluate_workload_gpu(_conv_name(N, H, W, C, K, R, S, algorithm, "GPU"), workload, energies, config)
+
+
+# pooling operator on a Stored Program Machine, NHWC input
+def pooling_nhwc_spm(N, H, W, C, R, S, attributes: 'StoredProgramMachineEnergy',
+                     config: 'StoredProgramMachineConfiguration', stride=None, padding=0,
+                     kind: str = 'max') -> 'StoredProgramMachineMetrics':
+    workload = pooling_workload(N, H, W, C, R, S, stride, padding, kind)
+    name = "Pool " + kind + " " + str(N) + "x" + str(H) + "x" + str(W) + "x" + str(C) + " " + str(R) + "x" + str(S) + " SPM"
+    return evaluate_workload_spm(name, workload, attributes, config)
+
+
+# pooling operator on a GPU, NHWC input
+def pooling_nhwc_gpu(N, H, W, C, R, S, energies: 'GraphicsProcessingUnitEnergy',
+                     config: 'GraphicsProcessingUnitConfiguration', stride=None, padding=0,
+                     kind: str = 'max') -> 'GraphicsProcessingUnitMetrics':
+    workload = pooling_workload(N, H, W, C, R, S, stride, padding, kind)
+    name = "Pool " + kind + " " + str(N) + "x" + str(H) + "x" + str(W) + "x" + str(C) + " " + str(R) + "x" + str(S) + " GPU"
+    return evaluate_workload_gpu(name, workload, energies, config)
+
+
+CONV_OBJECTIVES = ('energy', 'latency', 'edp')
+
+
+def select_conv_algorithm(N, H, W, C, K, R, S, energies, config, stride=1, padding=0,
+                          objective: str = 'energy', winograd_tiles: tuple = (2, 4)) -> pd.DataFrame:
+    """
+    Evaluate every applicable convolution algorithm of a layer shape, and select the best one.
+
+    Args:
+        N, H, W, C, K, R, S: layer shape, as conv2d_nhwc_spm
+        energies: energy set of the machine
+        config: StoredProgramMachineConfiguration or GraphicsProcessingUnitConfiguration
+        stride: stride of the window
+        padding: zero padding on every side of the input
+        objective: 'energy', 'latency', or 'edp', the energy-delay product
+        winograd_tiles: output tiles m of the Winograd candidates
+
+    Returns:
+        pd.DataFrame with a row per candidate: the algorithm, its Winograd tile, the executed operations,
+        the DRAM traffic in bytes, the total energy in pJ, the elapsed time, the energy-delay product in J*s,
+        and a selected column that marks the candidate that minimizes the objective
+    """
+    if objective not in CONV_OBJECTIVES:
+        raise ValueError(f'Objective {objective} not supported, choose one of {CONV_OBJECTIVES}')
+    if isinstance(config, StoredProgramMachineConfiguration):
+        model = conv2d_nhwc_spm
+    elif isinstance(config, GraphicsProcessingUnitConfiguration):
+        model = conv2d_nhwc_gpu
+    else:
+        raise ValueError(f'No convolution model for {type(config).__name__}, choose an SPM or a GPU')
+
+    candidates = [('im2col', 0), ('direct', 0)]
+    if stride == 1 and R == 3 and S == 3:
+        candidates += [('winograd', m) for m in winograd_tiles]
+
+    rows = []
+    for algorithm, m in candidates:
+        metrics = model(N, H, W, C, K, R, S, energies, config, stride, padding, algorithm, m or 2)
+        total_energy = metrics.occurrence_energy('total')
+        rows.append({
+            'algorithm': algorithm,
+            'winograd_tile': m,
+            'operations': metrics.occurrence('execute'),
+            'dram_bytes': metrics.read_data + metrics.write_data,
+            'total_energy': total_energy,
+            'elapsed_time': metrics.elapsed_time,
+            'edp': total_energy * 1.0e-12 * metrics.elapsed_time,
+        })
+    frame = pd.DataFrame(rows)
+    column = {'energy': 'total_energy', 'latency': 'elapsed_time', 'edp': 'edp'}[objective]
+    frame['selected'] = frame.index == frame[column].idxmin()
+    return frame
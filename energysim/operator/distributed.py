@@ -0,0 +1,244 @@
+import math
+
+import pandas as pd
+
+from energysim.execution.dmm_cluster import DistributedMemoryCluster
+from energysim.execution.event_metrics import EventMetrics
+from energysim.models.cluster_configuration import DistributedMemoryClusterConfiguration
+from energysim.models.dfa_configuration import DomainFlowArchitectureConfiguration
+from energysim.models.dfm_configuration import DataFlowMachineConfiguration
+from energysim.models.gpu_configuration import GraphicsProcessingUnitConfiguration
+from energysim.models.spm_configuration import StoredProgramMachineConfiguration
+from energysim.operator.flat_matmul import flat_matmul_dfm
+from energysim.operator.flat_matvec import flat_matvec_dfa, flat_matvec_dfm, flat_matvec_gpu, flat_matvec_spm
+from energysim.operator.tiled_matmul import tiled_matmul_spm
+
+# Operators partitioned across the nodes of a distributed-memory cluster.
+#
+# Every node evaluates its partition with the operator model of its machine, and the nodes exchange
+# the operands and the partial results with the collectives of the interconnect. A node first stages its
+# partition from local storage, when asked to, then communicates and computes: the phases follow each other,
+# so the elapsed time is their sum. The collectives of the groups of a process grid run concurrently.
+
+# operator models of the node machines
+NODE_MATVEC = {
+    StoredProgramMachineConfiguration: flat_matvec_spm,
+    GraphicsProcessingUnitConfiguration: flat_matvec_gpu,
+    DomainFlowArchitectureConfiguration: flat_matvec_dfa,
+    DataFlowMachineConfiguration: flat_matvec_dfm,
+}
+NODE_MATMUL = {
+    StoredProgramMachineConfiguration: tiled_matmul_spm,
+    DataFlowMachineConfiguration: flat_matmul_dfm,
+}
+
+MATVEC_PARTITIONS = ('row', '2d')
+
+
+def _node_operator(models: dict, node_config, operator: str):
+    model = models.get(type(node_config))
+    if model is None:
+        raise ValueError(f'No {operator} model for {type(node_config).__name__} nodes, '
+                         f'choose one of {[config.__name__ for config in models]}')
+    return model
+
+
+def _data_movement_split(metrics: 'EventMetrics') -> tuple:
+    # energy of the reads and of the writes among the recorded events that roll up into data_movement
+    metrics_class = type(metrics)
+    targets = {target for target, _ in metrics_class.consolidation}
+    data_movement = metrics_class.key_offset['data_movement']
+    read, write = 0.0, 0.0
+    for key, offset in metrics_class.key_offset.items():
+        if key in targets or metrics_class.aggregation[offset, data_movement] == 0:
+            continue
+        if key.endswith('_read'):
+            read += metrics.occurrence_energy(key)
+        elif key.endswith('_write'):
+            write += metrics.occurrence_energy(key)
+    return read, write
+
+
+def _cluster_metrics(name: str, cluster: 'DistributedMemoryClusterConfiguration', partition: str, node,
+                     collectives: list, storage_read_bytes, storage_write_bytes, fmas) \
+        -> 'DistributedMemoryCluster':
+    # compose the metrics of a node, the collectives as (cost, concurrent groups), and the staging of a node
+    interconnect = cluster.interconnect
+    nodes = cluster.nodes
+    cluster_metrics = DistributedMemoryCluster(name)
+    cluster_metrics.nodes = nodes
+    cluster_metrics.topology = interconnect.topology
+    cluster_metrics.partition = partition
+
+    memory_read, memory_write = _data_movement_split(node)
+    cluster_metrics.compute = nodes * node.occurrence_energy('compute')
+    cluster_metrics.memory_read = nodes * memory_read
+    cluster_metrics.memory_write = nodes * memory_write
+
+    for cost, groups in collectives:
+        network_read, network_write = interconnect.collective_energy(cost)
+        cluster_metrics.communication_time += cost[0]
+        cluster_metrics.network_data += groups * cost[1]
+        cluster_metrics.network_read += groups * network_read
+        cluster_metrics.network_write += groups * network_write
+
+    cluster_metrics.storage_read = nodes * storage_read_bytes * cluster.storage_read_energy_per_byte
+    cluster_metrics.storage_write = nodes * storage_write_bytes * cluster.storage_write_energy_per_byte
+    cluster_metrics.storage_data = nodes * (storage_read_bytes + storage_write_bytes)
+    cluster_metrics.storage_time = (storage_read_bytes + storage_write_bytes) / cluster.storage_bandwidth
+
+    cluster_metrics.compute_time = node.elapsed_time
+    cluster_metrics.elapsed_time = (cluster_metrics.storage_time + cluster_metrics.communication_time
+                                    + cluster_metrics.compute_time)
+
+    # normalized performance
+    # Watt = J/s
+    power = cluster_metrics.total * 1.0e-12 / cluster_metrics.elapsed_time
+    cluster_metrics.total_flops = fmas
+    cluster_metrics.flops_per_sec = fmas / cluster_metrics.elapsed_time
+    cluster_metrics.power = power
+    cluster_metrics.flops_per_watt = cluster_metrics.flops_per_sec / power
+    return cluster_metrics
+
+
+# matrix-vector operator on a distributed-memory cluster
+#
+# row: every node holds a block of rows of A, and gathers all of x before it computes its block of y.
+# 2d: the nodes form a process grid, every node holds a block of A, gathers the segment of x of its block
+#     from the nodes of its process column, and reduce-scatters its partial y over the nodes of its process row.
+def distributed_matvec(rows, cols, energies, cluster: 'DistributedMemoryClusterConfiguration',
+                       partition: str = 'row', from_storage: bool = False) -> 'DistributedMemoryCluster':
+    if partition not in MATVEC_PARTITIONS:
+        raise ValueError(f'Partition {partition} not supported, choose one of {MATVEC_PARTITIONS}')
+    node_config = cluster.node_config
+    model = _node_operator(NODE_MATVEC, node_config, 'matvec')
+    interconnect = cluster.interconnect
+    word_size = node_config.word_size
+
+    grid_rows, grid_cols = (cluster.nodes, 1) if partition == 'row' else cluster.process_grid()
+    local_rows = math.ceil(rows / grid_rows)
+    local_cols = math.ceil(cols / grid_cols)
+    node = model(local_rows, local_cols, energies, node_config)
+
+    # every process column gathers its segment of x, every process row reduces its partial y
+    collectives = [(interconnect.all_gather(local_cols * word_size, grid_rows), grid_cols)]
+    if grid_cols > 1:
+        collectives.append((interconnect.reduce_scatter(local_rows * word_size, grid_cols), grid_rows))
+
+    storage_read_bytes, storage_write_bytes = 0, 0
+    if from_storage:
+        storage_read_bytes = (local_rows * local_cols + math.ceil(local_cols / grid_rows)) * word_size
+        storage_write_bytes = math.ceil(local_rows / grid_cols) * word_size
+
+    name = "Distributed MV " + str(rows) + " x " + str(cols) + " on " + str(cluster.nodes) + " nodes"
+    return _cluster_metrics(name, cluster, partition, node, collectives,
+                            storage_read_bytes, storage_write_bytes, rows * cols)
+
+
+# matrix-matrix operator on a distributed-memory cluster, C = A * B with A (M x N), B (N x K), and C (M x K)
+#
+# SUMMA on a process grid: every node owns a block of A, B, and C. In each of the panel steps along N,
+# the owners broadcast a panel of A over their process row, and a panel of B over their process column,
+# and every node accumulates the product of the two panels into its block of C.
+def distributed_matmul(M, N, K, energies, cluster: 'DistributedMemoryClusterConfiguration',
+                       from_storage: bool = False) -> 'DistributedMemoryCluster':
+    node_config = cluster.node_config
+    model = _node_operator(NODE_MATMUL, node_config, 'matmul')
+    interconnect = cluster.interconnect
+    word_size = node_config.word_size
+
+    grid_rows, grid_cols = cluster.process_grid()
+    local_M = math.ceil(M / grid_rows)
+    local_K = math.ceil(K / grid_cols)
+    node = model(local_M, N, local_K, energies, node_config)
+
+    panels = max(grid_rows, grid_cols)
+    panel_N = math.ceil(N / panels)
+    collectives = []
+    if grid_cols > 1:
+        a_panel = interconnect.broadcast(local_M * panel_N * word_size, grid_cols)
+        collectives.append((tuple(panels * value for value in a_panel), grid_rows))
+    if grid_rows > 1:
+        b_panel = interconnect.broadcast(panel_N * local_K * word_size, grid_rows)
+        collectives.append((tuple(panels * value for value in b_panel), grid_cols))
+
+    storage_read_bytes, storage_write_bytes = 0, 0
+    if from_storage:
+        storage_read_bytes = (local_M * math.ceil(N / grid_cols) + math.ceil(N / grid_rows) * local_K) * word_size
+        storage_write_bytes = local_M * local_K * word_size
+
+    name = "Distributed Matmul " + str(M) + " x " + str(N) + " x " + str(K) + " on " + str(cluster.nodes) + " nodes"
+    return _cluster_metrics(name, cluster, 'summa', node, collectives,
+                            storage_read_bytes, storage_write_bytes, M * N * K)
+
+
+def _scaling_row(metrics: 'DistributedMemoryCluster') -> dict:
+    return {
+        'nodes': metrics.nodes,
+        'elapsed_time': metrics.elapsed_time,
+        'storage_time': metrics.storage_time,
+        'compute_time': metrics.compute_time,
+        'communication_time': metrics.communication_time,
+        'compute': metrics.compute,
+        'memory': metrics.memory,
+        'network': metrics.network,
+        'storage': metrics.storage,
+        'total_energy': metrics.total,
+        'network_data': metrics.network_data,
+        'total_flops': metrics.total_flops,
+        'flops_per_sec': metrics.flops_per_sec,
+        'power': metrics.power,
+        'flops_per_watt': metrics.flops_per_watt,
+    }
+
+
+def strong_scaling(operator, shape: tuple, energies, cluster: 'DistributedMemoryClusterConfiguration',
+                   node_counts, **kwargs) -> pd.DataFrame:
+    """
+    Strong scaling of a distributed operator: the same problem on a growing number of nodes.
+
+    Args:
+        operator: distributed_matvec or distributed_matmul
+        shape: the problem, (rows, cols) or (M, N, K)
+        energies: energy set of the node machine
+        cluster: cluster configuration, its node count is replaced by every entry of node_counts
+        node_counts: node counts to evaluate
+        **kwargs: passed on to the operator, such as, partition or from_storage
+
+    Returns:
+        pd.DataFrame with a row per node count: the time of every phase, the energy of compute, memory,
+        network, and storage in pJ, the speedup over the first node count, and the parallel efficiency
+    """
+    frame = pd.DataFrame([_scaling_row(operator(*shape, energies, cluster.with_nodes(nodes), **kwargs))
+                          for nodes in node_counts])
+    frame['speedup'] = frame['elapsed_time'].iloc[0] / frame['elapsed_time']
+    frame['parallel_efficiency'] = frame['speedup'] * frame['nodes'].iloc[0] / frame['nodes']
+    return frame
+
+
+def weak_scaling(operator, shape_per_node: tuple, energies, cluster: 'DistributedMemoryClusterConfiguration',
+                 node_counts, **kwargs) -> pd.DataFrame:
+    """
+    Weak scaling of a distributed operator: the problem grows with the number of nodes,
+    its first dimension is scaled by the node count, so the work per node stays the same.
+
+    Args:
+        operator: distributed_matvec or distributed_matmul
+        shape_per_node: the problem on a single node, (rows, cols) or (M, N, K)
+        energies: energy set of the node machine
+        cluster: cluster configuration, its node count is replaced by every entry of node_counts
+        node_counts: node counts to evaluate
+        **kwargs: passed on to the operator, such as, partition or from_storage
+
+    Returns:
+        pd.DataFrame with the columns of strong_scaling, the parallel efficiency is relative to the first node count
+    """
+    rows = []
+    for nodes in node_counts:
+        shape = (shape_per_node[0] * nodes, *shape_per_node[1:])
+        rows.append(_scaling_row(operator(*shape, energies, cluster.with_nodes(nodes), **kwargs)))
+    frame = pd.DataFrame(rows)
+    frame['speedup'] = frame['total_flops'] / frame['total_flops'].iloc[0] \
+        * frame['elapsed_time'].iloc[0] / frame['elapsed_time']
+    frame['parallel_efficiency'] = frame['elapsed_time'].iloc[0] / frame['elapsed_time']
+    return frame
@@ -1,8 +1,13 @@
 import math
 
+from energysim.database.dfm_energy import DataFlowMachineEnergy
 from energysim.database.spm_energy import StoredProgramMachineEnergy
+from energysim.execution.dfm_metrics import DataFlowMachineMetrics
 from energysim.execution.spm_metrics import StoredProgramMachineMetrics
+from energysim.models.dfm_configuration import DataFlowMachineConfiguration
+from energysim.models.roofline import Roofline
 from energysim.models.spm_configuration import StoredProgramMachineConfiguration
+from energysim.operator.flat_matvec import token_flow_performance
 
 
 # flat matrix-matrix operator on a Stored Program Machine
@@ -30,15 +35,14 @@ def flat_matmul_spm(M, N, K, attributes: 'StoredProgramMachineEnergy', config: '
     register_write = fmas * 3
     spm_metrics.record('register_write', register_write, attributes.register_write)
 
-    # flat mv assumes we are streaming to the cache without reuse
-    cache_line_size = 32  # bytes
+    # flat mm assumes we are streaming each matrix through the cache once
+    cache_line_size = config.cache_line_size  # bytes
     A_matrix_elements = M * N
     B_matrix_elements = N * K
     C_matrix_elements = M * K
-    total_elements = A_matrix_elements + B_matrix_elements + C_matrix_elements
-    A_matrix_cache_lines: int = math.ceil(A_matrix_elements / cache_line_size)
-    B_matrix_cache_lines: int = math.ceil(B_matrix_elements / cache_line_size)
-    C_matrix_cache_lines: int = math.ceil(C_matrix_elements / cache_line_size)
+    A_matrix_cache_lines: int = math.ceil(A_matrix_elements * config.word_size / cache_line_size)
+    B_matrix_cache_lines: int = math.ceil(B_matrix_elements * config.word_size / cache_line_size)
+    C_matrix_cache_lines: int = math.ceil(C_matrix_elements * config.output_word_size / cache_line_size)
     total_cache_lines_in: int = A_matrix_cache_lines + B_matrix_cache_lines + C_matrix_cache_lines
     total_cache_lines_out: int = C_matrix_cache_lines
     total_cache_lines: int = (total_cache_lines_in + total_cache_lines_out)
@@ -59,30 +63,104 @@ def flat_matmul_spm(M, N, K, attributes: 'StoredProgramMachineEnergy', config: '
     spm_metrics.record('dram_write', total_cache_lines_out, attributes.dram_write)
 
     # consolidate sets
-    spm_metrics.consolidate('compute', ['instruction', 'execute', 'register_read', 'register_write'])
-    spm_metrics.consolidate('l1', ['l1_read', 'l1_write'])
-    spm_metrics.consolidate('l2', ['l2_read', 'l2_write'])
-    spm_metrics.consolidate('l3', ['l3_read', 'l3_write'])
-    spm_metrics.consolidate('cache_read', ['l1_read', 'l2_read', 'l3_read'])
-    spm_metrics.consolidate('cache_write', ['l1_write', 'l2_write', 'l3_write'])
-    spm_metrics.consolidate('cache', ['cache_read', 'cache_write'])
-    spm_metrics.consolidate('memory', ['dram_read', 'dram_write'])
-    spm_metrics.consolidate('data_movement', ['cache', 'memory'])
-    spm_metrics.consolidate('total', ['compute', 'data_movement'])
+    spm_metrics.rollup()
 
     # calculate performance metrics
-    # Matvec is memory bound, which implies that
-    # the number of operations are governed by number of operands we can fetch
-    memory_clock = config.memory_clock
-
-    # how much time would it take to pull the total number of cachelines in
-    # a DDR5 DIMM is 64bit wide, so to transfer a 64byte cacheline, we need
-    # 8 bus cycles, with is 4 memory clocks.
-    bandwidth = memory_clock * 8 * 2
-    throughput = total_cache_lines_in * config.cache_line_size / bandwidth
-    gops = 1.0 / throughput
-    spm_metrics.instr_per_sec = gops / 100.0
-    spm_metrics.flops_per_sec = gops / 1000.0
-    spm_metrics.memops_per_sec = gops
+    roofline_performance(spm_metrics, config, fmas,
+                         total_cache_lines_in * cache_line_size, total_cache_lines_out * cache_line_size)
 
     return spm_metrics
+
+
+# flat matrix-matrix operator on a Data Flow Machine
+# The fma instructions, loads, and stores fire as in flat_matvec_dfm, with a store per element of C,
+# and the matrices stream through the caches once, as in flat_matmul_spm.
+def flat_matmul_dfm(M, N, K, energies: 'DataFlowMachineEnergy', config: 'DataFlowMachineConfiguration') \
+        -> 'DataFlowMachineMetrics':
+    # enumerate all the energy consuming transactions for a matmul on a DFM
+    dfm_metrics = DataFlowMachineMetrics("Flat Matmul " + str(M) + " x " + str(N) + " x " + str(K) + " DFM")
+
+    # nr of multiply-add operations
+    fmas: int = M * N * K
+    dfm_metrics.record('fma', fmas, energies.fma32b)
+    dfm_metrics.record('execute', fmas, energies.fma32b)
+
+    # two loads and an fma fire per multiply-add, and a store per element of C
+    C_matrix_elements = M * K
+    nr_of_instructions: int = 3 * fmas + C_matrix_elements
+    dfm_metrics.record('fetch', nr_of_instructions, energies.fetch)
+    dfm_metrics.record('decode', nr_of_instructions, energies.decode)
+
+    # the operand tokens of the fmas and the stores are matched in the CAM, loads are monadic and bypass it
+    dfm_metrics.record('token_match', 3 * fmas + 2 * C_matrix_elements, energies.token_match)
+    dfm_metrics.record('token_write', 2 * fmas + C_matrix_elements, energies.token_write)
+    dfm_metrics.record('token_read', 2 * fmas + C_matrix_elements, energies.token_read)
+
+    # flat mm assumes we are streaming each matrix through the cache once
+    cache_line_size = config.cache_line_size  # bytes
+    A_matrix_cache_lines: int = math.ceil(M * N * config.word_size / cache_line_size)
+    B_matrix_cache_lines: int = math.ceil(N * K * config.word_size / cache_line_size)
+    C_matrix_cache_lines: int = math.ceil(C_matrix_elements * config.output_word_size / cache_line_size)
+    total_cache_lines_in: int = A_matrix_cache_lines + B_matrix_cache_lines + C_matrix_cache_lines
+    total_cache_lines_out: int = C_matrix_cache_lines
+    total_cache_lines: int = total_cache_lines_in + total_cache_lines_out
+
+    dfm_metrics.record('l1_read', fmas * 2, energies.l1_read)
+    dfm_metrics.record('l1_write', total_cache_lines, energies.l1_write)
+    dfm_metrics.record('l2_read', total_cache_lines_in, energies.l2_read)
+    dfm_metrics.record('l2_write', total_cache_lines, energies.l2_write)
+    dfm_metrics.record('l3_read', total_cache_lines_in, energies.l3_read)
+    dfm_metrics.record('l3_write', total_cache_lines, energies.l3_write)
+    dfm_metrics.record('mem_read', total_cache_lines_in, energies.mem_read)
+    dfm_metrics.record('mem_write', total_cache_lines_out, energies.mem_write)
+
+    # consolidate sets
+    dfm_metrics.rollup()
+
+    # calculate performance metrics
+    token_flow_performance(dfm_metrics, energies, config, fmas, total_cache_lines_in, total_cache_lines_out)
+
+    return dfm_metrics
+
+
+# Performance of an operator on a Stored Program Machine, bounded by a roofline:
+# the operator takes the longer of the time to execute its fmas at the compute ceiling of the Roofline,
+# and the time to move its DRAM traffic at the peak bandwidth of the memory channels.
+def roofline_performance(spm_metrics: 'StoredProgramMachineMetrics', config: 'StoredProgramMachineConfiguration',
+                         fmas, read_bytes, write_bytes):
+    roofline = Roofline.from_spm(config)
+    compute_time = fmas / roofline.peak_flops
+    memory_time = (read_bytes + write_bytes) / roofline.bandwidths['dram']
+    total_elapsed_time_in_sec = max(compute_time, memory_time)
+
+    memory_transactions = math.ceil((read_bytes + write_bytes) / config.cache_line_size)
+    total_instructions = spm_metrics.occurrence('instruction')
+    total_flops = spm_metrics.occurrence('execute')
+
+    spm_metrics.elapsed_time = total_elapsed_time_in_sec
+    spm_metrics.instr_per_sec = total_instructions / total_elapsed_time_in_sec
+    spm_metrics.flops_per_sec = total_flops / total_elapsed_time_in_sec
+    spm_metrics.memory_transactions = memory_transactions
+    spm_metrics.memory_clock_ns = config.memory_cycle_ns
+    spm_metrics.read_data = read_bytes
+    spm_metrics.write_data = write_bytes
+    spm_metrics.memory_read_bw = read_bytes / total_elapsed_time_in_sec
+    spm_metrics.memory_write_bw = write_bytes / total_elapsed_time_in_sec
+    spm_metrics.memops_per_sec = memory_transactions / total_elapsed_time_in_sec
+
+    # copy the machine attributes into the metrics data structure
+    spm_metrics.core_clock_ghz = config.core_clock
+    spm_metrics.memory_clock_ghz = config.memory_clock
+    spm_metrics.word_size = config.word_size
+    spm_metrics.cache_line_size = config.cache_line_size
+    spm_metrics.memory_burst = config.memory_burst_size
+    spm_metrics.memory_channels = config.memory_channels
+    spm_metrics.channel_width = config.channel_width
+
+    # normalized performance
+    # Watt = J/s
+    total_energy = spm_metrics.occurrence_energy('total') * 1.0e-12
+    power = total_energy / total_elapsed_time_in_sec
+    spm_metrics.total_flops = total_flops
+    spm_metrics.power = power
+    spm_metrics.flops_per_watt = spm_metrics.flops_per_sec / power
@@ -1,11 +1,17 @@
 import math
 
 from energysim.database.dfa_energy import DomainFlowArchitectureEnergy
+from energysim.database.dfm_energy import DataFlowMachineEnergy
 from energysim.database.spm_energy import StoredProgramMachineEnergy
 from energysim.execution.dfa_metrics import DomainFlowArchitectureMetrics
+from energysim.execution.dfm_metrics import DataFlowMachineMetrics
 from energysim.execution.exu_metrics import ExecutionUnitMetrics
 from energysim.execution.gpu_metrics import GraphicsProcessingUnitMetrics
 from energysim.execution.spm_metrics import StoredProgramMachineMetrics
+from energysim.models.dfa_configuration import DomainFlowArchitectureConfiguration
+from energysim.models.dfm import token_flow_time
+from energysim.models.dfm_configuration import DataFlowMachineConfiguration
+from energysim.models.dram import transfer_time
 from energysim.models.exu_configuration import ExecutionUnitConfiguration
 from energysim.models.spm_configuration import StoredProgramMachineConfiguration
 
@@ -32,17 +38,15 @@ def flat_matvec_exu(rows, cols, attributes: 'ExecutionUnitEnergy', config: 'Exec
     exu_metrics.record('reg_write', reg_write, attributes.reg_write)
 
     # consolidate sets
-    exu_metrics.consolidate('compute', ['agu', 'alu', 'fpu', 'sfu'])
-    exu_metrics.consolidate('data', ['reg_read', 'reg_write'])
-    exu_metrics.consolidate('total', ['compute', 'data'])
+    exu_metrics.rollup()
 
     # calculate performance metrics
 
     # instruction throughput
 
-    total_iops = exu_metrics.events['agu'] + exu_metrics.events['alu']
-    total_flops = exu_metrics.events['fpu']
-    total_sfops = exu_metrics.events['sfu']
+    total_iops = exu_metrics.occurrence('agu') + exu_metrics.occurrence('alu')
+    total_flops = exu_metrics.occurrence('fpu')
+    total_sfops = exu_metrics.occurrence('sfu')
     total_ops = total_iops + total_flops + total_sfops
     exu_metrics.total_iops = total_iops
     exu_metrics.total_flops = total_flops
@@ -75,7 +79,7 @@ def flat_matvec_exu(rows, cols, attributes: 'ExecutionUnitEnergy', config: 'Exec
     # normalized performance
     # Watt = J/s
     # ops/Watt = ops/ (J/s)
-    total_energy_in_pJoules = exu_metrics.energy['total']
+    total_energy_in_pJoules = exu_metrics.occurrence_energy('total')
     total_energy = total_energy_in_pJoules * 1.0e-12
     power = total_energy / total_elapsed_time_in_sec
     exu_metrics.power = power
@@ -120,10 +124,13 @@ def flat_matvec_spm(rows, cols, attributes: 'StoredProgramMachineEnergy', config
     matrix_data_structure_size = matrix_elements * config.word_size
     vector_data_structure_size = vector_elements * config.word_size
     total_data_structure_size = total_elements * config.word_size
+    # the result vector is written in words of the output datatype
+    output_data_structure_size = vector_elements * config.output_word_size
     matrix_cache_lines: int = math.ceil(matrix_data_structure_size / cache_line_size)
     vector_cache_lines: int = math.ceil(vector_data_structure_size / cache_line_size)
+    output_cache_lines: int = math.ceil(output_data_structure_size / cache_line_size)
     total_cache_lines_in: int = matrix_cache_lines + vector_cache_lines
-    total_cache_lines_out: int = vector_cache_lines
+    total_cache_lines_out: int = output_cache_lines
     total_cache_lines: int = (total_cache_lines_in + total_cache_lines_out)
 
     spm_metrics.record('l1_read', fmas*2, attributes.l1_read)
@@ -142,30 +149,21 @@ def flat_matvec_spm(rows, cols, attributes: 'StoredProgramMachineEnergy', config
     spm_metrics.record('dram_write', total_cache_lines_out, attributes.dram_write)
 
     # consolidate sets
-    spm_metrics.consolidate('compute', ['instruction', 'execute', 'register_read', 'register_write'])
-    spm_metrics.consolidate('l1', ['l1_read', 'l1_write'])
-    spm_metrics.consolidate('l2', ['l2_read', 'l2_write'])
-    spm_metrics.consolidate('l3', ['l3_read', 'l3_write'])
-    spm_metrics.consolidate('cache_read', ['l1_read', 'l2_read', 'l3_read'])
-    spm_metrics.consolidate('cache_write', ['l1_write', 'l2_write', 'l3_write'])
-    spm_metrics.consolidate('cache', ['cache_read', 'cache_write'])
-    spm_metrics.consolidate('memory', ['dram_read', 'dram_write'])
-    spm_metrics.consolidate('data_movement', ['cache', 'memory'])
-    spm_metrics.consolidate('total', ['compute', 'data_movement'])
+    spm_metrics.rollup()
 
     # calculate performance metrics
     # Matvec is memory bound, which implies that
     # the number of operations are governed by number of operands we can fetch
 
     # how long would it take to move the total number of data from and to the memory
-    # a 64bit DDR DIMM needs 4 clocks to move a cacheline
+    # through the channels, banks, and row buffers of the DRAM
     memory_transactions = total_cache_lines
-    total_elapsed_time_in_sec = memory_transactions * 4 * config.memory_cycle_ns * 1.0e-9
+    total_elapsed_time_in_sec = transfer_time(config.dram, memory_transactions, cache_line_size)
 
     # instruction throughput yielded
-    total_instructions = spm_metrics.events['instruction']
+    total_instructions = spm_metrics.occurrence('instruction')
     instr_per_sec = total_instructions / total_elapsed_time_in_sec
-    total_flops = spm_metrics.events['execute']
+    total_flops = spm_metrics.occurrence('execute')
     flops_per_sec = total_flops / total_elapsed_time_in_sec
     memory_ops_per_second = total_cache_lines / total_elapsed_time_in_sec
 
@@ -192,12 +190,12 @@ def flat_matvec_spm(rows, cols, attributes: 'StoredProgramMachineEnergy', config
     # normalized performance
     # Watt = J/s
     # gops/Watt = gops/ (J/s)
-    total_energy_in_pJoules = spm_metrics.energy['total']
+    total_energy_in_pJoules = spm_metrics.occurrence_energy('total')
     total_energy = total_energy_in_pJoules * 1.0e-12
     power = total_energy / total_elapsed_time_in_sec
     spm_metrics.total_flops = total_flops
     spm_metrics.power = power
-    spm_metrics.flops_per_watt = total_flops / power
+    spm_metrics.flops_per_watt = spm_metrics.flops_per_sec / power
 
     return spm_metrics
 
@@ -239,6 +237,8 @@ def flat_matvec_gpu(rows, cols, energies: 'GraphicsProcessingUnitEnergy', config
     matrix_data_structure_size = matrix_elements * config.word_size
     vector_data_structure_size = vector_elements * config.word_size
     total_data_structure_size = total_elements * config.word_size
+    # the result vector is written in words of the output datatype
+    output_data_structure_size = vector_elements * config.output_word_size
 
     # a decoded instruction is sent to all the ALUs via a Warp (NVIDIA) or Wavefront (AMD) scheduler
     # this is an energetic event and needs to be tracked
@@ -267,34 +267,26 @@ def flat_matvec_gpu(rows, cols, energies: 'GraphicsProcessingUnitEnergy', config
     total_memory_read_bursts = math.ceil(total_memory_reads / config.memory_burst_size)
     total_memory_writes = rows / config.memory_burst_size * overfetch_factor
     total_memory_write_bursts = math.ceil(total_memory_writes / config.memory_burst_size)  # each row is an element of the result vector
-    gpu_metrics.record('gmem_read', total_memory_read_bursts, energies.gmem_read)
-    gpu_metrics.record('gmem_write', total_memory_write_bursts, energies.gmem_write)
+    burst_scale = energies.burst_scale(config.memory_burst_size)
+    gpu_metrics.record('gmem_read', total_memory_read_bursts, energies.gmem_read * burst_scale)
+    gpu_metrics.record('gmem_write', total_memory_write_bursts, energies.gmem_write * burst_scale)
 
     # consolidate sets
-    gpu_metrics.consolidate('compute', ['instruction', 'execute', 'register_read', 'register_write'])
-    gpu_metrics.consolidate('l1', ['l1_read', 'l1_write'])
-    gpu_metrics.consolidate('smem', ['smem_read', 'smem_write'])
-    gpu_metrics.consolidate('gmem', ['gmem_read', 'gmem_write'])
-    gpu_metrics.consolidate('cache_read', ['l1_read', 'smem_read'])
-    gpu_metrics.consolidate('cache_write', ['l1_write', 'smem_write'])
-    gpu_metrics.consolidate('cache', ['cache_read', 'cache_write'])
-    gpu_metrics.consolidate('memory', ['gmem_read', 'gmem_write'])
-    gpu_metrics.consolidate('data_movement', ['cache', 'memory'])
-    gpu_metrics.consolidate('total', ['compute', 'data_movement'])
+    gpu_metrics.rollup()
 
     # calculate performance metrics
     # Matvec is memory bound, which implies that
     # the number of operations are governed by number of operands we can fetch
 
     # how long would it take to move the total number of data from and to the memory
-    # a 64bit DDR DIMM needs 4 clocks to move a cacheline
+    # through the channels, banks, and row buffers of the DRAM
     memory_transactions = total_memory_read_bursts + total_memory_read_bursts
-    total_elapsed_time_in_sec = memory_transactions * 4 * config.memory_cycle_ns * 1.0e-9
+    total_elapsed_time_in_sec = transfer_time(config.dram, memory_transactions, config.memory_burst_size)
 
     # instruction throughput yielded
-    total_instructions = gpu_metrics.events['instruction']
+    total_instructions = gpu_metrics.occurrence('instruction')
     instr_per_sec = total_instructions / total_elapsed_time_in_sec
-    total_flops = gpu_metrics.events['execute']
+    total_flops = gpu_metrics.occurrence('execute')
     flops_per_sec = total_flops / total_elapsed_time_in_sec
     memory_ops_per_second = memory_transactions / total_elapsed_time_in_sec
 
@@ -304,9 +296,9 @@ def flat_matvec_gpu(rows, cols, energies: 'GraphicsProcessingUnitEnergy', config
     gpu_metrics.memory_transactions = memory_transactions
     gpu_metrics.memory_clock_ns = config.memory_cycle_ns
     gpu_metrics.read_data = matrix_data_structure_size
-    gpu_metrics.write_data = vector_data_structure_size
+    gpu_metrics.write_data = output_data_structure_size
     gpu_metrics.memory_read_bw = matrix_data_structure_size / total_elapsed_time_in_sec
-    gpu_metrics.memory_write_bw = vector_data_structure_size / total_elapsed_time_in_sec
+    gpu_metrics.memory_write_bw = output_data_structure_size / total_elapsed_time_in_sec
     gpu_metrics.memops_per_sec = memory_ops_per_second
 
     # copy the machine attributes into the metrics data structure
@@ -322,29 +314,251 @@ def flat_matvec_gpu(rows, cols, energies: 'GraphicsProcessingUnitEnergy', config
 
     # normalized performance
     # Watt = J/s
-    # flops/Watt = flops/ (J/s)
-    total_energy_in_pJoules = gpu_metrics.energy['total']
+    # FLOPS/Watt = (flops/s) / (J/s)
+    total_energy_in_pJoules = gpu_metrics.occurrence_energy('total')
     total_energy = total_energy_in_pJoules * 1.0e-12
     power =  total_energy / total_elapsed_time_in_sec
     gpu_metrics.total_flops = total_flops
     gpu_metrics.power = power
-    gpu_metrics.flops_per_watt = total_flops / power
+    gpu_metrics.flops_per_watt = gpu_metrics.flops_per_sec / power
 
     return gpu_metrics
 
 
-class DomainFlowArchitectureConfiguration:
-    pass
+# flat matrix-vector operator on a Domain Flow Architecture
+#
+# The (rows x cols) computational domain y(i) += A(i, j) * x(j) is tiled to the fabric_size x fabric_size fabric
+# of processing elements. A tile executes as a sequence of wavefronts: processing element (i, j) fires the fma of
+# tile t in wavefront t + i + j, so consecutive tiles are pipelined, one per wavefront, and the schedule fills
+# and drains in 2 * (fabric_size - 1) wavefronts. Every fma receives three data tokens into the iStore of its
+# processing element, A from the streamer at the edge of its row through the pipeline registers of the row,
+# x from its north neighbor, and the partial y from its west neighbor, dispatches one instruction token,
+# and forwards x and y to its neighbors. The instruction token of a tile waits in the iStore from the wavefront
+# that injects the tile until the wavefront that fires it, so the far corner of the fabric holds the tokens of
+# 2 * fabric_size - 1 tiles in flight: a shallower iStore stalls the injection of the next tile until a token
+# drains, and the schedule issues istore_depth tiles per 2 * fabric_size - 1 wavefronts.
+#
+# The streamers inject the tiles through two edges of the fabric, a word per edge processing element per clock,
+# and write the partial results of every tile back to the L1. The L1 is filled from the shared memory, and the DMA
+# engines move the memory bursts between global memory and the shared memory. x is reused from the L1 and
+# the shared memory when half of their capacity holds it, otherwise it is streamed again for every row of tiles.
+def flat_matvec_dfa(rows, cols, energies: 'DomainFlowArchitectureEnergy', config: 'DomainFlowArchitectureConfiguration') \
+        -> 'DomainFlowArchitectureMetrics':
+    # enumerate all the energy consuming transactions for a matvec on a DFA
+    dfa_metrics = DomainFlowArchitectureMetrics("Flat MV " + str(rows) + " x " + str(cols) + " DFA")
 
+    fabric_size = config.fabric_size
+    word_size = config.word_size
+    row_tiles = math.ceil(rows / fabric_size)
+    col_tiles = math.ceil(cols / fabric_size)
+    tiles = row_tiles * col_tiles
+
+    # nr of multiply-add operations
+    fmas: int = rows * cols
+    dfa_metrics.record('fma', fmas, energies.fma)
+    dfa_metrics.record('execute', fmas, energies.fma)
+
+    # every fma is triggered by three data tokens, and fires one instruction token
+    dfa_metrics.record('istore_operand_write', 3 * fmas, energies.istore_operand_write)
+    dfa_metrics.record('istore_dispatch', fmas, energies.istore_dispatch)
+
+    # x and y hop to a neighbor for every fma, A travels half a row on average
+    a_hops = fmas * (fabric_size - 1) // 2
+    pipe_hops = 2 * fmas + a_hops
+    dfa_metrics.record('pipe_write', pipe_hops, energies.pipe_write)
+    dfa_metrics.record('pipe_read', pipe_hops, energies.pipe_read)
+
+    # the streamers inject A, a segment of x per tile, and the partial y of every tile but the first of a row,
+    # and write the partial y of every tile back to the L1
+    matrix_words = rows * cols
+    streamed_in = matrix_words + row_tiles * cols + rows * (col_tiles - 1)
+    streamed_out = rows * col_tiles
+    dfa_metrics.record('str_read', streamed_in, energies.str_read)
+    dfa_metrics.record('str_write', streamed_out, energies.str_write)
+
+    # x stays in the L1 and the shared memory when it fits in half of their capacity
+    x_l1_fills = cols if 2 * cols * word_size <= config.l1_size else row_tiles * cols
+    x_smem_fills = cols if 2 * cols * word_size <= config.smem_size else row_tiles * cols
+    # the L1 is read by the streamers, and by the stream controller that returns y to the shared memory
+    dfa_metrics.record('l1_read', streamed_in + rows, energies.l1_read)
+    dfa_metrics.record('l1_write', matrix_words + x_l1_fills + streamed_out, energies.l1_write)
+    dfa_metrics.record('smem_read', matrix_words + x_l1_fills + rows, energies.smem_read)
+    dfa_metrics.record('smem_write', matrix_words + x_smem_fills + rows, energies.smem_write)
+
+    # the DMA engines move A and x in, and y out, in memory bursts
+    read_data = (matrix_words + x_smem_fills) * word_size
+    write_data = rows * config.output_word_size
+    memory_read_bursts = math.ceil(read_data / config.memory_burst_size)
+    memory_write_bursts = math.ceil(write_data / config.memory_burst_size)
+    dfa_metrics.record('dma_read', memory_read_bursts, energies.dma_read)
+    dfa_metrics.record('dma_write', memory_write_bursts, energies.dma_write)
+    dfa_metrics.record('gmem_read', memory_read_bursts, energies.gmem_read)
+    dfa_metrics.record('gmem_write', memory_write_bursts, energies.gmem_write)
+
+    # consolidate sets
+    dfa_metrics.rollup()
+
+    # calculate performance metrics
+    # the wavefront schedule pipelines a tile per clock, unless the iStore cannot hold the instruction tokens
+    # of the tiles in flight, or the streamers can't inject the tiles that fast
+    fill_and_drain = 2 * (fabric_size - 1)
+    tiles_in_flight = 2 * fabric_size - 1
+    wavefronts_per_tile = max(1.0, tiles_in_flight / config.istore_depth)
+    wavefronts = math.ceil(tiles * wavefronts_per_tile) + fill_and_drain
+    stream_cycles = math.ceil((streamed_in + streamed_out) / (2 * fabric_size)) + fill_and_drain
+    fabric_time = max(wavefronts, stream_cycles) * config.clock_cycle_ns * 1.0e-9
+    # a DMA engine moves a cache line per clock, the DRAM serves the bursts through its channels and banks
+    memory_transactions = memory_read_bursts + memory_write_bursts
+    dma_time = memory_transactions * config.memory_burst_size / (config.dma_engines * config.cache_line_size) \
+        * config.clock_cycle_ns * 1.0e-9
+    dram_time = transfer_time(config.dram, memory_transactions, config.memory_burst_size)
+    total_elapsed_time_in_sec = max(fabric_time, dma_time, dram_time)
+
+    total_instructions = dfa_metrics.occurrence('istore_dispatch')
+    total_flops = dfa_metrics.occurrence('execute')
+    elapsed_cycles = total_elapsed_time_in_sec / (config.clock_cycle_ns * 1.0e-9)
+
+    dfa_metrics.tiles = tiles
+    dfa_metrics.wavefronts = wavefronts
+    dfa_metrics.fabric_utilization = fmas / (elapsed_cycles * fabric_size * fabric_size)
+    dfa_metrics.elapsed_time = total_elapsed_time_in_sec
+    dfa_metrics.instr_per_sec = total_instructions / total_elapsed_time_in_sec
+    dfa_metrics.flops_per_sec = total_flops / total_elapsed_time_in_sec
+    dfa_metrics.memory_transactions = memory_transactions
+    dfa_metrics.memory_clock_ns = config.memory_cycle_ns
+    dfa_metrics.read_data = read_data
+    dfa_metrics.write_data = write_data
+    dfa_metrics.memory_read_bw = read_data / total_elapsed_time_in_sec
+    dfa_metrics.memory_write_bw = write_data / total_elapsed_time_in_sec
+    dfa_metrics.memops_per_sec = memory_transactions / total_elapsed_time_in_sec
+
+    # copy the machine attributes into the metrics data structure
+    dfa_metrics.core_clock_ghz = config.core_clock
+    dfa_metrics.memory_clock_ghz = config.memory_clock
+    dfa_metrics.word_size = config.word_size
+    dfa_metrics.cache_line_size = config.cache_line_size
+    dfa_metrics.memory_burst = config.memory_burst_size
+    dfa_metrics.memory_channels = config.memory_channels
+    dfa_metrics.channel_width = config.channel_width
+    dfa_metrics.max_memory_bw = config.dram.peak_bandwidth
+    dfa_metrics.fabric_size = fabric_size
+    dfa_metrics.istore_depth = config.istore_depth
+    dfa_metrics.dma_engines = config.dma_engines
+
+    # normalized performance
+    # Watt = J/s
+    # FLOPS/Watt = (flops/s) / (J/s)
+    total_energy = dfa_metrics.occurrence_energy('total') * 1.0e-12
+    power = total_energy / total_elapsed_time_in_sec
+    dfa_metrics.total_flops = total_flops
+    dfa_metrics.power = power
+    dfa_metrics.flops_per_watt = dfa_metrics.flops_per_sec / power
+
+    return dfa_metrics
 
-def flat_matvec_dfa(rows, cols, energies: DomainFlowArchitectureEnergy, config: DomainFlowArchitectureConfiguration) \
-        -> DomainFlowArchitectureMetrics:
-    # enumerate all the energy consuming transactions for a matvec on a DFA
-    dfa_metrics = DomainFlowArchitectureMetrics("Flat MV " + str(rows) + " x " + str(cols) + " GPU")
+
+# flat matrix-vector operator on a Data Flow Machine
+#
+# Every fma of y(i) += A(i, j) * x(j) is a triadic instruction whose operands arrive as tokens:
+# A(i, j) and x(j) from two monadic split-phase loads, and the partial y(i) from the previous fma of the row.
+# The tokens are matched in the CAM of the waiting-matching store, where the first two tokens of an fma wait
+# for the third, and the enabled instruction is fetched, decoded, and executed. The last fma of a row
+# sends y(i) to a dyadic store. The loads stream A and x through the caches without reuse, as on the SPM.
+def flat_matvec_dfm(rows, cols, energies: 'DataFlowMachineEnergy', config: 'DataFlowMachineConfiguration') \
+        -> 'DataFlowMachineMetrics':
+    # enumerate all the energy consuming transactions for a matvec on a DFM
+    dfm_metrics = DataFlowMachineMetrics("Flat MV " + str(rows) + " x " + str(cols) + " DFM")
 
     # nr of multiply-add operations
     fmas: int = rows * cols
-    dfa_metrics.record('fma', fmas, energies.fma32b)
-    dfa_metrics.record('execute', fmas, energies.fma32b)
+    dfm_metrics.record('fma', fmas, energies.fma32b)
+    dfm_metrics.record('execute', fmas, energies.fma32b)
+
+    # two loads and an fma fire per multiply-add, and a store per row
+    nr_of_instructions: int = 3 * fmas + rows
+    dfm_metrics.record('fetch', nr_of_instructions, energies.fetch)
+    dfm_metrics.record('decode', nr_of_instructions, energies.decode)
+
+    # the operand tokens of the fmas and the stores are matched in the CAM, loads are monadic and bypass it
+    dfm_metrics.record('token_match', 3 * fmas + 2 * rows, energies.token_match)
+    dfm_metrics.record('token_write', 2 * fmas + rows, energies.token_write)
+    dfm_metrics.record('token_read', 2 * fmas + rows, energies.token_read)
+
+    # flat mv assumes we are streaming to the cache without reuse
+    cache_line_size = config.cache_line_size  # bytes
+    matrix_cache_lines: int = math.ceil(rows * cols * config.word_size / cache_line_size)
+    x_cache_lines: int = math.ceil(cols * config.word_size / cache_line_size)
+    y_cache_lines: int = math.ceil(rows * config.output_word_size / cache_line_size)
+    total_cache_lines_in: int = matrix_cache_lines + x_cache_lines
+    total_cache_lines_out: int = y_cache_lines
+    total_cache_lines: int = total_cache_lines_in + total_cache_lines_out
+
+    dfm_metrics.record('l1_read', fmas * 2, energies.l1_read)
+    dfm_metrics.record('l1_write', total_cache_lines, energies.l1_write)
+    dfm_metrics.record('l2_read', total_cache_lines_in, energies.l2_read)
+    dfm_metrics.record('l2_write', total_cache_lines, energies.l2_write)
+    dfm_metrics.record('l3_read', total_cache_lines_in, energies.l3_read)
+    dfm_metrics.record('l3_write', total_cache_lines, energies.l3_write)
+    dfm_metrics.record('mem_read', total_cache_lines_in, energies.mem_read)
+    dfm_metrics.record('mem_write', total_cache_lines_out, energies.mem_write)
+
+    # consolidate sets
+    dfm_metrics.rollup()
 
-    return dfa_metrics
\ No newline at end of file
+    # calculate performance metrics
+    token_flow_performance(dfm_metrics, energies, config, fmas, total_cache_lines_in, total_cache_lines_out)
+
+    return dfm_metrics
+
+
+# Performance of an operator on a Data Flow Machine: the tokens flow through the CAM at its matching throughput,
+# the split-phase loads are covered by the fmas the CAM holds in flight, and the cache lines move
+# through the channels, banks, and row buffers of the DRAM, see energysim.models.dfm.
+def token_flow_performance(dfm_metrics: 'DataFlowMachineMetrics', energies: 'DataFlowMachineEnergy',
+                           config: 'DataFlowMachineConfiguration', fmas, cache_lines_in, cache_lines_out):
+    cache_line_size = config.cache_line_size
+    memory_transactions = cache_lines_in + cache_lines_out
+    memory_time = transfer_time(config.dram, memory_transactions, cache_line_size)
+    load_latency_ns = config.dram.activate_ns + config.dram.cas_latency_ns
+    total_elapsed_time_in_sec, matching_time = token_flow_time(
+        dfm_metrics.occurrence('token_match'), fmas, memory_time, config.core_clock, energies.cam_cycle_time_ns,
+        config.token_match_rate, config.cam_size, load_latency_ns)
+
+    total_instructions = dfm_metrics.occurrence('fetch')
+    total_flops = dfm_metrics.occurrence('execute')
+    read_data = cache_lines_in * cache_line_size
+    write_data = cache_lines_out * cache_line_size
+
+    dfm_metrics.matching_utilization = matching_time / total_elapsed_time_in_sec
+    dfm_metrics.elapsed_time = total_elapsed_time_in_sec
+    dfm_metrics.instr_per_sec = total_instructions / total_elapsed_time_in_sec
+    dfm_metrics.flops_per_sec = total_flops / total_elapsed_time_in_sec
+    dfm_metrics.memory_transactions = memory_transactions
+    dfm_metrics.memory_clock_ns = config.memory_cycle_ns
+    dfm_metrics.read_data = read_data
+    dfm_metrics.write_data = write_data
+    dfm_metrics.memory_read_bw = read_data / total_elapsed_time_in_sec
+    dfm_metrics.memory_write_bw = write_data / total_elapsed_time_in_sec
+    dfm_metrics.memops_per_sec = memory_transactions / total_elapsed_time_in_sec
+
+    # copy the machine attributes into the metrics data structure
+    dfm_metrics.core_clock_ghz = config.core_clock
+    dfm_metrics.memory_clock_ghz = config.memory_clock
+    dfm_metrics.word_size = config.word_size
+    dfm_metrics.cache_line_size = config.cache_line_size
+    dfm_metrics.memory_burst = config.memory_burst_size
+    dfm_metrics.memory_channels = config.memory_channels
+    dfm_metrics.channel_width = config.channel_width
+    dfm_metrics.max_memory_bw = config.dram.peak_bandwidth
+    dfm_metrics.cam_size = config.cam_size
+    dfm_metrics.token_match_rate = config.token_match_rate
+    dfm_metrics.cam_cycle_ns = energies.cam_cycle_time_ns
+
+    # normalized performance
+    # Watt = J/s
+    # FLOPS/Watt = (flops/s) / (J/s)
+    total_energy = dfm_metrics.occurrence_energy('total') * 1.0e-12
+    power = total_energy / total_elapsed_time_in_sec
+    dfm_metrics.total_flops = total_flops
+    dfm_metrics.power = power
+    dfm_metrics.flops_per_watt = dfm_metrics.flops_per_sec / power
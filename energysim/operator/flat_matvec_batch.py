@@ -0,0 +1,373 @@
+import numpy as np
+import pandas as pd
+
+from energysim.database.dfm_energy import DataFlowMachineEnergy
+from energysim.database.gpu_energy import GraphicsProcessingUnitEnergy
+from energysim.database.spm_energy import StoredProgramMachineEnergy
+from energysim.execution.dfm_metrics import DataFlowMachineMetrics
+from energysim.execution.gpu_metrics import GraphicsProcessingUnitMetrics
+from energysim.execution.spm_metrics import StoredProgramMachineMetrics
+from energysim.models.dfm import token_flow_time
+from energysim.models.dram import transfer_time
+from energysim.models.dram_configuration import DynamicRandomAccessMemoryConfiguration
+
+
+def _ceil_div(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    return -(-numerator // denominator)
+
+
+def _broadcast_parameters(*parameters) -> list:
+    # broadcast (value, dtype) pairs against each other and flatten them into design point vectors
+    arrays = [np.asarray(value, dtype=dtype) for value, dtype in parameters]
+    return [np.ravel(a) for a in np.broadcast_arrays(*arrays)]
+
+
+def _output_word_size(word_size_in_bytes, output_word_size_in_bytes):
+    # the results are written in words of the output datatype, the operand words unless configured
+    return word_size_in_bytes if output_word_size_in_bytes is None else output_word_size_in_bytes
+
+
+def _size_scale(size: np.ndarray, reference_size: int) -> np.ndarray:
+    # energies of cache line and memory burst events are expressed for the size they were looked up with,
+    # rescale them to the size of each design point
+    if reference_size > 0:
+        return size / reference_size
+    return np.ones(size.shape)
+
+
+def _record(metrics_class, size: int, events: dict) -> tuple[dict, dict]:
+    # record the events of every design point into (size x keys) buffers laid out like metrics_class,
+    # roll them up with the aggregation matrix of the class, and return the columns keyed by event
+    recorded_events, recorded_energy = metrics_class.record_batch(size, events)
+
+    occurrences = {key: recorded_events[:, offset] for key, offset in metrics_class.key_offset.items()}
+    energy = {key: recorded_energy[:, offset] for key, offset in metrics_class.key_offset.items()}
+    return occurrences, energy
+
+
+def _metric_columns(columns: dict, occurrences: dict, energy: dict):
+    # one events and one energy column for every key of the metrics class
+    for key in occurrences:
+        columns[key + '_events'] = occurrences[key]
+        columns[key + '_energy'] = energy[key]
+
+
+def _dram_timing(dram: 'DynamicRandomAccessMemoryConfiguration', family: str) \
+        -> 'DynamicRandomAccessMemoryConfiguration':
+    # the timing and organization of the DRAM, the interface parameters come from the sweep
+    if dram is not None:
+        return dram
+    return DynamicRandomAccessMemoryConfiguration.from_memory_parameters(1.0, 1, 8, 64, family=family)
+
+
+# Batched flat matrix-vector operator on a Stored Program Machine.
+# Evaluates the flat_matvec_spm model for whole arrays of matrix shapes and machine configurations.
+# All shape and configuration arguments broadcast against each other, so a design-space sweep
+# is a single call over flattened parameter arrays, or over an open grid built with np.ix_.
+# The result has one row per design point, with the events and energies of every
+# StoredProgramMachineMetrics key, and the performance metrics of the scalar model.
+def flat_matvec_spm_batch(rows, cols, attributes: 'StoredProgramMachineEnergy',
+                          core_clock_ghz, memory_clock_ghz, word_size_in_bytes,
+                          cache_line_size_in_bytes, memory_burst_size_in_bytes,
+                          memory_channels=1, channel_width_in_bytes=8,
+                          dram: 'DynamicRandomAccessMemoryConfiguration' = None,
+                          output_word_size_in_bytes=None) -> pd.DataFrame:
+    rows, cols, core_clock, memory_clock, word_size, cache_line_size, memory_burst_size, memory_channels, channel_width, \
+        output_word_size = _broadcast_parameters(
+            (rows, np.int64), (cols, np.int64),
+            (core_clock_ghz, np.float64), (memory_clock_ghz, np.float64),
+            (word_size_in_bytes, np.int64), (cache_line_size_in_bytes, np.int64),
+            (memory_burst_size_in_bytes, np.int64), (memory_channels, np.int64),
+            (channel_width_in_bytes, np.int64),
+            (_output_word_size(word_size_in_bytes, output_word_size_in_bytes), np.int64))
+    line_scale = _size_scale(cache_line_size, attributes.cache_line_size)
+
+    # nr of multiply-add operations
+    fmas = rows * cols
+
+    # flat mv assumes we are streaming to the cache without reuse
+    matrix_cache_lines = _ceil_div(rows * cols * word_size, cache_line_size)
+    vector_cache_lines = _ceil_div(cols * word_size, cache_line_size)
+    output_cache_lines = _ceil_div(cols * output_word_size, cache_line_size)
+    total_cache_lines_in = matrix_cache_lines + vector_cache_lines
+    total_cache_lines_out = output_cache_lines
+    total_cache_lines = total_cache_lines_in + total_cache_lines_out
+
+    # the same event model as flat_matvec_spm
+    occurrences, energy = _record(StoredProgramMachineMetrics, len(rows), {
+        'fma': (fmas, attributes.fma32b),
+        'execute': (fmas, attributes.fma32b),
+        'instruction': (fmas * 6, attributes.instruction),
+        'register_read': (fmas * 3, attributes.register_read),
+        'register_write': (fmas * 3, attributes.register_write),
+        'l1_read': (fmas * 2, attributes.l1_read),
+        'l1_write': (total_cache_lines, attributes.l1_write * line_scale),
+        'l2_read': (total_cache_lines_in, attributes.l2_read * line_scale),
+        'l2_write': (total_cache_lines, attributes.l2_write * line_scale),
+        'l3_read': (total_cache_lines_in, attributes.l3_read * line_scale),
+        'l3_write': (total_cache_lines, attributes.l3_write * line_scale),
+        'dram_read': (total_cache_lines_in, attributes.dram_read * line_scale),
+        'dram_write': (total_cache_lines_out, attributes.dram_write * line_scale),
+    })
+
+    columns = {
+        'rows': rows,
+        'cols': cols,
+        'core_clock_ghz': core_clock,
+        'memory_clock_ghz': memory_clock,
+        'word_size': word_size,
+        'output_word_size': output_word_size,
+        'cache_line_size': cache_line_size,
+        'memory_burst': memory_burst_size,
+        'memory_channels': memory_channels,
+        'channel_width': channel_width,
+    }
+    _metric_columns(columns, occurrences, energy)
+
+    # calculate performance metrics, the DRAM timing of flat_matvec_spm behind the swept memory interface
+    memory_cycle_ns = 1.0 / memory_clock
+    memory_transactions = total_cache_lines
+    dram = _dram_timing(dram, 'DDR4')
+    elapsed_time = transfer_time(dram, memory_transactions, cache_line_size, memory_clock_ghz=memory_clock,
+                                 memory_channels=memory_channels, channel_width_in_bytes=channel_width,
+                                 memory_burst_size_in_bytes=memory_burst_size)
+    total_flops = occurrences['execute']
+    read_data = total_cache_lines_in * cache_line_size
+    write_data = total_cache_lines_out * cache_line_size
+    total_energy = energy['total'] * 1.0e-12
+    power = total_energy / elapsed_time
+
+    columns['elapsed_time'] = elapsed_time
+    columns['instr_per_sec'] = occurrences['instruction'] / elapsed_time
+    columns['flops_per_sec'] = total_flops / elapsed_time
+    columns['memory_transactions'] = memory_transactions
+    columns['memory_clock_ns'] = memory_cycle_ns
+    columns['memops_per_sec'] = total_cache_lines / elapsed_time
+    columns['read_data'] = read_data
+    columns['write_data'] = write_data
+    columns['memory_read_bw'] = read_data / elapsed_time
+    columns['memory_write_bw'] = write_data / elapsed_time
+    columns['total_flops'] = total_flops
+    columns['power'] = power
+    columns['flops_per_watt'] = columns['flops_per_sec'] / power
+
+    return pd.DataFrame(columns, copy=False)
+
+
+# Batched flat matrix-vector operator on a Graphics Processing Unit.
+# Evaluates the flat_matvec_gpu model over arrays of kernel launch parameters
+# (threads per block, blocks per grid) and memory system parameters (burst size,
+# channel count, word size), which broadcast against each other and the matrix shape.
+# Next to the events, energies and performance metrics of the scalar model, the result
+# describes the launch geometry: warps per block, launched warps and threads, the fraction
+# of launched threads that own a row, and the rows each thread walks in a grid-stride loop.
+def flat_matvec_gpu_batch(rows, cols, energies: 'GraphicsProcessingUnitEnergy',
+                          core_clock_ghz, memory_clock_ghz, word_size_in_bytes,
+                          cache_line_size_in_bytes, memory_burst_size_in_bytes,
+                          memory_channels, channel_width_in_bytes,
+                          threads_per_block, blocks_per_grid,
+                          dram: 'DynamicRandomAccessMemoryConfiguration' = None,
+                          output_word_size_in_bytes=None) -> pd.DataFrame:
+    rows, cols, core_clock, memory_clock, word_size, cache_line_size, memory_burst_size, memory_channels, channel_width, \
+        threads_per_block, blocks_per_grid, output_word_size = _broadcast_parameters(
+            (rows, np.int64), (cols, np.int64),
+            (core_clock_ghz, np.float64), (memory_clock_ghz, np.float64),
+            (word_size_in_bytes, np.int64), (cache_line_size_in_bytes, np.int64),
+            (memory_burst_size_in_bytes, np.int64), (memory_channels, np.int64),
+            (channel_width_in_bytes, np.int64), (threads_per_block, np.int64),
+            (blocks_per_grid, np.int64),
+            (_output_word_size(word_size_in_bytes, output_word_size_in_bytes), np.int64))
+    line_scale = _size_scale(cache_line_size, energies.cache_line_size)
+    burst_scale = energies.burst_scale(memory_burst_size)
+
+    # nr of multiply-add operations
+    fmas = rows * cols
+
+    matrix_elements = rows * cols
+    vector_elements = cols
+    total_elements = matrix_elements + vector_elements
+    matrix_data_structure_size = matrix_elements * word_size
+    vector_data_structure_size = vector_elements * word_size
+    output_data_structure_size = vector_elements * output_word_size
+
+    # one thread per element of the result vector, see flat_matvec_gpu
+    nr_of_warps = _ceil_div(rows, 32)
+    warps_per_block = _ceil_div(threads_per_block, 32)
+    launched_warps = warps_per_block * blocks_per_grid
+    launched_threads = threads_per_block * blocks_per_grid
+    thread_utilization = np.minimum(rows, launched_threads) / launched_threads
+    rows_per_thread = _ceil_div(rows, launched_threads)
+
+    # memory bursts are 90% occupied, see flat_matvec_gpu
+    memory_burst_occupancy = 0.9
+    overfetch_factor = (1.0 + (1.0 - memory_burst_occupancy))
+    total_memory_reads = total_elements * overfetch_factor
+    total_memory_read_bursts = np.ceil(total_memory_reads / memory_burst_size)
+    total_memory_writes = rows / memory_burst_size * overfetch_factor
+    total_memory_write_bursts = np.ceil(total_memory_writes / memory_burst_size)
+
+    # the same event model as flat_matvec_gpu
+    occurrences, energy = _record(GraphicsProcessingUnitMetrics, len(rows), {
+        'fma': (fmas, energies.fma32b),
+        'execute': (fmas, energies.fma32b),
+        'instruction': (fmas * 20, energies.instruction),
+        'register_read': (fmas * 3, energies.reg_read),
+        'register_write': (fmas * 3, energies.reg_write),
+        'l1_read': (fmas * 2, energies.l1_read),
+        'l1_write': (fmas, energies.l1_write * line_scale),
+        'smem_read': (fmas, energies.smem_read),
+        'smem_write': (2 * cols, energies.smem_write),
+        'gmem_read': (total_memory_read_bursts, energies.gmem_read * burst_scale),
+        'gmem_write': (total_memory_write_bursts, energies.gmem_write * burst_scale),
+    })
+
+    columns = {
+        'rows': rows,
+        'cols': cols,
+        'core_clock_ghz': core_clock,
+        'memory_clock_ghz': memory_clock,
+        'word_size': word_size,
+        'output_word_size': output_word_size,
+        'cache_line_size': cache_line_size,
+        'memory_burst': memory_burst_size,
+        'memory_channels': memory_channels,
+        'channel_width': channel_width,
+        'threads_per_block': threads_per_block,
+        'blocks_per_grid': blocks_per_grid,
+        'nr_of_warps': nr_of_warps,
+        'warps_per_block': warps_per_block,
+        'launched_warps': launched_warps,
+        'launched_threads': launched_threads,
+        'thread_utilization': thread_utilization,
+        'rows_per_thread': rows_per_thread,
+    }
+    _metric_columns(columns, occurrences, energy)
+
+    # calculate performance metrics, with the memory transaction count and the DRAM timing of flat_matvec_gpu
+    memory_cycle_ns = 1.0 / memory_clock
+    memory_transactions = total_memory_read_bursts + total_memory_read_bursts
+    dram = _dram_timing(dram, 'GDDR6')
+    elapsed_time = transfer_time(dram, memory_transactions, memory_burst_size, memory_clock_ghz=memory_clock,
+                                 memory_channels=memory_channels, channel_width_in_bytes=channel_width,
+                                 memory_burst_size_in_bytes=memory_burst_size)
+    total_flops = occurrences['execute']
+    total_energy = energy['total'] * 1.0e-12
+    power = total_energy / elapsed_time
+
+    columns['max_memory_bw'] = memory_clock * 2 * channel_width * memory_channels * 2 * 1.0e9
+    columns['elapsed_time'] = elapsed_time
+    columns['instr_per_sec'] = occurrences['instruction'] / elapsed_time
+    columns['flops_per_sec'] = total_flops / elapsed_time
+    columns['memory_transactions'] = memory_transactions
+    columns['memory_clock_ns'] = memory_cycle_ns
+    columns['memops_per_sec'] = memory_transactions / elapsed_time
+    columns['read_data'] = matrix_data_structure_size
+    columns['write_data'] = output_data_structure_size
+    columns['memory_read_bw'] = matrix_data_structure_size / elapsed_time
+    columns['memory_write_bw'] = output_data_structure_size / elapsed_time
+    columns['total_flops'] = total_flops
+    columns['power'] = power
+    columns['flops_per_watt'] = columns['flops_per_sec'] / power
+
+    return pd.DataFrame(columns, copy=False)
+
+
+# Batched flat matrix-vector operator on a Data Flow Machine.
+# Evaluates the flat_matvec_dfm model over arrays of matrix shapes, memory system parameters,
+# and the size and matching throughput of the CAM, which broadcast against each other,
+# so a DFM joins the same sweeps as the SPM and the GPU.
+def flat_matvec_dfm_batch(rows, cols, energies: 'DataFlowMachineEnergy',
+                          core_clock_ghz, memory_clock_ghz, word_size_in_bytes,
+                          cache_line_size_in_bytes, memory_burst_size_in_bytes,
+                          memory_channels=1, channel_width_in_bytes=8,
+                          cam_size_in_tokens=1024, token_match_rate=8,
+                          dram: 'DynamicRandomAccessMemoryConfiguration' = None,
+                          output_word_size_in_bytes=None) -> pd.DataFrame:
+    rows, cols, core_clock, memory_clock, word_size, cache_line_size, memory_burst_size, memory_channels, channel_width, \
+        cam_size, token_match_rate, output_word_size = _broadcast_parameters(
+            (rows, np.int64), (cols, np.int64),
+            (core_clock_ghz, np.float64), (memory_clock_ghz, np.float64),
+            (word_size_in_bytes, np.int64), (cache_line_size_in_bytes, np.int64),
+            (memory_burst_size_in_bytes, np.int64), (memory_channels, np.int64),
+            (channel_width_in_bytes, np.int64), (cam_size_in_tokens, np.int64),
+            (token_match_rate, np.int64),
+            (_output_word_size(word_size_in_bytes, output_word_size_in_bytes), np.int64))
+    line_scale = _size_scale(cache_line_size, energies.cache_line_size)
+
+    # nr of multiply-add operations
+    fmas = rows * cols
+    nr_of_instructions = 3 * fmas + rows
+
+    # flat mv assumes we are streaming to the cache without reuse
+    total_cache_lines_in = _ceil_div(rows * cols * word_size, cache_line_size) \
+        + _ceil_div(cols * word_size, cache_line_size)
+    total_cache_lines_out = _ceil_div(rows * output_word_size, cache_line_size)
+    total_cache_lines = total_cache_lines_in + total_cache_lines_out
+
+    # the same event model as flat_matvec_dfm
+    occurrences, energy = _record(DataFlowMachineMetrics, len(rows), {
+        'fma': (fmas, energies.fma32b),
+        'execute': (fmas, energies.fma32b),
+        'fetch': (nr_of_instructions, energies.fetch),
+        'decode': (nr_of_instructions, energies.decode),
+        'token_match': (3 * fmas + 2 * rows, energies.token_match),
+        'token_write': (2 * fmas + rows, energies.token_write),
+        'token_read': (2 * fmas + rows, energies.token_read),
+        'l1_read': (fmas * 2, energies.l1_read),
+        'l1_write': (total_cache_lines, energies.l1_write * line_scale),
+        'l2_read': (total_cache_lines_in, energies.l2_read * line_scale),
+        'l2_write': (total_cache_lines, energies.l2_write * line_scale),
+        'l3_read': (total_cache_lines_in, energies.l3_read * line_scale),
+        'l3_write': (total_cache_lines, energies.l3_write * line_scale),
+        'mem_read': (total_cache_lines_in, energies.mem_read * line_scale),
+        'mem_write': (total_cache_lines_out, energies.mem_write * line_scale),
+    })
+
+    columns = {
+        'rows': rows,
+        'cols': cols,
+        'core_clock_ghz': core_clock,
+        'memory_clock_ghz': memory_clock,
+        'word_size': word_size,
+        'output_word_size': output_word_size,
+        'cache_line_size': cache_line_size,
+        'memory_burst': memory_burst_size,
+        'memory_channels': memory_channels,
+        'channel_width': channel_width,
+        'cam_size': cam_size,
+        'token_match_rate': token_match_rate,
+    }
+    _metric_columns(columns, occurrences, energy)
+
+    # calculate performance metrics, the token flow and DRAM timing of flat_matvec_dfm
+    memory_transactions = total_cache_lines
+    dram = _dram_timing(dram, 'DDR4')
+    memory_time = transfer_time(dram, memory_transactions, cache_line_size, memory_clock_ghz=memory_clock,
+                                memory_channels=memory_channels, channel_width_in_bytes=channel_width,
+                                memory_burst_size_in_bytes=memory_burst_size)
+    elapsed_time, matching_time = token_flow_time(occurrences['token_match'], fmas, memory_time, core_clock,
+                                                  energies.cam_cycle_time_ns, token_match_rate, cam_size,
+                                                  dram.activate_ns + dram.cas_latency_ns)
+    total_flops = occurrences['execute']
+    read_data = total_cache_lines_in * cache_line_size
+    write_data = total_cache_lines_out * cache_line_size
+    total_energy = energy['total'] * 1.0e-12
+    power = total_energy / elapsed_time
+
+    columns['max_memory_bw'] = memory_channels * channel_width * 2 * memory_clock * 1.0e9
+    columns['matching_utilization'] = matching_time / elapsed_time
+    columns['elapsed_time'] = elapsed_time
+    columns['instr_per_sec'] = occurrences['fetch'] / elapsed_time
+    columns['flops_per_sec'] = total_flops / elapsed_time
+    columns['memory_transactions'] = memory_transactions
+    columns['memory_clock_ns'] = 1.0 / memory_clock
+    columns['memops_per_sec'] = memory_transactions / elapsed_time
+    columns['read_data'] = read_data
+    columns['write_data'] = write_data
+    columns['memory_read_bw'] = read_data / elapsed_time
+    columns['memory_write_bw'] = write_data / elapsed_time
+    columns['total_flops'] = total_flops
+    columns['power'] = power
+    columns['flops_per_watt'] = columns['flops_per_sec'] / power
+
+    return pd.DataFrame(columns, copy=False)
@@ -0,0 +1,357 @@
+import functools
+import math
+
+import pandas as pd
+
+from energysim.execution.network_estimate import NetworkEstimate
+from energysim.models.gpu_configuration import GraphicsProcessingUnitConfiguration
+from energysim.models.roofline import Roofline
+from energysim.models.spm_configuration import StoredProgramMachineConfiguration
+from energysim.operator.conv import conv_output_shape, conv_workload, pooling_workload
+from energysim.operator.workload import (elementwise_workload, evaluate_workload_gpu, evaluate_workload_spm,
+                                         gemm_workload, softmax_workload)
+
+# Whole-network estimation from a layer graph.
+#
+# A layer graph is a DAG of operators on tensors, every layer consumes the output tensors of earlier layers,
+# or the inputs of the graph. The layers are added in the order they execute, which is a topological order.
+# A reshape is a view of a tensor with another shape: it does no work, and its consumers read the tensor it views.
+# Every layer is evaluated on the machine model as a workload, see energysim.operator.workload,
+# identical layers are evaluated once.
+#
+# Inter-layer residency: a layer evaluated on its own reads its inputs from, and writes its output to, DRAM.
+# In a network, a tensor stays in the last level of the cache hierarchy, the L3 of an SPM, or the L2 of a GPU,
+# as long as the tensor and everything the layers in between produce and read, their outputs and weights,
+# fit in that level. A consumer that finds its input resident does not read it from DRAM, and a tensor that all
+# its consumers find resident, and that is not an output of the graph, is never written back to DRAM.
+#
+# The latency of a layer is its roofline time with the remaining DRAM traffic. The end-to-end latency is
+# reported for a schedule that executes the layers one after the other, and as the critical path through the DAG,
+# the bound for a schedule that runs independent layers concurrently. Peak memory is the weights of all layers
+# plus the largest set of activations that are live at once, a tensor is freed after its last consumer.
+
+LAYER_OPS = ('input', 'reshape', 'matmul', 'matvec', 'conv', 'pooling', 'elementwise', 'softmax')
+# operators without work of their own, their tensors are not produced by a layer
+TENSOR_OPS = ('input', 'reshape')
+
+
+class LayerNode:
+    def __init__(self, name: str, op: str, inputs: tuple, shape: tuple, params: dict, weights: int = 0):
+        self.name = name
+        self.op = op
+        self.inputs = inputs      # names of the layers, or graph inputs, that produce the operands
+        self.shape = shape        # shape of the output tensor
+        self.params = params      # parameters of the operator
+        self.weights = weights    # elements of the parameters of the layer
+
+    def __repr__(self):
+        return f"LayerNode(name='{self.name}', op='{self.op}', inputs={self.inputs}, shape={self.shape})"
+
+
+class LayerGraph:
+    def __init__(self, name: str):
+        self.name = name
+        self.nodes: dict = {}
+
+    def __repr__(self):
+        return f"LayerGraph(name='{self.name}', layers={len(self.nodes)})"
+
+    def _add(self, name: str, op: str, inputs: tuple, shape: tuple, params: dict = None, weights: int = 0) -> str:
+        if name in self.nodes:
+            raise ValueError(f'Layer {name} already exists in {self.name}')
+        for operand in inputs:
+            if operand not in self.nodes:
+                raise ValueError(f'Layer {name} consumes {operand}, which is not in {self.name}')
+        self.nodes[name] = LayerNode(name, op, tuple(inputs), tuple(shape), params or {}, weights)
+        return name
+
+    def shape(self, name: str) -> tuple:
+        return self.nodes[name].shape
+
+    def add_input(self, name: str, shape: tuple) -> str:
+        return self._add(name, 'input', (), shape)
+
+    def reshape(self, name: str, operand: str, shape: tuple) -> str:
+        """
+        View of the operand with another shape of the same elements.
+        """
+        if math.prod(shape) != math.prod(self.shape(operand)):
+            raise ValueError(f'Reshape {name} of {operand} {self.shape(operand)} into {tuple(shape)} changes its size')
+        return self._add(name, 'reshape', (operand,), shape)
+
+    def source(self, name: str) -> str:
+        """
+        The layer, or graph input, that produces the tensor of a node, through any views.
+        """
+        while self.nodes[name].op == 'reshape':
+            name = self.nodes[name].inputs[0]
+        return name
+
+    def matmul(self, name: str, operand: str, out_features: int) -> str:
+        """
+        Fully connected layer: the last dimension of the operand, N, is multiplied by an (N x out_features)
+        weight matrix, the leading dimensions are the rows of the GEMM.
+        """
+        shape = self.shape(operand)
+        return self._add(name, 'matmul', (operand,), shape[:-1] + (out_features,),
+                         {'out_features': out_features}, shape[-1] * out_features)
+
+    def matvec(self, name: str, operand: str, rows: int) -> str:
+        """
+        Matrix-vector layer: a (rows x N) weight matrix times the vector operand of N elements.
+        """
+        shape = self.shape(operand)
+        if len(shape) != 1:
+            raise ValueError(f'Matvec {name} needs a vector operand, {operand} has shape {shape}')
+        return self._add(name, 'matvec', (operand,), (rows,), {'rows': rows}, rows * shape[0])
+
+    def conv(self, name: str, operand: str, K: int, R: int, S: int, stride: int = 1, padding: int = 0,
+             algorithm: str = 'im2col', winograd_tile: int = 2) -> str:
+        """
+        Convolution of an NHWC operand with an RSCK filter, see conv2d_nhwc_spm.
+        """
+        N, H, W, C = self._nhwc(name, operand)
+        P, Q = conv_output_shape(H, W, R, S, stride, padding)
+        params = {'K': K, 'R': R, 'S': S, 'stride': stride, 'padding': padding,
+                  'algorithm': algorithm, 'winograd_tile': winograd_tile}
+        return self._add(name, 'conv', (operand,), (N, P, Q, K), params, R * S * C * K)
+
+    def pooling(self, name: str, operand: str, R: int, S: int, stride: int = None, padding: int = 0,
+                kind: str = 'max') -> str:
+        N, H, W, C = self._nhwc(name, operand)
+        stride = R if stride is None else stride
+        P, Q = conv_output_shape(H, W, R, S, stride, padding)
+        params = {'R': R, 'S': S, 'stride': stride, 'padding': padding, 'kind': kind}
+        return self._add(name, 'pooling', (operand,), (N, P, Q, C), params)
+
+    def elementwise(self, name: str, operands: tuple, kind: str = 'relu') -> str:
+        """
+        Elementwise layer, a relu or a special function of one operand, or the add or mul of two operands
+        of the same shape.
+        """
+        operands = (operands,) if isinstance(operands, str) else tuple(operands)
+        shapes = {self.shape(operand) for operand in operands}
+        if len(shapes) != 1 or len(operands) != (1 if kind in ('relu', 'special') else 2):
+            raise ValueError(f'Elementwise {kind} {name} needs operands of one shape, got {operands}')
+        return self._add(name, 'elementwise', operands, shapes.pop(), {'kind': kind})
+
+    def softmax(self, name: str, operand: str) -> str:
+        """
+        Softmax along the last dimension of the operand, the exponentials are evaluated by the special function unit.
+        """
+        return self._add(name, 'softmax', (operand,), self.shape(operand))
+
+    def _nhwc(self, name: str, operand: str) -> tuple:
+        shape = self.shape(operand)
+        if len(shape) != 4:
+            raise ValueError(f'Layer {name} needs an NHWC operand, {operand} has shape {shape}')
+        return shape
+
+    def consumers(self) -> dict:
+        """
+        Layers that consume the tensor of every node, the consumers of a view consume the tensor it views.
+        """
+        consumers = {name: [] for name in self.nodes}
+        for node in self.nodes.values():
+            if node.op in TENSOR_OPS:
+                continue
+            for operand in node.inputs:
+                consumers[self.source(operand)].append(node.name)
+        return consumers
+
+    def outputs(self) -> list:
+        """
+        Layers whose output no other layer consumes.
+        """
+        return [name for name, users in self.consumers().items()
+                if not users and self.nodes[name].op not in TENSOR_OPS]
+
+
+def layer_workload(op: str, input_shapes: tuple, params: dict) -> dict:
+    """
+    Workload of a layer of a LayerGraph, from the shapes of its operands.
+    """
+    shape = input_shapes[0]
+    if op == 'matmul':
+        return gemm_workload(math.prod(shape[:-1]), shape[-1], params['out_features'])
+    if op == 'matvec':
+        return gemm_workload(1, shape[0], params['rows'])
+    if op == 'conv':
+        return conv_workload(*shape, params['K'], params['R'], params['S'], params['stride'], params['padding'],
+                             params['algorithm'], params['winograd_tile'])
+    if op == 'pooling':
+        return pooling_workload(*shape, params['R'], params['S'], params['stride'], params['padding'],
+                                params['kind'])
+    if op == 'elementwise':
+        return elementwise_workload(math.prod(shape), params['kind'])
+    if op == 'softmax':
+        return softmax_workload(math.prod(shape[:-1]), shape[-1])
+    raise ValueError(f'Layer operator {op} not supported, choose one of {LAYER_OPS}')
+
+
+class GraphEstimator:
+    def __init__(self, energies, config, cache_size: int = 256):
+        """
+        Estimator of layer graphs on a machine.
+
+        Args:
+            energies: energy set of the machine
+            config: StoredProgramMachineConfiguration or GraphicsProcessingUnitConfiguration
+            cache_size: layer evaluations kept in the memo
+        """
+        if isinstance(config, StoredProgramMachineConfiguration):
+            self._evaluate = evaluate_workload_spm
+            self.residency_size = config.l3_size
+            # a resident line saves the DRAM read and the fill of L3, or the write-back to DRAM
+            self.transfer_size = config.cache_line_size
+            self.read_saving = energies.dram_read + energies.l3_write
+            self.write_saving = energies.dram_write
+        elif isinstance(config, GraphicsProcessingUnitConfiguration):
+            self._evaluate = evaluate_workload_gpu
+            self.residency_size = config.l2_size
+            self.transfer_size = config.memory_burst_size
+            self.read_saving = energies.gmem_read * energies.burst_scale(config.memory_burst_size)
+            self.write_saving = energies.gmem_write * energies.burst_scale(config.memory_burst_size)
+        else:
+            raise ValueError(f'No layer models for {type(config).__name__}, choose an SPM or a GPU')
+        self.energies = energies
+        self.config = config
+        self.roofline = Roofline.from_spm(config) if isinstance(config, StoredProgramMachineConfiguration) \
+            else Roofline.from_gpu(config)
+        # identical layers, the same operator, operand shapes, and parameters, share one evaluation
+        self._layer_cache = functools.lru_cache(maxsize=cache_size)(self._evaluate_layer)
+
+    def __repr__(self):
+        return f"GraphEstimator(config={self.config!r}, ...)"
+
+    def _evaluate_layer(self, op: str, input_shapes: tuple, params: tuple):
+        workload = layer_workload(op, input_shapes, dict(params))
+        name = op + " " + " ".join("x".join(str(d) for d in shape) for shape in input_shapes)
+        return self._evaluate(name, workload, self.energies, self.config)
+
+    def evaluate(self, graph: 'LayerGraph', name: str):
+        """
+        Metrics of a layer of a graph evaluated on its own, memoized.
+        """
+        node = graph.nodes[name]
+        input_shapes = tuple(graph.shape(operand) for operand in node.inputs)
+        return self._layer_cache(node.op, input_shapes, tuple(sorted(node.params.items())))
+
+    def cache_info(self):
+        """
+        Statistics of the layer memo.
+
+        :return: named tuple with hits, misses, maxsize, and currsize
+        """
+        return self._layer_cache.cache_info()
+
+    def _transfers(self, size_in_bytes) -> int:
+        # DRAM transactions of the machine, cache lines of an SPM, memory bursts of a GPU
+        return math.ceil(size_in_bytes / self.transfer_size)
+
+    def estimate(self, graph: 'LayerGraph') -> 'NetworkEstimate':
+        """
+        Per-layer and end-to-end energy, latency, and memory of a layer graph.
+
+        Args:
+            graph: the layer graph, its layers in execution order
+
+        Returns:
+            NetworkEstimate with a row per layer
+        """
+        word_size = self.config.word_size
+        before = self.cache_info()
+
+        layers = [name for name, node in graph.nodes.items() if node.op not in TENSOR_OPS]
+        position = {name: i for i, name in enumerate(layers)}
+        consumers = graph.consumers()
+        outputs = set(graph.outputs())
+        # inputs and weights are operands, the activations are written in the output precision of the layers
+        tensor_bytes = {name: math.prod(node.shape) * (word_size if graph.nodes[graph.source(name)].op == 'input'
+                                                       else self.config.output_word_size)
+                        for name, node in graph.nodes.items()}
+        weight_bytes = {name: graph.nodes[name].weights * word_size for name in layers}
+        metrics = [self.evaluate(graph, name) for name in layers]
+
+        # residency of the operands: the bytes that pass through the last level between producer and consumer
+        saved_reads = [0] * len(layers)
+        resident_bytes = [0] * len(layers)
+        all_resident = {name: name in position and name not in outputs for name in graph.nodes}
+        for i, name in enumerate(layers):
+            for operand in map(graph.source, graph.nodes[name].inputs):
+                producer = position.get(operand)
+                resident = producer is not None and tensor_bytes[operand] + sum(
+                    tensor_bytes[layer] + weight_bytes[layer] for layer in layers[producer + 1:i]) \
+                    <= self.residency_size
+                all_resident[operand] = all_resident[operand] and resident
+                if resident:
+                    resident_bytes[i] += tensor_bytes[operand]
+                    saved_reads[i] += self._transfers(tensor_bytes[operand])
+            saved_reads[i] = min(saved_reads[i], self._transfers(metrics[i].read_data))
+
+        rows = []
+        finish = {}
+        critical_predecessor = {}
+        for i, name in enumerate(layers):
+            layer = metrics[i]
+            saved_writes = min(self._transfers(tensor_bytes[name]), self._transfers(layer.write_data)) \
+                if all_resident[name] and consumers[name] else 0
+            standalone_energy = layer.occurrence_energy('total')
+            energy = standalone_energy - saved_reads[i] * self.read_saving - saved_writes * self.write_saving
+            dram_bytes = max(layer.read_data + layer.write_data - (saved_reads[i] + saved_writes) * self.transfer_size, 0)
+            compute_time = layer.occurrence('execute') / self.roofline.peak_flops
+            latency = max(compute_time, dram_bytes / self.roofline.bandwidths['dram'])
+
+            # a layer starts when the last of its operands is ready
+            ready = [(finish[operand], operand) for operand in map(graph.source, graph.nodes[name].inputs)
+                     if operand in finish]
+            start, predecessor = max(ready) if ready else (0.0, None)
+            finish[name] = start + latency
+            critical_predecessor[name] = predecessor
+            rows.append({
+                'name': name,
+                'op': graph.nodes[name].op,
+                'shape': graph.nodes[name].shape,
+                'operations': layer.occurrence('execute'),
+                'weight_bytes': weight_bytes[name],
+                'output_bytes': tensor_bytes[name],
+                'resident_bytes': resident_bytes[i],
+                'dram_bytes': dram_bytes,
+                'standalone_energy': standalone_energy,
+                'energy': energy,
+                'compute_time': compute_time,
+                'latency': latency,
+                'start': start,
+                'finish': finish[name],
+            })
+
+        # critical path, backwards from the layer that finishes last
+        path = []
+        current = max(finish, key=finish.get) if finish else None
+        while current is not None:
+            path.append(current)
+            current = critical_predecessor[current]
+        path.reverse()
+
+        # live activations of the schedule: the graph inputs, and every output until its last consumer
+        last_use = {name: max((position[user] for user in users), default=-1) for name, users in consumers.items()}
+        live = {name for name, node in graph.nodes.items() if node.op == 'input'}
+        peak_activation = sum(tensor_bytes[name] for name in live)
+        for i, name in enumerate(layers):
+            live.add(name)
+            peak_activation = max(peak_activation, sum(tensor_bytes[tensor] for tensor in live))
+            live = {tensor for tensor in live if last_use[tensor] > i or tensor in outputs}
+
+        frame = pd.DataFrame(rows)
+        frame['critical'] = frame['name'].isin(path)
+        estimate = NetworkEstimate(graph.name, frame)
+        estimate.total_energy = frame['energy'].sum()
+        estimate.serial_latency = frame['latency'].sum()
+        estimate.critical_path_latency = finish[path[-1]] if path else 0.0
+        estimate.critical_path = path
+        estimate.weight_memory = sum(weight_bytes.values())
+        estimate.peak_activation_memory = peak_activation
+        after = self.cache_info()
+        estimate.evaluations = after.misses - before.misses
+        estimate.memo_hits = after.hits - before.hits
+        return estimate
@@ -20,12 +20,6 @@ def flat_matrix_vector_multiply(matrix: 'Matrix', vector: 'Vector') -> 'Vector':
     if matrix.shape[1] != vector.size:
         raise ValueError("Matrix columns must match vector size")
 
-    # Perform multiplication
-    result_data = []
-    for row in matrix[0:matrix.shape[0]]:
-        # Compute dot product of matrix row and vector
-        row_result = sum(row[j] * vector.get(j) for j in range(vector.size))
-        result_data.append(row_result)
-
-    return Vector(result_data)
+    # Perform multiplication, the product is computed by BLAS
+    return Vector._view(matrix.values @ vector.values)
 
@@ -0,0 +1,638 @@
+import math
+import re
+
+import pandas as pd
+
+from energysim.execution.network_estimate import NetworkEstimate
+from energysim.models.datatype import DATATYPES, Precision, apply_precision
+from energysim.operator.layer_graph import GraphEstimator, LayerGraph
+
+# MLIR front end: the linalg and tosa operators of an MLIR module as a layer graph.
+#
+# The module is read from its text. When the MLIR Python bindings are installed, they parse and verify the module,
+# and print it in the generic operation form, so that the spelling of the custom assembly formats does not matter.
+# Without the bindings, a small local parser reads the text as is: it understands the generic form, and the
+# custom forms of the linalg named operators, linalg.generic, and tosa that the scripts in scripts/mlir emit.
+#
+# Every tensor operator is recorded as an MlirOperation with its operand shapes, element types, and iteration space,
+# and mapped onto a layer of a LayerGraph:
+#   contractions   linalg.matmul, batch_matmul, matvec, vecmat, tosa.matmul, tosa.fully_connected,
+#                  and a linalg.generic that reduces products, are matmul or matvec layers
+#   convolutions   linalg.conv_2d_nhwc_hwcf and tosa.conv2d are conv layers
+#   pooling        linalg.pooling_nhwc_*, tosa.max_pool2d and tosa.avg_pool2d are pooling layers
+#   elementwise    the linalg and tosa elementwise operators, and a parallel linalg.generic
+#   softmax        linalg.softmax
+#   views          reshapes and casts are views of their operand
+# Constants are weights, they are not operands of a layer, and values that no operator produces are graph inputs.
+# A linalg operator on buffers produces the buffer of its outs operand. Operators that the models do not cover,
+# and attributes they do not support, such as dilated windows, are reported as unmapped.
+
+CONTAINER_OPS = ('builtin.module', 'func.func')
+VIEW_OPS = ('tosa.reshape', 'tensor.reshape', 'tensor.expand_shape', 'tensor.collapse_shape', 'tensor.cast',
+            'memref.expand_shape', 'memref.collapse_shape', 'memref.cast', 'memref.reshape')
+CONSTANT_OPS = ('arith.constant', 'tosa.const')
+BUFFER_OPS = ('tensor.empty', 'memref.alloc', 'memref.alloca', 'linalg.fill')
+# elementwise operators, by the kind of their elementwise layer
+ELEMENTWISE_OPS = {
+    'linalg.add': 'add', 'linalg.sub': 'add', 'linalg.max': 'add', 'linalg.min': 'add',
+    'linalg.mul': 'mul', 'linalg.div': 'mul',
+    'linalg.exp': 'special', 'linalg.log': 'special', 'linalg.sqrt': 'special', 'linalg.rsqrt': 'special',
+    'linalg.tanh': 'special', 'linalg.reciprocal': 'special',
+    'linalg.abs': 'relu', 'linalg.negf': 'relu', 'linalg.copy': 'relu',
+    'tosa.add': 'add', 'tosa.sub': 'add', 'tosa.maximum': 'add', 'tosa.minimum': 'add',
+    'tosa.mul': 'mul', 'tosa.clamp': 'relu', 'tosa.abs': 'relu', 'tosa.negate': 'relu',
+    'tosa.exp': 'special', 'tosa.log': 'special', 'tosa.tanh': 'special', 'tosa.sigmoid': 'special',
+    'tosa.reciprocal': 'special', 'tosa.rsqrt': 'special', 'tosa.erf': 'special',
+}
+# functions of linalg.elemwise_unary and linalg.elemwise_binary, and the operations in the body of linalg.generic
+SPECIAL_FUNCTIONS = ('exp', 'log', 'sqrt', 'rsqrt', 'tanh', 'erf', 'powf', 'sin', 'cos', 'divf')
+MULTIPLICATIONS = ('mul', 'mulf', 'muli')
+
+_OP = re.compile(r'(?:^|(?<=[\s;(]))(?:((?:%[\w.$#-]+(?::\d+)?\s*,\s*)*%[\w.$#-]+(?::\d+)?)\s*=\s*)?'
+                 r'("?)([a-z_][\w]*\.[\w.]+)\2(?=[\s(<{@:"]|$)', re.M)
+_ALIAS = re.compile(r'^\s*(#[\w.$-]+)\s*=\s*(.+?)\s*$', re.M)
+_SSA = re.compile(r'%[\w.$#-]+')
+_NUMBER = re.compile(r'-?\d+(?:\.\d*)?(?:[eE][-+]?\d+)?')
+_BODY_OP = re.compile(r'"?(?:arith|math)\.(\w+)')
+_CONTINUATION = re.compile(r'\s*(?:ins\s*\(|outs\s*\(|->|:|\{)')
+_CLOSING = {'(': ')', '[': ']', '{': '}', '<': '>'}
+
+
+class MlirOperation:
+    def __init__(self, name: str, function: str, results: list, inputs: list, outputs: list,
+                 input_types: list, output_types: list, result_types: list, attributes: dict, body: list):
+        self.name = name                    # dialect.operator
+        self.function = function            # the function that holds the operator
+        self.results = results              # SSA names of the results
+        self.inputs = inputs                # SSA names of the operands, the ins of a linalg operator
+        self.outputs = outputs              # SSA names of the outs of a linalg operator
+        self.input_types = input_types      # (shape, element type) of every input
+        self.output_types = output_types
+        self.result_types = result_types
+        self.attributes = attributes
+        self.body = body                    # arithmetic of the region, such as mulf and addf
+        self.iteration_space: dict = {}     # loop extents, filled in when the operator is mapped
+
+    def __repr__(self):
+        return f"MlirOperation(name='{self.name}', inputs={self.inputs}, outputs={self.outputs}, results={self.results})"
+
+    @property
+    def result_type(self) -> tuple:
+        # the shape of the tensor the operator produces, a result, or the buffer it writes
+        return (self.result_types or self.output_types)[0]
+
+    @property
+    def element_type(self) -> str:
+        return self.result_type[1]
+
+
+def parse_type(text: str):
+    """
+    (shape, element type) of a tensor, memref, or scalar type, shape is () for a scalar.
+    A dynamic dimension is None.
+    """
+    text = text.strip()
+    match = re.match(r'(?:tensor|memref)<(.*)>$', text, re.S)
+    if match is None:
+        return (), text
+    body = _split_top_level(match.group(1), ',')[0].strip()
+    parts = body.split('x')
+    element = parts[-1].strip()
+    shape = tuple(None if d.strip() == '?' else int(d) for d in parts[:-1])
+    return shape, element
+
+
+def _group_end(text: str, start: int) -> int:
+    # index just past the bracket group that opens at text[start], skipping strings, and the '->' of types
+    depth = 0
+    i = start
+    while i < len(text):
+        c = text[i]
+        if c == '"':
+            i = text.index('"', i + 1)
+        elif c == '-' and text.startswith('->', i):
+            i += 1
+        elif c in _CLOSING:
+            depth += 1
+        elif c in ')]}>':
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return len(text)
+
+
+def _statement_end(text: str, start: int) -> int:
+    # a statement ends at the first newline outside of all bracket groups, unless the next line continues it
+    i = start
+    while i < len(text):
+        c = text[i]
+        if c == '\n' and not _CONTINUATION.match(text, i):
+            return i
+        if c == '"':
+            i = text.index('"', i + 1) + 1
+        elif c == '-' and text.startswith('->', i):
+            i += 2
+        elif c in _CLOSING:
+            i = _group_end(text, i)
+        else:
+            i += 1
+    return len(text)
+
+
+def _segments(text: str) -> list:
+    # the top level of a statement: ('text', str) and ('group', opening bracket, inner text)
+    segments = []
+    i, start = 0, 0
+    while i < len(text):
+        c = text[i]
+        if c == '"':
+            i = text.index('"', i + 1) + 1
+        elif c == '-' and text.startswith('->', i):
+            i += 2
+        elif c in _CLOSING:
+            if i > start:
+                segments.append(('text', text[start:i]))
+            end = _group_end(text, i)
+            segments.append(('group', c, text[i + 1:end - 1]))
+            i = start = end
+        else:
+            i += 1
+    if start < len(text):
+        segments.append(('text', text[start:]))
+    return segments
+
+
+def _split_top_level(text: str, separator: str) -> list:
+    parts, start, i = [], 0, 0
+    while i < len(text):
+        c = text[i]
+        if c == '"':
+            i = text.index('"', i + 1) + 1
+            continue
+        if c == '-' and text.startswith('->', i):
+            i += 2
+            continue
+        if c in _CLOSING:
+            i = _group_end(text, i)
+            continue
+        if c == separator:
+            parts.append(text[start:i])
+            start = i + 1
+        i += 1
+    parts.append(text[start:])
+    return [part for part in parts if part.strip()]
+
+
+def _is_region(inner: str) -> bool:
+    stripped = inner.lstrip()
+    return stripped.startswith('^') or stripped.startswith('%') or stripped.startswith('{') or 'yield' in inner
+
+
+def _attribute_value(text: str, aliases: dict):
+    text = text.strip()
+    text = aliases.get(text, text)
+    if ':' in text and not text.startswith(('[', 'affine_map', 'array')):
+        # typed attribute, such as dense<2> : tensor<2xi64>
+        text = _split_top_level(text, ':')[0].strip()
+    match = re.match(r'(?:dense|array)<(.*)>$', text, re.S)
+    if match:
+        inner = match.group(1)
+        inner = inner.split(':', 1)[1] if text.startswith('array') and ':' in inner else inner
+        numbers = _NUMBER.findall(inner)
+        if len(numbers) > 64 or not all(re.fullmatch(r'-?\d+', n) for n in numbers):
+            return None
+        return [int(n) for n in numbers]
+    if text.startswith('['):
+        return [_attribute_value(item, aliases) for item in _split_top_level(text[1:-1], ',')]
+    if text.startswith('"'):
+        return text.strip('"')
+    match = re.match(r'#linalg\.\w+<(\w+)>$', text)
+    if match:
+        return match.group(1)
+    match = re.match(r'(-?\d+)\s*(?::\s*\w+)?$', text)
+    if match:
+        return int(match.group(1))
+    return text
+
+
+def _attributes(inner: str, aliases: dict) -> dict:
+    attributes = {}
+    for item in _split_top_level(inner, ','):
+        key, _, value = item.partition('=')
+        attributes[key.strip()] = _attribute_value(value, aliases) if value else True
+    return attributes
+
+
+def _types(text: str) -> list:
+    text = text.strip()
+    if text.startswith('(') and _group_end(text, 0) == len(text):
+        text = text[1:-1]
+    return [parse_type(t) for t in _split_top_level(text, ',')]
+
+
+def _joined(segments: list) -> str:
+    return ''.join(s[1] if s[0] == 'text' else s[1] + s[2] + _CLOSING[s[1]] for s in segments).strip()
+
+
+def _operation(name: str, function: str, results: list, statement: str, aliases: dict) -> 'MlirOperation':
+    segments = _segments(statement)
+    attributes, body, operands, inputs, outputs = {}, [], [], None, None
+    input_types, output_types, result_types = [], [], []
+    operand_group = statement.lstrip().startswith('(')
+    signature = None
+    tail = None
+    for k, segment in enumerate(segments):
+        if signature is not None:
+            signature.append(segment)
+            continue
+        if tail is not None:
+            tail.append(segment)
+            continue
+        if segment[0] == 'text':
+            text = segment[1]
+            if ':' in text:
+                before, _, after = text.partition(':')
+                operands += _SSA.findall(before)
+                signature = [('text', after)]
+                continue
+            keyword = text.rstrip().rsplit(None, 1)[-1] if text.strip() else ''
+            following = segments[k + 1] if k + 1 < len(segments) else None
+            if keyword not in ('ins', 'outs') or following is None:
+                operands += _SSA.findall(text)
+            if '->' in text:
+                # result types of the custom form of linalg, after its ins and outs
+                tail = [('text', text.split('->', 1)[1])]
+            continue
+        _, bracket, inner = segment
+        previous = segments[k - 1][1] if k > 0 and segments[k - 1][0] == 'text' else ''
+        keyword = previous.rstrip().rsplit(None, 1)[-1] if previous.strip() else ''
+        if bracket == '(' and keyword in ('ins', 'outs'):
+            names, _, types = inner.partition(':')
+            if keyword == 'ins':
+                inputs, input_types = _SSA.findall(names), _types(types)
+            else:
+                outputs, output_types = _SSA.findall(names), _types(types)
+        elif bracket == '(' and operand_group and k == 0:
+            if inner.lstrip().startswith('{'):
+                body += _BODY_OP.findall(inner)
+            else:
+                operands += _SSA.findall(inner)
+        elif bracket in '({' and _is_region(inner):
+            body += _BODY_OP.findall(inner)
+        elif bracket == '{':
+            attributes.update(_attributes(inner, aliases))
+        elif bracket == '<' and inner.startswith('{'):
+            attributes.update(_attributes(inner[1:-1], aliases))
+        elif bracket == '(' and keyword == 'dimension':
+            attributes['dimension'] = int(inner)
+        elif bracket == '(' and inner.lstrip().startswith('{'):
+            body += _BODY_OP.findall(inner)
+
+    if tail is not None:
+        result_types = _types(_joined(tail))
+    if signature is not None:
+        text = _joined(signature)
+        operand_text, arrow, result_text = text.partition(' into ' if ' into ' in text else '->')
+        if arrow:
+            types = _types(operand_text)
+            result_types = _types(result_text)
+        else:
+            types, result_types = [], _types(operand_text)
+        if inputs is None:
+            # generic form, the operand segments of a linalg operator split its ins and outs
+            segment_sizes = attributes.get('operandSegmentSizes') or attributes.get('operand_segment_sizes')
+            if isinstance(segment_sizes, list) and len(segment_sizes) == 2:
+                inputs, outputs = operands[:segment_sizes[0]], operands[segment_sizes[0]:]
+                input_types, output_types = types[:segment_sizes[0]], types[segment_sizes[0]:]
+            else:
+                inputs, input_types = operands, types
+    return MlirOperation(name, function, results, inputs or [], outputs or [], input_types, output_types,
+                         result_types, attributes, body)
+
+
+def _parse_local(text: str) -> list:
+    text = re.sub(r'//[^\n]*', '', text)
+    aliases = {alias: value for alias, value in _ALIAS.findall(text)}
+    operations = []
+    function = ''
+    consumed = 0
+    for match in _OP.finditer(text):
+        if match.start() < consumed:
+            continue
+        results, _, name = match.groups()
+        if name in CONTAINER_OPS:
+            if name == 'func.func':
+                symbol = re.compile(r'@([\w$.-]+)|sym_name\s*=\s*"([^"]+)"').search(text, match.end())
+                function = (symbol.group(1) or symbol.group(2)) if symbol else ''
+            continue
+        end = _statement_end(text, match.end())
+        consumed = end
+        results = [r.strip().split(':')[0] for r in results.split(',')] if results else []
+        operations.append(_operation(name, function, results, text[match.end():end], aliases))
+    return operations
+
+
+def parse_mlir(text: str, use_bindings: bool = None) -> list:
+    """
+    Operators of an MLIR module.
+
+    Args:
+        text: the module in MLIR assembly
+        use_bindings: parse and verify the module with the MLIR Python bindings, by default when they are installed
+
+    Returns:
+        list of MlirOperation in the order of the text, the operators of the regions of functions included
+    """
+    if use_bindings is None or use_bindings:
+        try:
+            from mlir.ir import Context, Module
+        except ImportError:
+            if use_bindings:
+                raise
+        else:
+            with Context() as context:
+                context.allow_unregistered_dialects = True
+                module = Module.parse(text)
+                text = module.operation.get_asm(print_generic_op_form=True)
+    return _parse_local(text)
+
+
+def _iteration_space_of_generic(operation: 'MlirOperation') -> tuple:
+    # extents of the loops of a linalg.generic, from the dimensions its indexing maps access directly
+    maps = operation.attributes.get('indexing_maps') or []
+    iterators = [str(i).strip('"') for i in operation.attributes.get('iterator_types') or []]
+    extents = [None] * len(iterators)
+    accessed = []
+    for map_text, (shape, _) in zip(maps, operation.input_types + operation.output_types):
+        match = re.match(r'affine_map<\(([^)]*)\)(?:\[[^]]*\])?\s*->\s*\(([^)]*)\)>', str(map_text))
+        if match is None:
+            accessed.append(set())
+            continue
+        dims = [d.strip() for d in match.group(1).split(',') if d.strip()]
+        results = [r.strip() for r in match.group(2).split(',')] if match.group(2).strip() else []
+        accessed.append({dims.index(r) for r in results if r in dims})
+        for position, result in enumerate(results):
+            if result in dims and extents[dims.index(result)] is None and position < len(shape):
+                extents[dims.index(result)] = shape[position]
+    return iterators, extents, accessed
+
+
+class _GraphBuilder:
+    def __init__(self, name: str):
+        self.graph = LayerGraph(name)
+        self.values = {}       # SSA name in a function -> layer of the graph, or 'constant'
+        self.unmapped = []
+        self.operations = {}   # layer name -> the MlirOperation it maps
+
+    def key(self, operation: 'MlirOperation', value: str) -> str:
+        return operation.function + '/' + value
+
+    def operand(self, operation: 'MlirOperation', value: str, shape: tuple):
+        # layer that produces a value, None for a constant, a graph input for a value that no operator produces
+        key = self.key(operation, value)
+        producer = self.values.get(key)
+        if producer == 'constant':
+            return None
+        if producer is None or producer == 'buffer':
+            producer = self.graph.add_input(key, shape)
+            self.values[key] = producer
+        if self.graph.shape(producer) != tuple(shape) and math.prod(self.graph.shape(producer)) == math.prod(shape):
+            producer = self.graph.reshape(key + '#' + 'x'.join(map(str, shape)), producer, shape)
+        return producer
+
+    def is_constant(self, operation: 'MlirOperation', value: str) -> bool:
+        return self.values.get(self.key(operation, value)) == 'constant'
+
+    def define(self, operation: 'MlirOperation', layer):
+        # the results of an operator, or the buffers it writes
+        for value in operation.results or operation.outputs:
+            self.values[self.key(operation, value)] = layer
+
+    def layer_name(self, operation: 'MlirOperation', index: int) -> str:
+        value = operation.results[0] if operation.results else operation.name + '#' + str(index)
+        return self.key(operation, value)
+
+
+def _single(values, operation: 'MlirOperation', attribute: str) -> int:
+    # strides and dilations are a value per spatial dimension, the models take one value for both
+    if values is None:
+        return 1
+    values = values if isinstance(values, list) else [values]
+    if len(set(values)) != 1:
+        raise ValueError(f'{operation.name} with {attribute} {values} is not supported, the models need equal values')
+    return values[0]
+
+
+def _map_operation(builder: '_GraphBuilder', operation: 'MlirOperation', index: int):
+    graph = builder.graph
+    name = operation.name
+    shapes = [shape for shape, _ in operation.input_types]
+    layer = builder.layer_name(operation, index)
+
+    if name in ('linalg.matmul', 'linalg.batch_matmul', 'tosa.matmul'):
+        *batch, M, K = shapes[0]
+        N = shapes[1][-1]
+        operation.iteration_space = dict(zip(('B', 'M', 'N', 'K'), ([math.prod(batch)] if batch else []) + [M, N, K])) \
+            if batch else {'M': M, 'N': N, 'K': K}
+        return graph.matmul(layer, builder.operand(operation, operation.inputs[0], shapes[0]), N)
+    if name == 'tosa.fully_connected':
+        M, K = shapes[0]
+        N = shapes[1][0]
+        operation.iteration_space = {'M': M, 'N': N, 'K': K}
+        return graph.matmul(layer, builder.operand(operation, operation.inputs[0], shapes[0]), N)
+    if name in ('linalg.matvec', 'linalg.vecmat'):
+        matrix, vector = (0, 1) if name == 'linalg.matvec' else (1, 0)
+        rows, cols = shapes[matrix] if name == 'linalg.matvec' else shapes[matrix][::-1]
+        operation.iteration_space = {'M': rows, 'N': cols}
+        return graph.matvec(layer, builder.operand(operation, operation.inputs[vector], shapes[vector]), rows)
+    if name in ('linalg.conv_2d_nhwc_hwcf', 'tosa.conv2d'):
+        N, H, W, C = shapes[0]
+        if name == 'tosa.conv2d':
+            K, R, S, _ = shapes[1]
+            pad = operation.attributes.get('pad') or [0]
+            padding = _single(pad, operation, 'pad')
+            stride = _single(operation.attributes.get('stride'), operation, 'stride')
+            dilation = _single(operation.attributes.get('dilation'), operation, 'dilation')
+        else:
+            R, S, _, K = shapes[1]
+            padding = 0
+            stride = _single(operation.attributes.get('strides'), operation, 'strides')
+            dilation = _single(operation.attributes.get('dilations'), operation, 'dilations')
+        if dilation != 1:
+            raise ValueError(f'{name} with dilation {dilation} is not supported')
+        operand = builder.operand(operation, operation.inputs[0], shapes[0])
+        conv = graph.conv(layer, operand, K, R, S, stride, padding)
+        P, Q = graph.shape(conv)[1:3]
+        operation.iteration_space = {'N': N, 'P': P, 'Q': Q, 'K': K, 'R': R, 'S': S, 'C': C}
+        return conv
+    if name.startswith('linalg.pooling_nhwc_') or name in ('tosa.max_pool2d', 'tosa.avg_pool2d'):
+        N, H, W, C = shapes[0]
+        if name.startswith('tosa.'):
+            R, S = operation.attributes.get('kernel')
+            padding = _single(operation.attributes.get('pad') or [0], operation, 'pad')
+            stride = _single(operation.attributes.get('stride'), operation, 'stride')
+            kind = 'max' if name == 'tosa.max_pool2d' else 'avg'
+        else:
+            R, S = shapes[1]
+            padding = 0
+            stride = _single(operation.attributes.get('strides'), operation, 'strides')
+            if _single(operation.attributes.get('dilations'), operation, 'dilations') != 1:
+                raise ValueError(f'{name} with dilations {operation.attributes["dilations"]} is not supported')
+            kind = 'sum' if name.endswith('_sum') else 'max'
+        pool = graph.pooling(layer, builder.operand(operation, operation.inputs[0], shapes[0]), R, S, stride,
+                             padding, kind)
+        operation.iteration_space = {'N': N, 'P': graph.shape(pool)[1], 'Q': graph.shape(pool)[2], 'C': C,
+                                     'R': R, 'S': S}
+        return pool
+    if name == 'linalg.softmax':
+        shape = shapes[0]
+        operation.iteration_space = {'rows': math.prod(shape[:-1]), 'cols': shape[-1]}
+        return graph.softmax(layer, builder.operand(operation, operation.inputs[0], shape))
+    if name == 'linalg.generic':
+        return _map_generic(builder, operation, layer)
+    if name in ELEMENTWISE_OPS or name in ('linalg.elemwise_unary', 'linalg.elemwise_binary'):
+        if name in ELEMENTWISE_OPS:
+            kind = ELEMENTWISE_OPS[name]
+        else:
+            function = str(operation.attributes.get('fun', 'exp' if name == 'linalg.elemwise_unary' else 'add'))
+            kind = 'special' if function in SPECIAL_FUNCTIONS else 'mul' if function in MULTIPLICATIONS else 'add'
+        return _map_elementwise(builder, operation, layer, kind)
+    raise ValueError(f'{name} has no operator model')
+
+
+def _map_elementwise(builder: '_GraphBuilder', operation: 'MlirOperation', layer: str, kind: str):
+    # the operands of the output shape are streamed, broadcast operands and constants are not
+    shape = operation.result_type[0]
+    operation.iteration_space = {f'd{i}': extent for i, extent in enumerate(shape)}
+    streamed = [builder.operand(operation, value, s) for value, (s, _) in zip(operation.inputs, operation.input_types)
+                if s == shape and not builder.is_constant(operation, value)]
+    if not streamed:
+        raise ValueError(f'{operation.name} has no operand of its output shape {shape}')
+    if kind in ('add', 'mul') and len(streamed) < 2:
+        kind = 'relu'
+    if kind in ('relu', 'special'):
+        streamed = streamed[:1]
+    return builder.graph.elementwise(layer, tuple(streamed[:2]), kind)
+
+
+def _map_generic(builder: '_GraphBuilder', operation: 'MlirOperation', layer: str):
+    iterators, extents, accessed = _iteration_space_of_generic(operation)
+    if None in extents:
+        raise ValueError(f'{operation.name} with loops that no operand accesses directly is not supported')
+    operation.iteration_space = {f'd{i}': extent for i, extent in enumerate(extents)}
+    reductions = [i for i, iterator in enumerate(iterators) if iterator == 'reduction']
+    if not reductions:
+        kind = 'special' if any(op in SPECIAL_FUNCTIONS for op in operation.body) else \
+            'mul' if any(op in MULTIPLICATIONS for op in operation.body) else 'add'
+        return _map_elementwise(builder, operation, layer, kind)
+    if not any(op in MULTIPLICATIONS for op in operation.body) or len(operation.inputs) < 2:
+        raise ValueError(f'{operation.name} reduction without products is not supported')
+    # a contraction: the parallel loops of the first input are the rows, the others the columns of the output
+    rows = math.prod(extents[i] for i in accessed[0] if i not in reductions)
+    columns = math.prod(extents[i] for i, iterator in enumerate(iterators)
+                        if iterator == 'parallel' and i not in accessed[0])
+    depth = math.prod(extents[i] for i in reductions)
+    operand = builder.operand(operation, operation.inputs[0], operation.input_types[0][0])
+    if builder.graph.shape(operand) != (rows, depth):
+        operand = builder.graph.reshape(layer + '#operand', operand, (rows, depth))
+    return builder.graph.matmul(layer, operand, columns)
+
+
+def mlir_layer_graph(text: str, name: str = 'mlir', use_bindings: bool = None) -> tuple:
+    """
+    Layer graph of the linalg and tosa operators of an MLIR module.
+
+    Args:
+        text: the module in MLIR assembly
+        name: name of the graph
+        use_bindings: see parse_mlir
+
+    Returns:
+        (LayerGraph, the mapped MlirOperation of every layer by layer name, unmapped operators as (name, reason))
+    """
+    builder = _GraphBuilder(name)
+    for index, operation in enumerate(parse_mlir(text, use_bindings)):
+        dialect = operation.name.split('.')[0]
+        if operation.name in CONSTANT_OPS:
+            if operation.result_types and operation.result_types[0][0]:
+                builder.define(operation, 'constant')
+            continue
+        if operation.name in BUFFER_OPS:
+            builder.define(operation, 'buffer')
+            continue
+        if operation.name in VIEW_OPS:
+            source = builder.values.get(builder.key(operation, operation.inputs[0])) if operation.inputs else None
+            shape = operation.result_type[0]
+            if source in (None, 'constant', 'buffer') or None in shape:
+                builder.define(operation, source)
+            else:
+                view = builder.graph.reshape(builder.layer_name(operation, index), source, shape)
+                builder.define(operation, view)
+            continue
+        if dialect not in ('linalg', 'tosa'):
+            continue
+        try:
+            if any(None in shape for shape, _ in operation.input_types + operation.output_types):
+                raise ValueError(f'{operation.name} with dynamic shapes is not supported')
+            layer = _map_operation(builder, operation, index)
+        except (ValueError, IndexError, TypeError) as error:
+            builder.unmapped.append((operation.name, str(error)))
+            continue
+        builder.operations[layer] = operation
+        builder.define(operation, layer)
+    return builder.graph, builder.operations, builder.unmapped
+
+
+def estimate_mlir(text: str, energies, config, name: str = 'mlir', use_bindings: bool = None,
+                  estimator: 'GraphEstimator' = None) -> 'NetworkEstimate':
+    """
+    Energy and latency of the linalg and tosa operators of an MLIR module, in one pass over the module.
+    When all operators share the element types of their inputs and of their results, such as i8 operands and
+    i32 accumulations, the machine computes in that precision, see models/datatype. Otherwise the module is
+    estimated in the precision of the energy set, and the unmapped operators record it.
+
+    Args:
+        text: the module in MLIR assembly
+        energies: energy set of the machine
+        config: StoredProgramMachineConfiguration or GraphicsProcessingUnitConfiguration
+        name: name of the estimate
+        use_bindings: see parse_mlir
+        estimator: a GraphEstimator to reuse its memo, it fixes the machine, energies and config are not used
+
+    Returns:
+        NetworkEstimate, with the element type and the iteration space of every layer, and the unmapped operators
+    """
+    graph, operations, unmapped = mlir_layer_graph(text, name, use_bindings)
+    if not operations:
+        raise ValueError(f'{name} has no operators with a model, unmapped: {unmapped}')
+    if estimator is None:
+        precisions = {(operation.input_types[0][1], operation.element_type) for operation in operations.values()}
+        if len(precisions) == 1 and set(*precisions) <= DATATYPES.keys():
+            energies, config = apply_precision(energies, config, Precision(*precisions.pop()))
+        else:
+            # the estimator models one precision per machine, the module is estimated in that of the energy set
+            types = ', '.join(f'{operand}->{result}' for operand, result in sorted(precisions))
+            unmapped = unmapped + [('precision', f'element types {types} are estimated in the precision '
+                                                 f'of the energy set, {config.word_size} byte words')]
+        estimator = GraphEstimator(energies, config)
+    estimate = estimator.estimate(graph)
+    estimate.layers['mlir_op'] = estimate.layers['name'].map(lambda layer: operations[layer].name)
+    estimate.layers['element_type'] = estimate.layers['name'].map(lambda layer: operations[layer].element_type)
+    estimate.layers['iteration_space'] = estimate.layers['name'].map(lambda layer: operations[layer].iteration_space)
+    estimate.unmapped = unmapped
+    return estimate
+
+
+def describe_mlir(text: str, use_bindings: bool = None) -> pd.DataFrame:
+    """
+    The tensor operators of an MLIR module with their operand shapes, element types, and iteration spaces.
+    """
+    _, operations, unmapped = mlir_layer_graph(text, use_bindings=use_bindings)
+    rows = [{'layer': layer, 'op': operation.name,
+             'input_shapes': [shape for shape, _ in operation.input_types],
+             'output_shape': operation.result_type[0], 'element_type': operation.element_type,
+             'iteration_space': operation.iteration_space}
+            for layer, operation in operations.items()]
+    rows += [{'layer': None, 'op': op, 'unmapped': reason} for op, reason in unmapped]
+    return pd.DataFrame(rows)
@@ -0,0 +1,207 @@
+import numpy as np
+import pandas as pd
+
+from energysim.database.gpu_energy import GraphicsProcessingUnitEnergy
+from energysim.database.spm_energy import StoredProgramMachineEnergy
+from energysim.models.gpu_configuration import GraphicsProcessingUnitConfiguration
+from energysim.models.spm_configuration import StoredProgramMachineConfiguration
+from energysim.operator.flat_matvec_batch import flat_matvec_gpu_batch
+from energysim.operator.tiled_matmul import square_tile, tile_footprint, tiled_matmul_spm_batch
+
+
+# Search of blocking and kernel launch parameters.
+#
+# The candidate space is pruned analytically before anything is evaluated:
+#   - block counts: the traffic of a level depends on the number of blocks ceil(D/T) along each
+#     dimension D, and ceil(D/b) is the smallest tile that cuts D into b blocks, so the tile sizes
+#     of a dimension are the distinct ceil(D/b), the divisors among them, next to the powers of two
+#     and those sizes rounded up to whole cache lines. Partial tiles at the edges are allowed,
+#     inner tiles do not exceed outer tiles, and GPU blocks are a whole number of warps
+#   - capacity: a tile fits in its cache level, a block fits in a streaming multiprocessor
+#   - dominance: traffic does not increase when a tile grows, so only tiles that cannot grow
+#     along any dimension without overflowing their level are kept
+# The square tiles of the tiled_matmul_spm defaults are always candidates, so the search
+# never returns a blocking that is worse than the default.
+# The survivors are evaluated in vectorized batches, and the search returns the Pareto front
+# of energy and latency. The energy-delay product is minimized by a point of that front.
+
+OBJECTIVES = ('energy', 'latency', 'edp')
+
+
+def _tile_sizes(n: int, line_elements: int = 1) -> np.ndarray:
+    # the smallest tile of every block count, aligned to whole lines, and the powers of two, up to n
+    n = int(n)
+    balanced = np.unique(-(-n // np.arange(1, n + 1)))
+    aligned = np.minimum(-(-balanced // line_elements) * line_elements, n)
+    powers = 2 ** np.arange(int(np.log2(n)) + 1)
+    return np.unique(np.concatenate((balanced, aligned, powers)))
+
+
+def pareto_front(df: pd.DataFrame, objectives: tuple = ('energy', 'latency')) -> pd.DataFrame:
+    """
+    Rows of df that are not dominated in the two objectives, lower is better.
+
+    Args:
+        df (pd.DataFrame): evaluated design points
+        objectives (tuple): the two columns to minimize
+
+    Returns:
+        pd.DataFrame: the non-dominated rows, sorted by the first objective
+    """
+    first, second = objectives
+    ordered = df.sort_values([first, second], kind='stable')
+    values = ordered[second].to_numpy()
+    # a point is on the front when it improves on the second objective of every point before it
+    best_before = np.minimum.accumulate(np.concatenate(([np.inf], values[:-1])))
+    return ordered[values < best_before]
+
+
+def _rank(front: pd.DataFrame, objective: str) -> pd.DataFrame:
+    if objective not in OBJECTIVES:
+        raise ValueError(f'Objective {objective} not supported, choose one of {OBJECTIVES}')
+    front = front.assign(edp=front['energy'] * 1.0e-12 * front['latency'])
+    return front.sort_values(objective, kind='stable').reset_index(drop=True)
+
+
+def _square_tile(M, N, K, capacity: int, word_size: int, output_word_size: int = None) -> tuple:
+    # the default tile of tiled_matmul_spm, clipped to the shape
+    square = int(square_tile(capacity, word_size, output_word_size))
+    return min(square, int(M)), min(square, int(N)), min(square, int(K))
+
+
+def matmul_tile_candidates(M, N, K, capacity: int, word_size: int, output_word_size: int = None,
+                           cache_line_size: int = None) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Maximal (Tm, Tn, Tk) tiles of a cache level: tiles of the candidate sizes of each dimension that fit
+    in the level, and cannot grow to the next candidate size of any dimension without overflowing it.
+    The largest square tile that fits, clipped to the shape, is always among them.
+
+    Args:
+        M, N, K: matmul shape, C(M x K) += A(M x N) * B(N x K)
+        capacity (int): capacity of the cache level in bytes
+        word_size (int): bytes per element of A and B
+        output_word_size (int): bytes per element of C, defaults to word_size
+        cache_line_size (int): bytes per cache line, adds the tile sizes of whole lines
+
+    Returns:
+        Tm, Tn, Tk vectors of the surviving tiles
+    """
+    output_word_size = output_word_size or word_size
+    line_elements = max(1, (cache_line_size or word_size) // word_size)
+    sizes = [_tile_sizes(M, line_elements), _tile_sizes(N, line_elements), _tile_sizes(K, line_elements)]
+
+    # the largest candidate Tk that fits next to every (Tm, Tn)
+    tm, tn = (np.ravel(g) for g in np.meshgrid(sizes[0], sizes[1], indexing='ij'))
+    limit = (capacity - tm * tn * word_size) // (tn * word_size + tm * output_word_size)
+    position = np.searchsorted(sizes[2], limit, side='right') - 1
+    fits = position >= 0
+    tm, tn, tk = tm[fits], tn[fits], sizes[2][position[fits]]
+
+    # a tile is dominated when it can grow to the next candidate size along M or N and still fit
+    tiles = (tm, tn, tk)
+    can_grow = np.zeros(tm.shape, dtype=bool)
+    for dimension in (0, 1):
+        d, t = sizes[dimension], tiles[dimension]
+        position = np.searchsorted(d, t)
+        grown = list(tiles)
+        grown[dimension] = d[np.minimum(position + 1, len(d) - 1)]
+        can_grow |= (position + 1 < len(d)) & (tile_footprint(*grown, word_size, output_word_size) <= capacity)
+    tm, tn, tk = tm[~can_grow], tn[~can_grow], tk[~can_grow]
+
+    square = _square_tile(M, N, K, capacity, word_size, output_word_size)
+    if not np.any((tm == square[0]) & (tn == square[1]) & (tk == square[2])):
+        tm, tn, tk = np.append(tm, square[0]), np.append(tn, square[1]), np.append(tk, square[2])
+    return tm, tn, tk
+
+
+def _nested(inner: tuple, outer: tuple) -> tuple[np.ndarray, np.ndarray]:
+    # index pairs of inner and outer tiles where no inner tile dimension exceeds the outer one
+    i, o = np.meshgrid(np.arange(len(inner[0])), np.arange(len(outer[0])), indexing='ij')
+    i, o = np.ravel(i), np.ravel(o)
+    fits = np.ones(i.shape, dtype=bool)
+    for inner_dimension, outer_dimension in zip(inner, outer):
+        fits &= inner_dimension[i] <= outer_dimension[o]
+    return i[fits], o[fits]
+
+
+# tile-size search for the tiled matmul on a Stored Program Machine
+# The traffic of a level depends on its own tiles only, so the candidates of each level are first ranked
+# with the other levels at their default square tiles, and the shortlist best of every level, the Pareto
+# front of L3, and the square tiles, are nested and evaluated together.
+# returns the Pareto front of energy (pJ) and latency (s), sorted by objective: 'energy', 'latency', or 'edp'
+def search_matmul_tiles_spm(M, N, K, attributes: 'StoredProgramMachineEnergy',
+                            config: 'StoredProgramMachineConfiguration', objective: str = 'edp',
+                            shortlist: int = 64) -> pd.DataFrame:
+    capacities = (config.l1_size, config.l2_size, config.l3_size)
+    squares = [_square_tile(M, N, K, capacity, config.word_size, config.output_word_size) for capacity in capacities]
+    levels = []
+    for level, capacity in enumerate(capacities):
+        tiles = matmul_tile_candidates(M, N, K, capacity, config.word_size, config.output_word_size,
+                                       config.cache_line_size)
+        arguments = list(squares)
+        arguments[level] = tiles
+        df = tiled_matmul_spm_batch(M, N, K, attributes, config, *arguments)
+        keep = np.argsort(df['total_energy'].to_numpy(), kind='stable')[:shortlist]
+        if level == 2:
+            # L3 tiles set the DRAM traffic, and with it the latency
+            front = pareto_front(df.assign(energy=df['total_energy'], latency=df['elapsed_time']))
+            keep = np.union1d(keep, front.index.to_numpy())
+        square = np.flatnonzero((tiles[0] == squares[level][0]) & (tiles[1] == squares[level][1]) &
+                                (tiles[2] == squares[level][2]))
+        levels.append(tuple(t[np.union1d(keep, square)] for t in tiles))
+    l1, l2, l3 = levels
+
+    # L1 tiles nest in L2 tiles, which nest in L3 tiles
+    l1_index, l2_index = _nested(l1, l2)
+    l2_pairs = tuple(t[l2_index] for t in l2)
+    pair_index, l3_index = _nested(l2_pairs, l3)
+    l1_index, l2_index = l1_index[pair_index], l2_index[pair_index]
+
+    df = tiled_matmul_spm_batch(M, N, K, attributes, config,
+                                tuple(t[l1_index] for t in l1),
+                                tuple(t[l2_index] for t in l2),
+                                tuple(t[l3_index] for t in l3))
+    df['energy'] = df['total_energy']
+    df['latency'] = df['elapsed_time']
+    return _rank(pareto_front(df), objective)
+
+
+# kernel launch search for the matvec on a Graphics Processing Unit
+# The flat_matvec_gpu model is extended with the execution of the grid: a thread walks
+# rows_per_thread rows of cols fmas in a grid-stride loop, and the blocks that do not fit
+# on the streaming multiprocessors at once run in waves. Every launched warp issues the
+# instructions of every iteration of the loop, occupied or not. Each resident warp keeps
+# one memory transaction in flight, so small grids cannot hide the memory latency (Little's law).
+# returns the Pareto front of energy (pJ) and latency (s), sorted by objective: 'energy', 'latency', or 'edp'
+def search_matvec_launch_gpu(rows, cols, energies: 'GraphicsProcessingUnitEnergy',
+                             config: 'GraphicsProcessingUnitConfiguration', objective: str = 'edp',
+                             streaming_multiprocessors: int = 80, max_threads_per_sm: int = 2048,
+                             memory_latency_ns: float = 400.0) -> pd.DataFrame:
+    # blocks are whole warps, and must fit in a streaming multiprocessor
+    threads_per_block = np.arange(32, min(1024, max_threads_per_sm) + 1, 32)
+    candidates = []
+    for tpb in threads_per_block:
+        # a grid larger than one thread per row only adds idle warps
+        max_blocks = -(-rows // tpb)
+        blocks = 2 ** np.arange(int(np.log2(max_blocks)) + 1)
+        blocks = np.unique(np.append(blocks, max_blocks))
+        candidates.append(np.stack([np.full(blocks.shape, tpb), blocks]))
+    threads_per_block, blocks_per_grid = np.concatenate(candidates, axis=1)
+
+    df = flat_matvec_gpu_batch(rows, cols, energies, config.core_clock, config.memory_clock, config.word_size,
+                               config.cache_line_size, config.memory_burst_size, config.memory_channels,
+                               config.channel_width, threads_per_block, blocks_per_grid,
+                               output_word_size_in_bytes=config.output_word_size)
+
+    resident_blocks = streaming_multiprocessors * (max_threads_per_sm // df['threads_per_block'])
+    waves = -(-df['blocks_per_grid'] // resident_blocks)
+    compute_time = waves * df['rows_per_thread'] * cols * config.clock_cycle_ns * 1.0e-9
+    resident_warps = np.minimum(df['launched_warps'], resident_blocks * df['warps_per_block'])
+    latency_bound_time = df['memory_transactions'] * memory_latency_ns * 1.0e-9 / resident_warps
+    warp_issues = df['launched_warps'] * df['rows_per_thread']
+
+    df['waves'] = waves
+    df['warp_energy'] = warp_issues * energies.thread
+    df['energy'] = df['total_energy'] + df['warp_energy']
+    df['latency'] = np.maximum(np.maximum(df['elapsed_time'], compute_time), latency_bound_time)
+    return _rank(pareto_front(df), objective)
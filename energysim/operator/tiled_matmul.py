@@ -0,0 +1,200 @@
+import numpy as np
+import pandas as pd
+
+from energysim.database.spm_energy import StoredProgramMachineEnergy
+from energysim.execution.spm_metrics import StoredProgramMachineMetrics
+from energysim.models.roofline import Roofline
+from energysim.models.spm_configuration import StoredProgramMachineConfiguration
+from energysim.operator.flat_matmul import roofline_performance
+
+
+# Tiled matrix-matrix operator C(M x K) += A(M x N) * B(N x K), with the same shape convention as flat_matmul_spm.
+#
+# A cache level that holds a (Tm x Tn x Tk) tile, that is, a Tm x Tn block of A, a Tn x Tk block of B,
+# and a Tm x Tk block of C, reuses every element while it computes on the tile: the reuse distance
+# of the accesses within a tile is bounded by the tile footprint, and the footprint fits in the level.
+# Reuse across tiles is lost, so, with the tiles of a level, the traffic between that level and the next is
+#   A: M*N * ceil(K/Tk)   every block of A is reloaded for every column block of C
+#   B: N*K * ceil(M/Tm)   every block of B is reloaded for every row block of C
+#   C: M*K * ceil(N/Tn)   every block of C is read and written back once per block of the reduction
+# The elements of C can be wider than those of A and B, such as FP32 accumulations of FP8 operands,
+# the output word size of the helpers defaults to the word size.
+# The helpers below take scalars or NumPy arrays, so that tile sizes can be swept in one call.
+
+def _ceil_div(numerator, denominator):
+    return -(-numerator // denominator)
+
+
+def tile_footprint(Tm, Tn, Tk, word_size, output_word_size=None):
+    """
+    Bytes of A, B, and C held by a cache level that computes on a (Tm x Tn x Tk) tile.
+
+    Args:
+        Tm, Tn, Tk: tile sizes along M, N, and K
+        word_size: bytes per element of A and B
+        output_word_size: bytes per element of C, defaults to word_size
+
+    Returns:
+        footprint in bytes
+    """
+    output_word_size = output_word_size or word_size
+    return (Tm * Tn + Tn * Tk) * word_size + Tm * Tk * output_word_size
+
+
+def square_tile(capacity, word_size, output_word_size=None):
+    """
+    Largest square tile whose footprint fits in a cache level.
+
+    Args:
+        capacity: cache capacity in bytes
+        word_size: bytes per element of A and B
+        output_word_size: bytes per element of C, defaults to word_size
+
+    Returns:
+        tile size T, such that T * T * (2 * word_size + output_word_size) <= capacity
+    """
+    output_word_size = output_word_size or word_size
+    return np.maximum(np.floor(np.sqrt(capacity / (2 * word_size + output_word_size))), 1).astype(np.int64)
+
+
+def tile_traffic(M, N, K, Tm, Tn, Tk, word_size, cache_line_size, output_word_size=None):
+    """
+    Cache lines moved between a cache level that holds (Tm x Tn x Tk) tiles and the next level.
+
+    Args:
+        M, N, K: matmul shape, C(M x K) += A(M x N) * B(N x K)
+        Tm, Tn, Tk: tile sizes of the level, clipped to the shape
+        word_size: bytes per element of A and B
+        cache_line_size: bytes per cache line
+        output_word_size: bytes per element of C, defaults to word_size
+
+    Returns:
+        (fill lines, write-back lines), the lines read into the level, and the lines of C written back
+    """
+    output_word_size = output_word_size or word_size
+    Tm, Tn, Tk = np.minimum(Tm, M), np.minimum(Tn, N), np.minimum(Tk, K)
+    a_lines = _ceil_div(M * N * word_size, cache_line_size) * _ceil_div(K, Tk)
+    b_lines = _ceil_div(N * K * word_size, cache_line_size) * _ceil_div(M, Tm)
+    c_lines = _ceil_div(M * K * output_word_size, cache_line_size) * _ceil_div(N, Tn)
+    return a_lines + b_lines + c_lines, c_lines
+
+
+def _level_tile(tile: tuple, capacity: int, config, level: str) -> tuple:
+    word_sizes = (config.word_size, config.output_word_size)
+    if tile is None:
+        t = int(square_tile(capacity, *word_sizes))
+        return t, t, t
+    if tile_footprint(*tile, *word_sizes) > capacity:
+        raise ValueError(f'{level} tile {tile} needs {tile_footprint(*tile, *word_sizes)} bytes, '
+                         f'{level} holds {capacity} bytes')
+    return tile
+
+
+# tiled matrix-matrix operator on a Stored Program Machine
+# l1_tile, l2_tile, and l3_tile are (Tm, Tn, Tk) tiles that must fit in their cache level,
+# they default to the largest square tile that fits in the capacity of the level
+def tiled_matmul_spm(M, N, K, attributes: 'StoredProgramMachineEnergy', config: 'StoredProgramMachineConfiguration',
+                     l1_tile: tuple = None, l2_tile: tuple = None, l3_tile: tuple = None) \
+        -> 'StoredProgramMachineMetrics':
+    # enumerate all the energy consuming transactions for a tiled matmul on an SPM
+    spm_metrics = StoredProgramMachineMetrics("Tiled Matmul " + str(M) + " x " + str(N) + " x " + str(K) + " SPM")
+
+    l1_tile = _level_tile(l1_tile, config.l1_size, config, 'L1')
+    l2_tile = _level_tile(l2_tile, config.l2_size, config, 'L2')
+    l3_tile = _level_tile(l3_tile, config.l3_size, config, 'L3')
+
+    # nr of multiply-add operations
+    fmas: int = M * N * K
+    spm_metrics.record('fma', fmas, attributes.fma32b)
+    spm_metrics.record('execute', fmas, attributes.fma32b)
+
+    # the same instruction and register file profile as flat_matmul_spm,
+    # so that the two models differ only in their data movement
+    nr_of_instructions: int = fmas * 13
+    spm_metrics.record('instruction', nr_of_instructions, attributes.instruction)
+    spm_metrics.record('register_read', fmas * 3, attributes.register_read)
+    spm_metrics.record('register_write', fmas * 3, attributes.register_write)
+
+    # lines filled into, and written back from, each cache level
+    cache_line_size = config.cache_line_size  # bytes
+    l1_fill, l1_writeback = (int(v) for v in tile_traffic(M, N, K, *l1_tile, config.word_size, cache_line_size,
+                                                          config.output_word_size))
+    l2_fill, l2_writeback = (int(v) for v in tile_traffic(M, N, K, *l2_tile, config.word_size, cache_line_size,
+                                                          config.output_word_size))
+    l3_fill, l3_writeback = (int(v) for v in tile_traffic(M, N, K, *l3_tile, config.word_size, cache_line_size,
+                                                          config.output_word_size))
+
+    # the core reads its two operands from L1
+    spm_metrics.record('l1_read', fmas*2, attributes.l1_read)
+    spm_metrics.record('l1_write', l1_fill, attributes.l1_write)
+
+    # L1 fills are read from L2, L2 is written by its own fills and the write-backs of L1
+    spm_metrics.record('l2_read', l1_fill, attributes.l2_read)
+    spm_metrics.record('l2_write', l2_fill + l1_writeback, attributes.l2_write)
+
+    spm_metrics.record('l3_read', l2_fill, attributes.l3_read)
+    spm_metrics.record('l3_write', l3_fill + l2_writeback, attributes.l3_write)
+
+    # the DRAM serves the fills of L3 and absorbs its write-backs
+    spm_metrics.record('dram_read', l3_fill, attributes.dram_read)
+    spm_metrics.record('dram_write', l3_writeback, attributes.dram_write)
+
+    # consolidate sets
+    spm_metrics.rollup()
+
+    # calculate performance metrics
+    roofline_performance(spm_metrics, config, fmas, l3_fill * cache_line_size, l3_writeback * cache_line_size)
+
+    return spm_metrics
+
+
+# Batched tiled matrix-matrix operator on a Stored Program Machine.
+# Evaluates the tiled_matmul_spm model of a single (M, N, K) for whole arrays of tile sizes,
+# each tile argument is a (Tm, Tn, Tk) tuple of arrays that broadcast against each other.
+# Tiles are not checked against the cache capacities, see tile_search for the pruned search.
+def tiled_matmul_spm_batch(M, N, K, attributes: 'StoredProgramMachineEnergy', config: 'StoredProgramMachineConfiguration',
+                           l1_tiles: tuple, l2_tiles: tuple, l3_tiles: tuple) -> pd.DataFrame:
+    tiles = np.broadcast_arrays(*(np.asarray(t, dtype=np.int64) for t in (*l1_tiles, *l2_tiles, *l3_tiles)))
+    tiles = [np.ravel(t) for t in tiles]
+    cache_line_size = config.cache_line_size  # bytes
+    l1_fill, l1_writeback = tile_traffic(M, N, K, *tiles[0:3], config.word_size, cache_line_size,
+                                         config.output_word_size)
+    l2_fill, l2_writeback = tile_traffic(M, N, K, *tiles[3:6], config.word_size, cache_line_size,
+                                         config.output_word_size)
+    l3_fill, l3_writeback = tile_traffic(M, N, K, *tiles[6:9], config.word_size, cache_line_size,
+                                         config.output_word_size)
+
+    # the same event model as tiled_matmul_spm
+    fmas = M * N * K
+    events, energy = StoredProgramMachineMetrics.record_batch(len(tiles[0]), {
+        'fma': (fmas, attributes.fma32b),
+        'execute': (fmas, attributes.fma32b),
+        'instruction': (fmas * 13, attributes.instruction),
+        'register_read': (fmas * 3, attributes.register_read),
+        'register_write': (fmas * 3, attributes.register_write),
+        'l1_read': (fmas * 2, attributes.l1_read),
+        'l1_write': (l1_fill, attributes.l1_write),
+        'l2_read': (l1_fill, attributes.l2_read),
+        'l2_write': (l2_fill + l1_writeback, attributes.l2_write),
+        'l3_read': (l2_fill, attributes.l3_read),
+        'l3_write': (l3_fill + l2_writeback, attributes.l3_write),
+        'dram_read': (l3_fill, attributes.dram_read),
+        'dram_write': (l3_writeback, attributes.dram_write),
+    })
+
+    # the roofline of roofline_performance
+    roofline = Roofline.from_spm(config)
+    compute_time = fmas / roofline.peak_flops
+    memory_time = (l3_fill + l3_writeback) * cache_line_size / roofline.bandwidths['dram']
+    elapsed_time = np.maximum(compute_time, memory_time)
+
+    columns = {}
+    for level, offset in (('l1', 0), ('l2', 3), ('l3', 6)):
+        columns[level + '_tm'] = tiles[offset]
+        columns[level + '_tn'] = tiles[offset + 1]
+        columns[level + '_tk'] = tiles[offset + 2]
+    columns['dram_read'] = l3_fill
+    columns['dram_write'] = l3_writeback
+    columns['total_energy'] = energy[:, StoredProgramMachineMetrics.key_offset['total']]
+    columns['elapsed_time'] = elapsed_time
+    return pd.DataFrame(columns, copy=False)
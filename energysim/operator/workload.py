@@ -0,0 +1,242 @@
+import math
+
+from energysim.database.gpu_energy import GraphicsProcessingUnitEnergy
+from energysim.database.spm_energy import StoredProgramMachineEnergy
+from energysim.execution.gpu_metrics import GraphicsProcessingUnitMetrics
+from energysim.execution.spm_metrics import StoredProgramMachineMetrics
+from energysim.models.gpu_configuration import GraphicsProcessingUnitConfiguration
+from energysim.models.roofline import Roofline
+from energysim.models.spm_configuration import StoredProgramMachineConfiguration
+from energysim.operator.flat_matmul import roofline_performance
+from energysim.operator.tiled_matmul import square_tile
+
+# Workloads: the machine independent work of an operator, evaluated on the SPM and GPU models.
+#
+# A workload is a dict of
+#   products        fmas of its GEMM phases
+#   adds, muls      other arithmetic, such as transforms, comparisons, and scaling
+#   specials        exponentials and reciprocals, evaluated by the special function unit
+#   gemms           GEMM phases as (count, M, N, K, A elements per pass), C(M x K) += A(M x N) * B(N x K),
+#                   whose cache traffic follows the tiles of tiled_matmul, A elements per pass is None for a
+#                   dense A, or a function of the rows Tm of a tile for an A that is gathered, see conv_workload
+#   stream_read     elements that the other phases read once
+#   stream_write    elements that the other phases write once
+#   operand_reads   words the core loads from L1
+#   output          shape of the output
+# The operands are read in words of config.word_size, the results, the C of the GEMMs and the streamed writes,
+# are written in words of config.output_word_size, so a mixed precision moves fewer lines, see models/datatype.
+# The flops of the metrics count the operations that are executed.
+
+# instructions per fma of the GEMM phases on an SPM, the profile of tiled_matmul_spm
+SPM_INSTRUCTIONS_PER_FMA = 13
+# a GPU thread computes a register tile of outputs, which amortizes its operand loads over the tile:
+# an fma, and a fraction of a shared memory load and of the address arithmetic
+GPU_REGISTER_TILE = 4
+GPU_INSTRUCTIONS_PER_FMA = 4
+ELEMENTWISE_KINDS = ('relu', 'add', 'mul', 'special')
+
+
+def _ceil_div(numerator, denominator):
+    return -(-numerator // denominator)
+
+
+def gemm_workload(M, N, K) -> dict:
+    """
+    Workload of C(M x K) = A(M x N) * B(N x K), a matvec is the GEMM of a single row, M = 1.
+    """
+    return {'output': (M, K), 'products': M * N * K, 'adds': 0, 'muls': 0, 'specials': 0,
+            'gemms': [(1, M, N, K, None)], 'stream_read': 0, 'stream_write': 0,
+            'operand_reads': 2 * M * N * K}
+
+
+def elementwise_workload(elements, kind: str = 'relu') -> dict:
+    """
+    Workload of an elementwise operator: a relu compares every element with zero,
+    an add or a mul combines the elements of two operands, and a special function, such as exp or tanh,
+    is evaluated by the special function unit.
+    """
+    if kind not in ELEMENTWISE_KINDS:
+        raise ValueError(f'Elementwise {kind} not supported, choose one of {ELEMENTWISE_KINDS}')
+    operands = 1 if kind in ('relu', 'special') else 2
+    return {'output': (elements,), 'products': 0,
+            'adds': elements if kind in ('relu', 'add') else 0, 'muls': elements if kind == 'mul' else 0,
+            'specials': elements if kind == 'special' else 0,
+            'gemms': [], 'stream_read': operands * elements, 'stream_write': elements,
+            'operand_reads': operands * elements}
+
+
+def softmax_workload(rows, cols) -> dict:
+    """
+    Workload of a softmax along the rows of a (rows x cols) tensor. Every row takes three passes:
+    its maximum, the exponentials of the shifted elements and their sum, and the scaling by the reciprocal
+    of the sum. A row stays in L1 between the passes, so the tensor is read from memory once.
+    """
+    elements = rows * cols
+    return {'output': (rows, cols), 'products': 0,
+            'adds': 3 * elements, 'muls': elements, 'specials': elements + rows,
+            'gemms': [], 'stream_read': elements, 'stream_write': elements,
+            'operand_reads': 3 * elements}
+
+
+def _gemm_lines(M, N, K, tile: tuple, word_size, cache_line_size, a_elements=None, output_word_size=None) -> tuple:
+    # tile_traffic, with the elements of A read per pass over K supplied by the lowering
+    output_word_size = output_word_size or word_size
+    Tm, Tn, Tk = min(tile[0], M), min(tile[1], N), min(tile[2], K)
+    a = M * N if a_elements is None else int(a_elements(Tm))
+    a_lines = _ceil_div(a * word_size, cache_line_size) * _ceil_div(K, Tk)
+    b_lines = _ceil_div(N * K * word_size, cache_line_size) * _ceil_div(M, Tm)
+    c_lines = _ceil_div(M * K * output_word_size, cache_line_size) * _ceil_div(N, Tn)
+    return a_lines + b_lines + c_lines, c_lines
+
+
+def _workload_lines(workload: dict, tile: tuple, word_size, cache_line_size, output_word_size=None) -> tuple:
+    # (fill lines, write-back lines) of a cache level that holds tiles of the GEMMs, and streams the other phases,
+    # the operands are read in words of word_size, and the results are written in words of output_word_size
+    output_word_size = output_word_size or word_size
+    fill = _ceil_div(workload['stream_read'] * word_size, cache_line_size)
+    writeback = _ceil_div(workload['stream_write'] * output_word_size, cache_line_size)
+    for count, M, N, K, a_elements in workload['gemms']:
+        gemm_fill, gemm_writeback = _gemm_lines(M, N, K, tile, word_size, cache_line_size, a_elements,
+                                                output_word_size)
+        fill += count * gemm_fill
+        writeback += count * gemm_writeback
+    return fill, writeback
+
+
+def _record_arithmetic(metrics, workload: dict, fma, fadd, fmul, fdiv) -> int:
+    # the execute event carries the energy of every executed operation,
+    # the special function unit evaluates an exponential or a reciprocal at the energy of a divide
+    products, adds, muls, specials = workload['products'], workload['adds'], workload['muls'], workload['specials']
+    ops = products + adds + muls + specials
+    metrics.record('fma', products, fma)
+    metrics.record('fadd', adds, fadd)
+    metrics.record('fmul', muls, fmul)
+    metrics.record('fdiv', specials, fdiv)
+    metrics.record('execute', ops, (products * fma + adds * fadd + muls * fmul + specials * fdiv) / ops)
+    return ops
+
+
+def _other_instructions(workload: dict) -> int:
+    return (workload['adds'] + workload['muls'] + workload['specials']
+            + workload['stream_read'] + workload['stream_write'])
+
+
+def evaluate_workload_spm(name: str, workload: dict, attributes: 'StoredProgramMachineEnergy',
+                          config: 'StoredProgramMachineConfiguration') -> 'StoredProgramMachineMetrics':
+    spm_metrics = StoredProgramMachineMetrics(name)
+    ops = _record_arithmetic(spm_metrics, workload, attributes.fma32b, attributes.fadd32b, attributes.fmul32b,
+                             attributes.fdiv32b)
+
+    # the GEMMs follow the profile of tiled_matmul_spm, any other operation is an instruction,
+    # and the streaming phases issue a load or a store per element
+    nr_of_instructions = workload['products'] * SPM_INSTRUCTIONS_PER_FMA + _other_instructions(workload)
+    spm_metrics.record('instruction', nr_of_instructions, attributes.instruction)
+    spm_metrics.record('register_read', ops * 3, attributes.register_read)
+    spm_metrics.record('register_write', ops * 3, attributes.register_write)
+
+    # lines filled into, and written back from, each cache level, with its largest square tile
+    word_sizes = (config.word_size, config.output_word_size)
+    cache_line_size = config.cache_line_size  # bytes
+    l1_fill, l1_writeback = _workload_lines(workload, (int(square_tile(config.l1_size, *word_sizes)),) * 3,
+                                            config.word_size, cache_line_size, config.output_word_size)
+    l2_fill, l2_writeback = _workload_lines(workload, (int(square_tile(config.l2_size, *word_sizes)),) * 3,
+                                            config.word_size, cache_line_size, config.output_word_size)
+    l3_fill, l3_writeback = _workload_lines(workload, (int(square_tile(config.l3_size, *word_sizes)),) * 3,
+                                            config.word_size, cache_line_size, config.output_word_size)
+
+    spm_metrics.record('l1_read', workload['operand_reads'], attributes.l1_read)
+    spm_metrics.record('l1_write', l1_fill, attributes.l1_write)
+    spm_metrics.record('l2_read', l1_fill, attributes.l2_read)
+    spm_metrics.record('l2_write', l2_fill + l1_writeback, attributes.l2_write)
+    spm_metrics.record('l3_read', l2_fill, attributes.l3_read)
+    spm_metrics.record('l3_write', l3_fill + l2_writeback, attributes.l3_write)
+    spm_metrics.record('dram_read', l3_fill, attributes.dram_read)
+    spm_metrics.record('dram_write', l3_writeback, attributes.dram_write)
+
+    # consolidate sets
+    spm_metrics.rollup()
+
+    # calculate performance metrics
+    roofline_performance(spm_metrics, config, ops, l3_fill * cache_line_size, l3_writeback * cache_line_size)
+
+    return spm_metrics
+
+
+def evaluate_workload_gpu(name: str, workload: dict, energies: 'GraphicsProcessingUnitEnergy',
+                          config: 'GraphicsProcessingUnitConfiguration') -> 'GraphicsProcessingUnitMetrics':
+    gpu_metrics = GraphicsProcessingUnitMetrics(name)
+    ops = _record_arithmetic(gpu_metrics, workload, energies.fma32b, energies.fadd32b, energies.fmul32b, energies.fdiv32b)
+
+    nr_of_instructions = workload['products'] * GPU_INSTRUCTIONS_PER_FMA + _other_instructions(workload)
+    gpu_metrics.record('instruction', nr_of_instructions, energies.instruction)
+    gpu_metrics.record('register_read', ops * 3, energies.reg_read)
+    gpu_metrics.record('register_write', ops * 3, energies.reg_write)
+
+    # a thread block stages the tiles of the GEMMs in shared memory, global memory serves its fills
+    word_size = config.word_size
+    cache_line_size = config.cache_line_size  # bytes
+    smem_tile = (int(square_tile(config.smem_size, word_size, config.output_word_size)),) * 3
+    fill, writeback = _workload_lines(workload, smem_tile, word_size, cache_line_size, config.output_word_size)
+    gemm_fill = fill - _ceil_div(workload['stream_read'] * word_size, cache_line_size)
+
+    # global loads pass through L1, the register tile of a thread reads every shared memory word for a row of fmas
+    gpu_metrics.record('l1_read', gemm_fill * cache_line_size // word_size + workload['stream_read'], energies.l1_read)
+    gpu_metrics.record('l1_write', fill, energies.l1_write)
+    gpu_metrics.record('smem_read', math.ceil(2 * workload['products'] / GPU_REGISTER_TILE), energies.smem_read)
+    gpu_metrics.record('smem_write', gemm_fill * cache_line_size // word_size, energies.smem_write)
+
+    read_bytes = fill * cache_line_size
+    write_bytes = writeback * cache_line_size
+    read_bursts = _ceil_div(read_bytes, config.memory_burst_size)
+    write_bursts = _ceil_div(write_bytes, config.memory_burst_size)
+    burst_scale = energies.burst_scale(config.memory_burst_size)
+    gpu_metrics.record('gmem_read', read_bursts, energies.gmem_read * burst_scale)
+    gpu_metrics.record('gmem_write', write_bursts, energies.gmem_write * burst_scale)
+
+    # consolidate sets
+    gpu_metrics.rollup()
+
+    # every thread computes a register tile of the output
+    outputs = workload['stream_write'] if workload['products'] == 0 else sum(
+        count * M * K for count, M, _, K, _ in workload['gemms'])
+    gpu_metrics.threads_per_block = config.threads_per_block
+    gpu_metrics.blocks_per_grid = config.blocks_per_grid
+    gpu_metrics.nr_of_warps = math.ceil(outputs / (GPU_REGISTER_TILE * GPU_REGISTER_TILE) / 32)
+
+    # calculate performance metrics on the roofline of the GPU
+    roofline = Roofline.from_gpu(config)
+    compute_time = ops / roofline.peak_flops
+    memory_time = (read_bytes + write_bytes) / roofline.bandwidths['dram']
+    total_elapsed_time_in_sec = max(compute_time, memory_time)
+
+    memory_transactions = read_bursts + write_bursts
+    total_flops = gpu_metrics.occurrence('execute')
+    gpu_metrics.elapsed_time = total_elapsed_time_in_sec
+    gpu_metrics.instr_per_sec = gpu_metrics.occurrence('instruction') / total_elapsed_time_in_sec
+    gpu_metrics.flops_per_sec = total_flops / total_elapsed_time_in_sec
+    gpu_metrics.memory_transactions = memory_transactions
+    gpu_metrics.memory_clock_ns = config.memory_cycle_ns
+    gpu_metrics.memops_per_sec = memory_transactions / total_elapsed_time_in_sec
+    gpu_metrics.read_data = read_bytes
+    gpu_metrics.write_data = write_bytes
+    gpu_metrics.memory_read_bw = read_bytes / total_elapsed_time_in_sec
+    gpu_metrics.memory_write_bw = write_bytes / total_elapsed_time_in_sec
+
+    # copy the machine attributes into the metrics data structure
+    gpu_metrics.core_clock_ghz = config.core_clock
+    gpu_metrics.memory_clock_ghz = config.memory_clock
+    gpu_metrics.word_size = word_size
+    gpu_metrics.cache_line_size = cache_line_size
+    gpu_metrics.memory_burst = config.memory_burst_size
+    gpu_metrics.memory_channels = config.memory_channels
+    gpu_metrics.channel_width = config.channel_width
+    gpu_metrics.max_memory_bw = roofline.bandwidths['dram']
+
+    # normalized performance
+    # Watt = J/s
+    power = gpu_metrics.occurrence_energy('total') * 1.0e-12 / total_elapsed_time_in_sec
+    gpu_metrics.total_flops = total_flops
+    gpu_metrics.power = power
+    gpu_metrics.flops_per_watt = gpu_metrics.flops_per_sec / power
+
+    return gpu_metrics
@@ -1,5 +1,7 @@
 import numpy as np
 
+from energysim.models.design_category import DesignCategory
+
 def randomizer(value: float, lowerbound: float = 0.0, upperbound: float = 0.0) -> float:
     """generates a uniform random value derived from the range defined by [lowerbound, upperbound]*value
 
@@ -23,4 +25,51 @@ def randomizer(value: float, lowerbound: float = 0.0, upperbound: float = 0.0) -
     low: float = lowerbound * value
     high: float = upperbound * value
     sample: float = np.random.uniform(low, high)
-    return sample
\ No newline at end of file
+    return sample
+
+def category_bounds(category: 'DesignCategory', proportion: float) -> tuple[float, float]:
+    """proportional randomization range of a design category
+
+    Energy efficient designs start from the 'low' corner of the energy profiles,
+    high performance designs start from the 'high' corner of the profile,
+    and the high volume designs are centered on the 'typical' profile.
+
+    Args:
+        category (DesignCategory): design category of the samples
+        proportion (float): width of the range as a proportion of the value, such as, 0.25
+
+    Returns:
+        (lowerbound, upperbound) proportions, (0.0, 0.0) for an unknown category
+    """
+    if category == DesignCategory.EnergyEfficient:
+        return 1.0 - proportion, 1.0
+    elif category == DesignCategory.HighVolume:
+        return 1.0 - (0.5 * proportion), 1.0 + (0.5 * proportion)
+    elif category == DesignCategory.HighPerformance:
+        return 1.0, 1.0 + proportion
+    return 0.0, 0.0
+
+
+def randomize_batch(values: np.ndarray, lowerbound: float, upperbound: float,
+                    nr_samples: int, rng: np.random.Generator) -> np.ndarray:
+    """generates nr_samples uniform random vectors derived from the range defined by [lowerbound, upperbound]*values
+
+    The batched equivalent of randomizer: the (nr_samples x len(values)) matrix
+    is drawn with a single call to the generator.
+
+    Args:
+        values (np.ndarray): the values to be randomized
+        lowerbound (float): the lower bound of the range
+        upperbound (float): the upper bound of the range
+        nr_samples (int): number of random vectors
+        rng (np.random.Generator): source of randomness
+
+    Returns:
+        (nr_samples x len(values)) matrix of randomized values (np.ndarray)
+    """
+    values = np.asarray(values, dtype=np.float64)
+    diff = upperbound - lowerbound
+    if diff < 0.01:
+        return np.tile(values, (nr_samples, 1))
+
+    return rng.uniform(lowerbound * values, upperbound * values, size=(nr_samples, len(values)))
@@ -1,12 +1,12 @@
 from energysim.database.dfa_energy import DomainFlowArchitectureEnergyDatabase
 from energysim.models.design_category import DesignCategory
-from energysim.models.spm_configuration import StoredProgramMachineConfiguration
-from energysim.operator.flat_matvec import flat_matvec_spm, DomainFlowArchitectureConfiguration, flat_matvec_dfa
+from energysim.models.dfa_configuration import DomainFlowArchitectureConfiguration
+from energysim.operator.flat_matvec import flat_matvec_dfa
 
 if __name__ == '__main__':
     db = DomainFlowArchitectureEnergyDatabase()
     full = db.load_data('../../data/dfa_energy.csv')
-    dfa_energies = db.lookupEnergySet('n14t', 64)
+    dfa_energies = db.lookupEnergySet('n14t')
     print(dfa_energies)
 
     rows = 1024*1024
@@ -28,6 +28,6 @@ if __name__ == '__main__':
         memory_channels,
         channel_width
     )
+    print(dfa_config)
     dfa_metrics = flat_matvec_dfa(rows, cols, dfa_energies, dfa_config)
     dfa_metrics.report()
-
@@ -1,5 +1,8 @@
 from energysim.database.spm_energy import StoredProgramMachineEnergyDatabase
+from energysim.models.cache_sampling import simulate_sampled
+from energysim.models.cache_simulator import CacheHierarchy
 from energysim.models.design_category import DesignCategory
+from energysim.models.loop_nest import matvec_loop_nest
 from energysim.models.spm_configuration import StoredProgramMachineConfiguration
 from energysim.operator.flat_matvec import flat_matvec_spm
 
@@ -30,3 +33,8 @@ if __name__ == '__main__':
     spm_metrics = flat_matvec_spm(rows, cols, spm_energies, spm_config)
     spm_metrics.report()
 
+    # cache traffic of the same matvec, from a simulation of 1/8th of the sets in 16 windows of its trace
+    sampled = simulate_sampled(matvec_loop_nest(rows, cols, word_size), CacheHierarchy.from_configuration(spm_config),
+                               set_fraction=0.125, windows=16, window_iterations=256*1024, seed=0)
+    print(sampled)
+
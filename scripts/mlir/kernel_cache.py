@@ -0,0 +1,138 @@
+import collections
+import hashlib
+import os
+import sys
+import time
+
+from mlir.ir import Module
+from mlir.passmanager import PassManager
+from mlir.execution_engine import ExecutionEngine
+
+# Content-addressed cache of compiled kernels for the ExecutionEngine test harnesses.
+#
+# A kernel is keyed on the hash of its IR text, the pass pipeline that lowers it, and the JIT optimization level.
+# The lowered LLVM dialect module is stored in the cache directory as <key>.mlir, and a run that finds it parses
+# the lowered module instead of running the pipeline. Within a run, the ExecutionEngine of a key is reused, so an
+# identical kernel is lowered and JIT compiled once. With object_files, the JIT compiled code is also dumped as
+# <key>.o, for inspection and for linking outside of Python: the ExecutionEngine of the bindings cannot load it back,
+# so a new run still JIT compiles the lowered module.
+#
+# The directory is ESIM_KERNEL_CACHE, or .kernel_cache next to this script. Delete it to drop the cache, a change
+# of the MLIR installation is not part of the key. The directory is created by the first kernel that is stored, so
+# constructing a cache has no side effects.
+
+CACHE_FORMAT = 1
+
+KernelCacheInfo = collections.namedtuple('KernelCacheInfo',
+                                         ['hits', 'disk_hits', 'misses', 'lowering_time', 'jit_time', 'entries'])
+
+
+def default_cache_directory() -> str:
+    return os.environ.get('ESIM_KERNEL_CACHE', os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                            '.kernel_cache'))
+
+
+class KernelCache:
+    def __init__(self, pipeline, directory: str = None, opt_level: int = 2, shared_libs=None,
+                 object_files: bool = False):
+        self.pipeline = tuple(pipeline)     # passes of the PassManager, nested passes as 'func.func(pass)'
+        self.directory = directory or default_cache_directory()
+        self.opt_level = opt_level
+        self.shared_libs = list(shared_libs or [])
+        self.object_files = object_files
+        self.engines = {}                   # key -> ExecutionEngine of this run
+        self.hits = 0                       # engines reused in this run
+        self.disk_hits = 0                  # lowered modules read from the directory
+        self.misses = 0                     # modules lowered by the pipeline
+        self.lowering_time = 0.0            # seconds in the pass pipeline
+        self.jit_time = 0.0                 # seconds constructing engines
+
+    def __repr__(self):
+        return f"KernelCache(directory='{self.directory}', passes={len(self.pipeline)}, engines={len(self.engines)})"
+
+    def key(self, ir_text: str) -> str:
+        digest = hashlib.sha256()
+        for part in (str(CACHE_FORMAT), ir_text, '\n'.join(self.pipeline), str(self.opt_level)):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def path(self, key: str, suffix: str = '.mlir') -> str:
+        return os.path.join(self.directory, key + suffix)
+
+    def lower(self, ir_text: str) -> Module:
+        """
+        The module of the IR text lowered by the pipeline, from the cache directory when it holds it.
+        Needs an active Context.
+        """
+        key = self.key(ir_text)
+        path = self.path(key)
+        if os.path.exists(path):
+            with open(path) as f:
+                lowered = f.read()
+            self.disk_hits += 1
+            return Module.parse(lowered)
+
+        start = time.perf_counter()
+        module = Module.parse(ir_text)
+        pm = PassManager('builtin.module')
+        for p in self.pipeline:
+            pm.add(p)
+        pm.run(module.operation)
+        self.lowering_time += time.perf_counter() - start
+        self.misses += 1
+
+        # write to a temporary file and rename, so a concurrent run never reads a partial module
+        os.makedirs(self.directory, exist_ok=True)
+        temporary = f'{path}.{os.getpid()}.tmp'
+        with open(temporary, 'w') as f:
+            f.write(str(module))
+        os.replace(temporary, path)
+        return module
+
+    def engine(self, ir_text: str) -> ExecutionEngine:
+        """
+        ExecutionEngine of the IR text, reused when this run compiled the same kernel before.
+        Needs an active Context.
+        """
+        key = self.key(ir_text)
+        if key in self.engines:
+            self.hits += 1
+            return self.engines[key]
+        module = self.lower(ir_text)
+        start = time.perf_counter()
+        engine = ExecutionEngine(module, opt_level=self.opt_level, shared_libs=self.shared_libs)
+        self.jit_time += time.perf_counter() - start
+        if self.object_files and not os.path.exists(self.path(key, '.o')):
+            engine.dump_to_object_file(self.path(key, '.o'))
+        self.engines[key] = engine
+        return engine
+
+    def cache_info(self) -> KernelCacheInfo:
+        """
+        :return: the hits in this run and in the directory, the misses, the seconds spent lowering and JIT compiling,
+        and the number of lowered modules in the directory
+        """
+        entries = sum(1 for name in self._files() if name.endswith('.mlir'))
+        return KernelCacheInfo(self.hits, self.disk_hits, self.misses, self.lowering_time, self.jit_time, entries)
+
+    def clear(self):
+        # remove the engines of this run and the files of the directory
+        self.engines.clear()
+        for name in self._files():
+            if name.endswith(('.mlir', '.o')):
+                os.remove(os.path.join(self.directory, name))
+
+    def _files(self) -> list:
+        # names in the cache directory, which does not exist before the first kernel is stored
+        return os.listdir(self.directory) if os.path.isdir(self.directory) else []
+
+    def report(self, file=sys.stderr):
+        info = self.cache_info()
+        print(f'Kernel cache        : {self.directory}', file=file)
+        print(f'- engines reused    : {info.hits}', file=file)
+        print(f'- lowered from disk : {info.disk_hits}', file=file)
+        print(f'- lowered           : {info.misses} in {info.lowering_time:.3f} sec', file=file)
+        print(f'- JIT compiled      : {len(self.engines)} in {info.jit_time:.3f} sec', file=file)
+        print(f'- cached modules    : {info.entries}', file=file)
+        file.flush()
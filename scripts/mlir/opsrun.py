@@ -11,6 +11,8 @@ from mlir.execution_engine import *
 
 from mlir.dialects.linalg.opdsl.lang import *
 
+from kernel_cache import KernelCache
+
 
 # Log everything to stderr and flush so that we have a unified stream to match
 # errors/info emitted by MLIR to stderr.
@@ -154,27 +156,40 @@ func.func @main() -> i32 attributes {llvm.emit_c_interface} {
 """
 
 
-def transform(module, boilerplate):
+# the lowering of the kernels to the LLVM dialect for the ExecutionEngine
+LOWERING_PIPELINE = (
+    "func.func(convert-linalg-to-loops)",
+    "func.func(lower-affine)",
+    "func.func(convert-math-to-llvm)",
+    "func.func(convert-scf-to-cf)",
+    "func.func(arith-expand)",
+    "func.func(memref-expand)",
+    "convert-vector-to-llvm",
+    "finalize-memref-to-llvm",
+    "convert-func-to-llvm",
+    "convert-arith-to-llvm",
+    "convert-cf-to-llvm",
+    "reconcile-unrealized-casts",
+)
+
+# identical kernels are lowered once across runs, and JIT compiled once per run;
+# the cache directory is created when the first kernel is lowered, not on import
+kernel_cache = KernelCache(LOWERING_PIPELINE)
+
+
+def kernel_text(module, boilerplate):
     # TODO: Allow cloning functions from one module to another.
     # Atm we have to resort to string concatenation.
     ops = module.operation.regions[0].blocks[0].operations
-    mod = Module.parse("\n".join([str(op) for op in ops]) + boilerplate)
-
-    pm = PassManager("builtin.module")
-    pm.add("func.func(convert-linalg-to-loops)")
-    pm.add("func.func(lower-affine)")
-    pm.add("func.func(convert-math-to-llvm)")
-    pm.add("func.func(convert-scf-to-cf)")
-    pm.add("func.func(arith-expand)")
-    pm.add("func.func(memref-expand)")
-    pm.add("convert-vector-to-llvm")
-    pm.add("finalize-memref-to-llvm")
-    pm.add("convert-func-to-llvm")
-    pm.add("convert-arith-to-llvm")
-    pm.add("convert-cf-to-llvm")
-    pm.add("reconcile-unrealized-casts")
-    pm.run(mod.operation)
-    return mod
+    return "\n".join([str(op) for op in ops]) + boilerplate
+
+
+def transform(module, boilerplate):
+    return kernel_cache.lower(kernel_text(module, boilerplate))
+
+
+def compile_kernel(module, boilerplate):
+    return kernel_cache.engine(kernel_text(module, boilerplate))
 
 
 def test_elemwise_builtin():
@@ -202,7 +217,7 @@ def test_elemwise_builtin():
                 linalg.elemwise_unary(lhs, outs=[out], fun=UnaryFn.log)
                 linalg.elemwise_binary(out, rhs, outs=[out], fun=BinaryFn.mul)
 
-        execution_engine = ExecutionEngine(transform(module, elemwise_boiler))
+        execution_engine = compile_kernel(module, elemwise_boiler)
 
         # TODO: FFI-based solution to allow testing and printing with python code.
         # Prepare arguments: one result f32.
@@ -249,7 +264,7 @@ def test_elemwise_generic():
                     out, rhs, outs=[out], fun=BinaryFn.mul, emit_generic=True
                 )
 
-        execution_engine = ExecutionEngine(transform(module, elemwise_boiler))
+        execution_engine = compile_kernel(module, elemwise_boiler)
 
         # TODO: FFI-based solution to allow testing and printing with python code.
         # Prepare arguments: one result f32.
@@ -286,7 +301,7 @@ def test_fill_builtin():
             def fill_2d_on_buffers(value, out):
                 linalg.fill(value, outs=[out])
 
-        execution_engine = ExecutionEngine(transform(module, fill_boiler))
+        execution_engine = compile_kernel(module, fill_boiler)
 
         # TODO: FFI-based solution to allow testing and printing with python code.
         # Prepare arguments: one result i32.
@@ -321,7 +336,7 @@ def test_fill_generic():
             def fill_2d_on_buffers(value, out):
                 linalg.fill(value, outs=[out], emit_generic=True)
 
-        execution_engine = ExecutionEngine(transform(module, fill_boiler))
+        execution_engine = compile_kernel(module, fill_boiler)
 
         # TODO: FFI-based solution to allow testing and printing with python code.
         # Prepare arguments: one result i32.
@@ -348,7 +363,7 @@ def test_fill_rng_builtin():
             def fill_rng_on_buffers(min, max, seed, out):
                 linalg.fill_rng_2d(min, max, seed, outs=[out])
 
-        execution_engine = ExecutionEngine(transform(module, fill_rng_boiler))
+        execution_engine = compile_kernel(module, fill_rng_boiler)
 
         # TODO: FFI-based solution to allow testing and printing with python code.
         # Prepare arguments: one result i32.
@@ -375,7 +390,7 @@ def test_fill_rng_generic():
             def fill_rng_on_buffers(min, max, seed, out):
                 linalg.fill_rng_2d(min, max, seed, outs=[out], emit_generic=True)
 
-        execution_engine = ExecutionEngine(transform(module, fill_rng_boiler))
+        execution_engine = compile_kernel(module, fill_rng_boiler)
 
         # TODO: FFI-based solution to allow testing and printing with python code.
         # Prepare arguments: one result i32.
@@ -408,7 +423,7 @@ def test_max_pooling_builtin():
                     input, shape, outs=[output], strides=[2, 4], dilations=[1, 2]
                 )
 
-        execution_engine = ExecutionEngine(transform(module, pooling_boiler))
+        execution_engine = compile_kernel(module, pooling_boiler)
 
         # TODO: FFI-based solution to allow testing and printing with python code.
         # Prepare arguments: one result i32.
@@ -447,7 +462,7 @@ def test_max_pooling_generic():
                     emit_generic=True,
                 )
 
-        execution_engine = ExecutionEngine(transform(module, pooling_boiler))
+        execution_engine = compile_kernel(module, pooling_boiler)
 
         # TODO: FFI-based solution to allow testing and printing with python code.
         # Prepare arguments: one result i32.
@@ -480,7 +495,7 @@ def test_min_pooling_builtin():
             def pooling_on_buffers(input, shape, output):
                 linalg.pooling_nhwc_min(input, shape, outs=[output], strides=[2, 4])
 
-        execution_engine = ExecutionEngine(transform(module, pooling_boiler))
+        execution_engine = compile_kernel(module, pooling_boiler)
 
         # TODO: FFI-based solution to allow testing and printing with python code.
         # Prepare arguments: one result i32.
@@ -514,7 +529,7 @@ def test_min_pooling_generic():
                     input, shape, outs=[output], strides=[2, 4], emit_generic=True
                 )
 
-        execution_engine = ExecutionEngine(transform(module, pooling_boiler))
+        execution_engine = compile_kernel(module, pooling_boiler)
 
         # TODO: FFI-based solution to allow testing and printing with python code.
         # Prepare arguments: one result i32.
@@ -528,3 +543,5 @@ def test_min_pooling_generic():
 
 
 test_min_pooling_generic()
+
+kernel_cache.report()
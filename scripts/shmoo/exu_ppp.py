@@ -118,49 +118,49 @@ if __name__ == '__main__':
     exu_metrics = execute_unit('n05t', 1.0, 1, 0, 0, 1, 1000, 0, 0, 0, 0, 1000)
     #exu_metrics.report("8bit ALU")
     #alu_ppp8 = exu_metrics.iops_per_watt * normalization_factor
-    alu_ppp8 = exu_metrics.energy['total']
+    alu_ppp8 = exu_metrics.occurrence_energy('total')
     # 16bit ALU is in the range of 250-500 gates
     exu_metrics = execute_unit('n05t', 1.0, 2, 0, 0, 1, 1000, 0, 0, 0, 0, 1000)
     #exu_metrics.report("16bit ALU")
     #alu_ppp16 = exu_metrics.iops_per_watt * normalization_factor
-    alu_ppp16 = exu_metrics.energy['total']
+    alu_ppp16 = exu_metrics.occurrence_energy('total')
     # 32bit ALU is in the range of 500-1000 gates
     exu_metrics = execute_unit('n05t', 1.0, 4, 0, 0, 1, 1000, 0, 0, 0, 0, 1000)
     #exu_metrics.report("32bit ALU")
     #alu_ppp32 = exu_metrics.iops_per_watt * normalization_factor
-    alu_ppp32 = exu_metrics.energy['total']
+    alu_ppp32 = exu_metrics.occurrence_energy('total')
 
     # 8bit FPU is in the range of 200-400 gates
     exu_metrics = execute_unit('n05t', 1.0, 1, 0, 0, 0, 0, 1, 1000, 0, 0, 1000)
     #exu_metrics.report("8bit FPU")
     #fpu_ppp8 = exu_metrics.flops_per_watt * normalization_factor
-    fpu_ppp8 = exu_metrics.energy['total']
+    fpu_ppp8 = exu_metrics.occurrence_energy('total')
     # 16bit FPU is in the range of 1000-2000 gates
     exu_metrics = execute_unit('n05t', 1.0, 2, 0, 0, 0, 0, 1, 1000, 0, 0, 1000)
     #exu_metrics.report("8bit FPU")
     #fpu_ppp16 = exu_metrics.flops_per_watt * normalization_factor
-    fpu_ppp16 = exu_metrics.energy['total']
+    fpu_ppp16 = exu_metrics.occurrence_energy('total')
     # 32bit FPU is in the range of 10'000-20'000 gates
     exu_metrics = execute_unit('n05t', 1.0, 4, 0, 0, 0, 0, 1, 1000, 0, 0, 1000)
     exu_metrics.report("32-bit FPU")
     #fpu_ppp32 = exu_metrics.flops_per_watt * normalization_factor
-    fpu_ppp32 = exu_metrics.energy['total']
+    fpu_ppp32 = exu_metrics.occurrence_energy('total')
 
     # AVX-512 style SIMD FPU is 16x the size of a 32bit FPU, and thus in the range of 160'000-320'000 gates
     exu_metrics = execute_unit('n05t', 1.0, 4, 0, 0, 0, 0, 64, 1000, 0, 0, 1000)
     exu_metrics.report("AVX-512 SIMD")
     #avx_ppp512 = exu_metrics.flops_per_watt * normalization_factor
-    avx_ppp512 = exu_metrics.energy['total']
+    avx_ppp512 = exu_metrics.occurrence_energy('total')
 
     # CPU executing a memory bound BLAS L2 matvec
     spm_metrics = spm_matvec()
     #spm = spm_metrics.flops_per_watt * normalization_factor
-    spm = spm_metrics.energy['total']
+    spm = spm_metrics.occurrence_energy('total')
 
     # GPU executing a memory bound BLAS L2 matvec
     gpu_metrics = gpu_matvec()
     #gpu = gpu_metrics.flops_per_watt * normalization_factor
-    gpu = gpu_metrics.energy['total']
+    gpu = gpu_metrics.occurrence_energy('total')
 
 
     performance_per_watt = False
@@ -0,0 +1,23 @@
+# tests/esim/conftest.py
+import os
+
+import pytest
+
+from energysim.database.gpu_energy import GraphicsProcessingUnitEnergyDatabase
+from energysim.database.spm_energy import StoredProgramMachineEnergyDatabase
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'data')
+
+
+@pytest.fixture
+def spm_energies():
+    db = StoredProgramMachineEnergyDatabase()
+    db.load_data(os.path.join(DATA_DIR, 'spm_energy.csv'))
+    return db.lookupEnergySet('n14t', 64)
+
+
+@pytest.fixture
+def gpu_energies():
+    db = GraphicsProcessingUnitEnergyDatabase()
+    db.load_data(os.path.join(DATA_DIR, 'gpu_energy.csv'))
+    return db.lookupEnergySet('n07t', 64)
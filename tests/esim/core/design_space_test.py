@@ -0,0 +1,102 @@
+# tests/esim/core/design_space_test.py
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from energysim.core.design_space import explore, parameter_grid, snapshot_database
+from energysim.database.energy_store import compile_snapshot
+from energysim.database.spm_energy import StoredProgramMachineEnergyDatabase
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'data')
+
+
+def evaluate_product(parameters: dict, rng: np.random.Generator, context) -> dict:
+    return {'product': parameters['rows'] * parameters['cols']}
+
+
+def sample_uniform(nr_samples: int, rng: np.random.Generator) -> dict:
+    return {'x': rng.random(nr_samples)}
+
+
+def evaluate_square(parameters: dict, rng: np.random.Generator, context) -> dict:
+    return {'x': parameters['x'], 'square': parameters['x'] ** 2}
+
+
+def evaluate_fma_energy(parameters: dict, rng: np.random.Generator, db) -> dict:
+    fma = db.lookupEnergySet('n14t', 64).fma32b
+    return {'energy': parameters['fmas'] * fma}
+
+
+def evaluate_half(parameters: dict, rng: np.random.Generator, context) -> dict:
+    # integer results for the first shard, floats for the others
+    n = parameters['n']
+    return {'half': n // 2 if n[0] == 0 else n / 2}
+
+
+def test_parameter_grid():
+    """
+    A grid holds every combination of the axes, one vector per parameter
+    """
+    grid = parameter_grid(rows=[1, 2, 3], cols=[10, 20])
+
+    assert len(grid['rows']) == 6
+    assert list(zip(grid['rows'], grid['cols']))[:3] == [(1, 10), (1, 20), (2, 10)]
+
+@pytest.mark.parametrize('max_workers', [0, 2])
+def test_grid_results_in_design_point_order(max_workers):
+    """
+    Results land at the offset of their design point, however shards complete
+    """
+    grid = parameter_grid(rows=np.arange(1, 40), cols=np.arange(1, 30))
+    df = explore(evaluate_product, grid, max_workers=max_workers, shard_size=50)
+
+    np.testing.assert_array_equal(df['product'].to_numpy(), grid['rows'] * grid['cols'])
+
+def test_sampler_is_independent_of_workers():
+    """
+    For a given seed and shard size, serial and parallel explorations draw the same samples
+    """
+    serial = explore(evaluate_square, sampler=sample_uniform, nr_samples=1000, max_workers=0, shard_size=100, seed=42)
+    parallel = explore(evaluate_square, sampler=sample_uniform, nr_samples=1000, max_workers=2, shard_size=100, seed=42)
+
+    assert len(serial) == 1000
+    assert serial.equals(parallel)
+    np.testing.assert_allclose(serial['square'], serial['x'] ** 2)
+
+def test_workers_share_snapshot(tmp_path):
+    """
+    The energy tables reach the workers as a memory-mapped snapshot
+    """
+    csv_file = str(tmp_path / 'spm_energy.csv')
+    shutil.copyfile(os.path.join(DATA_DIR, 'spm_energy.csv'), csv_file)
+    snapshot = compile_snapshot(csv_file)
+    fma = snapshot_database(StoredProgramMachineEnergyDatabase, snapshot).lookupEnergySet('n14t', 64).fma32b
+
+    df = explore(evaluate_fma_energy, {'fmas': np.arange(100)},
+                 context_factory=snapshot_database,
+                 context_args=(StoredProgramMachineEnergyDatabase, snapshot, csv_file),
+                 max_workers=2)
+
+    np.testing.assert_allclose(df['energy'], np.arange(100) * fma)
+
+    # workers given the CSV file reject a snapshot that is stale
+    with open(csv_file, 'a') as f:
+        f.write('\n')
+    with pytest.raises(ValueError):
+        snapshot_database(StoredProgramMachineEnergyDatabase, snapshot, csv_file)
+
+def test_columns_take_the_widest_shard_type():
+    """
+    A float result of a later shard is not truncated to the integer type of the first
+    """
+    df = explore(evaluate_half, {'n': np.arange(30)}, max_workers=0, shard_size=10)
+
+    assert df['half'].dtype == np.float64
+    np.testing.assert_array_equal(df['half'][10:], np.arange(10, 30) / 2)
+    np.testing.assert_array_equal(df['half'][:10], np.arange(10) // 2)
+
+def test_missing_design_points():
+    with pytest.raises(ValueError):
+        explore(evaluate_square, sampler=sample_uniform)
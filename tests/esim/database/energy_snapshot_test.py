@@ -0,0 +1,73 @@
+# tests/esim/database/energy_snapshot_test.py
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from energysim.database.energy_store import EnergyStore, compile_snapshot, read_energy_table
+from energysim.database.spm_energy import StoredProgramMachineEnergyDatabase
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'data')
+
+
+@pytest.fixture
+def spm_csv_file(tmp_path):
+    """
+    Private copy of the SPM energy table, so tests can modify it
+    """
+    csv_file = tmp_path / 'spm_energy.csv'
+    shutil.copy(os.path.join(DATA_DIR, 'spm_energy.csv'), csv_file)
+    return str(csv_file)
+
+def test_snapshot_round_trip(spm_csv_file):
+    """
+    A snapshot maps the same energy matrix as the CSV it was compiled from
+    """
+    snapshot = compile_snapshot(spm_csv_file)
+    assert snapshot.endswith('spm_energy.snapshot')
+
+    reference = EnergyStore.from_dataframe(read_energy_table(spm_csv_file))
+    store = EnergyStore.from_snapshot(snapshot, spm_csv_file)
+
+    assert isinstance(store.values, np.memmap)
+    assert not store.values.flags.writeable
+    assert store.nodes == reference.nodes
+    assert store.columns == reference.columns
+    np.testing.assert_array_equal(store.values, reference.values)
+
+def test_stale_snapshot(spm_csv_file):
+    """
+    Snapshots are rejected once their CSV changes
+    """
+    snapshot = compile_snapshot(spm_csv_file)
+    with open(spm_csv_file, 'a') as f:
+        f.write("n03t, 1.00, 1.00, 1.00, 0.10, 1.00, 0.50, 2.00, 2.00, 4.00, 0.10, 0.10, 1.00, 2.00, 2.00, 4.00, 4.00, 8.00, 10.00, 15.00\n")
+
+    with pytest.raises(ValueError):
+        EnergyStore.from_snapshot(snapshot, spm_csv_file)
+
+def test_invalid_snapshot(tmp_path):
+    """
+    Files that are not snapshots are rejected
+    """
+    not_a_snapshot = tmp_path / 'energy.snapshot'
+    not_a_snapshot.write_bytes(b'node,fetch\nn14t,1.0\n')
+    with pytest.raises(ValueError):
+        EnergyStore.from_snapshot(str(not_a_snapshot))
+
+def test_database_load_snapshot(spm_csv_file):
+    """
+    A database loaded from a snapshot produces the same energy sets as one loaded from CSV
+    """
+    snapshot = compile_snapshot(spm_csv_file)
+    csv_db = StoredProgramMachineEnergyDatabase()
+    csv_db.load_data(spm_csv_file)
+    snapshot_db = StoredProgramMachineEnergyDatabase()
+    snapshot_db.load_snapshot(snapshot, spm_csv_file)
+
+    expected = csv_db.lookupEnergySet('n07t', 64)
+    energies = snapshot_db.lookupEnergySet('n07t', 64)
+    assert snapshot_db.data is None
+    for field in ['instruction', 'fma32b', 'register_write', 'l1_write', 'l3_read', 'dram_read']:
+        assert getattr(energies, field) == getattr(expected, field)
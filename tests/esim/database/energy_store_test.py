@@ -0,0 +1,80 @@
+# tests/esim/database/energy_store_test.py
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from energysim.database.energy_store import EnergyStore
+from energysim.database.exu_energy import ExecutionUnitEnergyDatabase
+from energysim.database.gpu_energy import GraphicsProcessingUnitEnergyDatabase
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'data')
+
+
+@pytest.fixture
+def energy_table():
+    """
+    Small energy table with the layout of the energy CSV files
+    """
+    return pd.DataFrame({
+        'node': ['n14l', 'n14t', 'n07t'],
+        'fetch': [5.0, 7.5, 3.0],
+        'decode': [2.0, 3.5, 2.0],
+        'fma32b': [3.0, 4.0, 3.5],
+    })
+
+def test_row_lookup(energy_table):
+    """
+    A node lookup is a row of the energy matrix, addressable by event name
+    """
+    store = EnergyStore.from_dataframe(energy_table)
+
+    assert store.values.dtype == np.float64
+    assert store.values.shape == (3, 3)
+    row = store.row('n14t')
+    assert row['fetch'] == 7.5
+    assert row['fma32b'] == 4.0
+
+def test_bulk_lookup(energy_table):
+    """
+    A lookup of N nodes returns an N x events matrix
+    """
+    store = EnergyStore.from_dataframe(energy_table)
+
+    table = store.rows(['n07t', 'n14l', 'n07t'])
+    assert table.shape == (3, 3)
+    np.testing.assert_array_equal(table[:, store.column_index['fetch']], [3.0, 5.0, 3.0])
+
+    selected = store.rows(['n14t', 'n14l'], ['fma32b', 'fetch'])
+    np.testing.assert_array_equal(selected, [[4.0, 7.5], [3.0, 5.0]])
+    np.testing.assert_array_equal(store.column('decode'), [2.0, 3.5, 2.0])
+
+def test_unknown_node(energy_table):
+    """
+    Unsupported process nodes are reported
+    """
+    store = EnergyStore.from_dataframe(energy_table)
+    with pytest.raises(ValueError):
+        store.row('n99x')
+    with pytest.raises(ValueError):
+        store.rows(['n14t', 'n99x'])
+
+def test_databases_delegate_to_store():
+    """
+    Energy databases derive their energy sets from the columnar store
+    """
+    gpu_db = GraphicsProcessingUnitEnergyDatabase()
+    with pytest.raises(ValueError):
+        gpu_db.lookupEnergyTable(['n07t'])
+    gpu_db.load_data(os.path.join(DATA_DIR, 'gpu_energy.csv'))
+    gpu_energies = gpu_db.lookupEnergySet('n07t', 64)
+    assert gpu_energies.instruction == pytest.approx(2.0 + 2.0)
+    assert gpu_energies.gmem_read == pytest.approx(64 * 8 * 15.0)
+
+    exu_db = ExecutionUnitEnergyDatabase()
+    exu_db.load_data(os.path.join(DATA_DIR, 'exu_energy.csv'))
+    exu_energies = exu_db.lookupEnergySet('n14t', 4)
+    assert exu_energies.fpu == pytest.approx(1.32 * 4)
+    table = exu_db.lookupEnergyTable(['n28t', 'n14t'], ['fpu8'])
+    np.testing.assert_array_equal(table[:, 0], [1.95, 1.32])
@@ -0,0 +1,87 @@
+# tests/esim/database/spm_energy_test.py
+import os
+
+import numpy as np
+import pytest
+
+from energysim.database.spm_energy import StoredProgramMachineEnergyDatabase
+from energysim.models.design_category import DesignCategory
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'data')
+
+
+@pytest.fixture
+def spm_database():
+    """
+    Energy database loaded with the reference SPM energy table
+    """
+    db = StoredProgramMachineEnergyDatabase()
+    db.load_data(os.path.join(DATA_DIR, 'spm_energy.csv'))
+    return db
+
+def test_lookup_is_cached(spm_database):
+    """
+    Repeated lookups of the same (node, cache line size) share one energy set
+    """
+    first = spm_database.lookupEnergySet('n14t', 64)
+    second = spm_database.lookupEnergySet('n14t', 64)
+
+    assert first is second
+    assert spm_database.cache_misses == 1
+    assert spm_database.cache_hits == 1
+
+    other = spm_database.lookupEnergySet('n14t', 32)
+    assert other is not first
+    assert spm_database.cache_misses == 2
+
+def test_lookup_values(spm_database):
+    """
+    Energies are scaled from the per-bit table entries
+    """
+    energies = spm_database.lookupEnergySet('n14t', 64)
+
+    assert energies.instruction == pytest.approx(7.5 + 3.5 + 5.0)
+    assert energies.fma32b == pytest.approx(4.0)
+    assert energies.register_read == pytest.approx(0.5 * 32)
+    assert energies.l2_read == pytest.approx(64 * 8 * 4.0)
+    assert energies.dram_write == pytest.approx(64 * 8 * 20.0)
+
+def test_energy_set_is_immutable(spm_database):
+    """
+    Shared energy sets cannot be modified by their users
+    """
+    energies = spm_database.lookupEnergySet('n14t', 64)
+    with pytest.raises(AttributeError):
+        energies.fma32b = 0.0
+
+def test_unknown_node(spm_database):
+    """
+    Unsupported process nodes are reported
+    """
+    with pytest.raises(ValueError):
+        spm_database.lookupEnergySet('n99x', 64)
+
+def test_reload_clears_cache(spm_database):
+    """
+    Loading a new table invalidates previously cached energy sets
+    """
+    spm_database.lookupEnergySet('n14t', 64)
+    spm_database.load_data(os.path.join(DATA_DIR, 'spm_energy.csv'))
+    assert spm_database.cache_info().currsize == 0
+
+def test_randomized_samples(spm_database):
+    """
+    A batch of randomized designs is reproducible and stays in the corner of its category
+    """
+    energies = spm_database.lookupEnergySet('n14t', 64)
+    samples = energies.generate_randomized_samples('batch', 0.25, DesignCategory.EnergyEfficient, 1000, seed=3)
+    again = energies.generate_randomized_samples('batch', 0.25, DesignCategory.EnergyEfficient, 1000, seed=3)
+
+    assert samples.fma32b.shape == (1000,)
+    np.testing.assert_array_equal(samples.dram_read, again.dram_read)
+    assert np.all(samples.l1_read >= 0.75 * energies.l1_read)
+    assert np.all(samples.l1_read <= energies.l1_read)
+    assert samples.cache_line_size == 64
+    # derived energies are vectors of the randomized energies
+    np.testing.assert_allclose(samples.instruction, samples.fetch + samples.decode + samples.dispatch)
+    np.testing.assert_array_equal(samples.execute, samples.fma32b)
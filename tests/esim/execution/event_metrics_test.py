@@ -0,0 +1,84 @@
+# tests/esim/execution/event_metrics_test.py
+import numpy as np
+import pytest
+
+from energysim.execution.gpu_metrics import GraphicsProcessingUnitMetrics
+from energysim.execution.spm_metrics import StoredProgramMachineMetrics
+
+
+def test_record_and_consolidate():
+    """
+    Recorded events and energies roll up into their target key
+    """
+    metrics = StoredProgramMachineMetrics('spm')
+    metrics.record('l1_read', 10, 2.0)
+    metrics.record('l1_write', 4, 3.0)
+    metrics.consolidate('l1', ['l1_read', 'l1_write'])
+
+    assert metrics.gather('l1') == (14, 32.0)
+    assert metrics.occurrence('l1_read') == 10
+    assert metrics.occurrence_energy('l1_write') == 12.0
+    assert metrics.gather('no_such_key') == (0, 0)
+
+def test_keys_are_class_level():
+    """
+    Keys and offsets are shared by all instances, and instances have no __dict__
+    """
+    metrics = GraphicsProcessingUnitMetrics('gpu')
+
+    assert metrics.keys is GraphicsProcessingUnitMetrics.keys
+    assert GraphicsProcessingUnitMetrics.key_offset['total'] == len(GraphicsProcessingUnitMetrics.keys) - 1
+    assert not hasattr(metrics, '__dict__')
+    with pytest.raises(AttributeError):
+        metrics.not_an_attribute = 0
+
+def test_allocate_shares_buffer():
+    """
+    Metrics of a batch record straight into the rows of the shared buffers
+    """
+    metrics, events, energy = StoredProgramMachineMetrics.allocate(['a', 'b', 'c'])
+    for i, m in enumerate(metrics):
+        m.record('fma', i + 1, 0.5)
+
+    offset = StoredProgramMachineMetrics.key_offset['fma']
+    np.testing.assert_array_equal(events[:, offset], [1, 2, 3])
+    np.testing.assert_array_equal(energy[:, offset], [0.5, 1.0, 1.5])
+
+    stacked_events, stacked_energy = StoredProgramMachineMetrics.stack(metrics)
+    np.testing.assert_array_equal(stacked_events, events)
+    np.testing.assert_array_equal(stacked_energy, energy)
+
+def test_rollup_matches_consolidation_steps():
+    """
+    The aggregation matrix gives the same totals as applying the consolidation steps one by one
+    """
+    rng = np.random.default_rng(7)
+    leaves = ['instruction', 'execute', 'register_read', 'register_write', 'l1_read', 'l1_write',
+              'smem_read', 'smem_write', 'gmem_read', 'gmem_write']
+    rolled = GraphicsProcessingUnitMetrics('rolled')
+    stepped = GraphicsProcessingUnitMetrics('stepped')
+    for key in leaves:
+        occurrences, energy = rng.integers(1, 1000), rng.random()
+        rolled.record(key, occurrences, energy)
+        stepped.record(key, occurrences, energy)
+
+    rolled.rollup()
+    for target_key, source_keys in GraphicsProcessingUnitMetrics.consolidation:
+        stepped.consolidate(target_key, source_keys)
+
+    np.testing.assert_allclose(rolled.events, stepped.events)
+    np.testing.assert_allclose(rolled.energy, stepped.energy)
+    assert rolled.occurrence_energy('total') == pytest.approx(sum(rolled.occurrence_energy(key) for key in leaves))
+
+def test_rollup_batch():
+    """
+    Rolling up a batch is one matrix product over the rows of the batch
+    """
+    metrics, events, energy = StoredProgramMachineMetrics.allocate(['a', 'b'])
+    metrics[0].record('dram_read', 3, 10.0)
+    metrics[1].record('l1_write', 5, 1.0)
+    rolled_events, rolled_energy = StoredProgramMachineMetrics.rollup_batch(events, energy)
+
+    total = StoredProgramMachineMetrics.key_offset['total']
+    np.testing.assert_array_equal(rolled_events[:, total], [3, 5])
+    np.testing.assert_array_equal(rolled_energy[:, total], [30.0, 5.0])
@@ -0,0 +1,46 @@
+# tests/esim/linalg/matrix_test.py
+import numpy as np
+import pytest
+
+from energysim.linalg.matrix import Matrix
+from energysim.linalg.vector import Vector
+
+
+def test_matrix_api():
+    """
+    Construction, indexing and element access keep the list-based semantics
+    """
+    matrix = Matrix([[1, 2, 3], [4, 5, 6]])
+
+    assert matrix.shape == (2, 3)
+    assert matrix[1][2] == 6
+    assert matrix.get(0, 1) == 2.0
+    assert matrix.transpose().shape == (3, 2)
+    assert (matrix + matrix).get(1, 1) == 10.0
+    assert Matrix(rows=2, cols=2, fill_value=1.5).values.sum() == 6.0
+    with pytest.raises(ValueError):
+        Matrix([[1, 2], [3]])
+    with pytest.raises(IndexError):
+        matrix.get(2, 0)
+
+def test_slices_are_views():
+    """
+    Slicing shares the storage of the original, copy does not
+    """
+    matrix = Matrix([[1, 2], [3, 4], [5, 6]])
+    rows = matrix[1:3]
+    rows.set(0, 0, 30)
+    independent = matrix.copy()
+    independent.set(0, 0, 10)
+
+    assert matrix.get(1, 0) == 30.0
+    assert matrix.get(0, 0) == 1.0
+    assert rows.values.base is matrix.values
+
+    vector = Vector([1, 2, 3, 4])
+    head = vector[0:2]
+    head[1] = 20
+
+    assert vector.get(1) == 20.0
+    assert vector.dot(Vector([1, 1, 1, 1])) == 28.0
+    assert vector.magnitude() == pytest.approx(np.sqrt(1 + 400 + 9 + 16))
@@ -0,0 +1,88 @@
+# tests/esim/models/cache_sampling_test.py
+import pytest
+
+from energysim.models.cache_sampling import simulate_sampled
+from energysim.models.cache_simulator import CacheHierarchy, CacheLevel
+from energysim.models.design_category import DesignCategory
+from energysim.models.loop_nest import matmul_loop_nest, matvec_loop_nest
+from energysim.models.spm_configuration import StoredProgramMachineConfiguration
+
+
+def spm_hierarchy() -> 'CacheHierarchy':
+    config = StoredProgramMachineConfiguration(DesignCategory.HighVolume, 2.5, 3.2, 4, 64, 64, 1, 8,
+                                               l1_size_in_bytes=8 * 1024, l2_size_in_bytes=64 * 1024,
+                                               l3_size_in_bytes=256 * 1024)
+    return CacheHierarchy.from_configuration(config)
+
+
+def test_set_sampling_matches_full_simulation():
+    """
+    A quarter of the sets estimates the traffic of every level within a few percent
+    """
+    nest = matmul_loop_nest(48, 96, 80)
+    full = spm_hierarchy().simulate(nest.trace()).events()
+    sampled = simulate_sampled(nest, spm_hierarchy(), set_fraction=0.25, seed=1)
+
+    assert sampled.sampled_fraction < 0.3
+    for key in ('l1_read', 'l2_read', 'l3_read', 'dram_read'):
+        assert sampled.estimates[key] == pytest.approx(full[key], rel=0.05)
+
+def test_time_sampling_matches_full_simulation():
+    """
+    Windows with a warm-up estimate the streaming traffic of a matvec, and the write-back of its output
+    """
+    nest = matvec_loop_nest(1024, 2048)
+    hierarchy = spm_hierarchy().simulate(nest.trace())
+    full = hierarchy.events()
+    sampled = simulate_sampled(nest, spm_hierarchy(), set_fraction=0.5, windows=8,
+                               window_iterations=32 * 1024, seed=4)
+
+    assert sampled.method == 'time'
+    assert sampled.sampled_fraction < 0.2
+    low, high = sampled.interval('dram_read')
+    assert low <= sampled.estimates['dram_read'] <= high
+    assert sampled.estimates['dram_read'] == pytest.approx(full['dram_read'], rel=0.03)
+    low, high = sampled.interval('dram_write')
+    assert low <= full['dram_write'] <= high
+    assert sampled.hit_rates['l1'] == pytest.approx(hierarchy.levels[0].hit_rate, abs=0.01)
+
+def test_time_sampling_of_a_matmul():
+    """
+    The warm-up covers the reuse of B, the first row loads B once, and C is written back once
+    """
+    nest = matmul_loop_nest(96, 96, 96)
+    hierarchy = spm_hierarchy().simulate(nest.trace())
+    full = hierarchy.events()
+    sampled = simulate_sampled(nest, spm_hierarchy(), set_fraction=1.0, windows=8,
+                               window_iterations=8 * 1024, seed=0)
+
+    assert sampled.method == 'time'
+    assert sampled.sampled_fraction < 0.1
+    for key in ('dram_read', 'dram_write'):
+        low, high = sampled.interval(key)
+        assert low <= full[key] <= high
+        assert sampled.estimates[key] == pytest.approx(full[key], rel=0.05)
+    assert sampled.hit_rates['l1'] == pytest.approx(hierarchy.levels[0].hit_rate, abs=0.01)
+
+    # a warm-up shorter than the reuse of B falls back to set sampling, and says which warm-up it needs
+    with pytest.warns(UserWarning, match=f'at least {nest.reuse_span()} iterations'):
+        fallback = simulate_sampled(nest, spm_hierarchy(), set_fraction=0.25, windows=8,
+                                    window_iterations=8 * 1024, warmup_iterations=1024, seed=0)
+    assert fallback.method == 'sets'
+    assert fallback.estimates['dram_write'] == pytest.approx(full['dram_write'], rel=0.05)
+
+    # windows that do not fit in the iteration space fall back as well
+    with pytest.warns(UserWarning, match='do not fit'):
+        assert simulate_sampled(nest, spm_hierarchy(), set_fraction=0.25, windows=1000,
+                                window_iterations=8 * 1024, seed=0).method == 'sets'
+
+    with pytest.raises(ValueError):
+        simulate_sampled(nest, spm_hierarchy(), windows=8)
+
+def test_set_counts_must_nest():
+    """
+    Set sampling needs set counts that are multiples of the sets of the first level
+    """
+    hierarchy = CacheHierarchy([CacheLevel('l1', 64 * 64 * 2, 64, 2), CacheLevel('l2', 96 * 64 * 4, 64, 4)])
+    with pytest.raises(ValueError):
+        simulate_sampled(matvec_loop_nest(64, 64), hierarchy)
@@ -0,0 +1,106 @@
+# tests/esim/models/cache_simulator_test.py
+import os
+from collections import OrderedDict
+
+import numpy as np
+import pytest
+
+from energysim.database.spm_energy import StoredProgramMachineEnergyDatabase
+from energysim.execution.spm_metrics import StoredProgramMachineMetrics
+from energysim.models.cache_simulator import CacheHierarchy, CacheLevel
+from energysim.models.design_category import DesignCategory
+from energysim.models.loop_nest import matmul_loop_nest, matvec_loop_nest
+from energysim.models.spm_configuration import StoredProgramMachineConfiguration
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'data')
+
+
+def reference_counts(levels: list, addresses, writes) -> list:
+    # one access at a time through OrderedDict LRU sets, (reads, writes, read misses, write misses, write-backs)
+    sets = [[OrderedDict() for _ in range(capacity // (line * ways))] for capacity, line, ways in levels]
+    counts = [[0, 0, 0, 0, 0] for _ in levels]
+
+    def access(k, address, write):
+        if k == len(levels):
+            return
+        capacity, line_size, ways = levels[k]
+        line = address // line_size
+        cache_set = sets[k][line % len(sets[k])]
+        counts[k][1 if write else 0] += 1
+        if line in cache_set:
+            cache_set.move_to_end(line)
+            cache_set[line] |= write
+            return
+        counts[k][3 if write else 2] += 1
+        if len(cache_set) == ways:
+            victim, dirty = cache_set.popitem(last=False)
+            if dirty:
+                counts[k][4] += 1
+                access(k + 1, victim * line_size, True)
+        access(k + 1, line * line_size, False)
+        cache_set[line] = write
+
+    for address, write in zip(addresses.tolist(), writes.tolist()):
+        access(0, address, write)
+    return counts
+
+
+def test_matches_reference_lru():
+    """
+    The vectorized replay counts the same hits, misses, and write-backs as an access at a time LRU
+    """
+    levels = [(1024, 64, 2), (4096, 64, 4)]
+    rng = np.random.default_rng(7)
+    addresses = rng.integers(0, 1 << 14, 20000) * 4
+    writes = rng.random(20000) < 0.3
+
+    hierarchy = CacheHierarchy([CacheLevel(f'l{i + 1}', *level) for i, level in enumerate(levels)])
+    hierarchy.simulate([(addresses[:7000], writes[:7000]), (addresses[7000:], writes[7000:])], flush=False)
+
+    simulated = [[level.reads, level.writes, level.read_misses, level.write_misses, level.writebacks]
+                 for level in hierarchy.levels]
+    assert simulated == reference_counts(levels, addresses, writes)
+
+def test_loop_nest_trace():
+    """
+    The trace of a nest is in program order, with the accumulator stored once per row
+    """
+    nest = matvec_loop_nest(3, 4)
+    addresses, writes = (np.concatenate(parts) for parts in zip(*nest.trace(chunk_size=5)))
+
+    assert len(addresses) == nest.references() == 3 * 4 * 2 + 3
+    assert np.count_nonzero(writes) == 3
+    np.testing.assert_array_equal(np.flatnonzero(writes), [8, 17, 26])
+    assert addresses[0] == 0 and addresses[2] == 4
+
+def test_resident_operands_stream_once():
+    """
+    When the operands fit in the last level, the memory sees only compulsory misses and the final write-backs
+    """
+    config = StoredProgramMachineConfiguration(DesignCategory.HighVolume, 2.5, 3.2, 4, 64, 64, 1, 8)
+    hierarchy = CacheHierarchy.from_configuration(config).simulate(matmul_loop_nest(64, 64, 64).trace())
+
+    events = hierarchy.events()
+    lines = 64 * 64 * 4 // 64
+    assert events['dram_read'] == 3 * lines
+    assert events['dram_write'] == lines
+    assert events['l1_read'] == 64 * 64 * 64 * 2 + 64 * 64
+
+def test_record_into_spm_metrics():
+    """
+    Simulated events plug into the SPM metrics, and roll up into data movement
+    """
+    db = StoredProgramMachineEnergyDatabase()
+    db.load_data(os.path.join(DATA_DIR, 'spm_energy.csv'))
+    attributes = db.lookupEnergySet('n14t', 64)
+    config = StoredProgramMachineConfiguration(DesignCategory.HighVolume, 2.5, 3.2, 4, 64, 64, 1, 8)
+    hierarchy = CacheHierarchy.from_configuration(config).simulate(matvec_loop_nest(256, 256).trace())
+
+    spm_metrics = StoredProgramMachineMetrics('simulated matvec')
+    hierarchy.record(spm_metrics, attributes)
+    spm_metrics.rollup()
+
+    events = hierarchy.events()
+    expected = sum(count * getattr(attributes, key) for key, count in events.items())
+    assert spm_metrics.occurrence('l2_read') == events['l2_read']
+    assert spm_metrics.occurrence_energy('data_movement') == pytest.approx(expected)
@@ -0,0 +1,120 @@
+# tests/esim/models/datatype_test.py
+import os
+
+import pytest
+
+from energysim.database.exu_energy import ExecutionUnitEnergyDatabase
+from energysim.models.datatype import BF16, FP16, FP32, INT8, Precision, apply_precision, datatype
+from energysim.models.design_category import DesignCategory
+from energysim.models.gpu_configuration import GraphicsProcessingUnitConfiguration
+from energysim.models.spm_configuration import StoredProgramMachineConfiguration
+from energysim.operator.conv import conv2d_nhwc_gpu
+from energysim.operator.flat_matmul import flat_matmul_spm
+from energysim.operator.flat_matvec import flat_matvec_gpu, flat_matvec_spm
+from energysim.operator.flat_matvec_batch import flat_matvec_gpu_batch, flat_matvec_spm_batch
+from energysim.operator.tiled_matmul import square_tile, tile_traffic, tiled_matmul_spm
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'data')
+
+
+def spm_config():
+    return StoredProgramMachineConfiguration(DesignCategory.HighVolume, 2.5, 3.2, 4, 64, 64, 1, 8, fma_units=16)
+
+
+def test_energy_scaling(spm_energies):
+    """Multipliers scale with the square of the significand, adders and registers with the bits."""
+    assert FP16.multiplier_scale() == pytest.approx((11 / 24) ** 2)
+    assert INT8.multiplier_scale() == pytest.approx(1 / 16)
+    assert BF16.adder_scale() == pytest.approx(0.5)
+    assert datatype('f8E4M3FN').size == 1
+    with pytest.raises(ValueError):
+        datatype('fp7')
+
+    precision = Precision('fp8_e4m3', 'fp32')
+    assert (precision.accumulate, precision.output) == (FP32, FP32)
+    assert str(precision) == 'fp8_e4m3/fp32'
+
+    # FP32 is the characterized precision
+    fp32 = spm_energies.with_precision(Precision('fp32'))
+    for field in ('fma32b', 'execute', 'register_read', 'l1_read', 'dram_read'):
+        assert getattr(fp32, field) == pytest.approx(getattr(spm_energies, field))
+
+    fp16 = spm_energies.with_precision(Precision('fp16'))
+    assert fp16.fmul32b == pytest.approx(spm_energies.fmul32b * (11 / 24) ** 2)
+    assert fp16.fadd32b == pytest.approx(spm_energies.fadd32b / 2)
+    assert fp16.register_read == pytest.approx(spm_energies.register_read / 2)
+    assert fp16.l3_read == spm_energies.l3_read
+    assert fp16.identifier == 'n14t-fp16'
+
+    # an FP32 accumulator keeps the adder half of the fma at 32 bits
+    mixed = spm_energies.with_precision(precision)
+    fp8 = spm_energies.with_precision(Precision('fp8_e4m3'))
+    assert fp8.fma32b < mixed.fma32b < spm_energies.fma32b
+    assert mixed.fma32b - fp8.fma32b == pytest.approx(
+        spm_energies.fma32b * spm_energies.fadd32b * 0.75 / (spm_energies.fmul32b + spm_energies.fadd32b))
+    assert mixed.register_write == pytest.approx(spm_energies.register_write)
+
+    db = ExecutionUnitEnergyDatabase()
+    db.load_data(os.path.join(DATA_DIR, 'exu_energy.csv'))
+    reference = db.lookupEnergySet('n14t', 4, Precision('fp32'))
+    assert reference.fpu == pytest.approx(db.lookupEnergySet('n14t', 4).fpu)
+    assert db.lookupEnergySet('n14t', 1, Precision('int8', 'int32')).reg_write == pytest.approx(reference.reg_write)
+
+
+def test_bytes_per_line(spm_energies):
+    """Narrow operands pack more elements per line, wide accumulators fewer."""
+    assert square_tile(32 * 1024, 1, 4) == 73   # 73 * 73 * (1 + 1 + 4) <= 32K
+    assert square_tile(32 * 1024, 4) == square_tile(32 * 1024, 4, 4)
+    fills, writebacks = tile_traffic(256, 256, 256, 256, 256, 256, 1, 64, 4)
+    assert (fills, writebacks) == (2 * 256 * 256 // 64 + 256 * 256 * 4 // 64, 256 * 256 * 4 // 64)
+
+    fp32 = tiled_matmul_spm(512, 512, 512, spm_energies, spm_config())
+    energies, config = apply_precision(spm_energies, spm_config(), Precision('fp8_e4m3', 'fp32'))
+    assert (config.word_size, config.output_word_size, spm_config().output_word_size) == (1, 4, 4)
+    mixed = tiled_matmul_spm(512, 512, 512, energies, config)
+    assert mixed.occurrence('dram_read') < fp32.occurrence('dram_read')
+    assert mixed.occurrence('dram_write') == fp32.occurrence('dram_write') == 512 * 512 * 4 // 64
+    assert mixed.occurrence('fma') == fp32.occurrence('fma')
+    assert mixed.occurrence_energy('fma') < fp32.occurrence_energy('fma')
+    assert mixed.occurrence_energy('total') < fp32.occurrence_energy('total')
+
+
+def test_mixed_precision_on_gpu(gpu_energies):
+    """A BF16 convolution moves fewer bytes and spends less per operation, an FP32 accumulator adds some back."""
+    config = GraphicsProcessingUnitConfiguration(DesignCategory.HighVolume, 1.5, 2.0, 4, 64, 64, 8, 4, 128, 1024)
+    fp32 = conv2d_nhwc_gpu(1, 32, 32, 64, 64, 3, 3, gpu_energies, config, padding=1, algorithm='direct')
+    bf16 = conv2d_nhwc_gpu(1, 32, 32, 64, 64, 3, 3, *apply_precision(gpu_energies, config, 'bf16'), padding=1,
+                           algorithm='direct')
+    accumulate = conv2d_nhwc_gpu(1, 32, 32, 64, 64, 3, 3,
+                                 *apply_precision(gpu_energies, config, Precision('bf16', 'fp32')), padding=1,
+                                 algorithm='direct')
+    assert bf16.read_data + bf16.write_data < fp32.read_data + fp32.write_data
+    assert bf16.write_data < accumulate.write_data
+    assert bf16.read_data < accumulate.read_data < fp32.read_data
+    assert bf16.occurrence_energy('execute') < accumulate.occurrence_energy('execute') < \
+        fp32.occurrence_energy('execute')
+    assert bf16.occurrence_energy('total') < accumulate.occurrence_energy('total') < fp32.occurrence_energy('total')
+
+
+def test_flat_models_write_output_words(spm_energies, gpu_energies):
+    """The flat models read operand words, and write C and y in words of the output datatype."""
+    energies, config = apply_precision(spm_energies, spm_config(), Precision('fp8_e4m3', 'fp32'))
+    matmul = flat_matmul_spm(128, 128, 128, energies, config)
+    assert matmul.occurrence('dram_write') == 128 * 128 * 4 // 64
+    assert matmul.occurrence('dram_read') == 2 * 128 * 128 // 64 + 128 * 128 * 4 // 64
+
+    matvec = flat_matvec_spm(1024, 1024, energies, config)
+    assert matvec.occurrence('dram_write') == 1024 * 4 // 64
+    batch = flat_matvec_spm_batch(1024, 1024, energies, config.core_clock, config.memory_clock, config.word_size,
+                                  config.cache_line_size, config.memory_burst_size, config.memory_channels,
+                                  config.channel_width, output_word_size_in_bytes=config.output_word_size)
+    assert batch['dram_write_events'].iloc[0] == matvec.occurrence('dram_write')
+    assert batch['write_data'].iloc[0] == matvec.write_data
+
+    gpu_config = GraphicsProcessingUnitConfiguration(DesignCategory.HighVolume, 1.5, 2.0, 4, 64, 64, 8, 4, 128, 1024)
+    energies, gpu_config = apply_precision(gpu_energies, gpu_config, Precision('int8', 'int32'))
+    matvec = flat_matvec_gpu(1024, 1024, energies, gpu_config)
+    assert (matvec.read_data, matvec.write_data) == (1024 * 1024, 1024 * 4)
+    batch = flat_matvec_gpu_batch(1024, 1024, energies, 1.5, 2.0, 1, 64, 64, 8, 4, 128, 1024,
+                                  output_word_size_in_bytes=4)
+    assert batch['write_data'].iloc[0] == matvec.write_data
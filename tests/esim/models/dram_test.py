@@ -0,0 +1,70 @@
+# tests/esim/models/dram_test.py
+import numpy as np
+import pytest
+
+from energysim.models.dram import DramSimulator, transfer_time
+from energysim.models.dram_configuration import DynamicRandomAccessMemoryConfiguration
+
+
+def test_streaming_matches_the_peak_bandwidth():
+    """A sequential stream runs at the peak bandwidth in both modes, and replaces the 4 clocks per cache line."""
+    dram = DynamicRandomAccessMemoryConfiguration.part('DDR4-3200')
+    lines = 100_000
+    simulated = DramSimulator(dram).simulate(np.arange(lines) * 64, 64)
+    analytic = transfer_time(dram, lines, 64)
+    assert simulated.elapsed_time == pytest.approx(analytic, rel=1e-3)
+    assert simulated.bandwidth == pytest.approx(dram.peak_bandwidth, rel=1e-3)
+    assert simulated.row_hit_rate > 0.99
+
+    ddr = DynamicRandomAccessMemoryConfiguration.from_memory_parameters(3.2, 1, 8, 64)
+    assert transfer_time(ddr, 1_000_000, 64) == pytest.approx(1_000_000 * 4 / 3.2 * 1.0e-9, rel=1e-3)
+
+
+def test_random_access_and_closed_rows_are_slower():
+    """Row conflicts of random addresses, and an activation per burst of a closed row policy, cost bandwidth."""
+    dram = DynamicRandomAccessMemoryConfiguration.part('HBM2-2')
+    addresses = np.arange(50_000) * 64
+    stream = DramSimulator(dram).simulate(addresses, 64)
+    shuffled = DramSimulator(dram).simulate(np.random.default_rng(0).permutation(addresses) * 1024, 64)
+    assert shuffled.bandwidth < 0.5 * stream.bandwidth
+    assert shuffled.row_conflicts > 0.9 * shuffled.bursts
+
+    # an idle bank serves a row hit in tCL, a conflict in tRP + tRCD + tCL
+    spaced = np.arange(1000) * 200.0
+    hits = DramSimulator(dram).simulate(addresses[:1000] // 8, 64, arrivals_ns=spaced)
+    conflicts = DramSimulator(dram).simulate(addresses[:1000] * 1024, 64, arrivals_ns=spaced)
+    assert conflicts.average_latency_ns - hits.average_latency_ns == pytest.approx(
+        dram.precharge_ns + dram.activate_ns, rel=0.05)
+    assert transfer_time(dram, 50_000, 64, row_hit_rate=0.0) > transfer_time(dram, 50_000, 64)
+
+    closed = DynamicRandomAccessMemoryConfiguration.part('HBM2-2', row_policy='closed')
+    closed_stream = DramSimulator(closed).simulate(addresses, 64)
+    assert closed_stream.row_hits == 0
+    assert closed_stream.elapsed_time == pytest.approx(transfer_time(closed, 50_000, 64), rel=1e-3)
+    assert closed_stream.elapsed_time > stream.elapsed_time
+
+
+def test_random_access_agrees_in_both_modes():
+    """Random reads stall on banks that are still cycling, the analytic mode expects the same serialization."""
+    rng = np.random.default_rng(0)
+    for name in ('DDR4-3200', 'DDR5-4800', 'GDDR6-16', 'HBM2-2'):
+        for row_policy in ('open', 'closed'):
+            dram = DynamicRandomAccessMemoryConfiguration.part(name, row_policy=row_policy)
+            for footprint in (1 << 30, 1 << 20):
+                addresses = rng.integers(0, footprint, 20_000) // 64 * 64
+                simulated = DramSimulator(dram).simulate(addresses, 64)
+                analytic = transfer_time(dram, 20_000, 64, row_hit_rate=simulated.row_hit_rate)
+                assert analytic == pytest.approx(simulated.elapsed_time, rel=0.12)
+
+
+def test_channels_scale_the_bandwidth():
+    """Channels divide the transfer time of a stream, for arrays of channel counts in the analytic mode."""
+    dram = DynamicRandomAccessMemoryConfiguration.part('DDR5-4800')
+    channels = np.array([1, 2, 4, 8])
+    times = transfer_time(dram, 1_000_000, 64, memory_channels=channels)
+    assert times.shape == (4,)
+    np.testing.assert_allclose(times[0] / times, channels, rtol=1e-3)
+    for count in (2, 4):
+        scaled = DynamicRandomAccessMemoryConfiguration.part('DDR5-4800', memory_channels=count)
+        simulated = DramSimulator(scaled).simulate(np.arange(20_000) * 64, 64)
+        assert simulated.elapsed_time == pytest.approx(transfer_time(scaled, 20_000, 64), rel=1e-2)
@@ -0,0 +1,64 @@
+# tests/esim/models/interconnect_test.py
+import math
+
+import pytest
+
+from energysim.models.interconnect import Interconnect, torus_shape
+
+
+def test_topology_structure():
+    """Hops, diameter, and bisection of the ring, fat-tree, and torus."""
+    ring = Interconnect('ring')
+    assert ring.diameter(16) == 8
+    assert ring.average_hops(16) == pytest.approx(sum(min(d, 16 - d) for d in range(1, 16)) / 15)
+
+    fat_tree = Interconnect('fat-tree', radix=8)
+    assert fat_tree.levels(4) == 1 and fat_tree.levels(5) == 2 and fat_tree.levels(64) == 3
+    assert fat_tree.distance_hops(3, 64) == 2
+    assert fat_tree.distance_hops(4, 64) == 4
+    assert fat_tree.bisection_bandwidth(64) == pytest.approx(32 * 25.0e9)
+
+    torus = Interconnect('torus', dimensions=3)
+    assert torus_shape(64, 3) == (4, 4, 4)
+    assert torus_shape(100, 3) == (5, 5, 4)
+    assert torus.diameter(64) == 6
+    assert torus.average_hops(64) < ring.average_hops(64)
+
+    with pytest.raises(ValueError):
+        Interconnect('hypercube')
+
+
+def test_alpha_beta_collectives():
+    """The ring and recursive doubling algorithms follow their alpha-beta costs."""
+    nodes, size = 16, 1.0e6
+    ring = Interconnect('ring', link_bandwidth=10.0e9, link_latency_ns=100.0, software_overhead_ns=1000.0)
+    time, moved, byte_hops = ring.all_gather(size, nodes)
+    assert time == pytest.approx((nodes - 1) * (1.1e-6 + size / nodes / 10.0e9))
+    assert moved == pytest.approx((nodes - 1) * size)
+    assert byte_hops == moved
+
+    all_reduce = ring.all_reduce(size, nodes)
+    assert all_reduce[0] == pytest.approx(2 * time)
+    assert all_reduce[1] == pytest.approx(2 * moved)
+
+    fat_tree = Interconnect('fat-tree', link_bandwidth=10.0e9, radix=8)
+    time, moved, _ = fat_tree.all_gather(size, nodes)
+    assert moved == pytest.approx((nodes - 1) * size)
+    # log2(p) steps instead of p - 1, the same bytes per node
+    assert time < ring.all_gather(size, nodes)[0]
+    assert time == pytest.approx(2 * 1.2e-6 + 2 * 1.4e-6 + (nodes - 1) / nodes * size / 10.0e9)
+
+    # a small broadcast follows the binomial tree, a large one is a scatter and an all-gather
+    small = fat_tree.broadcast(64, nodes)
+    assert small[1] == pytest.approx((nodes - 1) * 64)
+    large = fat_tree.broadcast(1.0e9, nodes)
+    assert large[0] < math.log2(nodes) * 1.0e9 / 10.0e9
+    assert Interconnect('torus').all_reduce(size, 1) == (0.0, 0.0, 0.0)
+
+
+def test_collective_energy():
+    """Network interfaces inject and eject every byte, the links carry every byte-hop."""
+    interconnect = Interconnect('torus', link_energy_per_byte=40.0, nic_energy_per_byte=20.0)
+    network_read, network_write = interconnect.collective_energy((1.0e-6, 1000.0, 3000.0))
+    assert network_read == pytest.approx(20.0e3)
+    assert network_write == pytest.approx(20.0e3 + 120.0e3)
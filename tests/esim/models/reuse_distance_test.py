@@ -0,0 +1,59 @@
+# tests/esim/models/reuse_distance_test.py
+import numpy as np
+
+from energysim.models.cache_simulator import CacheHierarchy, CacheLevel
+from energysim.models.loop_nest import conv2d_loop_nest, matmul_loop_nest
+from energysim.models.reuse_distance import ReuseProfile, reuse_sweep, stack_distances
+
+
+def test_stack_distances():
+    """
+    Distances count the distinct lines since the previous reference to the same line
+    """
+    rng = np.random.default_rng(3)
+    lines = rng.integers(0, 40, 2000)
+
+    expected = []
+    for t in range(len(lines)):
+        previous = np.flatnonzero(lines[:t] == lines[t])
+        expected.append(len(np.unique(lines[previous[-1] + 1:t])) if len(previous) > 0 else -1)
+    np.testing.assert_array_equal(stack_distances(lines), expected)
+
+def test_profile_matches_fully_associative_cache():
+    """
+    One profile answers the misses and write-backs of every capacity of a fully associative LRU cache
+    """
+    rng = np.random.default_rng(5)
+    addresses = rng.integers(0, 300 * 64, 20000)
+    writes = rng.random(20000) < 0.25
+    profile = ReuseProfile.from_trace([(addresses, writes)], 64)
+
+    for lines in (1, 4, 32, 128, 512):
+        level = CacheLevel('l1', lines * 64, 64, lines)
+        CacheHierarchy([level]).simulate([(addresses, writes)])
+        assert profile.misses(lines * 64) == level.misses
+        assert profile.writebacks(lines * 64) == level.writebacks
+
+def test_sweep_of_a_loop_nest():
+    """
+    A sweep answers every capacity of every line size, misses fall with capacity down to the cold misses
+    """
+    df = reuse_sweep(matmul_loop_nest(32, 48, 40), line_sizes=[32, 64], capacities=[1024, 4096, 16384, 1 << 20])
+
+    assert len(df) == 8
+    for _, sweep in df.groupby('line_size'):
+        assert np.all(np.diff(sweep['misses']) <= 0)
+    lines = (32 * 48 + 48 * 40 + 32 * 40) * 4 // 64
+    assert df[(df['line_size'] == 64) & (df['capacity'] == 1 << 20)]['misses'].iloc[0] == lines
+
+def test_conv2d_loop_nest():
+    """
+    The convolution nest reads every input window and filter element once per output element
+    """
+    nest = conv2d_loop_nest(1, 8, 8, 4, 6, 3, 3)
+    profile = ReuseProfile.from_loop_nest(nest, 64)
+
+    macs = 6 * 6 * 6 * 3 * 3 * 4
+    assert nest.references() == 2 * macs + 2 * 6 * 6 * 6
+    # the arrays start on page boundaries, the filter and the output end in a partial line
+    assert profile.cold_misses == 8 * 8 * 4 * 4 // 64 + 2 * -(-3 * 3 * 4 * 6 * 4 // 64)
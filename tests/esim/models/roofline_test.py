@@ -0,0 +1,87 @@
+# tests/esim/models/roofline_test.py
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from energysim.database.gpu_energy import GraphicsProcessingUnitEnergyDatabase
+from energysim.models.design_category import DesignCategory
+from energysim.models.gpu_configuration import GraphicsProcessingUnitConfiguration
+from energysim.models.roofline import Roofline
+from energysim.models.spm_configuration import StoredProgramMachineConfiguration
+from energysim.operator.flat_matvec import flat_matvec_gpu, flat_matvec_spm
+from energysim.operator.flat_matvec_batch import flat_matvec_spm_batch
+from energysim.operator.tiled_matmul import tiled_matmul_spm
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'data')
+
+
+def spm_config(**kwargs):
+    return StoredProgramMachineConfiguration(DesignCategory.HighVolume, 2.5, 3.2, 4, 64, 64, 1, 8, **kwargs)
+
+
+def test_matvec_is_memory_bound_and_matmul_compute_bound(spm_energies):
+    """Matvec sits on the DRAM slope at the attainable rate, a tiled matmul under the compute ceiling."""
+    config = spm_config(fma_units=16)
+    roofline = Roofline.from_spm(config)
+    assert roofline.peak_flops == pytest.approx(16 * 2.5e9)
+    assert roofline.bandwidths['dram'] == pytest.approx(config.dram.peak_bandwidth)
+    assert roofline.ridge_point('dram') == pytest.approx(16 * 2.5e9 / 51.2e9)
+
+    matvec = roofline.place(flat_matvec_spm(4096, 4096, spm_energies, config))
+    assert matvec['bound'] == 'dram'
+    assert matvec['memory_bound']
+    assert matvec['dram_intensity'] < roofline.ridge_point('dram')
+    assert matvec['roofline_fraction'] == pytest.approx(1.0, rel=1e-3)
+
+    matmul = roofline.place(tiled_matmul_spm(1024, 1024, 1024, spm_energies, config))
+    assert matmul['bound'] == 'compute'
+    assert not matmul['memory_bound']
+    assert matmul['attainable_flops'] == pytest.approx(roofline.peak_flops)
+    assert matmul['roofline_fraction'] == pytest.approx(1.0)
+
+
+def test_sweep_is_placed_as_arrays(spm_energies):
+    """A batched sweep is placed on the roofline of every design point in one call."""
+    memory_clock = np.array([1.6, 2.4, 3.2, 4.8])
+    frame = flat_matvec_spm_batch(2048, 2048, spm_energies, 2.5, memory_clock, 4, 64, 64,
+                                  memory_channels=np.array([1, 1, 2, 2]))
+    roofline = Roofline.from_sweep(frame, 'SPM', fma_units=16)
+    placed = roofline.place_sweep(frame)
+
+    assert len(placed) == 4
+    assert placed['memory_bound'].all()
+    # faster DRAM moves the bound of a matvec to the streaming bandwidth of the L3
+    assert list(placed['bound']) == ['dram', 'dram', 'l3', 'l3']
+    np.testing.assert_allclose(placed['dram_ceiling'][:2], placed['attainable_flops'][:2])
+    np.testing.assert_allclose(roofline.bandwidths['dram'], np.array([1.6, 2.4, 6.4, 9.6]) * 16e9)
+    assert np.all(np.diff(placed['attainable_flops']) >= 0)
+    np.testing.assert_allclose(placed['roofline_fraction'][:2], 1.0, rtol=1e-3)
+
+    scalar = Roofline.from_spm(spm_config())
+    attainable = scalar.attainable(np.array([0.01, 1.0, 100.0]), 'l2')
+    np.testing.assert_allclose(attainable, [0.01 * 64 * 2.5e9, 2.5e9, 2.5e9])
+
+
+def test_gpu_roofline():
+    """The GPU roofline bounds a matvec by its global memory traffic."""
+    db = GraphicsProcessingUnitEnergyDatabase()
+    db.load_data(os.path.join(DATA_DIR, 'gpu_energy.csv'))
+    config = GraphicsProcessingUnitConfiguration(DesignCategory.HighVolume, 1.5, 2.0, 4, 64, 64, 8, 4, 128, 1024,
+                                                 fma_units=1920)
+    roofline = Roofline.from_gpu(config)
+    placed = roofline.place(flat_matvec_gpu(128 * 1024, 1024, db.lookupEnergySet('n14t', 4), config))
+    assert placed['bound'] == 'dram'
+    assert placed['smem_intensity'] > placed['dram_intensity']
+    with pytest.raises(ValueError):
+        Roofline.from_sweep(None, 'DFA')
+
+
+def test_import_does_not_load_pandas():
+    """The operator models import the roofline, pandas is only loaded by the analysis."""
+    code = 'import sys, energysim, energysim.operator.flat_matmul; print("pandas" in sys.modules)'
+    root = os.path.join(os.path.dirname(__file__), '..', '..', '..')
+    result = subprocess.run([sys.executable, '-c', code], cwd=root, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == 'False'
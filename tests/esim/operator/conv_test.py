@@ -0,0 +1,87 @@
+# tests/esim/operator/conv_test.py
+import pytest
+
+from energysim.models.design_category import DesignCategory
+from energysim.models.gpu_configuration import GraphicsProcessingUnitConfiguration
+from energysim.models.spm_configuration import StoredProgramMachineConfiguration
+from energysim.operator.conv import (conv2d_nhwc_gpu, conv2d_nhwc_spm, conv_workload, pooling_nhwc_gpu,
+                                     pooling_nhwc_spm, select_conv_algorithm)
+from energysim.operator.tiled_matmul import tiled_matmul_spm
+
+
+def spm_config():
+    return StoredProgramMachineConfiguration(DesignCategory.HighVolume, 2.5, 3.2, 4, 64, 64, 1, 8, fma_units=16)
+
+
+def gpu_config():
+    return GraphicsProcessingUnitConfiguration(DesignCategory.HighVolume, 1.5, 2.0, 4, 64, 64, 8, 4, 128, 1024)
+
+
+def test_im2col_and_direct(spm_energies):
+    """Both lowerings execute the direct fmas, a 1x1 im2col adds only the lowering to the tiled matmul."""
+    config = spm_config()
+    workload = conv_workload(2, 16, 16, 32, 64, 3, 3, padding=1)
+    assert workload['output'] == (16, 16)
+    assert workload['products'] == workload['macs'] == 2 * 16 * 16 * 64 * 3 * 3 * 32
+
+    im2col = conv2d_nhwc_spm(2, 16, 16, 32, 64, 3, 3, spm_energies, config, padding=1)
+    direct = conv2d_nhwc_spm(2, 16, 16, 32, 64, 3, 3, spm_energies, config, padding=1, algorithm='direct')
+    assert im2col.occurrence('fma') == direct.occurrence('fma') == workload['macs']
+    assert direct.read_data + direct.write_data < im2col.read_data + im2col.write_data
+    assert direct.occurrence_energy('total') < im2col.occurrence_energy('total')
+
+    # a 1x1 convolution is a matmul of (NHW x C) by (C x K), im2col copies the input once more
+    pointwise = conv2d_nhwc_spm(1, 8, 8, 64, 32, 1, 1, spm_energies, config)
+    matmul = tiled_matmul_spm(64, 64, 32, spm_energies, config)
+    assert pointwise.occurrence('fma') == matmul.occurrence('fma')
+    assert pointwise.occurrence('dram_write') == matmul.occurrence('dram_write') + 64 * 64 * 4 // 64
+
+    with pytest.raises(ValueError):
+        conv2d_nhwc_spm(1, 8, 8, 64, 32, 1, 1, spm_energies, config, algorithm='fft')
+
+
+def test_winograd(spm_energies, gpu_energies):
+    """F(2x2, 3x3) cuts the products by 36/16, and needs a 3x3 filter with stride 1."""
+    direct = conv_workload(1, 32, 32, 16, 16, 3, 3, padding=1, algorithm='direct')
+    winograd = conv_workload(1, 32, 32, 16, 16, 3, 3, padding=1, algorithm='winograd')
+    assert direct['products'] / winograd['products'] == pytest.approx(36 / 16)
+    # 256 tiles of 16 channels: 32 adds per input transform, 24 per output transform,
+    # and a filter transform of 28 adds and 42 muls by the halves of G
+    tiles = 16 * 16
+    assert winograd['adds'] == tiles * 16 * 32 + 16 * 16 * 28 + tiles * 16 * 24
+    assert winograd['muls'] == 16 * 16 * 42
+
+    larger = conv_workload(1, 32, 32, 16, 16, 3, 3, padding=1, algorithm='winograd', winograd_tile=4)
+    assert larger['products'] < winograd['products']
+
+    metrics = conv2d_nhwc_gpu(1, 32, 32, 16, 16, 3, 3, gpu_energies, gpu_config(), padding=1, algorithm='winograd')
+    assert metrics.occurrence('execute') == winograd['products'] + winograd['adds'] + winograd['muls']
+    assert metrics.occurrence_energy('total') == pytest.approx(
+        metrics.occurrence_energy('compute') + metrics.occurrence_energy('data_movement'))
+
+    with pytest.raises(ValueError):
+        conv2d_nhwc_spm(1, 32, 32, 16, 16, 3, 3, spm_energies, spm_config(), stride=2, algorithm='winograd')
+    with pytest.raises(ValueError):
+        conv_workload(1, 32, 32, 16, 16, 5, 5, algorithm='winograd')
+
+
+def test_selection_and_pooling(spm_energies, gpu_energies):
+    """The selection marks one candidate per objective, and pooling reads its input once."""
+    frame = select_conv_algorithm(1, 56, 56, 64, 64, 3, 3, spm_energies, spm_config(), padding=1)
+    assert list(frame['algorithm']) == ['im2col', 'direct', 'winograd', 'winograd']
+    assert frame['selected'].sum() == 1
+    assert frame.loc[frame['selected'], 'total_energy'].iloc[0] == frame['total_energy'].min()
+    # the energy-delay product is in J*s, as in the tile search
+    assert frame['edp'].to_list() == pytest.approx(list(frame['total_energy'] * 1.0e-12 * frame['elapsed_time']))
+
+    strided = select_conv_algorithm(1, 224, 224, 3, 64, 7, 7, gpu_energies, gpu_config(), stride=2, padding=3,
+                                    objective='latency')
+    assert 'winograd' not in set(strided['algorithm'])
+    assert strided.loc[strided['selected'], 'elapsed_time'].iloc[0] == strided['elapsed_time'].min()
+
+    spm_pool = pooling_nhwc_spm(1, 112, 112, 64, 3, 3, spm_energies, spm_config(), stride=2, padding=1)
+    assert spm_pool.occurrence('fadd') == 56 * 56 * 64 * 9
+    assert spm_pool.occurrence('dram_read') == 112 * 112 * 64 * 4 // 64
+    gpu_pool = pooling_nhwc_gpu(1, 112, 112, 64, 2, 2, gpu_energies, gpu_config(), kind='avg')
+    assert gpu_pool.occurrence('fmul') == 56 * 56 * 64
+    assert gpu_pool.read_data == 112 * 112 * 64 * 4
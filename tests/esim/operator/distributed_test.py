@@ -0,0 +1,80 @@
+# tests/esim/operator/distributed_test.py
+import os
+
+import numpy as np
+import pytest
+
+from energysim.database.gpu_energy import GraphicsProcessingUnitEnergyDatabase
+from energysim.models.cluster_configuration import DistributedMemoryClusterConfiguration
+from energysim.models.design_category import DesignCategory
+from energysim.models.gpu_configuration import GraphicsProcessingUnitConfiguration
+from energysim.models.interconnect import Interconnect
+from energysim.models.spm_configuration import StoredProgramMachineConfiguration
+from energysim.operator.distributed import distributed_matmul, distributed_matvec, strong_scaling, weak_scaling
+from energysim.operator.flat_matvec import flat_matvec_spm
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'data')
+
+
+def spm_node():
+    return StoredProgramMachineConfiguration(DesignCategory.HighVolume, 2.5, 3.2, 4, 64, 64, 1, 8, fma_units=16)
+
+
+def test_matvec_partitions(spm_energies):
+    """A single node is the node model, the 2d partition moves less data than the row partition."""
+    node = spm_node()
+    single = distributed_matvec(2048, 2048, spm_energies, DistributedMemoryClusterConfiguration(1, node))
+    reference = flat_matvec_spm(2048, 2048, spm_energies, node)
+    assert single.communication_time == 0.0
+    assert single.elapsed_time == pytest.approx(reference.elapsed_time)
+    assert single.total == pytest.approx(reference.occurrence_energy('total'))
+
+    cluster = DistributedMemoryClusterConfiguration(64, node, Interconnect('torus'))
+    assert cluster.process_grid() == (8, 8)
+    row = distributed_matvec(4096, 4096, spm_energies, cluster)
+    assert row.network_data == pytest.approx(63 * 4096 * 4)
+    grid = distributed_matvec(4096, 4096, spm_energies, cluster, partition='2d')
+    assert grid.network_data == pytest.approx(7 * 4096 * 4 + 7 * 4096 * 4)
+    assert grid.network < row.network
+    assert grid.total == pytest.approx(grid.compute + grid.memory + grid.network + grid.storage)
+
+    staged = distributed_matvec(4096, 4096, spm_energies, cluster, from_storage=True)
+    assert staged.storage_data == pytest.approx(64 * (64 * 4096 + 64 + 64) * 4)
+    assert staged.elapsed_time == pytest.approx(row.elapsed_time + staged.storage_time)
+
+    with pytest.raises(ValueError):
+        distributed_matvec(4096, 4096, spm_energies, cluster, partition='column')
+
+
+def test_strong_and_weak_scaling(spm_energies):
+    """Thousands of nodes: communication erodes the strong scaling of matmul, weak scaling of matvec holds."""
+    cluster = DistributedMemoryClusterConfiguration(1, spm_node(), Interconnect('fat-tree'))
+    node_counts = [1, 4, 16, 64, 256, 1024, 4096]
+    strong = strong_scaling(distributed_matmul, (8192, 8192, 8192), spm_energies, cluster, node_counts)
+    assert list(strong['nodes']) == node_counts
+    assert np.all(np.diff(strong['elapsed_time']) < 0)
+    assert np.all(np.diff(strong['parallel_efficiency']) < 0)
+    assert strong['parallel_efficiency'].iloc[-1] < 0.75
+    assert np.all(np.diff(strong['network']) > 0)
+    np.testing.assert_allclose(strong['total_flops'], 8192 ** 3)
+
+    weak = weak_scaling(distributed_matvec, (4096, 4096), spm_energies, cluster, node_counts, partition='2d')
+    # the blocks of the process grid change aspect ratio, the work per node doesn't
+    np.testing.assert_allclose(weak['compute_time'], weak['compute_time'].iloc[0], rtol=1e-3)
+    assert np.all(np.diff(weak['communication_time']) > 0)
+    assert weak['parallel_efficiency'].iloc[-1] > 0.9
+    np.testing.assert_allclose(weak['total_flops'], 4096 * 4096 * np.array(node_counts))
+
+
+def test_gpu_nodes():
+    """GPU nodes run the distributed matvec, a matmul needs a node model that the GPU doesn't have."""
+    db = GraphicsProcessingUnitEnergyDatabase()
+    db.load_data(os.path.join(DATA_DIR, 'gpu_energy.csv'))
+    energies = db.lookupEnergySet('n14t', 64)
+    node = GraphicsProcessingUnitConfiguration(DesignCategory.HighVolume, 1.5, 2.0, 4, 64, 64, 8, 4, 128, 1024)
+    cluster = DistributedMemoryClusterConfiguration(8, node, Interconnect('ring'))
+    metrics = distributed_matvec(8192, 1024, energies, cluster)
+    assert metrics.nodes == 8 and metrics.topology == 'ring'
+    assert metrics.memory_read > 0 and metrics.memory_write > 0
+    with pytest.raises(ValueError):
+        distributed_matmul(1024, 1024, 1024, energies, cluster)
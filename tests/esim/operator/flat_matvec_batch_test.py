@@ -0,0 +1,116 @@
+# tests/esim/operator/flat_matvec_batch_test.py
+import os
+
+import numpy as np
+import pytest
+
+from energysim.database.gpu_energy import GraphicsProcessingUnitEnergyDatabase
+from energysim.database.spm_energy import StoredProgramMachineEnergyDatabase
+from energysim.models.design_category import DesignCategory
+from energysim.models.gpu_configuration import GraphicsProcessingUnitConfiguration
+from energysim.models.spm_configuration import StoredProgramMachineConfiguration
+from energysim.operator.flat_matvec import flat_matvec_gpu, flat_matvec_spm
+from energysim.operator.flat_matvec_batch import flat_matvec_gpu_batch, flat_matvec_spm_batch
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'data')
+
+
+@pytest.fixture
+def spm_database():
+    db = StoredProgramMachineEnergyDatabase()
+    db.load_data(os.path.join(DATA_DIR, 'spm_energy.csv'))
+    return db
+
+@pytest.fixture
+def gpu_database():
+    db = GraphicsProcessingUnitEnergyDatabase()
+    db.load_data(os.path.join(DATA_DIR, 'gpu_energy.csv'))
+    return db
+
+def test_spm_batch_matches_scalar_model(spm_database):
+    """
+    Every design point of a batch reproduces the scalar flat_matvec_spm model
+    """
+    rows = np.array([16, 100, 1024, 4096])
+    cols = np.array([16, 37, 1024, 256])
+    core_clock = np.array([2.5, 3.0, 3.5, 4.0])
+    memory_clock = np.array([2.7, 3.2, 3.6, 4.5])
+    cache_line_size = np.array([32, 64, 64, 128])
+    energies = spm_database.lookupEnergySet('n14t', 64)
+
+    batch = flat_matvec_spm_batch(rows, cols, energies, core_clock, memory_clock, 4, cache_line_size, 64)
+    assert len(batch) == 4
+
+    for i in range(4):
+        config = StoredProgramMachineConfiguration(DesignCategory.HighVolume, core_clock[i], memory_clock[i],
+                                                   4, int(cache_line_size[i]), 64, 1, 8)
+        reference = flat_matvec_spm(int(rows[i]), int(cols[i]),
+                                    spm_database.lookupEnergySet('n14t', config.cache_line_size), config)
+        for key in ['instruction', 'l1_write', 'l2_read', 'dram_read', 'dram_write', 'cache', 'total']:
+            assert batch[key + '_events'][i] == reference.occurrence(key)
+            assert batch[key + '_energy'][i] == pytest.approx(reference.occurrence_energy(key))
+        for metric in ['elapsed_time', 'instr_per_sec', 'memory_read_bw', 'power', 'flops_per_watt']:
+            assert batch[metric][i] == pytest.approx(getattr(reference, metric))
+        # FLOPS/Watt is the flop rate over the power, the flops per joule
+        assert reference.flops_per_watt == pytest.approx(reference.total_flops /
+                                                         (reference.occurrence_energy('total') * 1.0e-12))
+
+def test_spm_batch_broadcasts(spm_database):
+    """
+    Shape and configuration arguments broadcast against each other
+    """
+    energies = spm_database.lookupEnergySet('n07t', 64)
+    shapes = np.array([64, 128, 256])
+    clocks = np.array([2.0, 3.0])
+
+    batch = flat_matvec_spm_batch(shapes[:, None], shapes[:, None], energies, 3.0, clocks[None, :], 4, 64, 64)
+    assert len(batch) == 6
+    np.testing.assert_array_equal(batch['rows'], [64, 64, 128, 128, 256, 256])
+    np.testing.assert_array_equal(batch['memory_clock_ghz'], [2.0, 3.0] * 3)
+    # a faster memory clock shortens the memory-bound elapsed time
+    assert (batch['elapsed_time'][1::2].to_numpy() < batch['elapsed_time'][0::2].to_numpy()).all()
+
+def test_gpu_batch_matches_scalar_model(gpu_database):
+    """
+    Every launch configuration of a batch reproduces the scalar flat_matvec_gpu model
+    """
+    rows, cols = 4096, 1024
+    threads_per_block = np.array([32, 128, 256, 1024])
+    blocks_per_grid = (rows + threads_per_block - 1) // threads_per_block
+    memory_burst_size = np.array([32, 64, 64, 128])
+    energies = gpu_database.lookupEnergySet('n14t', 64)
+
+    batch = flat_matvec_gpu_batch(rows, cols, energies, 1.5, 2.0, 4, 64, memory_burst_size, 8, 4,
+                                  threads_per_block, blocks_per_grid)
+
+    for i in range(4):
+        config = GraphicsProcessingUnitConfiguration(DesignCategory.HighVolume, 1.5, 2.0, 4, 64,
+                                                     int(memory_burst_size[i]), 8, 4,
+                                                     int(threads_per_block[i]), int(blocks_per_grid[i]))
+        reference = flat_matvec_gpu(rows, cols, energies, config)
+        assert batch['nr_of_warps'][i] == reference.nr_of_warps
+        for key in ['instruction', 'smem_write', 'gmem_read', 'gmem_write', 'total']:
+            assert batch[key + '_events'][i] == reference.occurrence(key)
+        for key in ['gmem_read', 'gmem_write', 'total']:
+            assert batch[key + '_energy'][i] == pytest.approx(reference.occurrence_energy(key))
+        for metric in ['elapsed_time', 'memory_transactions', 'max_memory_bw', 'power']:
+            assert batch[metric][i] == pytest.approx(getattr(reference, metric))
+    # global memory energies are rescaled to the memory burst size of each design point
+    np.testing.assert_allclose(batch['gmem_read_energy'],
+                               batch['gmem_read_events'] * energies.gmem_read * memory_burst_size / 64)
+
+def test_gpu_batch_launch_geometry(gpu_database):
+    """
+    Launch geometry columns follow the threads per block and blocks per grid grid
+    """
+    energies = gpu_database.lookupEnergySet('n14t', 64)
+    threads_per_block = np.array([64, 100, 256])
+    blocks_per_grid = np.array([1, 16, 64])
+
+    batch = flat_matvec_gpu_batch(2048, 256, energies, 1.5, 2.0, 4, 64, 64, 8, 4,
+                                  threads_per_block[:, None], blocks_per_grid[None, :])
+    assert len(batch) == 9
+    np.testing.assert_array_equal(batch['warps_per_block'], np.repeat([2, 4, 8], 3))
+    np.testing.assert_array_equal(batch['launched_threads'], np.outer(threads_per_block, blocks_per_grid).ravel())
+    assert batch['rows_per_thread'][0] == 2048 // 64
+    assert batch['thread_utilization'][8] == pytest.approx(2048 / (256 * 64))
@@ -0,0 +1,89 @@
+# tests/esim/operator/flat_matvec_dfa_test.py
+import os
+
+import pytest
+
+from energysim.database.dfa_energy import DomainFlowArchitectureEnergyDatabase
+from energysim.database.spm_energy import StoredProgramMachineEnergyDatabase
+from energysim.models.design_category import DesignCategory
+from energysim.models.dfa_configuration import DomainFlowArchitectureConfiguration
+from energysim.models.spm_configuration import StoredProgramMachineConfiguration
+from energysim.operator.flat_matvec import flat_matvec_dfa, flat_matvec_spm
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'data')
+
+
+@pytest.fixture
+def dfa_energies():
+    db = DomainFlowArchitectureEnergyDatabase()
+    db.load_data(os.path.join(DATA_DIR, 'dfa_energy.csv'))
+    return db.lookupEnergySet('n14t')
+
+
+def dfa_config(**kwargs):
+    return DomainFlowArchitectureConfiguration(DesignCategory.HighVolume, 2.5, 3.2, 4, 64, 64, 1, 8, **kwargs)
+
+
+def test_events_of_the_fabric(dfa_energies):
+    """
+    Every fma fires one instruction token and receives three data tokens, the energies come from the CSV
+    """
+    assert dfa_energies.istore_dispatch == 2.0
+    assert dfa_energies.execute == dfa_energies.fma
+
+    metrics = flat_matvec_dfa(64, 48, dfa_energies, dfa_config(fabric_size=16))
+    fmas = 64 * 48
+    assert metrics.occurrence('istore_dispatch') == fmas
+    assert metrics.occurrence('istore_operand_write') == 3 * fmas
+    assert metrics.occurrence('pipe_write') == 2 * fmas + fmas * 15 // 2
+    # A, x per row of tiles, and the partial y of every tile but the first
+    assert metrics.occurrence('str_read') == fmas + 4 * 48 + 64 * 2
+    assert metrics.occurrence('gmem_read') == (fmas + 48) * 4 // 64
+    assert metrics.occurrence('total') == pytest.approx(
+        metrics.occurrence('compute') + metrics.occurrence('data_movement'))
+    assert metrics.occurrence_energy('total') > 0
+
+
+def test_wavefront_schedule(dfa_energies):
+    """
+    Tiles pipeline one per wavefront behind the fill and drain of the fabric, unless the iStore is too shallow,
+    a large domain is memory bound
+    """
+    small = flat_matvec_dfa(32, 32, dfa_energies, dfa_config(fabric_size=32))
+    assert small.tiles == 1
+    assert small.wavefronts == 1 + 2 * 31
+    assert small.elapsed_time >= small.wavefronts * 0.4e-9
+    wide = flat_matvec_dfa(32, 32 * 1024, dfa_energies, dfa_config(fabric_size=32))
+    assert wide.wavefronts == 1024 + 2 * 31
+
+    config = dfa_config()
+    large = flat_matvec_dfa(64 * 1024, 1024, dfa_energies, config)
+    assert large.memory_read_bw == pytest.approx(config.dram.peak_bandwidth, rel=0.01)
+    assert 0.0 < large.fabric_utilization < 0.01
+
+    # an iStore shallower than the tiles in flight stalls the injection of tiles
+    deep = flat_matvec_dfa(1024, 1024, dfa_energies, dfa_config(fabric_size=4))
+    shallow = flat_matvec_dfa(1024, 1024, dfa_energies, dfa_config(fabric_size=4, istore_depth=1))
+    assert deep.wavefronts == 256 * 256 + 2 * 3
+    assert shallow.wavefronts == 256 * 256 * 7 + 2 * 3
+    assert shallow.elapsed_time > deep.elapsed_time
+    assert shallow.elapsed_time == pytest.approx(shallow.wavefronts * 0.4e-9)
+
+    # x is streamed again for every row of tiles when the L1 cannot hold it
+    spilled = flat_matvec_dfa(64 * 1024, 1024, dfa_energies, dfa_config(l1_size_in_bytes=4 * 1024))
+    assert spilled.occurrence('l1_write') - large.occurrence('l1_write') == (64 * 1024 // 32 - 1) * 1024
+
+
+def test_compare_with_spm(dfa_energies):
+    """
+    The DFA and the SPM evaluate the same operator on the same memory system
+    """
+    db = StoredProgramMachineEnergyDatabase()
+    db.load_data(os.path.join(DATA_DIR, 'spm_energy.csv'))
+    spm_config = StoredProgramMachineConfiguration(DesignCategory.HighVolume, 2.5, 3.2, 4, 64, 64, 1, 8)
+    spm = flat_matvec_spm(4096, 4096, db.lookupEnergySet('n14t', 64), spm_config)
+    dfa = flat_matvec_dfa(4096, 4096, dfa_energies, dfa_config())
+
+    assert dfa.total_flops == spm.total_flops
+    assert dfa.elapsed_time == pytest.approx(spm.elapsed_time, rel=0.01)
+    assert dfa.flops_per_watt > spm.flops_per_watt
@@ -0,0 +1,99 @@
+# tests/esim/operator/flat_matvec_dfm_test.py
+import os
+
+import numpy as np
+import pytest
+
+from energysim.database.dfm_energy import DataFlowMachineEnergyDatabase
+from energysim.models.design_category import DesignCategory
+from energysim.models.dfm_configuration import DataFlowMachineConfiguration
+from energysim.operator.flat_matmul import flat_matmul_dfm
+from energysim.operator.flat_matvec import flat_matvec_dfm
+from energysim.operator.flat_matvec_batch import flat_matvec_dfm_batch
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'data')
+
+
+@pytest.fixture
+def dfm_database():
+    db = DataFlowMachineEnergyDatabase()
+    db.load_data(os.path.join(DATA_DIR, 'dfm_energy.csv'))
+    return db
+
+
+def dfm_config(**kwargs):
+    return DataFlowMachineConfiguration(DesignCategory.HighVolume, 2.5, 3.2, 4, 64, 64, 1, 8, **kwargs)
+
+
+def test_token_events(dfm_database):
+    """
+    Every fma matches three operand tokens in the CAM, and fires with two loads, the energies come from the CSV
+    """
+    energies = dfm_database.lookupEnergySet('n14t', 64)
+    assert energies.cam_cycle_time_ns == 0.34
+    assert energies.token_match == 5.0
+    assert energies.mem_read == 64 * 8 * 15.0
+
+    metrics = flat_matvec_dfm(64, 48, energies, dfm_config())
+    fmas = 64 * 48
+    assert metrics.occurrence('token_match') == 3 * fmas + 2 * 64
+    assert metrics.occurrence('fetch') == 3 * fmas + 64
+    assert metrics.occurrence('mem_read') == (fmas + 48) * 4 // 64
+    assert metrics.occurrence('mem_write') == 64 * 4 // 64
+    assert metrics.occurrence('total') == pytest.approx(
+        metrics.occurrence('compute') + metrics.occurrence('data_movement'))
+
+    matmul = flat_matmul_dfm(32, 16, 8, energies, dfm_config())
+    assert matmul.occurrence('execute') == 32 * 16 * 8
+    assert matmul.occurrence('token_write') == 2 * 32 * 16 * 8 + 32 * 8
+    assert matmul.total_flops == 32 * 16 * 8
+
+
+def test_cam_size_and_matching_throughput(dfm_database):
+    """
+    A small CAM can't cover the load latency, a slow CAM limits the rate tokens are matched
+    """
+    energies = dfm_database.lookupEnergySet('n14t', 64)
+    rows, cols = 4096, 1024
+    config = dfm_config(token_match_rate=64)
+    large = flat_matvec_dfm(rows, cols, energies, config)
+    assert large.memory_read_bw == pytest.approx(config.dram.peak_bandwidth, rel=0.01)
+
+    small = flat_matvec_dfm(rows, cols, energies, dfm_config(token_match_rate=64, cam_size_in_tokens=16))
+    load_latency = (config.dram.activate_ns + config.dram.cas_latency_ns) * 1.0e-9
+    assert small.elapsed_time == pytest.approx(rows * cols * load_latency / 8)
+    assert small.occurrence_energy('total') == large.occurrence_energy('total')
+
+    # one token per CAM cycle, and the CAM cycles at the core clock when the CAM is faster
+    serial = flat_matvec_dfm(rows, cols, energies, dfm_config(token_match_rate=1))
+    assert serial.matching_utilization == pytest.approx(1.0)
+    assert serial.elapsed_time == pytest.approx(serial.occurrence('token_match') * 0.4e-9)
+
+
+def test_batch_matches_scalar_model(dfm_database):
+    """
+    Every design point of a batch reproduces the scalar flat_matvec_dfm model
+    """
+    rows = np.array([16, 100, 1024, 4096])
+    cols = np.array([16, 37, 1024, 256])
+    cache_line_size = np.array([32, 64, 64, 128])
+    cam_size = np.array([1024, 64, 16, 4096])
+    token_match_rate = np.array([8, 1, 4, 16])
+    energies = dfm_database.lookupEnergySet('n07t', 64)
+
+    batch = flat_matvec_dfm_batch(rows, cols, energies, 2.5, 3.2, 4, cache_line_size, 64,
+                                  cam_size_in_tokens=cam_size, token_match_rate=token_match_rate)
+    assert len(batch) == 4
+
+    for i in range(4):
+        config = DataFlowMachineConfiguration(DesignCategory.HighVolume, 2.5, 3.2, 4, int(cache_line_size[i]), 64, 1, 8,
+                                              cam_size_in_tokens=int(cam_size[i]),
+                                              token_match_rate=int(token_match_rate[i]))
+        reference = flat_matvec_dfm(int(rows[i]), int(cols[i]),
+                                    dfm_database.lookupEnergySet('n07t', config.cache_line_size), config)
+        for key in ['token_match', 'fetch', 'l1_write', 'l2_read', 'mem_read', 'mem_write', 'matching', 'total']:
+            assert batch[key + '_events'][i] == reference.occurrence(key)
+            assert batch[key + '_energy'][i] == pytest.approx(reference.occurrence_energy(key))
+        for metric in ['elapsed_time', 'matching_utilization', 'instr_per_sec', 'memory_read_bw', 'power',
+                       'flops_per_watt']:
+            assert batch[metric][i] == pytest.approx(getattr(reference, metric))
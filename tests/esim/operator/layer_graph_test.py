@@ -0,0 +1,87 @@
+# tests/esim/operator/layer_graph_test.py
+import pytest
+
+from energysim.models.design_category import DesignCategory
+from energysim.models.gpu_configuration import GraphicsProcessingUnitConfiguration
+from energysim.models.spm_configuration import StoredProgramMachineConfiguration
+from energysim.operator.layer_graph import GraphEstimator, LayerGraph
+from energysim.operator.tiled_matmul import tiled_matmul_spm
+
+
+def spm_config(l3_size=8 * 1024 * 1024):
+    return StoredProgramMachineConfiguration(DesignCategory.HighVolume, 2.5, 3.2, 4, 64, 64, 1, 8, fma_units=16,
+                                             l3_size_in_bytes=l3_size)
+
+
+def mlp(layers: int) -> LayerGraph:
+    graph = LayerGraph('mlp')
+    previous = graph.add_input('x', (64, 256))
+    for layer in range(layers):
+        fc = graph.matmul(f'fc{layer}', previous, 256)
+        previous = graph.elementwise(f'relu{layer}', fc)
+    return graph
+
+
+def test_single_layer_and_memoization(spm_energies):
+    """A lone layer is its operator model, identical layers are evaluated once."""
+    config = spm_config()
+    graph = LayerGraph('fc')
+    graph.matmul('fc', graph.add_input('x', (64, 256)), 128)
+    estimate = GraphEstimator(spm_energies, config).estimate(graph)
+    reference = tiled_matmul_spm(64, 256, 128, spm_energies, config)
+    assert estimate.total_energy == pytest.approx(reference.occurrence_energy('total'))
+    assert estimate.serial_latency == pytest.approx(reference.elapsed_time)
+    assert estimate.weight_memory == 256 * 128 * 4
+
+    estimator = GraphEstimator(spm_energies, config)
+    deep = estimator.estimate(mlp(4))
+    assert (deep.evaluations, deep.memo_hits) == (2, 6)
+    again = estimator.estimate(mlp(4))
+    assert (again.evaluations, again.memo_hits) == (0, 8)
+    assert again.total_energy == pytest.approx(deep.total_energy)
+    assert estimator.cache_info().currsize == 2
+
+
+def test_residency(spm_energies, gpu_energies):
+    """Activations that fit in the last level skip DRAM, a small last level keeps the standalone estimate."""
+    resident = GraphEstimator(spm_energies, spm_config()).estimate(mlp(3))
+    layers = resident.layers.set_index('name')
+    assert layers.loc['fc0', 'resident_bytes'] == 0
+    assert layers.loc['relu0', 'resident_bytes'] == 64 * 256 * 4
+    assert layers.loc['relu0', 'dram_bytes'] == 0
+    assert resident.total_energy < layers['standalone_energy'].sum()
+
+    streaming = GraphEstimator(spm_energies, spm_config(l3_size=32 * 1024)).estimate(mlp(3))
+    assert streaming.layers['resident_bytes'].sum() == 0
+    assert streaming.total_energy == pytest.approx(streaming.layers['standalone_energy'].sum())
+
+    gpu = GraphicsProcessingUnitConfiguration(DesignCategory.HighVolume, 1.5, 2.0, 4, 64, 64, 8, 4, 128, 1024)
+    on_gpu = GraphEstimator(gpu_energies, gpu).estimate(mlp(3))
+    assert on_gpu.layers['resident_bytes'].sum() > 0
+    assert on_gpu.total_energy < on_gpu.layers['standalone_energy'].sum()
+
+
+def test_critical_path_and_peak_memory(spm_energies):
+    """Two independent branches overlap on the critical path, activations are freed after their last use."""
+    graph = LayerGraph('branches')
+    x = graph.add_input('x', (256,))
+    left = graph.matvec('left', x, 512)
+    right = graph.matvec('right', x, 512)
+    joined = graph.elementwise('join', (left, right), 'add')
+    graph.softmax('softmax', joined)
+    assert graph.outputs() == ['softmax']
+
+    estimate = GraphEstimator(spm_energies, spm_config()).estimate(graph)
+    latency = estimate.layers.set_index('name')['latency']
+    assert estimate.critical_path in (['left', 'join', 'softmax'], ['right', 'join', 'softmax'])
+    assert estimate.critical_path_latency == pytest.approx(latency['left'] + latency['join'] + latency['softmax'])
+    assert estimate.serial_latency == pytest.approx(estimate.critical_path_latency + latency['right'])
+
+    # x and both branches are live while the join executes
+    assert estimate.peak_activation_memory == (512 + 512 + 512) * 4
+    assert estimate.peak_memory == 2 * 512 * 256 * 4 + (512 + 512 + 512) * 4
+
+    with pytest.raises(ValueError):
+        graph.elementwise('bad', (x, joined), 'add')
+    with pytest.raises(ValueError):
+        graph.conv('conv', x, 16, 3, 3)
@@ -0,0 +1,32 @@
+# tests/esim/operator/matvec_test.py
+import numpy as np
+import pytest
+
+from energysim.linalg.matrix import Matrix
+from energysim.linalg.vector import Vector
+from energysim.operator.matvec import flat_matrix_vector_multiply
+
+
+def test_flat_matrix_vector_multiply():
+    """
+    The functional reference computes A @ x
+    """
+    result = flat_matrix_vector_multiply(Matrix([[1, 2, 3], [4, 5, 6]]), Vector([2, 3, 4]))
+
+    assert result.size == 2
+    assert [result.get(0), result.get(1)] == [20.0, 47.0]
+
+def test_realistic_shape():
+    """
+    A 4K x 4K reference product is computed on the arrays
+    """
+    rng = np.random.default_rng(0)
+    a = rng.random((4096, 4096))
+    x = rng.random(4096)
+    result = flat_matrix_vector_multiply(Matrix(a), Vector(x))
+
+    np.testing.assert_allclose(result.values, a @ x)
+
+def test_shape_mismatch():
+    with pytest.raises(ValueError):
+        flat_matrix_vector_multiply(Matrix(rows=2, cols=3), Vector(size=2))
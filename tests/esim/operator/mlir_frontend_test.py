@@ -0,0 +1,131 @@
+# tests/esim/operator/mlir_frontend_test.py
+import os
+
+import pytest
+
+from energysim.models.datatype import apply_precision
+from energysim.models.design_category import DesignCategory
+from energysim.models.spm_configuration import StoredProgramMachineConfiguration
+from energysim.operator.layer_graph import GraphEstimator
+from energysim.operator.mlir_frontend import estimate_mlir, mlir_layer_graph, parse_mlir, parse_type
+
+MLIR_DIR = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'scripts', 'mlir')
+
+LINALG_MODULE = """
+#map0 = affine_map<(d0, d1, d2) -> (d0, d2)>
+#map1 = affine_map<(d0, d1, d2) -> (d2, d1)>
+#map2 = affine_map<(d0, d1, d2) -> (d0, d1)>
+module {
+  func.func @net(%x: tensor<1x32x32x16xf16>, %w: tensor<3x3x16x32xf16>, %b: tensor<32x8xf16>) -> tensor<49x8xf16> {
+    %cst = arith.constant 0.000000e+00 : f16
+    %e = tensor.empty() : tensor<1x15x15x32xf16>
+    %f = linalg.fill ins(%cst : f16) outs(%e : tensor<1x15x15x32xf16>) -> tensor<1x15x15x32xf16>
+    %c = linalg.conv_2d_nhwc_hwcf {dilations = dense<1> : tensor<2xi64>, strides = dense<2> : tensor<2xi64>}
+           ins(%x, %w : tensor<1x32x32x16xf16>, tensor<3x3x16x32xf16>) outs(%f : tensor<1x15x15x32xf16>) -> tensor<1x15x15x32xf16>
+    %win = tensor.empty() : tensor<3x3xf16>
+    %pe = tensor.empty() : tensor<1x7x7x32xf16>
+    %p = linalg.pooling_nhwc_max {dilations = dense<1> : tensor<2xi64>, strides = dense<2> : tensor<2xi64>} ins(%c, %win : tensor<1x15x15x32xf16>, tensor<3x3xf16>) outs(%pe : tensor<1x7x7x32xf16>) -> tensor<1x7x7x32xf16>
+    %flat = tensor.collapse_shape %p [[0, 1, 2], [3]] : tensor<1x7x7x32xf16> into tensor<49x32xf16>
+    %o = tensor.empty() : tensor<49x8xf16>
+    %g = linalg.generic {indexing_maps = [#map0, #map1, #map2], iterator_types = ["parallel", "parallel", "reduction"]} ins(%flat, %b : tensor<49x32xf16>, tensor<32x8xf16>) outs(%o : tensor<49x8xf16>) {
+    ^bb0(%in: f16, %in_1: f16, %out: f16):
+      %1 = arith.mulf %in, %in_1 : f16
+      %2 = arith.addf %out, %1 : f16
+      linalg.yield %2 : f16
+    } -> tensor<49x8xf16>
+    %s = linalg.softmax dimension(1) ins(%g : tensor<49x8xf16>) outs(%o : tensor<49x8xf16>) -> tensor<49x8xf16>
+    %d = linalg.conv_2d_nhwc_hwcf {dilations = dense<2> : tensor<2xi64>, strides = dense<1> : tensor<2xi64>} ins(%x, %w : tensor<1x32x32x16xf16>, tensor<3x3x16x32xf16>) outs(%f : tensor<1x15x15x32xf16>) -> tensor<1x15x15x32xf16>
+    return %s : tensor<49x8xf16>
+  }
+  func.func @buffers(%A: memref<16x8xf16>, %B: memref<8x4xf16>, %C: memref<16x4xf16, strided<[4, 1]>>) {
+    linalg.matmul ins(%A, %B : memref<16x8xf16>, memref<8x4xf16>) outs(%C : memref<16x4xf16, strided<[4, 1]>>)
+    linalg.add ins(%C, %C : memref<16x4xf16, strided<[4, 1]>>, memref<16x4xf16, strided<[4, 1]>>) outs(%C : memref<16x4xf16, strided<[4, 1]>>)
+    return
+  }
+}
+"""
+
+
+def spm_config():
+    return StoredProgramMachineConfiguration(DesignCategory.HighVolume, 2.5, 3.2, 4, 64, 64, 1, 8, fma_units=16)
+
+
+def test_generic_form_tosa():
+    """The generic form of a tosa fully connected layer, constants are weights and not operands."""
+    assert parse_type('tensor<1x?x10xbf16>') == ((1, None, 10), 'bf16')
+    assert parse_type('memref<4x8xf32, strided<[8, 1]>>') == ((4, 8), 'f32')
+    assert parse_type('f32') == ((), 'f32')
+
+    with open(os.path.join(MLIR_DIR, 'fc_layer.mlir')) as f:
+        text = f.read()
+    operations = parse_mlir(text, use_bindings=False)
+    assert [op.name for op in operations] == ['tosa.const'] * 3 + ['tosa.reshape', 'tosa.matmul', 'tosa.add',
+                                                                   'tosa.maximum', 'func.return']
+    matmul = operations[4]
+    assert (matmul.function, matmul.results, matmul.inputs) == ('fc_relu', ['%4'], ['%arg0', '%0'])
+    assert matmul.input_types == [((1, 10), 'f32'), ((10, 5), 'f32')]
+
+    graph, mapped, unmapped = mlir_layer_graph(text, use_bindings=False)
+    assert unmapped == []
+    assert mapped['fc_relu/%4'].iteration_space == {'M': 1, 'N': 5, 'K': 10}
+    assert [graph.nodes[name].op for name in mapped] == ['matmul', 'elementwise', 'elementwise']
+    # the bias and the zeros of the relu are constants, each elementwise layer streams one activation
+    assert graph.nodes['fc_relu/%5'].inputs == ('fc_relu/%4',)
+    assert graph.outputs() == ['fc_relu/%6']
+
+
+def test_custom_form_linalg():
+    """Named linalg operators, a contraction in linalg.generic, views, and operators on buffers."""
+    graph, mapped, unmapped = mlir_layer_graph(LINALG_MODULE, use_bindings=False)
+    assert [graph.nodes[name].op for name in mapped] == ['conv', 'pooling', 'matmul', 'softmax', 'matmul',
+                                                          'elementwise']
+    assert graph.nodes['net/%c'].params['stride'] == 2
+    assert graph.shape('net/%c') == (1, 15, 15, 32)
+    assert mapped['net/%p'].iteration_space == {'N': 1, 'P': 7, 'Q': 7, 'C': 32, 'R': 3, 'S': 3}
+    # the contraction reads the pooled activations through the collapse_shape view
+    assert graph.source(graph.nodes['net/%g'].inputs[0]) == 'net/%p'
+    assert mapped['net/%g'].iteration_space == {'d0': 49, 'd1': 8, 'd2': 32}
+    assert graph.shape('net/%g') == (49, 8)
+    assert mapped['net/%s'].element_type == 'f16'
+    # the add reads the buffer the matmul writes
+    matmul, add = (name for name in mapped if name.startswith('buffers/'))
+    assert graph.nodes[add].inputs == (matmul, matmul)
+    assert unmapped == [('linalg.conv_2d_nhwc_hwcf', 'linalg.conv_2d_nhwc_hwcf with dilation 2 is not supported')]
+
+
+def test_estimate(spm_energies, capsys):
+    """The estimate of a module is the estimate of its layer graph, in the precision of its element type."""
+    estimate = estimate_mlir(LINALG_MODULE, spm_energies, spm_config(), 'net', use_bindings=False)
+    assert list(estimate.layers['element_type']) == ['f16'] * 6
+    assert estimate.layers.set_index('name').loc['net/%g', 'mlir_op'] == 'linalg.generic'
+    assert len(estimate.unmapped) == 1
+
+    graph, _, _ = mlir_layer_graph(LINALG_MODULE, 'net', use_bindings=False)
+    reference = GraphEstimator(*apply_precision(spm_energies, spm_config(), 'fp16')).estimate(graph)
+    assert estimate.total_energy == pytest.approx(reference.total_energy)
+    assert estimate.weight_memory == reference.weight_memory == (3 * 3 * 16 * 32 + 32 * 8 + 8 * 4) * 2
+
+    estimate.report()
+    assert 'dilation 2 is not supported' in capsys.readouterr().out
+
+    with pytest.raises(ValueError):
+        estimate_mlir('func.func @f() {\n  return\n}\n', spm_energies, spm_config(), use_bindings=False)
+
+
+def test_mixed_precision_is_reported(spm_energies):
+    """A module with more than one precision is estimated in the precision of the energy set, and says so."""
+    module = """
+func.func @mixed(%a: tensor<16x8xf16>, %b: tensor<8x4xf16>, %c: tensor<16x4xf16>,
+                 %x: tensor<16x8xf32>, %y: tensor<8x4xf32>, %z: tensor<16x4xf32>) -> (tensor<16x4xf16>, tensor<16x4xf32>) {
+  %0 = linalg.matmul ins(%a, %b : tensor<16x8xf16>, tensor<8x4xf16>) outs(%c : tensor<16x4xf16>) -> tensor<16x4xf16>
+  %1 = linalg.matmul ins(%x, %y : tensor<16x8xf32>, tensor<8x4xf32>) outs(%z : tensor<16x4xf32>) -> tensor<16x4xf32>
+  return %0, %1 : tensor<16x4xf16>, tensor<16x4xf32>
+}
+"""
+    estimate = estimate_mlir(module, spm_energies, spm_config(), use_bindings=False)
+    assert estimate.unmapped == [('precision', 'element types f16->f16, f32->f32 are estimated in the precision '
+                                               'of the energy set, 4 byte words')]
+    graph, _, unmapped = mlir_layer_graph(module, use_bindings=False)
+    assert unmapped == []
+    reference = GraphEstimator(spm_energies, spm_config()).estimate(graph)
+    assert estimate.total_energy == pytest.approx(reference.total_energy)
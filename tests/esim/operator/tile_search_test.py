@@ -0,0 +1,98 @@
+# tests/esim/operator/tile_search_test.py
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from energysim.database.gpu_energy import GraphicsProcessingUnitEnergyDatabase
+from energysim.database.spm_energy import StoredProgramMachineEnergyDatabase
+from energysim.models.design_category import DesignCategory
+from energysim.models.gpu_configuration import GraphicsProcessingUnitConfiguration
+from energysim.models.spm_configuration import StoredProgramMachineConfiguration
+from energysim.operator.tile_search import matmul_tile_candidates, pareto_front, search_matmul_tiles_spm, \
+    search_matvec_launch_gpu
+from energysim.operator.tiled_matmul import tile_footprint, tiled_matmul_spm
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'data')
+
+
+def assert_non_dominated(front: pd.DataFrame):
+    energy = front['energy'].to_numpy()
+    latency = front['latency'].to_numpy()
+    dominated = (energy[:, None] <= energy) & (latency[:, None] <= latency) & \
+                ((energy[:, None] < energy) | (latency[:, None] < latency))
+    assert not dominated.any()
+
+
+def test_pareto_front():
+    """
+    Only points that no other point beats on both objectives survive
+    """
+    df = pd.DataFrame({'energy': [1.0, 2.0, 3.0, 2.5, 1.0], 'latency': [5.0, 3.0, 1.0, 4.0, 6.0]})
+    front = pareto_front(df)
+
+    assert list(front.index) == [0, 1, 2]
+
+def test_tile_candidates_fit_and_are_maximal():
+    """
+    Surviving tiles fit the capacity, cannot grow along any dimension, and include the square tile
+    """
+    tm, tn, tk = matmul_tile_candidates(256, 128, 512, 32 * 1024, 4)
+
+    assert len(tm) > 0
+    assert np.all(tile_footprint(tm, tn, tk, 4) <= 32 * 1024)
+    assert np.all((tm <= 256) & (tn <= 128) & (tk <= 512))
+    assert np.all(tile_footprint(2 * tm, tn, tk, 4) > 32 * 1024)
+    assert np.all(tile_footprint(tm, tn, 2 * tk, 4) > 32 * 1024)
+    assert np.any((tm == 52) & (tn == 52) & (tk == 52))
+
+    # tiles of shapes without useful divisors leave partial tiles at the edges
+    tm, tn, tk = matmul_tile_candidates(997, 1009, 1013, 32 * 1024, 4, cache_line_size=64)
+    assert np.all(tile_footprint(tm, tn, tk, 4) <= 32 * 1024)
+    assert np.all((tm <= 997) & (tn <= 1009) & (tk <= 1013))
+    assert np.any((997 % tm != 0) & (1009 % tn != 0) & (1013 % tk != 0))
+    assert np.any(tn % 16 == 0)
+
+def test_search_matmul_tiles_spm():
+    """
+    The best tiles of the search are no worse than the default square tiles
+    """
+    db = StoredProgramMachineEnergyDatabase()
+    db.load_data(os.path.join(DATA_DIR, 'spm_energy.csv'))
+    energies = db.lookupEnergySet('n14t', 64)
+    config = StoredProgramMachineConfiguration(DesignCategory.HighVolume, 2.5, 3.2, 4, 64, 64, 1, 8,
+                                               l3_size_in_bytes=2 * 1024 * 1024)
+    front = search_matmul_tiles_spm(512, 768, 1024, energies, config, objective='energy')
+    best = front.iloc[0]
+    reference = tiled_matmul_spm(512, 768, 1024, energies, config,
+                                 (best.l1_tm, best.l1_tn, best.l1_tk),
+                                 (best.l2_tm, best.l2_tn, best.l2_tk),
+                                 (best.l3_tm, best.l3_tn, best.l3_tk))
+    default = tiled_matmul_spm(512, 768, 1024, energies, config)
+
+    assert_non_dominated(front)
+    assert best.energy == pytest.approx(reference.occurrence_energy('total'))
+    assert best.latency == pytest.approx(reference.elapsed_time)
+    assert best.energy <= default.occurrence_energy('total')
+
+    # prime and odd shapes have no divisor tiles, the search still beats the default square tiles
+    for shape in [(997, 1009, 1013), (7, 3000, 5)]:
+        best = search_matmul_tiles_spm(*shape, energies, config, objective='energy').iloc[0]
+        assert best.energy <= tiled_matmul_spm(*shape, energies, config).occurrence_energy('total')
+
+def test_search_matvec_launch_gpu():
+    """
+    The launch search returns a front of warp-multiple blocks, ordered by the objective
+    """
+    db = GraphicsProcessingUnitEnergyDatabase()
+    db.load_data(os.path.join(DATA_DIR, 'gpu_energy.csv'))
+    energies = db.lookupEnergySet('n14t', 64)
+    config = GraphicsProcessingUnitConfiguration(DesignCategory.HighVolume, 1.5, 7.0, 4, 64, 64, 4, 8, 256, 64)
+    front = search_matvec_launch_gpu(4096, 1024, energies, config, objective='latency')
+
+    assert_non_dominated(front)
+    assert np.all(front['threads_per_block'] % 32 == 0)
+    assert front['latency'].is_monotonic_increasing
+    with pytest.raises(ValueError):
+        search_matvec_launch_gpu(4096, 1024, energies, config, objective='throughput')
@@ -0,0 +1,55 @@
+# tests/esim/operator/tiled_matmul_test.py
+import numpy as np
+import pytest
+
+from energysim.models.design_category import DesignCategory
+from energysim.models.spm_configuration import StoredProgramMachineConfiguration
+from energysim.operator.flat_matmul import flat_matmul_spm
+from energysim.operator.tiled_matmul import square_tile, tile_footprint, tile_traffic, tiled_matmul_spm
+
+
+def spm_config(**cache_sizes):
+    return StoredProgramMachineConfiguration(DesignCategory.HighVolume, 2.5, 3.2, 4, 64, 64, 1, 8, **cache_sizes)
+
+
+def test_tile_traffic_is_vectorized():
+    """
+    Traffic of a sweep of tile sizes is computed in one call, and shrinks with larger tiles
+    """
+    tiles = np.array([8, 16, 32, 64])
+    fill, writeback = tile_traffic(256, 256, 256, tiles, tiles, tiles, 4, 64)
+
+    assert fill.shape == (4,)
+    assert np.all(np.diff(fill) < 0)
+    assert np.all(np.diff(writeback) < 0)
+    assert tile_footprint(square_tile(32 * 1024, 4), square_tile(32 * 1024, 4), square_tile(32 * 1024, 4), 4) <= 32 * 1024
+
+def test_resident_matrices_stream_once(spm_energies):
+    """
+    When all three matrices fit in L3, DRAM traffic equals the streaming model of flat_matmul_spm
+    """
+    M = N = K = 64
+    tiled = tiled_matmul_spm(M, N, K, spm_energies, spm_config(), l3_tile=(M, N, K))
+    flat = flat_matmul_spm(M, N, K, spm_energies, spm_config())
+
+    assert tiled.occurrence('dram_read') == flat.occurrence('dram_read')
+    assert tiled.occurrence('dram_write') == flat.occurrence('dram_write')
+    assert tiled.read_data == flat.read_data
+
+def test_blocking_reduces_energy(spm_energies):
+    """
+    Larger caches allow larger tiles, which move less data and take less energy
+    """
+    M = N = K = 1024
+    small = tiled_matmul_spm(M, N, K, spm_energies, spm_config(l3_size_in_bytes=64 * 1024))
+    large = tiled_matmul_spm(M, N, K, spm_energies, spm_config())
+
+    assert large.occurrence('dram_read') < small.occurrence('dram_read')
+    assert large.occurrence_energy('total') < small.occurrence_energy('total')
+    assert large.elapsed_time <= small.elapsed_time
+    # the elapsed time is bounded below by one fma per core clock
+    assert large.elapsed_time >= M * N * K / 2.5e9
+
+def test_tile_must_fit(spm_energies):
+    with pytest.raises(ValueError):
+        tiled_matmul_spm(128, 128, 128, spm_energies, spm_config(), l1_tile=(128, 128, 128))
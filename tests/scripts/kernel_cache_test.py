@@ -0,0 +1,116 @@
+# tests/scripts/kernel_cache_test.py
+import importlib
+import os
+import sys
+import types
+
+import pytest
+
+SCRIPT_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'scripts', 'mlir')
+
+PIPELINE = ("func.func(convert-linalg-to-loops)", "convert-func-to-llvm")
+IR_TEXT = 'func.func @main() { return }'
+
+
+class Module:
+    # stands in for mlir.ir.Module: parsing keeps the text, the operation is the module itself
+    def __init__(self, text):
+        self.text = text
+        self.operation = self
+
+    @classmethod
+    def parse(cls, text):
+        return cls(text)
+
+    def __str__(self):
+        return self.text
+
+
+class PassManager:
+    # stands in for mlir.passmanager.PassManager: running it marks the module as lowered by its passes
+    runs = 0
+
+    def __init__(self, anchor):
+        self.passes = []
+
+    def add(self, p):
+        self.passes.append(p)
+
+    def run(self, operation):
+        PassManager.runs += 1
+        operation.text = f'// lowered by {len(self.passes)} passes\n' + operation.text
+
+
+@pytest.fixture
+def kernel_cache(monkeypatch):
+    mlir = types.ModuleType('mlir')
+    ir = types.ModuleType('mlir.ir')
+    ir.Module = Module
+    passmanager = types.ModuleType('mlir.passmanager')
+    passmanager.PassManager = PassManager
+    execution_engine = types.ModuleType('mlir.execution_engine')
+    execution_engine.ExecutionEngine = object
+    for name, module in (('mlir', mlir), ('mlir.ir', ir), ('mlir.passmanager', passmanager),
+                         ('mlir.execution_engine', execution_engine)):
+        monkeypatch.setitem(sys.modules, name, module)
+    monkeypatch.syspath_prepend(SCRIPT_DIR)
+    monkeypatch.delitem(sys.modules, 'kernel_cache', raising=False)
+    PassManager.runs = 0
+    return importlib.import_module('kernel_cache')
+
+
+def test_key_is_stable(kernel_cache, tmp_path):
+    """The key depends on the IR, the pipeline and the optimization level only."""
+    a = kernel_cache.KernelCache(PIPELINE, directory=str(tmp_path))
+    b = kernel_cache.KernelCache(list(PIPELINE), directory=str(tmp_path / 'other'))
+    assert a.key(IR_TEXT) == b.key(IR_TEXT)
+    assert len(a.key(IR_TEXT)) == 64
+    assert a.key(IR_TEXT) != a.key(IR_TEXT + '\n')
+    assert a.key(IR_TEXT) != kernel_cache.KernelCache(PIPELINE[:1], directory=str(tmp_path)).key(IR_TEXT)
+    assert a.key(IR_TEXT) != kernel_cache.KernelCache(PIPELINE, directory=str(tmp_path), opt_level=3).key(IR_TEXT)
+
+
+def test_directory_is_created_lazily(kernel_cache, tmp_path):
+    """Constructing a cache creates no directory, the first lowered kernel does."""
+    directory = tmp_path / 'cache'
+    cache = kernel_cache.KernelCache(PIPELINE, directory=str(directory))
+    assert not directory.exists()
+    assert cache.cache_info().entries == 0
+    cache.clear()
+    cache.lower(IR_TEXT)
+    assert directory.is_dir()
+
+
+def test_second_cache_reads_the_stored_module(kernel_cache, tmp_path):
+    """A new cache on the same directory parses the lowered module instead of running the pipeline."""
+    first = kernel_cache.KernelCache(PIPELINE, directory=str(tmp_path))
+    lowered = str(first.lower(IR_TEXT))
+    assert (first.misses, first.disk_hits, PassManager.runs) == (1, 0, 1)
+
+    second = kernel_cache.KernelCache(PIPELINE, directory=str(tmp_path))
+    assert str(second.lower(IR_TEXT)) == lowered
+    assert (second.misses, second.disk_hits, PassManager.runs) == (0, 1, 1)
+    assert second.cache_info().entries == 1
+
+    second.clear()
+    assert second.cache_info().entries == 0
+
+
+def test_module_is_written_through_a_temporary_file(kernel_cache, tmp_path, monkeypatch):
+    """The lowered module is written to a temporary file and renamed into place, leaving no temporary behind."""
+    replaced = []
+    replace = os.replace
+
+    def record(src, dst):
+        assert os.path.exists(src) and not os.path.exists(dst)
+        replaced.append((src, dst))
+        replace(src, dst)
+
+    monkeypatch.setattr(os, 'replace', record)
+    cache = kernel_cache.KernelCache(PIPELINE, directory=str(tmp_path))
+    module = cache.lower(IR_TEXT)
+    path = cache.path(cache.key(IR_TEXT))
+    assert replaced == [(f'{path}.{os.getpid()}.tmp', path)]
+    assert sorted(os.listdir(tmp_path)) == [os.path.basename(path)]
+    with open(path) as f:
+        assert f.read() == str(module)